@@ -5,7 +5,7 @@ Configuration centralisée des routers
 
 from fastapi import APIRouter
 
-from app.api import auth, users, clients, documents, exports, stats, entreprise
+from app.api import auth, users, clients, documents, exports, imports, stats, entreprise, admin
 
 # Router principal de l'API
 api_router = APIRouter()
@@ -41,6 +41,12 @@ api_router.include_router(
     tags=["Exports"]
 )
 
+api_router.include_router(
+    imports.router,
+    prefix="/imports",
+    tags=["Imports"]
+)
+
 api_router.include_router(
     stats.router,
     prefix="/stats",
@@ -51,4 +57,10 @@ api_router.include_router(
     entreprise.router,
     prefix="",
     tags=["Entreprise"]
-)
\ No newline at end of file
+)
+
+api_router.include_router(
+    admin.router,
+    prefix="/admin",
+    tags=["Administration"]
+)
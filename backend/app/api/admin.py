@@ -0,0 +1,70 @@
+"""
+API Routes d'administration technique (niveaux de log à chaud)
+"""
+
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.core.deps import get_current_admin_user
+from app.core.logging import get_log_levels, get_logger, set_log_levels
+from app.models.user import User
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+
+@router.get("/logging/levels", response_model=Dict[str, str])
+async def read_log_levels(
+    current_user: User = Depends(get_current_admin_user)
+) -> Dict[str, str]:
+    """
+    Niveaux de log explicitement définis (racine comprise)
+
+    Args:
+        current_user: Administrateur authentifié
+
+    Returns:
+        Niveau par nom de logger
+    """
+    return get_log_levels()
+
+
+@router.put("/logging/levels", response_model=Dict[str, str])
+async def update_log_levels(
+    levels: Dict[str, Optional[str]],
+    current_user: User = Depends(get_current_admin_user)
+) -> Dict[str, str]:
+    """
+    Modifier des niveaux de log sans redémarrage
+
+    Exemple: {"sqlalchemy.engine": "INFO", "app.services": "DEBUG", "httpx": null}
+    (null = le logger hérite de nouveau du niveau de son parent).
+    Tous les niveaux sont validés avant d'en appliquer un seul: un niveau
+    inconnu renvoie 400 sans aucun changement.
+
+    Limite: le changement ne concerne que le processus (worker) qui traite
+    la requête, il n'est pas propagé aux autres workers et ne survit pas à
+    un redémarrage (niveaux persistants: LOG_LEVELS).
+
+    Args:
+        levels: Niveau par nom de logger
+        current_user: Administrateur authentifié
+
+    Returns:
+        Niveaux après modification
+    """
+    try:
+        set_log_levels(levels)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    logger.info(
+        "Niveaux de log modifiés",
+        user_id=str(current_user.id),
+        extra={"levels": levels}
+    )
+    return get_log_levels()
@@ -8,18 +8,21 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_session, get_current_active_user, get_current_admin_user
+from app.core.deps import (
+    get_session, get_read_session, get_current_active_user, get_current_admin_user, get_current_read_user
+)
 from app.crud.client import crud_client
 from app.crud.produit import crud_produit
 from app.schemas.client import (
-    ClientCreate, ClientUpdate, ClientResponse, ClientListResponse, ClientFormDataCreate
+    ClientCreate, ClientUpdate, ClientResponse, ClientListResponse, ClientFormDataCreate,
+    ClientFormPatch, ClientFormPatchResponse
 )
 from app.schemas.produit import ProduitCreate, ProduitResponse
 from app.models.user import User
 from app.models.client import Client, ClientStatut
 from app.models.audit_log import AuditLog, AuditAction
-from app.services.risk_calculator import calculate_risk_profile
-from app.services.lcb_ft_classifier import classify_lcb_ft_level
+from app.services.form_patch import FormPatchError, parse_pointer, merge_patch_to_operations
+from app.services.scoring import apply_scoring
 
 router = APIRouter()
 
@@ -34,8 +37,8 @@ async def list_clients(
     only_validated: bool = False,
     profil_risque: Optional[str] = None,
     lcb_ft_niveau: Optional[str] = None,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_session)
+    current_user: User = Depends(get_current_read_user),
+    db: AsyncSession = Depends(get_read_session)
 ) -> ClientListResponse:
     """
     Liste des clients avec filtres et pagination
@@ -49,7 +52,7 @@ async def list_clients(
         profil_risque: Filtrer par profil de risque
         lcb_ft_niveau: Filtrer par niveau LCB-FT
         current_user: Utilisateur authentifié
-        db: Session database
+        db: Session de lecture (réplica si disponible)
         
     Returns:
         Liste paginée de clients
@@ -149,27 +152,13 @@ async def create_client(
     Returns:
         Client créé
     """
-    # Créer le client
+    # Créer le client (profil de risque et LCB-FT calculés par crud_client.create)
     client = await crud_client.create(
         db,
         obj_in=client_in,
         conseiller_id=current_user.id
     )
     
-    # Calculer automatiquement le profil de risque
-    profile = calculate_risk_profile(client)
-    await crud_client.update_profil_risque(
-        db,
-        client_id=client.id,
-        profil=profile["profil"],
-        score=profile["score"]
-    )
-    
-    # Classifier le niveau LCB-FT
-    lcb_level = classify_lcb_ft_level(client)
-    client.lcb_ft_niveau_risque = lcb_level
-    await db.commit()
-    
     # Log création
     await AuditLog.log_action(
         db,
@@ -212,6 +201,7 @@ async def update_client(
     Raises:
         404: Client non trouvé
         403: Accès non autorisé
+        409: Client modifié entre-temps (verrou optimiste)
     """
     # Récupérer le client
     client = await crud_client.get(db, id=client_id)
@@ -232,26 +222,13 @@ async def update_client(
     # Sauvegarder anciennes valeurs pour audit
     old_values = client.to_dict()
     
-    # Mettre à jour
+    # Mettre à jour (profil/LCB-FT recalculés si leurs entrées changent)
     client = await crud_client.update(
         db,
         db_obj=client,
         obj_in=client_in
     )
     
-    # Recalculer le profil de risque si données modifiées
-    if any(field in client_in.dict(exclude_unset=True) for field in [
-        'objectifs_investissement', 'horizon_placement', 'tolerance_risque',
-        'pertes_maximales_acceptables', 'experience_perte'
-    ]):
-        profile = calculate_risk_profile(client)
-        await crud_client.update_profil_risque(
-            db,
-            client_id=client.id,
-            profil=profile["profil"],
-            score=profile["score"]
-        )
-    
     # Log mise à jour
     await AuditLog.log_action(
         db,
@@ -301,27 +278,13 @@ async def partial_update_client(
     # Sauvegarder anciennes valeurs pour audit
     old_values = client.to_dict()
 
-    # Mettre à jour uniquement les champs fournis
+    # Mettre à jour uniquement les champs fournis (profil/LCB-FT recalculés si besoin)
     client = await crud_client.update(
         db,
         db_obj=client,
         obj_in=client_in
     )
 
-    # Recalculer le profil de risque si données modifiées
-    update_data = client_in.dict(exclude_unset=True)
-    if any(field in update_data for field in [
-        'objectifs_investissement', 'horizon_placement', 'tolerance_risque',
-        'pertes_maximales_acceptables', 'experience_perte'
-    ]):
-        profile = calculate_risk_profile(client)
-        await crud_client.update_profil_risque(
-            db,
-            client_id=client.id,
-            profil=profile["profil"],
-            score=profile["score"]
-        )
-
     # Log mise à jour
     await AuditLog.log_action(
         db,
@@ -529,40 +492,19 @@ async def create_client_from_form(
     # Extraire les données du formulaire vers le format modèle
     client_data = form_data.extract_client_data()
 
-    # Générer numéro client
-    numero = await crud_client.generate_numero_client(db)
-
-    # Ajouter les champs obligatoires
-    client_data['numero_client'] = numero
+    # Ajouter les champs obligatoires (numero_client alloué par la base)
+    client_data.pop('numero_client', None)
     client_data['conseiller_id'] = current_user.id
 
-    # Créer le client directement avec les données extraites
+    # Construire le client et calculer profil/LCB-FT en mémoire
     client = Client(**client_data)
+    apply_scoring(client)
     db.add(client)
-    await db.commit()
-    await db.refresh(client)
 
-    # Calculer automatiquement le profil de risque si possible
-    try:
-        profile = calculate_risk_profile(client)
-        await crud_client.update_profil_risque(
-            db,
-            client_id=client.id,
-            profil=profile["profil"],
-            score=profile["score"]
-        )
-    except Exception:
-        pass  # Ignorer si les données sont insuffisantes
-
-    # Classifier le niveau LCB-FT si possible
-    try:
-        lcb_level = classify_lcb_ft_level(client)
-        client.lcb_ft_niveau_risque = lcb_level
-        await db.commit()
-    except Exception:
-        pass  # Ignorer si les données sont insuffisantes
+    # INSERT ... RETURNING (id, numero_client, dates) sans commit
+    await db.flush()
 
-    # Log création
+    # Log création (même transaction)
     await AuditLog.log_action(
         db,
         user_id=current_user.id,
@@ -573,10 +515,9 @@ async def create_client_from_form(
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("User-Agent")
     )
-    await db.commit()
 
-    # Recharger le client
-    client = await crud_client.get(db, id=client.id, load_relations=False)
+    # Commit unique: client + audit
+    await db.commit()
 
     return ClientResponse.from_orm(client)
 
@@ -600,6 +541,9 @@ async def update_client_from_form(
 
     Returns:
         Client mis à jour
+
+    Raises:
+        409: Client modifié entre-temps (verrou optimiste)
     """
     # Récupérer le client
     client = await crud_client.get(db, id=client_id)
@@ -628,33 +572,11 @@ async def update_client_from_form(
         if hasattr(client, key) and value is not None:
             setattr(client, key, value)
 
-    # CRITICAL: Marquer l'objet comme modifié pour SQLAlchemy
+    # Recalculer profil/LCB-FT en mémoire si leurs entrées ont changé
+    apply_scoring(client)
     db.add(client)
-    await db.commit()
-    await db.refresh(client)
 
-    # Recalculer le profil de risque si possible
-    try:
-        profile = calculate_risk_profile(client)
-        await crud_client.update_profil_risque(
-            db,
-            client_id=client.id,
-            profil=profile["profil"],
-            score=profile["score"]
-        )
-    except Exception:
-        pass  # Ignorer si données insuffisantes
-
-    # Reclassifier LCB-FT si possible
-    try:
-        lcb_level = classify_lcb_ft_level(client)
-        client.lcb_ft_niveau_risque = lcb_level
-        db.add(client)
-        await db.commit()
-    except Exception:
-        pass  # Ignorer si données insuffisantes
-
-    # Log mise à jour
+    # Log mise à jour (même transaction)
     await AuditLog.log_action(
         db,
         user_id=current_user.id,
@@ -666,9 +588,108 @@ async def update_client_from_form(
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("User-Agent")
     )
+
+    # Commit unique: UPDATE ... RETURNING (updated_at) + audit
     await db.commit()
 
-    # Recharger
-    client = await crud_client.get(db, id=client.id, load_relations=False)
+    return ClientResponse.from_orm(client)
+
+
+@router.patch("/{client_id}/form", response_model=ClientFormPatchResponse)
+async def autosave_client_form(
+    request: Request,
+    client_id: UUID,
+    patch: ClientFormPatch,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_session)
+) -> ClientFormPatchResponse:
+    """
+    Autosave incrémental du formulaire client
+
+    Le frontend envoie uniquement les champs modifiés (JSON Patch ou delta)
+    et la version qu'il a chargée. Seules les colonnes impactées et les clés
+    form_data concernées sont mises à jour.
+
+    Args:
+        client_id: ID du client
+        patch: Opérations/delta et version connue
+        current_user: Utilisateur authentifié
+        db: Session database
+
+    Returns:
+        Nouvelle version et champs recalculés
+
+    Raises:
+        404: Client non trouvé
+        403: Accès non autorisé
+        409: Version obsolète (modifié entre-temps)
+        422: Opération de patch invalide
+    """
+    # Récupérer le client
+    client = await crud_client.get(db, id=client_id)
+
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client non trouvé"
+        )
+
+    # Vérifier les permissions
+    if not current_user.is_admin and client.conseiller_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès non autorisé à ce client"
+        )
+
+    conflict = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"message": "Client modifié entre-temps", "version": client.version}
+    )
+    if client.version != patch.version:
+        raise conflict
+
+    # Opérations JSON Patch puis delta (merge patch)
+    try:
+        operations = [
+            {"op": operation.op, "path": parse_pointer(operation.path), "value": operation.value}
+            for operation in patch.operations
+        ]
+        if patch.delta:
+            operations.extend(merge_patch_to_operations(patch.delta))
+
+        result = await crud_client.patch_form(
+            db,
+            db_obj=client,
+            version=patch.version,
+            operations=operations
+        )
+    except FormPatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    if result is None:
+        raise conflict
+
+    # Log mise à jour (même transaction)
+    if result["version"] != patch.version:
+        await AuditLog.log_action(
+            db,
+            user_id=current_user.id,
+            action=AuditAction.UPDATE.value,
+            entity_type="client",
+            entity_id=client.id,
+            old_values={"version": patch.version},
+            new_values={
+                "source": "autosave",
+                "version": result["version"],
+                "columns": result["updated_columns"]
+            },
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("User-Agent")
+        )
+
+    await db.commit()
 
-    return ClientResponse.from_orm(client)
\ No newline at end of file
+    return ClientFormPatchResponse(id=client.id, **result)
@@ -6,12 +6,13 @@ Génération DOCX et téléchargement
 from typing import List, Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-import os
 from datetime import datetime
+import time
 
 from app.core.deps import get_session, get_current_active_user
+from app.core.security import create_download_signature, verify_download_signature
 from app.crud.document import crud_document
 from app.crud.client import crud_client
 from app.schemas.document import (
@@ -21,7 +22,11 @@ from app.schemas.document import (
 from app.models.user import User
 from app.models.document import TypeDocument
 from app.models.audit_log import AuditLog, AuditAction
-from app.services.docx_generator import DocxGenerator
+from app.services.docx_generator import DocxGenerator, RenderPlan, V2_DOCUMENT_TYPES
+from app.services.document_storage import StoredDocument
+from app.services.document_bundle import bundle_entries, iter_zip
+from app.services.document_delivery import build_download_response
+from app.services.generation_profiler import generation_phase, track_document_generation
 from app.config import settings
 
 router = APIRouter()
@@ -73,6 +78,112 @@ async def list_client_documents(
     return [DocumentResponse.from_orm(doc) for doc in documents]
 
 
+@router.get("/client/{client_id}/bundle")
+async def download_client_bundle(
+    client_id: UUID,
+    document_ids: Optional[List[UUID]] = Query(None),
+    type_document: Optional[TypeDocument] = None,
+    signe_only: bool = False,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_session)
+) -> StreamingResponse:
+    """
+    Télécharger la liasse d'un client (tous ou certains documents) en zip
+    
+    L'archive est produite en streaming; les DOCX sont stockés sans
+    recompression.
+    
+    Args:
+        client_id: ID du client
+        document_ids: Documents à inclure (tous par défaut)
+        type_document: Filtrer par type
+        signe_only: Uniquement les signés
+        current_user: Utilisateur authentifié
+        db: Session database
+        
+    Returns:
+        Archive zip en streaming
+    """
+    # Vérifier permissions (une seule fois pour toute la liasse)
+    client = await crud_client.get(db, id=client_id)
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client non trouvé"
+        )
+    
+    if not current_user.is_admin and client.conseiller_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès non autorisé"
+        )
+    
+    documents = await crud_document.get_by_client(
+        db,
+        client_id=client_id,
+        type_document=type_document,
+        signe_only=signe_only,
+        document_ids=document_ids
+    )
+    
+    if not documents:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aucun document à télécharger"
+        )
+    
+    filename = f"liasse_{client.numero_client}_{datetime.now().strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        iter_zip(bundle_entries(documents)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+async def _render_document(
+    generator: DocxGenerator,
+    doc_type: TypeDocument,
+    plan: Optional[RenderPlan],
+    client,
+    conseiller: User
+) -> StoredDocument:
+    """Rendre et enregistrer un document (plan v2 ou générateur historique)"""
+    if plan:
+        return generator.save_plan(plan, client)
+    if doc_type == TypeDocument.DER:
+        return await generator.generate_der(client, conseiller)
+    if doc_type in (TypeDocument.QCC, TypeDocument.KYC):
+        return await generator.generate_kyc(client, conseiller)
+    if doc_type == TypeDocument.PROFIL_RISQUE:
+        return await generator.generate_profil_risque(client, conseiller)
+    if doc_type in (TypeDocument.LETTRE_MISSION, TypeDocument.LETTRE_MISSION_CIF):
+        return await generator.generate_lettre_mission_cif(client, conseiller)
+    if doc_type in (TypeDocument.DECLARATION_ADEQUATION, TypeDocument.DECLARATION_ADEQUATION_CIF):
+        return await generator.generate_declaration_adequation(client, conseiller)
+    if doc_type == TypeDocument.CONVENTION_RTO:
+        return await generator.generate_convention_rto(client, conseiller)
+    if doc_type in (TypeDocument.RAPPORT_IAS, TypeDocument.RAPPORT_CONSEIL_IAS):
+        return await generator.generate_rapport_conseil_ias(client, conseiller)
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Type de document non supporté: {doc_type}"
+    )
+
+
+def _stored_from(document) -> StoredDocument:
+    """Blob d'un document existant (réutilisé par une nouvelle ligne)"""
+    return StoredDocument(
+        cle=document.stockage_cle,
+        hash_fichier=document.hash_fichier,
+        taille_octets=document.taille_octets,
+        taille_stockee=document.taille_octets,
+        compresse=False,
+        nom_fichier=document.nom_fichier,
+        chemin=document.chemin_fichier,
+        deja_present=True
+    )
+
+
 @router.post("/generate", response_model=DocumentGenerateResponse)
 async def generate_document(
     request: Request,
@@ -97,11 +208,13 @@ async def generate_document(
         500: Erreur de génération
     """
     # Récupérer le client avec toutes les données
+    client_load_start = time.perf_counter()
     client = await crud_client.get(
         db, 
         id=generate_request.client_id,
         load_relations=True
     )
+    client_load_seconds = time.perf_counter() - client_load_start
     
     if not client:
         raise HTTPException(
@@ -116,77 +229,92 @@ async def generate_document(
             detail="Accès non autorisé"
         )
     
+    # Générer le document selon le type (avec alias pour rétrocompatibilité)
+    doc_type = generate_request.type_document
+
     try:
-        # Initialiser le générateur
-        generator = DocxGenerator()
-
-        # Générer le document selon le type (avec alias pour rétrocompatibilité)
-        doc_type = generate_request.type_document
-
-        if doc_type == TypeDocument.DER:
-            # Utiliser le nouveau template v2 avec mise en page professionnelle
-            file_path = await generator.generate_der_v2(client, current_user)
-        elif doc_type in (TypeDocument.QCC, TypeDocument.KYC):
-            # Utiliser le nouveau template v2 avec les données client pré-remplies
-            file_path = await generator.generate_qcc_v2(client, current_user)
-        elif doc_type == TypeDocument.PROFIL_RISQUE:
-            # Utiliser le nouveau template v2 avec les données client pré-remplies
-            file_path = await generator.generate_profil_risque_v2(client, current_user)
-        elif doc_type in (TypeDocument.LETTRE_MISSION, TypeDocument.LETTRE_MISSION_CIF):
-            file_path = await generator.generate_lettre_mission_cif(client, current_user)
-        elif doc_type in (TypeDocument.DECLARATION_ADEQUATION, TypeDocument.DECLARATION_ADEQUATION_CIF):
-            file_path = await generator.generate_declaration_adequation(client, current_user)
-        elif doc_type == TypeDocument.CONVENTION_RTO:
-            # Utiliser le nouveau template v2 avec mise en page professionnelle
-            file_path = await generator.generate_rto_v2(client, current_user)
-        elif doc_type in (TypeDocument.RAPPORT_IAS, TypeDocument.RAPPORT_CONSEIL_IAS):
-            file_path = await generator.generate_rapport_conseil_ias(client, current_user)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Type de document non supporté: {generate_request.type_document}"
+        with track_document_generation(doc_type.value) as generation:
+            generation.record_phase("client_load", client_load_seconds)
+
+            # Initialiser le générateur
+            generator = DocxGenerator()
+
+            # Templates v2: empreinte du rendu avant de rendre
+            plan = None
+            if doc_type in V2_DOCUMENT_TYPES:
+                plan = generator.plan_v2_document(V2_DOCUMENT_TYPES[doc_type], client, current_user)
+
+            stored = None
+            if plan and settings.DOCUMENT_RENDER_CACHE != "off" and not generate_request.force_regeneration:
+                with generation_phase("cache_lookup"):
+                    existing = await crud_document.find_by_render_fingerprint(
+                        db,
+                        client_id=client.id,
+                        type_document=doc_type,
+                        empreinte_rendu=plan.empreinte
+                    )
+                if existing and existing.file_exists:
+                    if settings.DOCUMENT_RENDER_CACHE != "link":
+                        generation.status = "reused"
+                        return DocumentGenerateResponse(
+                            success=True,
+                            message=f"Document {doc_type.value} déjà à jour",
+                            document_id=existing.id,
+                            download_url=f"/api/v1/documents/download/{existing.id}",
+                            filename=existing.nom_fichier,
+                            reused=True
+                        )
+                    # Nouvelle ligne (traçabilité) sur le même blob
+                    generation.status = "reused"
+                    stored = _stored_from(existing)
+
+            if stored is None:
+                stored = await _render_document(generator, doc_type, plan, client, current_user)
+            
+            # Enregistrer en base de données (le blob peut être partagé)
+            filename = stored.nom_fichier
+            with generation_phase("db_insert"):
+                document = await crud_document.create(
+                    db,
+                    client_id=client.id,
+                    type_document=generate_request.type_document,
+                    nom_fichier=filename,
+                    chemin_fichier=stored.chemin,
+                    genere_par=current_user.id,
+                    stockage=stored,
+                    empreinte_rendu=plan.empreinte if plan else None,
+                    metadata=generate_request.metadata or {
+                        "template_version": "2025.03",
+                        "generated_by": current_user.nom_complet
+                    }
+                )
+                
+                # Log génération
+                await AuditLog.log_action(
+                    db,
+                    user_id=current_user.id,
+                    action=AuditAction.GENERATE_DOC.value,
+                    entity_type="document",
+                    entity_id=document.id,
+                    new_values={
+                        "type": generate_request.type_document.value,
+                        "client_id": str(client.id),
+                        "filename": filename
+                    },
+                    ip_address=request.client.host if request.client else None,
+                    user_agent=request.headers.get("User-Agent")
+                )
+                await db.commit()
+            
+            return DocumentGenerateResponse(
+                success=True,
+                message=f"Document {generate_request.type_document.value} généré avec succès",
+                document_id=document.id,
+                download_url=f"/api/v1/documents/download/{document.id}",
+                filename=filename,
+                reused=stored.deja_present
             )
         
-        # Enregistrer en base de données
-        filename = os.path.basename(file_path)
-        document = await crud_document.create(
-            db,
-            client_id=client.id,
-            type_document=generate_request.type_document,
-            nom_fichier=filename,
-            chemin_fichier=file_path,
-            genere_par=current_user.id,
-            metadata=generate_request.metadata or {
-                "template_version": "2025.03",
-                "generated_by": current_user.nom_complet
-            }
-        )
-        
-        # Log génération
-        await AuditLog.log_action(
-            db,
-            user_id=current_user.id,
-            action=AuditAction.GENERATE_DOC.value,
-            entity_type="document",
-            entity_id=document.id,
-            new_values={
-                "type": generate_request.type_document.value,
-                "client_id": str(client.id),
-                "filename": filename
-            },
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("User-Agent")
-        )
-        await db.commit()
-        
-        return DocumentGenerateResponse(
-            success=True,
-            message=f"Document {generate_request.type_document.value} généré avec succès",
-            document_id=document.id,
-            download_url=f"/api/v1/documents/download/{document.id}",
-            filename=filename
-        )
-        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -244,15 +372,38 @@ async def generate_bulk_documents(
     return results
 
 
+def _check_download_access(current_user: User, conseiller_id: Optional[UUID]) -> None:
+    """Admin ou conseiller du client du document"""
+    if not current_user.is_admin and conseiller_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès non autorisé"
+        )
+
+
+def _download_response(request: Request, document) -> Response:
+    """Réponse de téléchargement (404 si le fichier a disparu)"""
+    try:
+        return build_download_response(document, request.headers)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Fichier non trouvé sur le serveur"
+        )
+
+
 @router.get("/download/{document_id}")
 async def download_document(
+    request: Request,
     document_id: UUID,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_session)
-) -> FileResponse:
+) -> Response:
     """
     Télécharger un document
     
+    ETag fort (SHA-256), 304 sur If-None-Match, plages d'octets (Range).
+    
     Args:
         document_id: ID du document
         current_user: Utilisateur authentifié
@@ -265,36 +416,87 @@ async def download_document(
         404: Document ou fichier non trouvé
         403: Accès non autorisé
     """
-    # Récupérer le document
-    document = await crud_document.get(db, id=document_id)
+    # Document et conseiller du client en une requête
+    found = await crud_document.get_for_download(db, id=document_id)
     
-    if not document:
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document non trouvé"
         )
     
-    # Vérifier permissions via le client
-    client = await crud_client.get(db, id=document.client_id)
-    if not current_user.is_admin and client.conseiller_id != current_user.id:
+    document, conseiller_id = found
+    _check_download_access(current_user, conseiller_id)
+    
+    return _download_response(request, document)
+
+
+@router.get("/{document_id}/download-url")
+async def get_download_url(
+    document_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_session)
+) -> dict:
+    """
+    URL de téléchargement signée de courte durée (sans en-tête Authorization)
+    
+    Args:
+        document_id: ID du document
+        current_user: Utilisateur authentifié
+        db: Session database
+        
+    Returns:
+        URL signée et date d'expiration
+    """
+    found = await crud_document.get_for_download(db, id=document_id)
+    
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document non trouvé"
+        )
+    
+    _check_download_access(current_user, found[1])
+    
+    expires, signature = create_download_signature(str(document_id))
+    return {
+        "url": f"/api/v1/documents/signed/{document_id}?expires={expires}&signature={signature}",
+        "expires_at": datetime.utcfromtimestamp(expires).isoformat()
+    }
+
+
+@router.get("/signed/{document_id}")
+async def download_signed_document(
+    request: Request,
+    document_id: UUID,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    db: AsyncSession = Depends(get_session)
+) -> Response:
+    """
+    Télécharger un document via une URL signée
+    
+    Avec DOCUMENT_X_ACCEL_PREFIX, nginx sert le fichier (X-Accel-Redirect).
+    
+    Raises:
+        403: Signature invalide ou expirée
+        404: Document ou fichier non trouvé
+    """
+    if not verify_download_signature(str(document_id), expires, signature):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Accès non autorisé"
+            detail="Lien de téléchargement invalide ou expiré"
         )
     
-    # Vérifier que le fichier existe
-    if not document.file_exists:
+    found = await crud_document.get_for_download(db, id=document_id)
+    
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Fichier non trouvé sur le serveur"
+            detail="Document non trouvé"
         )
     
-    # Retourner le fichier
-    return FileResponse(
-        path=document.chemin_fichier,
-        filename=document.nom_fichier,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    )
+    return _download_response(request, found[0])
 
 
 @router.post("/{document_id}/sign")
@@ -11,7 +11,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 import io
 
-from app.core.deps import get_session, get_current_active_user, get_current_admin_user
+from app.core.deps import (
+    get_session, get_read_session, get_current_active_user, get_current_admin_read_user, get_current_read_user
+)
 from app.crud.client import crud_client
 from app.crud.document import crud_document
 from app.models.user import User
@@ -19,6 +21,7 @@ from app.models.document import TypeDocument
 from app.models.client import ClientStatut
 from app.models.audit_log import AuditLog, AuditAction
 from app.services.csv_exporter import CsvExporter
+from app.services.document_storage import get_document_storage
 
 router = APIRouter()
 
@@ -30,8 +33,9 @@ async def export_clients_harvest(
     date_to: Optional[datetime] = Query(None, description="Date de fin"),
     statut: Optional[ClientStatut] = Query(None, description="Filtrer par statut"),
     conseiller_id: Optional[UUID] = Query(None, description="Filtrer par conseiller"),
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_session)
+    current_user: User = Depends(get_current_read_user),
+    db: AsyncSession = Depends(get_session),
+    read_db: AsyncSession = Depends(get_read_session)
 ) -> StreamingResponse:
     """
     Export CSV des clients pour Harvest CRM
@@ -43,7 +47,8 @@ async def export_clients_harvest(
         statut: Filtrer par statut client
         conseiller_id: Filtrer par conseiller (admin only)
         current_user: Utilisateur authentifié
-        db: Session database
+        db: Session database (document d'export et audit)
+        read_db: Session de lecture des clients (réplica si disponible)
         
     Returns:
         Fichier CSV en streaming
@@ -60,7 +65,7 @@ async def export_clients_harvest(
     
     # Récupérer les clients
     clients = await crud_client.get_multi(
-        db,
+        read_db,
         skip=0,
         limit=10000,  # Limite haute pour export
         conseiller_id=conseiller_id,
@@ -72,20 +77,25 @@ async def export_clients_harvest(
         c for c in clients 
         if c.created_at >= date_from and c.created_at <= date_to
     ]
+    # Clients chargés: libérer la connexion de lecture avant la génération et le streaming
+    await read_db.rollback()
     
     # Générer le CSV
     exporter = CsvExporter()
     csv_buffer = await exporter.export_clients_harvest(filtered_clients)
     
-    # Créer un document pour traçabilité
+    # Créer un document pour traçabilité (blob CSV compressé)
     filename = f"harvest_clients_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    csv_bytes = csv_buffer.getvalue().encode('utf-8')
+    stored = get_document_storage().save_bytes(csv_bytes, filename)
     document = await crud_document.create(
         db,
         client_id=None,  # Export global, pas lié à un client
         type_document=TypeDocument.EXPORT_CSV,
         nom_fichier=filename,
-        chemin_fichier=f"/app/exports/{filename}",
+        chemin_fichier=stored.chemin,
         genere_par=current_user.id,
+        stockage=stored,
         metadata={
             "export_type": "harvest_clients",
             "filters": {
@@ -117,7 +127,7 @@ async def export_clients_harvest(
     
     # Retourner le CSV en streaming
     return StreamingResponse(
-        io.BytesIO(csv_buffer.getvalue().encode('utf-8')),
+        io.BytesIO(csv_bytes),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
@@ -127,15 +137,15 @@ async def export_clients_harvest(
 
 @router.get("/statistics")
 async def get_export_statistics(
-    current_user: User = Depends(get_current_admin_user),
-    db: AsyncSession = Depends(get_session)
+    current_user: User = Depends(get_current_admin_read_user),
+    db: AsyncSession = Depends(get_read_session)
 ) -> dict:
     """
     Statistiques des exports (admin uniquement)
     
     Args:
         current_user: Admin authentifié
-        db: Session database
+        db: Session de lecture (réplica si disponible)
         
     Returns:
         Statistiques d'export
@@ -5,27 +5,19 @@ Vérifie la santé de tous les composants du système
 
 from fastapi import APIRouter, Response
 from pydantic import BaseModel
-from typing import Dict, Optional, List
+from typing import Optional, List
 from datetime import datetime
-import asyncio
 
 from app.core.logging import get_logger
 from app.core.metrics import get_metrics, get_metrics_content_type
+from app.services.health_monitor import ComponentHealth, get_health_monitor
+from app.services.template_warmup import is_warm
 
 logger = get_logger(__name__)
 
 router = APIRouter(tags=["Health"])
 
 
-class ComponentHealth(BaseModel):
-    """État de santé d'un composant"""
-    name: str
-    status: str  # "healthy", "unhealthy", "degraded"
-    latency_ms: Optional[float] = None
-    message: Optional[str] = None
-    last_check: str
-
-
 class HealthResponse(BaseModel):
     """Réponse complète du health check"""
     status: str  # "healthy", "unhealthy", "degraded"
@@ -33,6 +25,7 @@ class HealthResponse(BaseModel):
     version: str
     environment: str
     uptime_seconds: float
+    last_refresh: Optional[str] = None
     components: List[ComponentHealth]
 
 
@@ -40,202 +33,31 @@ class HealthResponse(BaseModel):
 _start_time = datetime.utcnow()
 
 
-async def check_database() -> ComponentHealth:
-    """Vérifie la connexion à PostgreSQL"""
-    start = datetime.utcnow()
-    try:
-        from app.database import get_db_session
-        from sqlalchemy import text
-
-        async for db in get_db_session():
-            result = await db.execute(text("SELECT 1"))
-            result.scalar()
-            break
-
-        latency = (datetime.utcnow() - start).total_seconds() * 1000
-        return ComponentHealth(
-            name="database",
-            status="healthy",
-            latency_ms=round(latency, 2),
-            message="PostgreSQL connection OK",
-            last_check=datetime.utcnow().isoformat()
-        )
-    except Exception as e:
-        latency = (datetime.utcnow() - start).total_seconds() * 1000
-        logger.error(f"Database health check failed: {e}")
-        return ComponentHealth(
-            name="database",
-            status="unhealthy",
-            latency_ms=round(latency, 2),
-            message=str(e),
-            last_check=datetime.utcnow().isoformat()
-        )
-
-
-async def check_redis() -> ComponentHealth:
-    """Vérifie la connexion à Redis"""
-    start = datetime.utcnow()
-    try:
-        from app.core.redis_client import get_redis_client
-
-        redis = await get_redis_client()
-        if redis:
-            await redis.ping()
-            latency = (datetime.utcnow() - start).total_seconds() * 1000
-            return ComponentHealth(
-                name="redis",
-                status="healthy",
-                latency_ms=round(latency, 2),
-                message="Redis connection OK",
-                last_check=datetime.utcnow().isoformat()
-            )
-        else:
-            return ComponentHealth(
-                name="redis",
-                status="degraded",
-                message="Redis client not initialized",
-                last_check=datetime.utcnow().isoformat()
-            )
-    except Exception as e:
-        latency = (datetime.utcnow() - start).total_seconds() * 1000
-        logger.error(f"Redis health check failed: {e}")
-        return ComponentHealth(
-            name="redis",
-            status="unhealthy",
-            latency_ms=round(latency, 2),
-            message=str(e),
-            last_check=datetime.utcnow().isoformat()
-        )
-
-
-async def check_disk_space() -> ComponentHealth:
-    """Vérifie l'espace disque disponible"""
-    try:
-        import shutil
-        import os
-
-        # Vérifier l'espace sur le répertoire de données
-        data_path = os.environ.get("DATA_PATH", "/app/data")
-        if not os.path.exists(data_path):
-            data_path = "/"
-
-        total, used, free = shutil.disk_usage(data_path)
-        free_percent = (free / total) * 100
-
-        status = "healthy"
-        message = f"Free: {free_percent:.1f}% ({free // (1024**3)} GB)"
-
-        if free_percent < 10:
-            status = "unhealthy"
-            message = f"CRITICAL: Only {free_percent:.1f}% free space"
-        elif free_percent < 20:
-            status = "degraded"
-            message = f"WARNING: Only {free_percent:.1f}% free space"
-
-        return ComponentHealth(
-            name="disk",
-            status=status,
-            message=message,
-            last_check=datetime.utcnow().isoformat()
-        )
-    except Exception as e:
-        logger.error(f"Disk health check failed: {e}")
-        return ComponentHealth(
-            name="disk",
-            status="unhealthy",
-            message=str(e),
-            last_check=datetime.utcnow().isoformat()
-        )
-
-
-async def check_templates() -> ComponentHealth:
-    """Vérifie que les templates DOCX sont accessibles"""
-    try:
-        import os
-
-        templates_path = os.environ.get("TEMPLATES_PATH", "/app/templates")
-
-        if not os.path.exists(templates_path):
-            return ComponentHealth(
-                name="templates",
-                status="degraded",
-                message=f"Templates directory not found: {templates_path}",
-                last_check=datetime.utcnow().isoformat()
-            )
-
-        # Compter les templates .docx
-        docx_files = [f for f in os.listdir(templates_path) if f.endswith('.docx')]
-
-        if len(docx_files) == 0:
-            return ComponentHealth(
-                name="templates",
-                status="degraded",
-                message="No DOCX templates found",
-                last_check=datetime.utcnow().isoformat()
-            )
-
-        return ComponentHealth(
-            name="templates",
-            status="healthy",
-            message=f"{len(docx_files)} template(s) available",
-            last_check=datetime.utcnow().isoformat()
-        )
-    except Exception as e:
-        logger.error(f"Templates health check failed: {e}")
-        return ComponentHealth(
-            name="templates",
-            status="unhealthy",
-            message=str(e),
-            last_check=datetime.utcnow().isoformat()
-        )
-
-
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
     Health check complet du système
 
-    Vérifie:
-    - Base de données PostgreSQL
+    Dernier état connu (rafraîchi en tâche de fond, HEALTH_CHECK_INTERVAL) de:
+    - Base de données PostgreSQL et occupation du pool
     - Cache Redis
     - Espace disque
     - Templates DOCX
+    - Retard de la boucle d'événements
+    - Générations de documents en cours
 
     Returns:
         HealthResponse avec le statut de chaque composant
     """
     from app.config import settings
 
-    # Exécuter tous les checks en parallèle
-    checks = await asyncio.gather(
-        check_database(),
-        check_redis(),
-        check_disk_space(),
-        check_templates(),
-        return_exceptions=True
-    )
-
-    # Convertir les exceptions en ComponentHealth
-    components = []
-    for check in checks:
-        if isinstance(check, Exception):
-            components.append(ComponentHealth(
-                name="unknown",
-                status="unhealthy",
-                message=str(check),
-                last_check=datetime.utcnow().isoformat()
-            ))
-        else:
-            components.append(check)
+    monitor = get_health_monitor()
+    await monitor.ensure_fresh()
 
-    # Déterminer le statut global
-    statuses = [c.status for c in components]
-    if "unhealthy" in statuses:
-        overall_status = "unhealthy"
-    elif "degraded" in statuses:
+    components = list(monitor.snapshot().values())
+    overall_status = monitor.overall_status()
+    if monitor.is_stale():
         overall_status = "degraded"
-    else:
-        overall_status = "healthy"
 
     # Calculer l'uptime
     uptime = (datetime.utcnow() - _start_time).total_seconds()
@@ -243,9 +65,10 @@ async def health_check():
     return HealthResponse(
         status=overall_status,
         timestamp=datetime.utcnow().isoformat(),
-        version=getattr(settings, "VERSION", "1.0.0"),
+        version=getattr(settings, "APP_VERSION", "1.0.0"),
         environment=getattr(settings, "ENVIRONMENT", "development"),
         uptime_seconds=round(uptime, 2),
+        last_refresh=monitor.last_refresh,
         components=components
     )
 
@@ -267,25 +90,35 @@ async def readiness_probe():
     Readiness probe pour Kubernetes
 
     Retourne 200 si l'application est prête à recevoir du trafic
-    Vérifie que la DB et Redis sont accessibles
+    Vérifie que le préchauffage des templates est terminé
+    et que la DB et Redis sont accessibles (dernier état du moniteur de santé)
     """
-    db_health = await check_database()
-    redis_health = await check_redis()
-
-    if db_health.status == "unhealthy":
+    if not is_warm():
         return Response(
-            content='{"status": "not ready", "reason": "database unavailable"}',
+            content='{"status": "not ready", "reason": "templates warming up"}',
             status_code=503,
             media_type="application/json"
         )
 
-    if redis_health.status == "unhealthy":
+    monitor = get_health_monitor()
+    await monitor.ensure_fresh()
+
+    if monitor.is_stale():
         return Response(
-            content='{"status": "not ready", "reason": "redis unavailable"}',
+            content='{"status": "not ready", "reason": "health checks stale"}',
             status_code=503,
             media_type="application/json"
         )
 
+    for name, reason in (("database", "database unavailable"), ("redis", "redis unavailable")):
+        component = monitor.component(name)
+        if component is None or component.status == "unhealthy":
+            return Response(
+                content=f'{{"status": "not ready", "reason": "{reason}"}}',
+                status_code=503,
+                media_type="application/json"
+            )
+
     return {"status": "ready"}
 
 
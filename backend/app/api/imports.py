@@ -0,0 +1,177 @@
+"""
+API Routes pour les imports
+Import en masse de clients (CSV Harvest / XLSX) en tâche de fond
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Path, UploadFile, status
+)
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.core.deps import get_current_active_user
+from app.core.tracing import inject
+from app.models.user import User
+from app.services.client_importer import (
+    IMPORT_EXTENSIONS, job_dir, job_errors_path, load_job_state, run_import_job, save_job_state
+)
+
+router = APIRouter()
+
+# Identifiant de job (uuid hex): utilisé dans les chemins de fichiers
+JOB_ID_PATTERN = r"^[0-9a-f]{32}$"
+
+# Taille des blocs lus depuis l'upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _check_job_access(state: Optional[dict], current_user: User) -> dict:
+    """Vérifie l'existence du job et les droits de l'utilisateur"""
+    if not state:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import non trouvé"
+        )
+    if not current_user.is_admin and state.get("user_id") != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès non autorisé à cet import"
+        )
+    return state
+
+
+@router.post("/clients", status_code=status.HTTP_202_ACCEPTED)
+async def import_clients(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="Fichier CSV (format Harvest) ou XLSX"),
+    conseiller_id: Optional[UUID] = Form(None, description="Conseiller attributaire (admin)"),
+    current_user: User = Depends(get_current_active_user)
+) -> dict:
+    """
+    Lancer un import de clients en masse
+
+    Le fichier est enregistré puis traité en tâche de fond par lots
+    (validation, calcul profil/LCB-FT, INSERT multi-lignes).
+
+    Args:
+        file: Fichier CSV ou XLSX
+        conseiller_id: Conseiller attributaire (admin uniquement)
+        current_user: Utilisateur authentifié
+
+    Returns:
+        Identifiant du job et URL de suivi
+    """
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if extension not in IMPORT_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format non supporté. Formats acceptés: {', '.join(IMPORT_EXTENSIONS)}"
+        )
+
+    # Si pas admin, forcer son propre ID
+    if not current_user.is_admin or conseiller_id is None:
+        conseiller_id = current_user.id
+
+    job_id = uuid.uuid4().hex
+    path = os.path.join(job_dir(), f"{job_id}{extension}")
+
+    # Copie en flux par blocs, disque hors boucle d'événements;
+    # 413 dès que la taille maximale est dépassée (reste du fichier non lu)
+    max_size = settings.IMPORT_MAX_FILE_SIZE_MB * 1024 * 1024
+    size = 0
+    buffer = await asyncio.to_thread(open, path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                break
+            await asyncio.to_thread(buffer.write, chunk)
+    finally:
+        await asyncio.to_thread(buffer.close)
+
+    if size > max_size:
+        await asyncio.to_thread(os.remove, path)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Fichier trop volumineux (max {settings.IMPORT_MAX_FILE_SIZE_MB} Mo)"
+        )
+
+    save_job_state(job_id, {
+        "job_id": job_id,
+        "statut": "en_attente",
+        "fichier": file.filename,
+        "user_id": str(current_user.id),
+        "conseiller_id": str(conseiller_id),
+        "cree_le": datetime.utcnow().isoformat()
+    })
+
+    background_tasks.add_task(
+        run_import_job,
+        job_id,
+        path,
+        conseiller_id=conseiller_id,
+        user_id=current_user.id,
+        filename=file.filename,
+        trace_context=inject()
+    )
+
+    return {
+        "job_id": job_id,
+        "statut": "en_attente",
+        "suivi": f"{settings.API_PREFIX}/imports/clients/{job_id}"
+    }
+
+
+@router.get("/clients/{job_id}")
+async def get_import_status(
+    job_id: str = Path(..., pattern=JOB_ID_PATTERN),
+    current_user: User = Depends(get_current_active_user)
+) -> dict:
+    """
+    État d'avancement d'un import
+
+    Args:
+        job_id: Identifiant du job
+        current_user: Utilisateur authentifié
+
+    Returns:
+        Statut et compteurs (lignes, importés, erreurs)
+    """
+    return _check_job_access(load_job_state(job_id), current_user)
+
+
+@router.get("/clients/{job_id}/erreurs")
+async def download_import_errors(
+    job_id: str = Path(..., pattern=JOB_ID_PATTERN),
+    current_user: User = Depends(get_current_active_user)
+) -> FileResponse:
+    """
+    Télécharger le rapport d'erreurs par ligne (CSV)
+
+    Args:
+        job_id: Identifiant du job
+        current_user: Utilisateur authentifié
+
+    Returns:
+        Fichier CSV ligne;champ;message
+    """
+    _check_job_access(load_job_state(job_id), current_user)
+
+    path = job_errors_path(job_id)
+    if not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rapport d'erreurs non disponible"
+        )
+
+    return FileResponse(
+        path=path,
+        filename=f"import_{job_id}_erreurs.csv",
+        media_type="text/csv"
+    )
@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, extract
 from pydantic import BaseModel
 
-from app.core.deps import get_session, get_current_active_user
+from app.core.deps import get_read_session, get_current_read_user
 from app.models.user import User
 from app.models.client import Client, ClientStatut
 from app.models.document import Document
@@ -26,8 +26,8 @@ class DashboardStats(BaseModel):
 
 @router.get("/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_session)
+    current_user: User = Depends(get_current_read_user),
+    db: AsyncSession = Depends(get_read_session)
 ) -> DashboardStats:
     """
     Récupérer les statistiques pour le dashboard
@@ -39,7 +39,7 @@ async def get_dashboard_stats(
 
     Args:
         current_user: Utilisateur authentifié
-        db: Session database
+        db: Session de lecture (réplica si disponible)
 
     Returns:
         Statistiques du dashboard
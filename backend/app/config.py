@@ -47,6 +47,33 @@ class Settings(BaseSettings):
     DATABASE_POOL_SIZE: int = config('DATABASE_POOL_SIZE', default=20, cast=int)
     DATABASE_MAX_OVERFLOW: int = config('DATABASE_MAX_OVERFLOW', default=40, cast=int)
     DATABASE_ECHO: bool = config('DATABASE_ECHO', default=False, cast=bool)
+    # Processus API (uvicorn --workers / gunicorn), pour répartir DATABASE_MAX_CONNECTIONS
+    API_WORKERS: int = config('WEB_CONCURRENCY', default=1, cast=int)
+    # Connexions autorisées pour l'ensemble des workers (0 = pool_size/max_overflow par worker)
+    DATABASE_MAX_CONNECTIONS: int = config('DATABASE_MAX_CONNECTIONS', default=0, cast=int)
+    # queue = pool local par worker, null = une connexion par session (pooling par PgBouncer)
+    DATABASE_POOL_MODE: str = config('DATABASE_POOL_MODE', default='queue')
+    # PgBouncer en mode transaction: caches de requêtes préparées désactivés, noms uniques
+    DATABASE_PGBOUNCER: bool = config('DATABASE_PGBOUNCER', default=False, cast=bool)
+    # Requêtes préparées gardées par connexion asyncpg (hors PgBouncer, 0 = pas de cache)
+    DATABASE_STATEMENT_CACHE_SIZE: int = config('DATABASE_STATEMENT_CACHE_SIZE', default=100, cast=int)
+    # Journal des requêtes lentes (ms) et échantillon d'EXPLAIN par requête
+    DATABASE_SLOW_QUERY_MS: float = config('DATABASE_SLOW_QUERY_MS', default=500.0, cast=float)
+    DATABASE_SLOW_QUERY_EXPLAIN: bool = config('DATABASE_SLOW_QUERY_EXPLAIN', default=True, cast=bool)
+    DATABASE_SLOW_QUERY_EXPLAIN_INTERVAL: float = config(
+        'DATABASE_SLOW_QUERY_EXPLAIN_INTERVAL', default=300.0, cast=float
+    )
+    # Réplica en lecture (vide = toutes les lectures sur le primaire)
+    DATABASE_REPLICA_URL: str = config('DATABASE_REPLICA_URL', default='')
+    DATABASE_REPLICA_POOL_SIZE: int = config('DATABASE_REPLICA_POOL_SIZE', default=10, cast=int)
+    DATABASE_REPLICA_MAX_OVERFLOW: int = config('DATABASE_REPLICA_MAX_OVERFLOW', default=20, cast=int)
+    # Retard de réplication (s) au-delà duquel les lectures reviennent au primaire
+    # (mesuré par le moniteur de santé, HEALTH_CHECK_INTERVAL)
+    DATABASE_REPLICA_MAX_LAG: float = config('DATABASE_REPLICA_MAX_LAG', default=5.0, cast=float)
+    # Fenêtre (s) pendant laquelle un utilisateur qui vient d'écrire lit sur le primaire
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = config(
+        'DATABASE_READ_YOUR_WRITES_SECONDS', default=10.0, cast=float
+    )
     
     # ==========================================
     # REDIS CACHE
@@ -71,16 +98,96 @@ class Settings(BaseSettings):
     # ==========================================
     LOG_LEVEL: str = config('LOG_LEVEL', default='INFO')
     LOG_FILE: str = config('LOG_FILE', default='/app/logs/fare_epargne.log')
-    
+    LOG_JSON: bool = config('LOG_JSON', default=True, cast=bool)
+    # File entre l'application et le thread d'écriture (records abandonnés au-delà)
+    LOG_QUEUE_SIZE: int = config('LOG_QUEUE_SIZE', default=10000, cast=int)
+    # Fraction conservée des logs DEBUG et des erreurs de validation (422)
+    LOG_DEBUG_SAMPLE_RATE: float = config('LOG_DEBUG_SAMPLE_RATE', default=1.0, cast=float)
+    LOG_VALIDATION_SAMPLE_RATE: float = config('LOG_VALIDATION_SAMPLE_RATE', default=1.0, cast=float)
+    # Niveaux par logger au démarrage, ex: "app.core.db_instrumentation=DEBUG,httpx=INFO"
+    # (modifiables ensuite sans redémarrage: PUT /api/v1/admin/logging/levels)
+    LOG_LEVELS: str = config('LOG_LEVELS', default='')
+
+    # ==========================================
+    # TRACING (X-Request-ID, spans API/DB/Redis/DOCX)
+    # ==========================================
+    # none = identifiant de requête dans les logs uniquement, file = JSON lines, otlp = collecteur OTLP/HTTP
+    TRACING_EXPORTER: str = config('TRACING_EXPORTER', default='none')
+    TRACING_FILE_PATH: str = config('TRACING_FILE_PATH', default='/app/logs/traces.jsonl')
+    TRACING_OTLP_ENDPOINT: str = config('TRACING_OTLP_ENDPOINT', default='http://otel-collector:4318/v1/traces')
+    TRACING_SERVICE_NAME: str = config('TRACING_SERVICE_NAME', default='fare-epargne-api')
+    # Fraction des traces exportées (décidée à la racine, héritée par les spans enfants)
+    TRACING_SAMPLE_RATE: float = config('TRACING_SAMPLE_RATE', default=1.0, cast=float)
+
+    # ==========================================
+    # HEALTH CHECKS (moniteur en tâche de fond, probes sur instantané)
+    # ==========================================
+    # Intervalle de rafraîchissement en secondes (0 = vérifications à la demande)
+    HEALTH_CHECK_INTERVAL: float = config('HEALTH_CHECK_INTERVAL', default=15.0, cast=float)
+    # Délai maximal d'une vérification (au-delà: composant unhealthy)
+    HEALTH_CHECK_TIMEOUT: float = config('HEALTH_CHECK_TIMEOUT', default=5.0, cast=float)
+    # Âge maximal de l'instantané avant que /health/ready réponde 503
+    HEALTH_MAX_AGE: float = config('HEALTH_MAX_AGE', default=60.0, cast=float)
+    # Battement de la boucle d'événements en secondes (0 = surveillance désactivée)
+    EVENT_LOOP_WATCHDOG_INTERVAL: float = config('EVENT_LOOP_WATCHDOG_INTERVAL', default=0.1, cast=float)
+    # Blocage signalé (pile + Sentry) au-delà de ce retard, une fois par pile et par intervalle
+    EVENT_LOOP_BLOCK_THRESHOLD_MS: float = config('EVENT_LOOP_BLOCK_THRESHOLD_MS', default=200.0, cast=float)
+    EVENT_LOOP_BLOCK_REPORT_INTERVAL: float = config('EVENT_LOOP_BLOCK_REPORT_INTERVAL', default=300.0, cast=float)
+
+    # ==========================================
+    # AUDIT TRAIL (partitionnement et rétention)
+    # ==========================================
+    # Partitions mensuelles créées à l'avance sur audit_logs
+    AUDIT_PARTITIONS_AHEAD_MONTHS: int = config('AUDIT_PARTITIONS_AHEAD_MONTHS', default=3, cast=int)
+    # Intervalle (s) de vérification des partitions par l'application (0 = démarrage seulement)
+    AUDIT_PARTITIONS_CHECK_INTERVAL: float = config('AUDIT_PARTITIONS_CHECK_INTERVAL', default=21600.0, cast=float)
+    # Durée de conservation en ligne avant détachement + archivage
+    AUDIT_RETENTION_MONTHS: int = config('AUDIT_RETENTION_MONTHS', default=24, cast=int)
+    # Dossier des archives compressées (une archive .jsonl.gz par mois)
+    AUDIT_ARCHIVE_PATH: str = config('AUDIT_ARCHIVE_PATH', default='/app/archives/audit')
+
     # ==========================================
     # DOCUMENTS
     # ==========================================
     DOCX_TEMPLATE_PATH: str = config('DOCX_TEMPLATE_PATH', default='/app/templates')
+    # Intervalle de scan du dossier templates en secondes (0 = pas de rechargement à chaud)
+    TEMPLATES_WATCH_INTERVAL: float = config('TEMPLATES_WATCH_INTERVAL', default=5.0, cast=float)
+    # Préchauffage des templates au démarrage (/health/ready attend la fin)
+    TEMPLATES_WARMUP: bool = config('TEMPLATES_WARMUP', default=True, cast=bool)
     EXPORT_PATH: str = config('EXPORT_PATH', default='/app/exports')
     MAX_FILE_SIZE_MB: int = config('MAX_FILE_SIZE_MB', default=10, cast=int)
+    # Stockage des documents générés (adressage par contenu, backend: local)
+    DOCUMENT_STORAGE_BACKEND: str = config('DOCUMENT_STORAGE_BACKEND', default='local')
+    DOCUMENT_STORAGE_PATH: str = config('DOCUMENT_STORAGE_PATH', default='/app/exports/documents')
+    # Compression gzip des formats non compressés (CSV, TXT)
+    DOCUMENT_STORAGE_COMPRESS: bool = config('DOCUMENT_STORAGE_COMPRESS', default=True, cast=bool)
+    # Âge minimal (heures) d'un blob non référencé avant suppression
+    DOCUMENT_GC_GRACE_HOURS: float = config('DOCUMENT_GC_GRACE_HOURS', default=24.0, cast=float)
+    # Durée de validité (secondes) des URLs de téléchargement signées
+    DOCUMENT_DOWNLOAD_URL_TTL: int = config('DOCUMENT_DOWNLOAD_URL_TTL', default=300, cast=int)
+    # Location nginx interne des blobs (ex: /protected-documents/), vide = servi par Python
+    DOCUMENT_X_ACCEL_PREFIX: str = config('DOCUMENT_X_ACCEL_PREFIX', default='')
+    # Génération identique (même empreinte de rendu, non signé):
+    # reuse = renvoyer le document existant, link = nouvelle ligne sur le même blob, off = toujours rendre
+    DOCUMENT_RENDER_CACHE: str = config('DOCUMENT_RENDER_CACHE', default='reuse')
+    # Fraction des générations profilées (0 = désactivé) et dossier des rapports
+    DOCUMENT_PROFILE_SAMPLE_RATE: float = config('DOCUMENT_PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+    DOCUMENT_PROFILE_PATH: str = config('DOCUMENT_PROFILE_PATH', default='/app/logs/profiles')
     
     # Extensions autorisées pour upload
     ALLOWED_EXTENSIONS: List[str] = ['.pdf', '.docx', '.doc', '.jpg', '.jpeg', '.png']
+
+    # ==========================================
+    # IMPORT CLIENTS (CSV/XLSX)
+    # ==========================================
+    IMPORT_PATH: str = config('IMPORT_PATH', default='/app/exports/imports')
+    IMPORT_BATCH_SIZE: int = config('IMPORT_BATCH_SIZE', default=500, cast=int)
+    IMPORT_MAX_FILE_SIZE_MB: int = config('IMPORT_MAX_FILE_SIZE_MB', default=50, cast=int)
+
+    # ==========================================
+    # RE-SCORING NOCTURNE (profil de risque / LCB-FT)
+    # ==========================================
+    RESCORING_BATCH_SIZE: int = config('RESCORING_BATCH_SIZE', default=1000, cast=int)
     
     # ==========================================
     # NUMERO CLIENT
@@ -98,19 +205,51 @@ class Settings(BaseSettings):
     PASSWORD_REQUIRE_NUMBER: bool = True
     PASSWORD_REQUIRE_SPECIAL: bool = True
     
-    # Profil de risque - Seuils de score
+    # Profil de risque - Seuils de score, bornes incluses [min, max]
+    # (un score de 75 est Dynamique). Lus par app/services/risk_calculator.py:
+    # toute modification change RISK_RULES_VERSION et déclenche le re-scoring.
     PROFIL_RISQUE_SEUILS: ClassVar[Dict[str, Tuple[int, int]]] = {
-        'Sécuritaire': (0, 25),
-        'Prudent': (26, 50),
-        'Equilibré': (51, 75),
-        'Dynamique': (76, 100)
+        'Sécuritaire': (0, 24),
+        'Prudent': (25, 49),
+        'Équilibré': (50, 74),
+        'Dynamique': (75, 100)
     }
     
-    # LCB-FT - Critères de classification
+    # LCB-FT - Règles de classification (compilées une fois par
+    # app/services/lcb_ft_classifier.py). LCB_FT_RULES_FILE permet de
+    # surcharger ces valeurs par un fichier JSON versionné.
+    LCB_FT_RULES_FILE: str = config('LCB_FT_RULES_FILE', default='')
     LCB_FT_CRITERES: ClassVar[Dict] = {
+        'version': '2026.1',
         'montant_eleve': 500000,  # XPF
-        'pays_risque': ['Corée du Nord', 'Iran', 'Syrie'],
-        'ppe_risque_eleve': True
+        'montant_tres_eleve': 1000000,  # XPF
+        'patrimoine_tres_eleve': '5000000',  # Tranche du formulaire
+        'pays_risque': ['Corée du Nord', 'Iran', 'Myanmar', 'Syrie'],
+        'professions_risque': ['trader', 'cambiste', 'crypto', 'bitcoin', 'casino', 'jeux', 'paris'],
+        'formes_juridiques_risque': ['holding'],
+        'residence_reference': 'France',
+        'ppe_risque_eleve': True,
+        # Points par facteur
+        'facteurs': {
+            'ppe': 3,
+            'us_person': 2,
+            'residence_hors_reference': 1,
+            'pays_risque': 3,
+            'gains_jeu': 2,
+            'cession_pro': 1,
+            'origine_autres_non_justifiee': 1,
+            'montant_tres_eleve': 2,
+            'montant_eleve': 1,
+            'patrimoine_tres_eleve': 1,
+            'profession_risque': 2,
+            'structure_complexe': 1,
+        },
+        # Score minimum par niveau (du plus élevé au plus bas)
+        'seuils': {
+            'Élevé': 5,
+            'Renforcé': 3,
+            'Standard': 1,
+        },
     }
     
     @field_validator('SECRET_KEY')
@@ -14,7 +14,7 @@ from functools import wraps
 from typing import Optional, Any, Callable, TypeVar, Union
 from datetime import datetime
 
-from app.core.redis_client import get_redis, CACHE_PREFIX
+from app.core.redis_client import get_redis, register_key_prefixes, CACHE_PREFIX
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -48,6 +48,12 @@ class CacheKeys:
     USER_PERMISSIONS = "user_perms:"
 
 
+# Métriques Redis ventilées par domaine (cache:client:, cache:dashboard:...)
+register_key_prefixes(*(
+    f"{CACHE_PREFIX}{value}" for name, value in vars(CacheKeys).items() if not name.startswith("_")
+))
+
+
 # ==========================================
 # TTL PAR TYPE DE DONNÉES
 # ==========================================
@@ -0,0 +1,282 @@
+"""
+Instrumentation de l'engine SQLAlchemy
+
+Ce module gère:
+- La durée de chaque requête, par empreinte normalisée et par table
+- Le délai d'obtention d'une connexion et l'occupation du pool
+- Le journal structuré des requêtes lentes avec un échantillon d'EXPLAIN
+- Un span par requête (enfant du span courant, voir app.core.tracing)
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.config import settings
+from app.core import metrics
+from app.core.logging import get_logger
+from app.core.tracing import finish_span, open_span
+
+logger = get_logger(__name__)
+
+# Option d'exécution désactivant le journal lent (requêtes EXPLAIN elles-mêmes)
+SKIP_SLOW_LOG_OPTION = "skip_slow_query_log"
+
+EXPLAINABLE_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+_MAX_PLAN_LENGTH = 4000
+
+
+# ==========================================
+# NORMALISATION DES REQUÊTES
+# ==========================================
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")
+_WHITESPACE = re.compile(r"\s+")
+# Conversion de type sur un paramètre (asyncpg: $1::UUID, $4::TIMESTAMP WITH TIME ZONE, $2::VARCHAR(50)[])
+_PLACEHOLDER_CAST = re.compile(
+    r"\?::[A-Z_][A-Z0-9_]*(?:\s+(?:WITH|WITHOUT)\s+TIME\s+ZONE|\s+VARYING|\s+PRECISION)?"
+    r"(?:\(\d+(?:, ?\d+)*\))?(?:\[\])*",
+    re.IGNORECASE
+)
+_PLACEHOLDER_LIST = re.compile(r"\(\?(?:, \?)+\)")
+_REPEATED_TUPLES = re.compile(r"(\(\?\))(?:, \(\?\))+")
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+((?:"?\w+"?\.)*"?\w+"?)', re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class StatementInfo:
+    """Forme normalisée d'une requête SQL"""
+    empreinte: str
+    operation: str
+    table: str
+    normalisee: str
+
+
+@lru_cache(maxsize=2048)
+def statement_info(statement: str) -> StatementInfo:
+    """
+    Normalise une requête: littéraux et paramètres remplacés par ?
+    (conversions de type des paramètres retirées), listes IN et VALUES
+    multiples réduites à un seul élément
+
+    Deux exécutions d'une même requête avec des valeurs différentes ont
+    donc la même empreinte (label de métrique à cardinalité bornée).
+
+    Args:
+        statement: Requête telle qu'envoyée au driver
+
+    Returns:
+        Empreinte (12 caractères), opération, première table et texte normalisé
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _PLACEHOLDER_CAST.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    normalized = _PLACEHOLDER_LIST.sub("(?)", normalized)
+    normalized = _REPEATED_TUPLES.sub(r"\1", normalized)
+
+    operation = normalized.split(" ", 1)[0].upper() if normalized else "-"
+    match = _TABLE.search(normalized)
+    table = match.group(1).split(".")[-1].strip('"').lower() if match else "-"
+
+    return StatementInfo(
+        empreinte=hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12],
+        operation=operation,
+        table=table,
+        normalisee=normalized,
+    )
+
+
+# ==========================================
+# POOL INSTRUMENTÉ
+# ==========================================
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Pool asyncio qui mesure le délai d'obtention d'une connexion et
+    publie l'occupation (connexions prêtées, au repos, en débordement)
+    """
+
+    def connect(self):
+        # Attente du pool, ouverture éventuelle et pre-ping compris:
+        # c'est le délai réellement subi par la requête
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            metrics.db_pool_checkout_wait_seconds.observe(time.perf_counter() - start)
+            update_pool_gauges(self)
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        update_pool_gauges(self)
+
+
+def update_pool_gauges(pool: AsyncAdaptedQueuePool) -> None:
+    """Publie l'état courant du pool"""
+    metrics.db_connections_active.set(pool.checkedout())
+    metrics.db_connections_idle.set(pool.checkedin())
+    metrics.db_connections_overflow.set(max(pool.overflow(), 0))
+
+
+# ==========================================
+# JOURNAL DES REQUÊTES LENTES
+# ==========================================
+
+class SlowQueryExplainer:
+    """
+    Échantillonne le plan des requêtes lentes
+
+    Au plus un EXPLAIN (sans ANALYZE: la requête n'est pas rejouée) par
+    empreinte et par intervalle, et un seul à la fois, exécuté hors de la
+    transaction appelante sur une connexion dédiée.
+    """
+
+    def __init__(self, engine: AsyncEngine, interval_seconds: float):
+        self.engine = engine
+        self.interval_seconds = interval_seconds
+        self._last_sample: Dict[str, float] = {}
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+
+    def should_sample(self, info: StatementInfo, now: float) -> bool:
+        if self._running or info.operation not in EXPLAINABLE_OPERATIONS:
+            return False
+        last = self._last_sample.get(info.empreinte)
+        return last is None or now - last >= self.interval_seconds
+
+    def schedule(self, statement: str, parameters: Any, info: StatementInfo) -> None:
+        """Lance l'EXPLAIN en tâche de fond (ignoré hors boucle asyncio)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        now = time.monotonic()
+        if not self.should_sample(info, now):
+            return
+        self._last_sample[info.empreinte] = now
+        self._running = True
+        self._task = loop.create_task(self._explain(statement, parameters, info))
+
+    async def _explain(self, statement: str, parameters: Any, info: StatementInfo) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                conn = await conn.execution_options(**{SKIP_SLOW_LOG_OPTION: True})
+                result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                plan = "\n".join(str(row[0]) for row in result.fetchall())
+            logger.info(
+                "Plan d'une requête lente",
+                extra={"fingerprint": info.empreinte, "plan": plan[:_MAX_PLAN_LENGTH]}
+            )
+        except Exception as e:
+            logger.debug(f"EXPLAIN impossible ({info.empreinte}): {str(e)}")
+        finally:
+            self._running = False
+
+
+# ==========================================
+# BRANCHEMENT SUR L'ENGINE
+# ==========================================
+
+def _describe_span(span, info: StatementInfo, dialect: str) -> None:
+    """Attributs d'un span SQL (texte normalisé: aucune valeur client)"""
+    span.name = f"db {info.operation} {info.table}"
+    span.set_attribute("db.system", dialect)
+    span.set_attribute("db.operation", info.operation)
+    span.set_attribute("db.sql.table", info.table)
+    span.set_attribute("db.statement", info.normalisee)
+    span.set_attribute("db.fingerprint", info.empreinte)
+
+
+def instrument_engine(
+    engine: AsyncEngine,
+    slow_query_ms: Optional[float] = None,
+    explain: Optional[bool] = None,
+    explain_interval_seconds: Optional[float] = None,
+    pool_metrics: bool = True
+) -> None:
+    """
+    Branche les événements de mesure sur un engine async
+
+    Args:
+        engine: Engine à instrumenter
+        slow_query_ms: Seuil du journal des requêtes lentes (settings par défaut)
+        explain: Joindre un échantillon d'EXPLAIN aux requêtes lentes
+        explain_interval_seconds: Intervalle minimal entre deux EXPLAIN d'une même requête
+        pool_metrics: Publier l'état du pool (jauges db_connections_*, engine primaire uniquement)
+    """
+    threshold = (settings.DATABASE_SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms) / 1000
+    if explain is None:
+        explain = settings.DATABASE_SLOW_QUERY_EXPLAIN
+    if explain_interval_seconds is None:
+        explain_interval_seconds = settings.DATABASE_SLOW_QUERY_EXPLAIN_INTERVAL
+    explainer = SlowQueryExplainer(engine, explain_interval_seconds) if explain else None
+
+    sync_engine: Engine = engine.sync_engine
+    pool = sync_engine.pool
+    if pool_metrics and isinstance(pool, AsyncAdaptedQueuePool):
+        metrics.db_connections_pool_size.set(pool.size())
+        update_pool_gauges(pool)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_span = open_span("db.query", kind="client")
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_query_span", None)
+        if span is not None:
+            _describe_span(
+                span, statement_info(exception_context.statement or ""), exception_context.dialect.name
+            )
+            finish_span(span, exception_context.original_exception)
+            context._query_span = None
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        info = statement_info(statement)
+        metrics.db_query_duration_seconds.labels(
+            operation=info.operation, table=info.table, fingerprint=info.empreinte
+        ).observe(duration)
+        span = getattr(context, "_query_span", None)
+        if span is not None:
+            _describe_span(span, info, conn.dialect.name)
+            finish_span(span)
+            context._query_span = None
+
+        if duration < threshold or context.execution_options.get(SKIP_SLOW_LOG_OPTION):
+            return
+        # Texte normalisé uniquement: les paramètres (données clients) ne sont pas journalisés
+        logger.warning(
+            "Requête SQL lente",
+            duration_ms=round(duration * 1000, 2),
+            extra={
+                "fingerprint": info.empreinte,
+                "operation": info.operation,
+                "table": info.table,
+                "statement": info.normalisee,
+                "executemany": executemany,
+            }
+        )
+        if explainer is not None and not executemany:
+            explainer.schedule(statement, parameters, info)
@@ -11,7 +11,8 @@ from sqlalchemy import select
 from jose import JWTError
 import uuid
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_db, get_read_db
+from app.core.read_replica import choose_read_target, set_request_user, track_session
 from app.core.security import decode_token
 from app.core.redis_client import is_token_blacklisted
 from app.models.user import User
@@ -36,6 +37,8 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     Alias pour get_db pour clarté
     """
     async for session in get_db():
+        # Écritures marquées par ReadYourWritesMiddleware avant l'envoi de la réponse
+        track_session(session)
         yield session
 
 
@@ -43,20 +46,10 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 # AUTHENTICATION DEPENDENCIES
 # ==========================================
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_session)
-) -> User:
+async def _authenticate(credentials: HTTPAuthorizationCredentials, db: AsyncSession) -> User:
     """
-    Récupère l'utilisateur actuel depuis le token JWT
-    
-    Args:
-        credentials: Token Bearer depuis le header Authorization
-        db: Session de base de données
-        
-    Returns:
-        User authentifié
-        
+    Charge l'utilisateur désigné par le token JWT
+
     Raises:
         HTTPException 401 si token invalide
         HTTPException 403 si utilisateur inactif
@@ -127,10 +120,32 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Compte utilisateur désactivé"
         )
-    
+
+    set_request_user(user.id)
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_session)
+) -> User:
+    """
+    Récupère l'utilisateur actuel depuis le token JWT
+    
+    Args:
+        credentials: Token Bearer depuis le header Authorization
+        db: Session de base de données
+        
+    Returns:
+        User authentifié
+        
+    Raises:
+        HTTPException 401 si token invalide
+        HTTPException 403 si utilisateur inactif
+    """
+    return await _authenticate(credentials, db)
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -177,6 +192,63 @@ async def get_current_admin_user(
     return current_user
 
 
+# ==========================================
+# READ-ONLY DATABASE DEPENDENCY
+# ==========================================
+
+async def get_current_read_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    """
+    Utilisateur actif des routes en lecture seule
+
+    Chargé sur le primaire dans une session courte, fermée avant la lecture:
+    la requête ne garde pas de connexion primaire (ni pendant un streaming).
+    L'utilisateur retourné est détaché: ne pas le modifier.
+    """
+    async with AsyncSessionLocal() as db:
+        user = await _authenticate(credentials, db)
+
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Compte utilisateur inactif"
+        )
+    return user
+
+
+async def get_current_admin_read_user(
+    current_user: User = Depends(get_current_read_user)
+) -> User:
+    """Administrateur des routes en lecture seule (voir get_current_read_user)"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Privilèges administrateur requis"
+        )
+    return current_user
+
+
+async def get_read_session(
+    current_user: User = Depends(get_current_read_user)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Fournit une session pour les routes en lecture seule
+    (listes, statistiques, exports)
+
+    Réplica si configuré et à jour, sauf si l'utilisateur vient d'écrire
+    (DATABASE_READ_YOUR_WRITES_SECONDS); primaire sinon.
+    Ne jamais écrire dans cette session. Les routes qui n'écrivent pas
+    déclarent leur utilisateur avec get_current_read_user.
+    """
+    if await choose_read_target(current_user.id) == "replica":
+        async for session in get_read_db():
+            yield session
+    else:
+        async for session in get_db():
+            yield session
+
+
 # ==========================================
 # AUDIT LOGGING DEPENDENCY
 # ==========================================
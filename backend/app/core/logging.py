@@ -1,19 +1,43 @@
 """
 Configuration du logging structuré (JSON)
 Pour une meilleure intégration avec les outils de monitoring (ELK, Datadog, etc.)
+
+Les handlers appelants ne font que déposer les records dans une file bornée
+(QueueHandler); la sérialisation JSON et l'écriture (console, fichier) se
+font dans le thread du QueueListener.
 """
 
+import atexit
+import copy
 import logging
+import queue
+import random
 import sys
 import json
-from datetime import datetime
-from typing import Any, Dict, Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Mapping, Optional, Union
 from functools import wraps
 import time
 import traceback
 
 from pydantic import BaseModel
 
+from app.core import metrics
+from app.core.tracing import RequestContextFilter
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    """Sérialisation JSON (orjson si installé)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, default=str, separators=(",", ":"))
+
 
 class LogRecord(BaseModel):
     """Structure d'un log JSON"""
@@ -25,6 +49,8 @@ class LogRecord(BaseModel):
     function: Optional[str] = None
     line: Optional[int] = None
     request_id: Optional[str] = None
+    trace_id: Optional[str] = None
+    span_id: Optional[str] = None
     user_id: Optional[str] = None
     client_id: Optional[str] = None
     duration_ms: Optional[float] = None
@@ -37,8 +63,10 @@ class JSONFormatter(logging.Formatter):
     """Formateur JSON pour les logs"""
 
     def format(self, record: logging.LogRecord) -> str:
+        # Heure de l'événement (le formatage a lieu plus tard, dans le thread d'écriture)
         log_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                         + f".{int(record.msecs):03d}Z",
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -47,9 +75,9 @@ class JSONFormatter(logging.Formatter):
             "line": record.lineno,
         }
 
-        # Ajouter les attributs personnalisés
-        for attr in ["request_id", "user_id", "client_id", "duration_ms"]:
-            if hasattr(record, attr):
+        # Ajouter les attributs personnalisés (request_id/trace_id: RequestContextFilter)
+        for attr in ["request_id", "trace_id", "span_id", "user_id", "client_id", "duration_ms"]:
+            if getattr(record, attr, None) is not None:
                 log_data[attr] = getattr(record, attr)
 
         # Ajouter les extra data
@@ -61,7 +89,7 @@ class JSONFormatter(logging.Formatter):
             log_data["error"] = str(record.exc_info[1])
             log_data["traceback"] = "".join(traceback.format_exception(*record.exc_info))
 
-        return json.dumps(log_data, ensure_ascii=False, default=str)
+        return _dumps(log_data)
 
 
 class StructuredLogger:
@@ -110,10 +138,74 @@ class StructuredLogger:
         return new_logger
 
 
+# ==========================================
+# PIPELINE ASYNCHRONE (FILE BORNÉE)
+# ==========================================
+
+class LogQueueHandler(QueueHandler):
+    """
+    Dépose les records dans une file bornée sans jamais bloquer l'appelant
+
+    Sous pression (file remplie au-delà du seuil) les records sous WARNING
+    sont abandonnés; file pleine, tout record est abandonné. Les pertes sont
+    comptées dans logs_dropped_total.
+    """
+
+    def __init__(self, log_queue: queue.Queue, pressure_ratio: float = 0.75):
+        super().__init__(log_queue)
+        self._pressure_size = int(log_queue.maxsize * pressure_ratio) if log_queue.maxsize > 0 else 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Message interpolé dans le thread appelant (arguments potentiellement
+        # modifiés ensuite); exc_info conservé: file en mémoire, pas de pickle
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if (record.levelno < logging.WARNING and self._pressure_size
+                and self.queue.qsize() >= self._pressure_size):
+            metrics.logs_dropped_total.labels(level=record.levelname).inc()
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.logs_dropped_total.labels(level=record.levelname).inc()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Échantillonnage des logs bruyants
+
+    Les loggers déclarés (ex: app.validation) ont leur propre taux; les
+    autres records DEBUG suivent debug_rate. 1.0 = tout conserver.
+    """
+
+    def __init__(self, debug_rate: float = 1.0, logger_rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.debug_rate = debug_rate
+        self.logger_rates = logger_rates or {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.logger_rates.get(record.name)
+        if rate is None and record.levelno <= logging.DEBUG:
+            rate = self.debug_rate
+        return rate is None or rate >= 1 or random.random() < rate
+
+
+# Listener actif (un seul par processus)
+_queue_listener: Optional[QueueListener] = None
+
+
 def setup_logging(
     level: str = "INFO",
     json_format: bool = True,
-    log_file: Optional[str] = None
+    log_file: Optional[str] = None,
+    queue_size: int = 10000,
+    debug_sample_rate: float = 1.0,
+    logger_sample_rates: Optional[Dict[str, float]] = None,
+    levels: Optional[str] = None
 ) -> None:
     """
     Configure le logging pour l'application
@@ -122,7 +214,15 @@ def setup_logging(
         level: Niveau de log (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         json_format: Si True, utilise le format JSON
         log_file: Chemin vers un fichier de log (optionnel)
+        queue_size: Taille de la file entre l'application et le thread d'écriture
+        debug_sample_rate: Fraction des logs DEBUG conservés
+        logger_sample_rates: Taux d'échantillonnage par logger (ex: {"app.validation": 0.1})
+        levels: Niveaux par logger, ex: "sqlalchemy.engine=INFO,app.services=DEBUG"
     """
+    global _queue_listener
+
+    shutdown_logging()
+
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, level.upper()))
 
@@ -141,19 +241,105 @@ def setup_logging(
     # Handler console
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     # Handler fichier (optionnel)
     if log_file:
         file_handler = logging.FileHandler(log_file, encoding="utf-8")
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # Seul handler du thread appelant: contexte de requête lu ici (contextvars)
+    queue_handler = LogQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(SamplingFilter(debug_sample_rate, logger_sample_rates))
+    root_logger.addHandler(queue_handler)
+
+    _queue_listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
 
     # Réduire le bruit des loggers tiers
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
+    if levels:
+        apply_log_levels(levels)
+
+
+def shutdown_logging() -> None:
+    """Écrit les records en attente et arrête le thread d'écriture"""
+    global _queue_listener
+
+    if _queue_listener is not None:
+        listener, _queue_listener = _queue_listener, None
+        listener.stop()
+
+
+atexit.register(shutdown_logging)
+
+
+# ==========================================
+# NIVEAUX PAR LOGGER (MODIFIABLES À CHAUD)
+# ==========================================
+
+def _level_value(level: Union[str, int]) -> int:
+    """Valeur numérique d'un niveau (nom ou valeur)"""
+    if isinstance(level, str):
+        value = logging.getLevelName(level.upper())
+        if not isinstance(value, int):
+            raise ValueError(f"Niveau de log inconnu: {level}")
+        return value
+    return level
+
+
+def set_log_level(name: str, level: Optional[Union[str, int]]) -> None:
+    """
+    Change le niveau d'un logger sans redémarrage
+
+    Args:
+        name: Nom du logger ("root" ou "" pour la racine)
+        level: Niveau (nom ou valeur), None = hériter du parent
+    """
+    target = logging.getLogger() if name in ("", "root") else logging.getLogger(name)
+    target.setLevel(logging.NOTSET if level is None else _level_value(level))
+
+
+def set_log_levels(levels: Mapping[str, Optional[Union[str, int]]]) -> None:
+    """
+    Change plusieurs niveaux d'un bloc: tous sont validés avant d'en
+    appliquer un seul (un niveau inconnu ne laisse aucun changement partiel)
+
+    Raises:
+        ValueError: Niveau inconnu
+    """
+    resolved = {
+        name: None if level is None else _level_value(level)
+        for name, level in levels.items()
+    }
+    for name, level in resolved.items():
+        set_log_level(name, level)
+
+
+def apply_log_levels(spec: str) -> None:
+    """Applique des niveaux au format "logger=NIVEAU,autre.logger=NIVEAU" """
+    levels = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip()
+    set_log_levels(levels)
+
+
+def get_log_levels() -> Dict[str, str]:
+    """Niveaux explicitement définis (racine comprise)"""
+    levels = {"root": logging.getLevelName(logging.getLogger().level)}
+    for name, candidate in sorted(logging.root.manager.loggerDict.items()):
+        if isinstance(candidate, logging.Logger) and candidate.level != logging.NOTSET:
+            levels[name] = logging.getLevelName(candidate.level)
+    return levels
+
 
 def get_logger(name: str) -> StructuredLogger:
     """Obtenir un logger structuré"""
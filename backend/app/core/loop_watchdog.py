@@ -0,0 +1,191 @@
+"""
+Surveillance de la boucle d'événements asyncio
+
+Ce module gère:
+- La mesure continue du retard de la boucle (battement asyncio à intervalle fixe)
+- La détection des blocages par un thread de surveillance: au-delà du seuil,
+  la pile du thread de la boucle est capturée pendant le blocage
+- Le signalement (log WARNING + Sentry), limité à un par pile et par intervalle
+"""
+
+import asyncio
+import hashlib
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.core import metrics
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Frames conservées dans un rapport de blocage (les plus internes)
+_STACK_LIMIT = 30
+# Frames servant d'empreinte à une pile (même appel bloquant = même empreinte)
+_FINGERPRINT_FRAMES = 5
+
+
+class LoopWatchdog:
+    """
+    Retard de la boucle d'événements et détection des appels bloquants
+
+    Le battement (tâche asyncio) dort `interval` secondes et mesure son
+    réveil tardif. Le thread de surveillance vérifie que le battement
+    progresse; s'il est en retard de plus de `threshold_ms`, la boucle est
+    bloquée et sa pile courante désigne l'appel fautif.
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        threshold_ms: Optional[float] = None,
+        report_interval: Optional[float] = None
+    ):
+        self.interval = interval if interval is not None else settings.EVENT_LOOP_WATCHDOG_INTERVAL
+        self.threshold_ms = threshold_ms if threshold_ms is not None else settings.EVENT_LOOP_BLOCK_THRESHOLD_MS
+        self.report_interval = (
+            report_interval if report_interval is not None else settings.EVENT_LOOP_BLOCK_REPORT_INTERVAL
+        )
+        self.lag_seconds = 0.0
+        self._max_lag = 0.0
+        self._beats = 0
+        self._last_beat = 0.0
+        self._reported_beat = -1
+        self._last_reports: Dict[str, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def pop_max_lag(self) -> float:
+        """Retard maximal (secondes) depuis le dernier appel"""
+        lag, self._max_lag = self._max_lag, self.lag_seconds
+        return lag
+
+    # ==========================================
+    # BATTEMENT (DANS LA BOUCLE)
+    # ==========================================
+
+    async def _heartbeat(self) -> None:
+        while True:
+            start = time.monotonic()
+            self._last_beat = start
+            self._beats += 1
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - start - self.interval)
+            self.lag_seconds = lag
+            self._max_lag = max(self._max_lag, lag)
+            metrics.event_loop_lag_seconds.set(lag)
+
+    # ==========================================
+    # SURVEILLANCE (THREAD DÉDIÉ)
+    # ==========================================
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check_blocked()
+
+    def check_blocked(self) -> Optional[float]:
+        """
+        Signale la boucle si le battement courant est en retard
+
+        Un blocage n'est signalé qu'une fois (même s'il dure plusieurs
+        vérifications). Retourne la durée du blocage en ms si signalé.
+        """
+        beat = self._beats
+        blocked_ms = (time.monotonic() - self._last_beat - self.interval) * 1000
+        if blocked_ms < self.threshold_ms or beat == self._reported_beat:
+            return None
+        self._reported_beat = beat
+
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.format_stack(frame)[-_STACK_LIMIT:]
+        # Tâche asyncio en cours d'exécution (lecture seule depuis ce thread)
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+
+        metrics.event_loop_blocked_total.inc()
+        self._report(blocked_ms, stack, task.get_name() if task is not None else None)
+        return blocked_ms
+
+    def _report(self, blocked_ms: float, stack: List[str], task_name: Optional[str]) -> None:
+        # Import différé: Sentry est optionnel et non initialisé par défaut
+        from app.core.sentry import capture_message
+
+        fingerprint = hashlib.sha1(
+            "".join(stack[-_FINGERPRINT_FRAMES:]).encode("utf-8")
+        ).hexdigest()[:12]
+
+        now = time.monotonic()
+        last = self._last_reports.get(fingerprint)
+        if last is not None and now - last < self.report_interval:
+            return
+        self._last_reports[fingerprint] = now
+
+        details = {
+            "blocked_ms": round(blocked_ms, 1),
+            "threshold_ms": self.threshold_ms,
+            "fingerprint": fingerprint,
+            "task": task_name,
+            "stack": "".join(stack),
+        }
+        logger.warning("Boucle d'événements bloquée", extra=details)
+        capture_message(
+            "Event loop blocked",
+            level="warning",
+            tags={"loop_block_fingerprint": fingerprint},
+            extra=details
+        )
+
+    # ==========================================
+    # CYCLE DE VIE
+    # ==========================================
+
+    def start(self) -> bool:
+        """Lance le battement et le thread (depuis la boucle à surveiller; 0 = désactivé)"""
+        if self.interval <= 0 or self._task is not None:
+            return False
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = self._loop.create_task(self._heartbeat(), name="loop-watchdog")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        return True
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+# Instance globale
+_loop_watchdog: Optional[LoopWatchdog] = None
+
+
+def get_loop_watchdog() -> LoopWatchdog:
+    """Obtenir l'instance de surveillance de la boucle"""
+    global _loop_watchdog
+    if _loop_watchdog is None:
+        _loop_watchdog = LoopWatchdog()
+    return _loop_watchdog
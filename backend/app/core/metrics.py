@@ -2,13 +2,10 @@
 Métriques Prometheus pour le monitoring de l'application
 """
 
-from typing import Callable, Optional
+from typing import Callable, Dict, Optional, Tuple
 from functools import wraps
 import time
 
-# Note: prometheus_client doit être ajouté aux requirements.txt
-# pip install prometheus-client
-
 try:
     from prometheus_client import Counter, Histogram, Gauge, Info, generate_latest, CONTENT_TYPE_LATEST
     PROMETHEUS_AVAILABLE = True
@@ -45,10 +42,25 @@ http_request_duration_seconds = Histogram(
     buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
 )
 
+# Par méthode: la route n'est connue qu'après le routage
 http_requests_in_progress = Gauge(
     "http_requests_in_progress",
     "Nombre de requêtes HTTP en cours",
-    ["method", "endpoint"]
+    ["method"]
+)
+
+http_response_size_bytes = Histogram(
+    "http_response_size_bytes",
+    "Taille des réponses HTTP en octets",
+    ["method", "endpoint"],
+    buckets=[100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+)
+
+http_time_to_first_byte_seconds = Histogram(
+    "http_time_to_first_byte_seconds",
+    "Délai avant le premier octet du corps de réponse (streaming, exports)",
+    ["method", "endpoint"],
+    buckets=[0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
 )
 
 
@@ -56,10 +68,11 @@ http_requests_in_progress = Gauge(
 # MÉTRIQUES BASE DE DONNÉES
 # ==========================================
 
+# fingerprint: empreinte de la requête normalisée (voir app.core.db_instrumentation)
 db_query_duration_seconds = Histogram(
     "db_query_duration_seconds",
     "Durée des requêtes SQL en secondes",
-    ["operation", "table"],
+    ["operation", "table", "fingerprint"],
     buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
 )
 
@@ -68,6 +81,29 @@ db_connections_active = Gauge(
     "Nombre de connexions DB actives"
 )
 
+db_connections_idle = Gauge(
+    "db_connections_idle",
+    "Nombre de connexions DB au repos dans le pool"
+)
+
+db_connections_overflow = Gauge(
+    "db_connections_overflow",
+    "Nombre de connexions DB ouvertes au-delà de la taille du pool"
+)
+
+db_pool_checkout_wait_seconds = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Délai d'obtention d'une connexion du pool en secondes",
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0]
+)
+
+# reason: replica, no_replica, lag_unknown, replica_down, lag, recent_write
+db_read_routing_total = Counter(
+    "db_read_routing_total",
+    "Sessions de lecture par cible (réplica ou primaire) et raison",
+    ["target", "reason"]
+)
+
 db_connections_pool_size = Gauge(
     "db_connections_pool_size",
     "Taille du pool de connexions DB"
@@ -78,19 +114,26 @@ db_connections_pool_size = Gauge(
 # MÉTRIQUES REDIS
 # ==========================================
 
+# prefix: préfixe de clé déclaré (voir app.core.redis_client.register_key_prefixes)
 redis_operations_total = Counter(
     "redis_operations_total",
     "Total des opérations Redis",
-    ["operation", "status"]
+    ["operation", "prefix", "status"]
 )
 
 redis_operation_duration_seconds = Histogram(
     "redis_operation_duration_seconds",
     "Durée des opérations Redis en secondes",
-    ["operation"],
+    ["operation", "prefix"],
     buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1]
 )
 
+redis_cache_lookups_total = Counter(
+    "redis_cache_lookups_total",
+    "Lectures Redis (GET, EXISTS...) trouvées ou non, par préfixe de clé",
+    ["prefix", "result"]
+)
+
 
 # ==========================================
 # MÉTRIQUES MÉTIER
@@ -115,6 +158,15 @@ document_generation_duration_seconds = Histogram(
     buckets=[0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
 )
 
+# phase: client_load, template_load, replacements, fingerprint, substitution,
+# hidden_sections, save, cache_lookup, db_insert (voir app.services.generation_profiler)
+document_generation_phase_seconds = Histogram(
+    "document_generation_phase_seconds",
+    "Durée des phases de génération des documents en secondes",
+    ["type_document", "phase"],
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+)
+
 auth_attempts_total = Counter(
     "auth_attempts_total",
     "Total des tentatives d'authentification",
@@ -136,6 +188,22 @@ app_info = Info(
     "Informations sur l'application"
 )
 
+event_loop_lag_seconds = Gauge(
+    "event_loop_lag_seconds",
+    "Retard du dernier réveil de la boucle d'événements"
+)
+
+event_loop_blocked_total = Counter(
+    "event_loop_blocked_total",
+    "Blocages de la boucle d'événements au-delà du seuil"
+)
+
+logs_dropped_total = Counter(
+    "logs_dropped_total",
+    "Logs abandonnés (file d'écriture saturée)",
+    ["level"]
+)
+
 
 # ==========================================
 # HELPERS ET DÉCORATEURS
@@ -153,7 +221,7 @@ def track_request_metrics(method: str, endpoint: str):
     def decorator(func: Callable):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            http_requests_in_progress.labels(method=method, endpoint=endpoint).inc()
+            http_requests_in_progress.labels(method=method).inc()
             start_time = time.perf_counter()
 
             try:
@@ -167,16 +235,110 @@ def track_request_metrics(method: str, endpoint: str):
                 duration = time.perf_counter() - start_time
                 http_requests_total.labels(method=method, endpoint=endpoint, status=status).inc()
                 http_request_duration_seconds.labels(method=method, endpoint=endpoint).observe(duration)
-                http_requests_in_progress.labels(method=method, endpoint=endpoint).dec()
+                http_requests_in_progress.labels(method=method).dec()
 
         return wrapper
     return decorator
 
 
-def track_db_query(operation: str, table: str):
+# ==========================================
+# MIDDLEWARE HTTP
+# ==========================================
+
+_HTTP_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+# Requête sans route (404): un seul label au lieu du chemin brut
+UNMATCHED_ENDPOINT = "unmatched"
+
+
+class PrometheusMiddleware:
+    """
+    Middleware ASGI: métriques HTTP de chaque requête
+
+    - endpoint = template de la route ("/api/v1/clients/{client_id}"),
+      jamais le chemin brut (cardinalité bornée)
+    - status = code réel envoyé (500 si l'application lève une exception)
+    - taille de la réponse et délai du premier octet du corps
+
+    Les enfants labellisés sont mis en cache: une requête coûte quelques
+    recherches dans un dict et les observe() des métriques.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._in_progress: Dict[str, object] = {}
+        self._counters: Dict[Tuple[str, str, int], object] = {}
+        self._histograms: Dict[Tuple[str, str], Tuple[object, object, object]] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in _HTTP_METHODS else "OTHER"
+        in_progress = self._in_progress.get(method)
+        if in_progress is None:
+            in_progress = self._in_progress[method] = http_requests_in_progress.labels(method=method)
+
+        start = time.perf_counter()
+        # [status, taille, délai du premier octet]
+        state = [500, 0, None]
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if body:
+                    if state[2] is None:
+                        state[2] = time.perf_counter() - start
+                    state[1] += len(body)
+            elif message["type"] == "http.response.start":
+                state[0] = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+
+            # Route posée dans le scope par le routeur FastAPI
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or UNMATCHED_ENDPOINT
+            self._record(method, endpoint, state, duration)
+
+    def _record(self, method: str, endpoint: str, state: list, duration: float) -> None:
+        """Observe les métriques d'une requête terminée"""
+        status, size, ttfb = state
+
+        key = (method, endpoint, status)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = http_requests_total.labels(
+                method=method, endpoint=endpoint, status=str(status)
+            )
+        counter.inc()
+
+        histograms = self._histograms.get((method, endpoint))
+        if histograms is None:
+            histograms = self._histograms[(method, endpoint)] = (
+                http_request_duration_seconds.labels(method=method, endpoint=endpoint),
+                http_response_size_bytes.labels(method=method, endpoint=endpoint),
+                http_time_to_first_byte_seconds.labels(method=method, endpoint=endpoint),
+            )
+        histograms[0].observe(duration)
+        histograms[1].observe(size)
+        if ttfb is not None:
+            histograms[2].observe(ttfb)
+
+
+def track_db_query(operation: str, table: str, fingerprint: str = "manual"):
     """
     Context manager pour tracker les requêtes DB
 
+    Les requêtes passant par l'engine sont déjà mesurées automatiquement
+    (app.core.db_instrumentation); réservé aux traitements hors engine.
+
     Usage:
         with track_db_query("SELECT", "clients"):
             result = await db.execute(query)
@@ -191,15 +353,20 @@ def track_db_query(operation: str, table: str):
 
         def __exit__(self, exc_type, exc_val, exc_tb):
             duration = time.perf_counter() - self.start_time
-            db_query_duration_seconds.labels(operation=operation, table=table).observe(duration)
+            db_query_duration_seconds.labels(
+                operation=operation, table=table, fingerprint=fingerprint
+            ).observe(duration)
 
     return DBQueryTracker()
 
 
-def track_redis_operation(operation: str):
+def track_redis_operation(operation: str, prefix: str = "-"):
     """
     Context manager pour tracker les opérations Redis
 
+    Les commandes passant par get_redis() sont déjà mesurées automatiquement
+    (app.core.redis_client.InstrumentedRedis).
+
     Usage:
         with track_redis_operation("GET"):
             result = await redis.get(key)
@@ -215,8 +382,8 @@ def track_redis_operation(operation: str):
         def __exit__(self, exc_type, exc_val, exc_tb):
             duration = time.perf_counter() - self.start_time
             status = "error" if exc_type else "success"
-            redis_operations_total.labels(operation=operation, status=status).inc()
-            redis_operation_duration_seconds.labels(operation=operation).observe(duration)
+            redis_operations_total.labels(operation=operation, prefix=prefix, status=status).inc()
+            redis_operation_duration_seconds.labels(operation=operation, prefix=prefix).observe(duration)
 
     return RedisOperationTracker()
 
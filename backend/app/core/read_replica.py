@@ -0,0 +1,241 @@
+"""
+Routage des lectures vers le réplica PostgreSQL
+
+Ce module gère:
+- Le retard de réplication, mesuré sur le réplica par le moniteur de santé
+- La lecture de ses propres écritures: après une écriture, un utilisateur lit
+  sur le primaire pendant DATABASE_READ_YOUR_WRITES_SECONDS (marque Redis,
+  partagée entre les workers, posée avant l'envoi de la réponse)
+- Le choix réplica / primaire de chaque session de lecture (get_read_session)
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import metrics
+from app.core.logging import get_logger
+from app.core.redis_client import get_redis, register_key_prefixes
+
+logger = get_logger(__name__)
+
+# Préfixe des marques "écriture récente" (une clé par utilisateur, expirant avec la fenêtre)
+READ_YOUR_WRITES_PREFIX = "read_your_writes:"
+register_key_prefixes(READ_YOUR_WRITES_PREFIX)
+
+# Clé de Session.info posée dès qu'une session écrit
+SESSION_WRITES_KEY = "has_writes"
+
+# Retard de rejeu: nul hors réplication ou si tout le WAL reçu est rejoué
+# (sinon le primaire inactif ferait croître le retard apparent)
+_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+# Utilisateur authentifié de la requête courante (posé par get_current_user)
+_request_user_id: ContextVar[Optional[str]] = ContextVar("request_user_id", default=None)
+
+
+class RequestWrites:
+    """
+    Sessions ouvertes et utilisateur d'une requête HTTP
+
+    Objet mutable posé par ReadYourWritesMiddleware: les dépendances le
+    complètent même si elles s'exécutent dans un contexte copié.
+    """
+
+    def __init__(self):
+        self.user_id: Optional[str] = None
+        self.sessions: List[Session] = []
+        self.marked = False
+
+    def has_writes(self) -> bool:
+        return any(session.info.get(SESSION_WRITES_KEY) for session in self.sessions)
+
+
+_request_writes: ContextVar[Optional[RequestWrites]] = ContextVar("request_writes", default=None)
+
+
+def set_request_user(user_id: Any) -> None:
+    user_id = str(user_id) if user_id is not None else None
+    _request_user_id.set(user_id)
+    state = _request_writes.get()
+    if state is not None:
+        state.user_id = user_id
+
+
+def get_request_user() -> Optional[str]:
+    return _request_user_id.get()
+
+
+def track_session(session: Any) -> None:
+    """Surveille les écritures d'une session de la requête courante (hors middleware: sans effet)"""
+    state = _request_writes.get()
+    if state is not None:
+        state.sessions.append(getattr(session, "sync_session", session))
+
+
+# ==========================================
+# RETARD DE RÉPLICATION
+# ==========================================
+
+class ReplicaState:
+    """Dernier retard mesuré sur le réplica"""
+
+    def __init__(self):
+        self.lag_seconds: Optional[float] = None
+        self.measured_at: Optional[float] = None
+
+    def record_lag(self, lag_seconds: float) -> None:
+        self.lag_seconds = lag_seconds
+        self.measured_at = time.monotonic()
+
+    def record_failure(self) -> None:
+        self.lag_seconds = None
+        self.measured_at = time.monotonic()
+
+    def usable(self) -> Tuple[bool, str]:
+        """Réplica utilisable pour les lectures, et sinon pourquoi"""
+        if self.measured_at is None or time.monotonic() - self.measured_at > settings.HEALTH_MAX_AGE:
+            return False, "lag_unknown"
+        if self.lag_seconds is None:
+            return False, "replica_down"
+        if self.lag_seconds > settings.DATABASE_REPLICA_MAX_LAG:
+            return False, "lag"
+        return True, "replica"
+
+
+_replica_state = ReplicaState()
+
+
+def get_replica_state() -> ReplicaState:
+    return _replica_state
+
+
+async def measure_replica_lag() -> float:
+    """Mesure le retard du réplica (secondes) et le conserve pour le routage"""
+    from app.database import replica_engine
+
+    try:
+        async with replica_engine.connect() as conn:
+            lag = float((await conn.execute(_LAG_QUERY)).scalar() or 0.0)
+    except Exception:
+        _replica_state.record_failure()
+        raise
+    _replica_state.record_lag(lag)
+    return lag
+
+
+# ==========================================
+# LIRE SES PROPRES ÉCRITURES
+# ==========================================
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_writes(session, flush_context):
+    # Collections encore dans leur état d'avant flush
+    if session.new or session.dirty or session.deleted:
+        session.info[SESSION_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[SESSION_WRITES_KEY] = True
+
+
+async def mark_user_write(user_id: Optional[str]) -> None:
+    """Oriente les lectures de l'utilisateur vers le primaire pendant la fenêtre"""
+    from app.database import replica_engine
+
+    window = settings.DATABASE_READ_YOUR_WRITES_SECONDS
+    if user_id is None or replica_engine is None or window <= 0:
+        return
+    try:
+        redis = await get_redis()
+        await redis.set(f"{READ_YOUR_WRITES_PREFIX}{user_id}", "1", px=int(window * 1000))
+    except Exception as e:
+        logger.warning(f"Écriture récente non marquée: {str(e)}", user_id=user_id)
+
+
+async def _mark_request_writes(state: RequestWrites) -> None:
+    if not state.marked and state.has_writes():
+        state.marked = True
+        await mark_user_write(state.user_id)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Marque les écritures de la requête avant l'envoi de la réponse
+
+    Le nettoyage des dépendances (après yield) ne s'exécute qu'une fois la
+    réponse envoyée: le client pourrait relire sur le réplica avant la marque.
+    Les écritures faites pendant le streaming sont marquées en fin de requête.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = RequestWrites()
+        token = _request_writes.set(state)
+
+        async def send_after_marking(message):
+            if message["type"] == "http.response.start":
+                await _mark_request_writes(state)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_after_marking)
+        finally:
+            _request_writes.reset(token)
+            await _mark_request_writes(state)
+
+
+async def has_recent_write(user_id: str) -> bool:
+    try:
+        redis = await get_redis()
+        return bool(await redis.exists(f"{READ_YOUR_WRITES_PREFIX}{user_id}"))
+    except Exception as e:
+        # Marque illisible: le primaire garantit de relire ses écritures
+        logger.warning(f"Écriture récente non vérifiée: {str(e)}", user_id=user_id)
+        return True
+
+
+# ==========================================
+# CHOIX DE LA CIBLE
+# ==========================================
+
+async def choose_read_target(user_id: Optional[Any] = None) -> str:
+    """
+    Cible d'une session de lecture: "replica" ou "primary"
+
+    Primaire si aucun réplica n'est configuré, si son retard est inconnu ou
+    dépasse DATABASE_REPLICA_MAX_LAG, ou si l'utilisateur vient d'écrire.
+    """
+    from app.database import replica_engine
+
+    if replica_engine is None:
+        target, reason = "primary", "no_replica"
+    else:
+        usable, reason = _replica_state.usable()
+        if not usable:
+            target = "primary"
+        elif user_id is not None and await has_recent_write(str(user_id)):
+            target, reason = "primary", "recent_write"
+        else:
+            target = "replica"
+
+    metrics.db_read_routing_total.labels(target=target, reason=reason).inc()
+    return target
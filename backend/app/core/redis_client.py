@@ -3,10 +3,14 @@ Client Redis pour la gestion du cache et de la blacklist des tokens
 """
 
 import redis.asyncio as redis
-from typing import Optional
+from redis.asyncio.client import Pipeline
+from typing import Any, List, Optional, Sequence
 import logging
+import time
 
 from app.config import settings
+from app.core import metrics
+from app.core.tracing import finish_span, open_span
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +18,121 @@ logger = logging.getLogger(__name__)
 _redis_client: Optional[redis.Redis] = None
 
 
+# ==========================================
+# INSTRUMENTATION DU CLIENT
+# ==========================================
+
+# Préfixes de clés connus (label "prefix" à cardinalité bornée),
+# complétés par les modules qui définissent leurs propres préfixes
+_KEY_PREFIXES: List[str] = []
+
+UNKNOWN_PREFIX = "other"
+NO_KEY_PREFIX = "-"
+
+# Commandes de lecture comptées en hit/miss
+_LOOKUP_COMMANDS = {"GET", "GETEX", "HGET", "EXISTS", "MGET"}
+
+
+def register_key_prefixes(*prefixes: str) -> None:
+    """Déclare des préfixes de clés (le plus long correspondant l'emporte)"""
+    for prefix in prefixes:
+        if prefix not in _KEY_PREFIXES:
+            _KEY_PREFIXES.append(prefix)
+    _KEY_PREFIXES.sort(key=len, reverse=True)
+
+
+def key_prefix(args: Sequence[Any]) -> str:
+    """Préfixe de la première clé d'une commande (args[0] = nom de la commande)"""
+    if len(args) < 2 or not isinstance(args[1], (str, bytes)):
+        return NO_KEY_PREFIX
+    key = args[1].decode("utf-8", "replace") if isinstance(args[1], bytes) else args[1]
+    for prefix in _KEY_PREFIXES:
+        if key.startswith(prefix):
+            return prefix
+    return UNKNOWN_PREFIX
+
+
+def _record_command(args: Sequence[Any], prefix: str, status: str, result: Any = None) -> None:
+    """Compte une commande et, pour une lecture réussie, son hit/miss"""
+    command = str(args[0]).upper()
+    metrics.redis_operations_total.labels(operation=command, prefix=prefix, status=status).inc()
+
+    if status == "success" and command in _LOOKUP_COMMANDS:
+        lookups = metrics.redis_cache_lookups_total
+        if command == "MGET":
+            hits = sum(value is not None for value in result)
+            lookups.labels(prefix=prefix, result="hit").inc(hits)
+            lookups.labels(prefix=prefix, result="miss").inc(len(result) - hits)
+        else:
+            hit = bool(result) if command == "EXISTS" else result is not None
+            lookups.labels(prefix=prefix, result="hit" if hit else "miss").inc()
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline dont chaque exécution est chronométrée et chaque commande comptée"""
+
+    async def execute(self, raise_on_error: bool = True):
+        commands = [args for args, _ in self.command_stack]
+        span = open_span("redis PIPELINE", kind="client", **{
+            "db.system": "redis", "db.redis.commands": len(commands)
+        })
+        start = time.perf_counter()
+        try:
+            results = await super().execute(raise_on_error)
+        except Exception as e:
+            finish_span(span, e)
+            for args in commands:
+                _record_command(args, key_prefix(args), "error")
+            raise
+        else:
+            finish_span(span)
+        finally:
+            metrics.redis_operation_duration_seconds.labels(
+                operation="PIPELINE", prefix=NO_KEY_PREFIX
+            ).observe(time.perf_counter() - start)
+
+        for args, result in zip(commands, results):
+            status = "error" if isinstance(result, Exception) else "success"
+            _record_command(args, key_prefix(args), status, result)
+        return results
+
+
+class InstrumentedRedis(redis.Redis):
+    """
+    Client Redis dont chaque commande est chronométrée et comptée par
+    type de commande et préfixe de clé (voir CacheKeys)
+    """
+
+    async def execute_command(self, *args, **options):
+        prefix = key_prefix(args)
+        command = str(args[0]).upper()
+        # Préfixe seulement: la clé peut contenir un token ou un identifiant
+        span = open_span(f"redis {command}", kind="client", **{
+            "db.system": "redis", "db.operation": command, "db.redis.prefix": prefix
+        })
+        start = time.perf_counter()
+        try:
+            result = await super().execute_command(*args, **options)
+        except Exception as e:
+            finish_span(span, e)
+            _record_command(args, prefix, "error")
+            raise
+        else:
+            finish_span(span)
+        finally:
+            metrics.redis_operation_duration_seconds.labels(
+                operation=command, prefix=prefix
+            ).observe(time.perf_counter() - start)
+
+        _record_command(args, prefix, "success", result)
+        return result
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
 async def get_redis() -> redis.Redis:
     """
     Retourne le client Redis singleton
@@ -24,7 +143,7 @@ async def get_redis() -> redis.Redis:
     global _redis_client
 
     if _redis_client is None:
-        _redis_client = redis.from_url(
+        _redis_client = InstrumentedRedis.from_url(
             settings.REDIS_URL,
             encoding="utf-8",
             decode_responses=True
@@ -48,6 +167,7 @@ async def close_redis() -> None:
 
 # Préfixe pour les clés de blacklist
 BLACKLIST_PREFIX = "token_blacklist:"
+register_key_prefixes(BLACKLIST_PREFIX)
 
 
 async def blacklist_token(token: str, expires_in: int) -> bool:
@@ -121,6 +241,7 @@ async def get_blacklist_count() -> int:
 # ==========================================
 
 CACHE_PREFIX = "cache:"
+register_key_prefixes(CACHE_PREFIX)
 
 
 async def cache_set(key: str, value: str, expires_in: int = None) -> bool:
@@ -198,6 +319,7 @@ async def cache_delete(key: str) -> bool:
 # ==========================================
 
 RATE_LIMIT_PREFIX = "rate_limit:"
+register_key_prefixes(RATE_LIMIT_PREFIX)
 
 
 async def check_rate_limit(identifier: str, max_requests: int, window_seconds: int) -> tuple[bool, int]:
@@ -7,8 +7,11 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
 import bcrypt
+import hashlib
+import hmac
 import secrets
 import string
+import time
 import re
 
 from app.config import settings
@@ -177,6 +180,44 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+# ==========================================
+# URLS DE TÉLÉCHARGEMENT SIGNÉES
+# ==========================================
+
+def _download_signature(document_id: str, expires: int) -> str:
+    """HMAC-SHA256 de l'identifiant du document et de l'expiration"""
+    message = f"download:{document_id}:{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def create_download_signature(document_id: str, expires_in: Optional[int] = None) -> tuple[int, str]:
+    """
+    Signe un téléchargement de courte durée
+
+    Args:
+        document_id: ID du document
+        expires_in: Validité en secondes (DOCUMENT_DOWNLOAD_URL_TTL par défaut)
+
+    Returns:
+        Tuple (expiration timestamp, signature)
+    """
+    ttl = expires_in if expires_in is not None else settings.DOCUMENT_DOWNLOAD_URL_TTL
+    expires = int(time.time()) + ttl
+    return expires, _download_signature(str(document_id), expires)
+
+
+def verify_download_signature(document_id: str, expires: int, signature: str) -> bool:
+    """
+    Vérifie une signature de téléchargement (comparaison en temps constant)
+
+    Returns:
+        True si la signature est valide et non expirée
+    """
+    if expires < int(time.time()):
+        return False
+    return hmac.compare_digest(_download_signature(str(document_id), expires), signature)
+
+
 def generate_secure_password(length: int = 12) -> str:
     """
     Génère un mot de passe sécurisé aléatoire
@@ -0,0 +1,495 @@
+"""
+Contexte de requête et traces distribuées
+
+Ce module gère:
+- L'identifiant de requête (X-Request-ID reçu ou généré) porté par contextvars
+- Des spans au format OpenTelemetry (trace_id/span_id, W3C traceparent)
+  pour l'API, la base de données, Redis et les phases DOCX
+- La propagation du contexte vers les tâches de fond (inject/continue_trace)
+- L'export par lots vers un fichier JSON lines ou un collecteur OTLP/HTTP
+
+Dépendance à app.config uniquement (importé par app.core.logging).
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+import urllib.request
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+TRACEPARENT_HEADER = "traceparent"
+
+# Identifiant reçu accepté tel quel s'il est raisonnable (sinon régénéré)
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._\-]{1,128}$")
+_TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+# ==========================================
+# SPANS
+# ==========================================
+
+@dataclass
+class Span:
+    """Opération chronométrée d'une trace"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = "internal"
+    sampled: bool = True
+    request_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    status: str = "ok"
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return round((self.end_ns - self.start_ns) / 1_000_000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": self.duration_ms,
+            "requestId": self.request_id,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.error},
+        }
+
+
+def _new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def _new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def tracing_enabled() -> bool:
+    return _processor is not None
+
+
+def open_span(name: str, kind: str = "internal", **attributes: Any) -> Optional[Span]:
+    """
+    Crée un span enfant du span courant sans en faire le span courant
+
+    Pour les opérations feuilles (requête SQL, commande Redis) terminées par
+    finish_span(). Retourne None si le traçage est désactivé ou si la trace
+    courante n'est pas échantillonnée; une nouvelle trace non échantillonnée
+    donne un span racine muet dont les enfants héritent de la décision.
+    """
+    if _processor is None:
+        return None
+    parent = _current_span.get()
+    if parent is not None and not parent.sampled:
+        return None
+    if parent is None:
+        trace_id, parent_id = _new_trace_id(), None
+        sampled = random.random() < settings.TRACING_SAMPLE_RATE
+    else:
+        trace_id, parent_id, sampled = parent.trace_id, parent.span_id, True
+    return Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=_new_span_id(),
+        parent_id=parent_id,
+        kind=kind,
+        sampled=sampled,
+        request_id=_request_id.get(),
+        attributes=attributes,
+    )
+
+
+def finish_span(span: Optional[Span], error: Optional[BaseException] = None) -> None:
+    """Termine un span et le transmet à l'export"""
+    if span is None:
+        return
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.status = "error"
+        span.error = f"{type(error).__name__}: {error}"
+    if span.sampled and _processor is not None:
+        _processor.submit(span)
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Span courant le temps du bloc (les spans ouverts dedans en sont les enfants)
+
+    Usage:
+        with start_span("docx.substitution", type_document="DER"):
+            ...
+    """
+    span = open_span(name, kind, **attributes)
+    if span is None:
+        yield None
+        return
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        finish_span(span, e)
+        raise
+    else:
+        finish_span(span)
+    finally:
+        _current_span.reset(token)
+
+
+# ==========================================
+# CONTEXTE DE REQUÊTE
+# ==========================================
+
+def get_request_id() -> Optional[str]:
+    """Identifiant de la requête (ou du job) en cours"""
+    return _request_id.get()
+
+
+def current_trace_ids() -> Tuple[Optional[str], Optional[str]]:
+    """(trace_id, span_id) du span courant"""
+    span = _current_span.get()
+    if span is None:
+        return None, None
+    return span.trace_id, span.span_id
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """En-tête W3C traceparent -> (trace_id, parent_id, échantillonné)"""
+    match = _TRACEPARENT_PATTERN.match((value or "").strip().lower())
+    if not match:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 0x01)
+
+
+def inject() -> Dict[str, str]:
+    """
+    Contexte à transmettre à une tâche de fond (payload de job, en-têtes)
+
+    Returns:
+        {"X-Request-ID": ..., "traceparent": ...} (clés absentes si inconnues)
+    """
+    carrier: Dict[str, str] = {}
+    request_id = _request_id.get()
+    if request_id:
+        carrier[REQUEST_ID_HEADER] = request_id
+    span = _current_span.get()
+    if span is not None:
+        carrier[TRACEPARENT_HEADER] = f"00-{span.trace_id}-{span.span_id}-{'01' if span.sampled else '00'}"
+    return carrier
+
+
+@contextmanager
+def continue_trace(
+    carrier: Optional[Mapping[str, str]],
+    name: str,
+    kind: str = "internal",
+    **attributes: Any
+) -> Iterator[Optional[Span]]:
+    """
+    Reprend le contexte d'une requête (inject()) dans une tâche de fond
+
+    L'identifiant de requête est conservé (ou généré) et le span du job est
+    rattaché à la trace d'origine.
+    """
+    carrier = carrier or {}
+    request_token = _request_id.set(_valid_request_id(carrier.get(REQUEST_ID_HEADER)))
+    span_token = _current_span.set(_remote_parent(carrier.get(TRACEPARENT_HEADER)))
+    try:
+        with start_span(name, kind, **attributes) as span:
+            yield span
+    finally:
+        _current_span.reset(span_token)
+        _request_id.reset(request_token)
+
+
+def _valid_request_id(value: Optional[str]) -> str:
+    if value and _REQUEST_ID_PATTERN.match(value):
+        return value
+    return uuid.uuid4().hex
+
+
+def _remote_parent(traceparent: Optional[str]) -> Optional[Span]:
+    """Parent distant (non exporté) portant trace_id et décision d'échantillonnage"""
+    parsed = parse_traceparent(traceparent)
+    if parsed is None:
+        return None
+    trace_id, parent_id, sampled = parsed
+    return Span(name="remote", trace_id=trace_id, span_id=parent_id, sampled=sampled)
+
+
+class RequestContextFilter(logging.Filter):
+    """Ajoute request_id, trace_id et span_id du contexte à chaque log"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = _request_id.get()
+        span = _current_span.get()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+# ==========================================
+# MIDDLEWARE ASGI
+# ==========================================
+
+class RequestContextMiddleware:
+    """
+    Identifiant de requête et span racine de chaque requête HTTP
+
+    Reprend X-Request-ID et traceparent s'ils sont fournis (nginx, frontend),
+    renvoie X-Request-ID dans la réponse.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        carrier = {
+            REQUEST_ID_HEADER: headers.get(REQUEST_ID_HEADER.lower()),
+            TRACEPARENT_HEADER: headers.get(TRACEPARENT_HEADER),
+        }
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (REQUEST_ID_HEADER.lower().encode("latin-1"), get_request_id().encode("latin-1"))
+                ]
+            await send(message)
+
+        with continue_trace(carrier, f"HTTP {method}", kind="server", **{
+            "http.method": method,
+            "http.target": scope["path"],
+        }) as span:
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            finally:
+                if span is not None:
+                    route = scope.get("route")
+                    if route is not None:
+                        span.name = f"{method} {route.path}"
+                        span.set_attribute("http.route", route.path)
+                    span.set_attribute("http.status_code", status_code)
+                    if status_code >= 500:
+                        span.status = "error"
+
+
+# ==========================================
+# EXPORT
+# ==========================================
+
+class SpanExporter(ABC):
+    """Destination des spans terminés"""
+
+    @abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        ...
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileSpanExporter(SpanExporter):
+    """Un span JSON par ligne (lisible par jq, importable dans un collecteur)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as output:
+            for span in spans:
+                output.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """Envoi OTLP/HTTP JSON à un collecteur OpenTelemetry local (ex: :4318/v1/traces)"""
+
+    _KINDS = {"internal": 1, "server": 2, "client": 3}
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    @staticmethod
+    def _attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _otlp_span(self, span: Span) -> Dict[str, Any]:
+        attributes = dict(span.attributes)
+        if span.request_id:
+            attributes["request.id"] = span.request_id
+        otlp = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": self._KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [self._attribute(key, value) for key, value in attributes.items()],
+            "status": {"code": 2 if span.status == "error" else 1, "message": span.error or ""},
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+    def export(self, spans: List[Span]) -> None:
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": [self._otlp_span(s) for s in spans]}],
+        }]}
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload, default=str).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class BatchSpanProcessor:
+    """
+    File bornée vidée par un thread: l'export ne bloque jamais la requête
+
+    Les spans sont abandonnés (et comptés) si la file est pleine.
+    """
+
+    def __init__(self, exporter: SpanExporter, max_queue_size: int = 2048,
+                 batch_size: int = 256, flush_interval: float = 2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                item = False
+            if item is None:
+                self._export(batch)
+                return
+            if item:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _export(self, batch: List[Span]) -> None:
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning(f"Export des spans impossible ({len(batch)} perdus): {e}")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Exporte les spans en attente puis arrête le thread"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self.exporter.shutdown()
+
+
+_processor: Optional[BatchSpanProcessor] = None
+
+
+def configure_tracing(exporter: Optional[SpanExporter] = None) -> bool:
+    """
+    Active l'export des spans selon TRACING_EXPORTER (none, file, otlp)
+
+    Args:
+        exporter: Exporteur explicite (prioritaire sur la configuration)
+
+    Returns:
+        True si le traçage est actif
+    """
+    global _processor
+
+    if exporter is None:
+        if settings.TRACING_EXPORTER == "file":
+            exporter = FileSpanExporter(settings.TRACING_FILE_PATH)
+        elif settings.TRACING_EXPORTER == "otlp":
+            exporter = OtlpHttpSpanExporter(settings.TRACING_OTLP_ENDPOINT, settings.TRACING_SERVICE_NAME)
+        else:
+            return False
+
+    shutdown_tracing()
+    _processor = BatchSpanProcessor(exporter)
+    logger.info(f"Traçage actif ({type(exporter).__name__})")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Vide la file d'export et désactive le traçage"""
+    global _processor
+
+    if _processor is not None:
+        processor, _processor = _processor, None
+        processor.shutdown()
@@ -7,10 +7,12 @@ from app.crud.user import crud_user
 from app.crud.client import crud_client
 from app.crud.document import crud_document
 from app.crud.produit import crud_produit
+from app.crud.audit_log import crud_audit_log
 
 __all__ = [
     'crud_user',
     'crud_client',
     'crud_document',
-    'crud_produit'
+    'crud_produit',
+    'crud_audit_log'
 ]
\ No newline at end of file
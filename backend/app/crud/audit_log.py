@@ -0,0 +1,123 @@
+"""
+CRUD operations pour AuditLog
+Lectures toujours bornées dans le temps (partition pruning sur audit_logs)
+"""
+
+from typing import Optional, List
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
+
+from app.models.audit_log import AuditLog
+
+
+# Fenêtre par défaut des consultations d'audit
+DEFAULT_WINDOW_DAYS = 90
+
+
+def _time_window(
+    since: Optional[datetime],
+    until: Optional[datetime]
+) -> tuple:
+    """
+    Calcule la fenêtre [since, until[ de la requête
+
+    Sans borne explicite, seules les DEFAULT_WINDOW_DAYS derniers jours
+    sont lus: Postgres n'ouvre alors que les partitions concernées.
+    """
+    until = until or datetime.now(timezone.utc)
+    since = since or (until - timedelta(days=DEFAULT_WINDOW_DAYS))
+    return since, until
+
+
+class CRUDAuditLog:
+    """
+    Classe CRUD pour la consultation de l'audit trail
+    L'écriture passe par AuditLog.log_action
+    """
+
+    # ==========================================
+    # READ
+    # ==========================================
+
+    async def get_by_entity(
+        self,
+        db: AsyncSession,
+        *,
+        entity_type: str,
+        entity_id: UUID,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100
+    ) -> List[AuditLog]:
+        """
+        Historique d'une entité (client, document...)
+
+        Args:
+            db: Session database
+            entity_type: Type d'entité
+            entity_id: ID de l'entité
+            since: Début de la fenêtre (défaut: il y a 90 jours)
+            until: Fin de la fenêtre (défaut: maintenant)
+            limit: Nombre max de résultats
+
+        Returns:
+            Logs du plus récent au plus ancien
+        """
+        since, until = _time_window(since, until)
+        result = await db.execute(
+            select(AuditLog)
+            .where(
+                and_(
+                    AuditLog.entity_type == entity_type,
+                    AuditLog.entity_id == entity_id,
+                    AuditLog.created_at >= since,
+                    AuditLog.created_at < until
+                )
+            )
+            .order_by(AuditLog.created_at.desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def get_by_user(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: UUID,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100
+    ) -> List[AuditLog]:
+        """
+        Actions d'un utilisateur
+
+        Args:
+            db: Session database
+            user_id: ID de l'utilisateur
+            since: Début de la fenêtre (défaut: il y a 90 jours)
+            until: Fin de la fenêtre (défaut: maintenant)
+            limit: Nombre max de résultats
+
+        Returns:
+            Logs du plus récent au plus ancien
+        """
+        since, until = _time_window(since, until)
+        result = await db.execute(
+            select(AuditLog)
+            .where(
+                and_(
+                    AuditLog.user_id == user_id,
+                    AuditLog.created_at >= since,
+                    AuditLog.created_at < until
+                )
+            )
+            .order_by(AuditLog.created_at.desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+
+# Instance singleton
+crud_audit_log = CRUDAuditLog()
@@ -7,11 +7,14 @@ from typing import Optional, List, Dict, Any
 from uuid import UUID
 from datetime import datetime, date
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, update
+from sqlalchemy import Integer, select, and_, or_, cast, extract, func, literal, update
 from sqlalchemy.orm import selectinload
 
 from app.models.client import Client, ClientStatut
-from app.schemas.client import ClientCreate, ClientUpdate
+from app.schemas.client import ClientCreate, ClientUpdate, ClientFormDataCreate
+from app.services.form_patch import apply_operations, build_jsonb_expression, diff_columns
+from app.services.attribute_view import AttributeView
+from app.services.scoring import apply_scoring, score_client
 
 
 def serialize_for_json(value: Any) -> Any:
@@ -38,11 +41,27 @@ def serialize_for_json(value: Any) -> Any:
     return value
 
 
+def format_numero_client(year: int, counter: int) -> str:
+    """
+    Formater un numéro client
+    Format: FAR-YYYY-NNNN (identique à next_numero_client() en base)
+    """
+    return f"FAR-{year}-{counter:04d}"
+
+
 class CRUDClient:
     """
     Classe CRUD pour les opérations Client
     Gestion complète des clients avec 120+ champs
     """
+
+    # Champs système à ne jamais mettre à jour via l'API
+    PROTECTED_FIELDS = {
+        'id', 'conseiller_id', 'created_at', 'updated_at',
+        'validated_at', 'validated_by', 'profil_risque_date_calcul',
+        'nom_complet_t1', 'nom_complet_t2', 'has_titulaire_2',
+        'is_validated', 'is_us_person', 'is_ppe', 'version'
+    }
     
     # ==========================================
     # CREATE
@@ -66,16 +85,17 @@ class CRUDClient:
         Returns:
             Client créé
         """
-        # Générer numéro client si non fourni
-        if not obj_in.numero_client:
-            obj_in.numero_client = await self.generate_numero_client(db)
-        
         # Convertir en dict et ajouter conseiller_id
         obj_in_data = obj_in.dict()
         obj_in_data['conseiller_id'] = conseiller_id
+
+        # Numéro client alloué par la base dans l'INSERT si non fourni
+        if not obj_in_data.get('numero_client'):
+            obj_in_data.pop('numero_client', None)
         
-        # Créer l'objet Client
+        # Créer l'objet Client, profil de risque / LCB-FT et empreintes calculés en mémoire
         db_obj = Client(**obj_in_data)
+        apply_scoring(db_obj)
         
         db.add(db_obj)
         await db.commit()
@@ -87,29 +107,47 @@ class CRUDClient:
         """
         Générer un numéro client unique
         Format: FAR-YYYY-NNNN
-        
+
+        Les créations courantes n'ont pas besoin d'appeler cette méthode:
+        numero_client a pour défaut next_numero_client() côté base.
+
         Returns:
             Numéro client généré
         """
-        year = datetime.now().year
-        prefix = f"FAR-{year}-"
-        
-        # Récupérer le dernier numéro
+        result = await db.execute(select(func.next_numero_client()))
+        return result.scalar()
+
+    async def reserve_numero_clients(
+        self,
+        db: AsyncSession,
+        count: int,
+        year: Optional[int] = None
+    ) -> List[str]:
+        """
+        Réserver un bloc de numéros clients (imports en masse)
+
+        Un seul UPDATE ... RETURNING sur le compteur de l'année, quel que
+        soit le nombre de numéros.
+
+        Args:
+            db: Session database
+            count: Nombre de numéros à réserver
+            year: Année (défaut: année courante selon NOW() en base, comme
+                next_numero_client())
+
+        Returns:
+            Numéros réservés, dans l'ordre
+        """
+        if count <= 0:
+            return []
+
+        year_expr = cast(extract('year', func.now()), Integer) if year is None else literal(year)
         result = await db.execute(
-            select(func.max(Client.numero_client))
-            .where(Client.numero_client.like(f"{prefix}%"))
+            select(year_expr, func.reserve_numero_client(count, year_expr))
         )
-        last_numero = result.scalar()
-        
-        if last_numero:
-            # Extraire le compteur et incrémenter
-            last_count = int(last_numero.split("-")[-1])
-            new_count = last_count + 1
-        else:
-            new_count = 1
-        
-        return f"{prefix}{new_count:04d}"
-    
+        year, first = result.one()
+        return [format_numero_client(year, first + offset) for offset in range(count)]
+
     # ==========================================
     # READ
     # ==========================================
@@ -293,14 +331,6 @@ class CRUDClient:
         Returns:
             Client mis à jour
         """
-        # Champs système à ne jamais mettre à jour via l'API
-        PROTECTED_FIELDS = {
-            'id', 'conseiller_id', 'created_at', 'updated_at',
-            'validated_at', 'validated_by', 'profil_risque_date_calcul',
-            'nom_complet_t1', 'nom_complet_t2', 'has_titulaire_2',
-            'is_validated', 'is_us_person', 'is_ppe'
-        }
-
         # Convertir en dict et ignorer les None
         update_data = obj_in.dict(exclude_unset=True)
 
@@ -314,7 +344,7 @@ class CRUDClient:
         # Mettre à jour les champs
         for field, value in update_data.items():
             # Ignorer les champs protégés
-            if field in PROTECTED_FIELDS:
+            if field in self.PROTECTED_FIELDS:
                 continue
 
             if field in model_columns:
@@ -330,12 +360,98 @@ class CRUDClient:
             merged_form_data = {**existing_form_data, **extra_fields}
             db_obj.form_data = merged_form_data
 
+        # Recalcul profil/LCB-FT si leurs entrées ont changé (empreintes à jour)
+        apply_scoring(db_obj)
+
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
 
         return db_obj
     
+    async def patch_form(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Client,
+        version: int,
+        operations: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Appliquer un delta du formulaire (autosave)
+
+        Seules les colonnes dont la valeur extraite change sont écrites,
+        form_data est modifié côté serveur (jsonb_set / #-) et le profil de
+        risque / LCB-FT n'est recalculé que si l'une de leurs entrées change.
+        Le commit est laissé à l'appelant (audit dans la même transaction).
+
+        Args:
+            db: Session database
+            db_obj: Client existant
+            version: Version connue du frontend
+            operations: Opérations {"op", "path" (segments), "value"}
+
+        Returns:
+            Résultat (version, colonnes modifiées, recalculs) ou None si la
+            version ne correspond plus (modification concurrente)
+
+        Raises:
+            FormPatchError: Opération invalide
+        """
+        new_form, normalized = apply_operations(db_obj.form_data, operations)
+
+        # Colonnes mappées impactées par le delta
+        old_columns = ClientFormDataCreate(
+            form_data=db_obj.form_data or {}, statut=db_obj.statut
+        ).extract_client_data()
+        new_columns = ClientFormDataCreate(
+            form_data=new_form, statut=db_obj.statut
+        ).extract_client_data()
+        model_columns = {column.name for column in Client.__table__.columns}
+        changes = diff_columns(old_columns, new_columns, model_columns - self.PROTECTED_FIELDS)
+
+        result = {
+            "version": db_obj.version,
+            "updated_at": db_obj.updated_at,
+            "updated_columns": sorted(changes),
+            "risk_recalculated": False,
+            "profil_risque_calcule": db_obj.profil_risque_calcule,
+            "profil_risque_score": db_obj.profil_risque_score,
+            "lcb_ft_niveau_risque": db_obj.lcb_ft_niveau_risque,
+        }
+
+        if not normalized and not changes:
+            return result
+
+        values = dict(changes)
+
+        # Recalcul uniquement si l'empreinte d'un score a changé
+        scoring = score_client(AttributeView(changes, db_obj))
+        if scoring:
+            values.update(scoring)
+            result["risk_recalculated"] = True
+            for key in ("profil_risque_calcule", "profil_risque_score", "lcb_ft_niveau_risque"):
+                if key in scoring:
+                    result[key] = scoring[key]
+
+        if normalized:
+            values["form_data"] = build_jsonb_expression(Client.form_data, normalized)
+
+        row = (await db.execute(
+            update(Client)
+            .where(and_(Client.id == db_obj.id, Client.version == version))
+            .values(**values, version=Client.version + 1)
+            .returning(Client.version, Client.updated_at)
+            .execution_options(synchronize_session=False)
+        )).first()
+
+        if row is None:
+            return None
+
+        result["version"] = row.version
+        result["updated_at"] = row.updated_at
+        return result
+
     async def update_profil_risque(
         self,
         db: AsyncSession,
@@ -346,6 +462,9 @@ class CRUDClient:
     ) -> bool:
         """
         Mettre à jour le profil de risque calculé
+
+        Profil posé hors du scoring mémoïsé: l'empreinte est effacée pour
+        que la prochaine écriture recalcule le profil.
         
         Args:
             db: Session database
@@ -362,7 +481,8 @@ class CRUDClient:
             .values(
                 profil_risque_calcule=profil,
                 profil_risque_score=score,
-                profil_risque_date_calcul=datetime.utcnow()
+                profil_risque_date_calcul=datetime.utcnow(),
+                profil_risque_empreinte=None
             )
         )
         await db.commit()
@@ -3,7 +3,7 @@ CRUD operations pour Document
 Génération et gestion des documents DOCX et CSV
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
 from datetime import datetime
 import hashlib
@@ -12,8 +12,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 from sqlalchemy.orm import selectinload
 
+from app.models.client import Client
 from app.models.document import Document, TypeDocument
 from app.schemas.document import DocumentCreate
+from app.services.document_storage import StoredDocument
 from app.config import settings
 
 
@@ -36,7 +38,9 @@ class CRUDDocument:
         nom_fichier: str,
         chemin_fichier: str,
         genere_par: UUID,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        stockage: Optional[StoredDocument] = None,
+        empreinte_rendu: Optional[str] = None
     ) -> Document:
         """
         Créer un nouveau document
@@ -49,6 +53,8 @@ class CRUDDocument:
             chemin_fichier: Chemin complet du fichier
             genere_par: ID de l'utilisateur générateur
             metadata: Métadonnées additionnelles
+            stockage: Blob enregistré (taille et hash calculés à l'écriture)
+            empreinte_rendu: Empreinte du rendu v2 (cache de génération)
             
         Returns:
             Document créé
@@ -57,7 +63,11 @@ class CRUDDocument:
         taille_octets = None
         hash_fichier = None
         
-        if os.path.exists(chemin_fichier):
+        if stockage:
+            # Déjà calculés pendant l'écriture du blob
+            taille_octets = stockage.taille_octets
+            hash_fichier = stockage.hash_fichier
+        elif os.path.exists(chemin_fichier):
             # Taille du fichier
             taille_octets = os.path.getsize(chemin_fichier)
             
@@ -72,6 +82,8 @@ class CRUDDocument:
             chemin_fichier=chemin_fichier,
             taille_octets=taille_octets,
             hash_fichier=hash_fichier,
+            stockage_cle=stockage.cle if stockage else None,
+            empreinte_rendu=empreinte_rendu,
             genere_par=genere_par,
             metadata=metadata
         )
@@ -95,7 +107,7 @@ class CRUDDocument:
         sha256_hash = hashlib.sha256()
         with open(filepath, "rb") as f:
             # Lire par chunks pour les gros fichiers
-            for byte_block in iter(lambda: f.read(4096), b""):
+            for byte_block in iter(lambda: f.read(1024 * 1024), b""):
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
     
@@ -128,13 +140,70 @@ class CRUDDocument:
         )
         return result.scalar_one_or_none()
     
+    async def find_by_render_fingerprint(
+        self,
+        db: AsyncSession,
+        *,
+        client_id: UUID,
+        type_document: TypeDocument,
+        empreinte_rendu: str
+    ) -> Optional[Document]:
+        """
+        Dernier document non signé issu d'un rendu identique
+        
+        Args:
+            db: Session database
+            client_id: ID du client
+            type_document: Type de document
+            empreinte_rendu: Empreinte du rendu
+            
+        Returns:
+            Document ou None
+        """
+        result = await db.execute(
+            select(Document)
+            .where(
+                Document.client_id == client_id,
+                Document.type_document == type_document.value,
+                Document.empreinte_rendu == empreinte_rendu,
+                Document.signe == False
+            )
+            .order_by(Document.date_generation.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_for_download(
+        self,
+        db: AsyncSession,
+        id: UUID
+    ) -> Optional[Tuple[Document, Optional[UUID]]]:
+        """
+        Récupérer un document et le conseiller de son client en une requête
+        
+        Args:
+            db: Session database
+            id: ID du document
+            
+        Returns:
+            Tuple (document, conseiller_id) ou None
+        """
+        result = await db.execute(
+            select(Document, Client.conseiller_id)
+            .outerjoin(Client, Client.id == Document.client_id)
+            .where(Document.id == id)
+        )
+        row = result.first()
+        return (row[0], row[1]) if row else None
+    
     async def get_by_client(
         self,
         db: AsyncSession,
         *,
         client_id: UUID,
         type_document: Optional[TypeDocument] = None,
-        signe_only: bool = False
+        signe_only: bool = False,
+        document_ids: Optional[List[UUID]] = None
     ) -> List[Document]:
         """
         Récupérer les documents d'un client
@@ -144,12 +213,16 @@ class CRUDDocument:
             client_id: ID du client
             type_document: Filtrer par type
             signe_only: Uniquement les signés
+            document_ids: Restreindre à ces documents
             
         Returns:
             Liste de documents
         """
         query = select(Document).where(Document.client_id == client_id)
         
+        if document_ids:
+            query = query.where(Document.id.in_(document_ids))
+        
         if type_document:
             query = query.where(Document.type_document == type_document.value)
         
@@ -304,8 +377,9 @@ class CRUDDocument:
         """
         document = await self.get(db, id=id)
         if document:
-            # Supprimer le fichier physique si demandé
-            if delete_file and document.file_exists:
+            # Supprimer le fichier physique si demandé (un blob partagé
+            # est supprimé par le nettoyage des orphelins)
+            if delete_file and not document.stockage_cle and document.file_exists:
                 try:
                     os.remove(document.chemin_fichier)
                 except OSError:
@@ -3,13 +3,15 @@ Configuration de la base de données PostgreSQL
 Utilisation de SQLAlchemy 2.0 avec support async
 """
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from sqlalchemy import text
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
 import logging
+import uuid
 from app.config import settings
+from app.core.db_instrumentation import InstrumentedAsyncPool, instrument_engine
 
 # Logger
 logger = logging.getLogger(__name__)
@@ -18,24 +20,97 @@ logger = logging.getLogger(__name__)
 # CONFIGURATION ENGINE
 # ==========================================
 
-# Paramètres de connexion selon l'environnement
-if settings.ENVIRONMENT == 'testing':
-    # Pool null pour les tests
-    engine = create_async_engine(
-        settings.DATABASE_URL,
-        echo=settings.DATABASE_ECHO,
-        poolclass=NullPool,
+def pool_sizing(pool_size: int, max_overflow: int, workers: int, max_connections: int) -> Tuple[int, int]:
+    """
+    Taille du pool d'un processus
+
+    Sans budget (max_connections <= 0), les valeurs configurées sont gardées.
+    Avec un budget, chaque worker en reçoit une part égale: pool_size est
+    plafonné à cette part et le débordement ne peut pas la dépasser.
+
+    Returns:
+        (pool_size, max_overflow)
+    """
+    if max_connections <= 0:
+        return pool_size, max_overflow
+    share = max(1, max_connections // max(1, workers))
+    size = max(1, min(pool_size, share))
+    return size, max(0, min(max_overflow, share - size))
+
+
+def connect_args() -> Dict[str, Any]:
+    """
+    Options asyncpg (cache des requêtes préparées)
+
+    Derrière PgBouncer en mode transaction, deux transactions successives
+    peuvent s'exécuter sur des connexions serveur différentes: les caches de
+    requêtes préparées sont désactivés et chaque requête préparée reçoit un
+    nom unique (pas de collision "__asyncpg_stmt_1__" entre clients).
+    """
+    if settings.DATABASE_PGBOUNCER:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+    }
+
+
+def engine_options(url: str, pool_size: int, max_overflow: int, poolclass: type) -> Dict[str, Any]:
+    """Options de create_async_engine selon l'environnement et le mode de pool"""
+    options: Dict[str, Any] = {"echo": settings.DATABASE_ECHO}
+    if url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = connect_args()
+
+    if settings.ENVIRONMENT == 'testing' or settings.DATABASE_POOL_MODE == 'null':
+        # Pas de pool local: tests, ou pooling assuré par PgBouncer
+        options["poolclass"] = NullPool
+        return options
+
+    size, overflow = pool_sizing(
+        pool_size, max_overflow, settings.API_WORKERS, settings.DATABASE_MAX_CONNECTIONS
     )
-else:
-    # Pool normal pour dev/prod
-    engine = create_async_engine(
-        settings.DATABASE_URL,
-        echo=settings.DATABASE_ECHO,
-        pool_size=settings.DATABASE_POOL_SIZE,
-        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    options.update(
+        pool_size=size,
+        max_overflow=overflow,
+        poolclass=poolclass,
         pool_pre_ping=True,  # Vérifier connexion avant utilisation
         pool_recycle=3600,   # Recycler connexions après 1h
     )
+    return options
+
+
+# Pool mesuré (attente et occupation) pour le primaire
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    **engine_options(
+        settings.DATABASE_URL, settings.DATABASE_POOL_SIZE, settings.DATABASE_MAX_OVERFLOW, InstrumentedAsyncPool
+    )
+)
+if isinstance(engine.pool, AsyncAdaptedQueuePool):
+    logger.info(
+        f"Pool database: {engine.pool.size()} connexions (+{engine.pool._max_overflow} en débordement) "
+        f"par worker, workers={settings.API_WORKERS}, pgbouncer={settings.DATABASE_PGBOUNCER}"
+    )
+
+# Durée par requête normalisée, journal des requêtes lentes
+instrument_engine(engine)
+
+# Réplica en lecture (optionnel): engine et pool distincts
+# (jauges db_connections_* réservées au primaire)
+replica_engine: Optional[AsyncEngine] = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        settings.DATABASE_REPLICA_URL,
+        **engine_options(
+            settings.DATABASE_REPLICA_URL, settings.DATABASE_REPLICA_POOL_SIZE,
+            settings.DATABASE_REPLICA_MAX_OVERFLOW, AsyncAdaptedQueuePool
+        )
+    )
+    instrument_engine(replica_engine, pool_metrics=False)
 
 # ==========================================
 # SESSION FACTORY
@@ -50,6 +125,15 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
+# Sessions de lecture sur le réplica (None si pas de réplica)
+ReadSessionLocal = async_sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False
+) if replica_engine is not None else None
+
 # ==========================================
 # BASE MODEL
 # ==========================================
@@ -85,6 +169,22 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session en lecture seule sur le réplica (sur le primaire si aucun réplica)
+
+    Rien n'est validé: la transaction est annulée en fin de requête.
+    Le choix réplica / primaire par requête est fait par get_read_session
+    (app.core.deps).
+    """
+    factory = ReadSessionLocal or AsyncSessionLocal
+    async with factory() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+            await session.close()
+
 # ==========================================
 # HELPERS
 # ==========================================
@@ -106,6 +206,8 @@ async def close_db():
     Ferme proprement les connexions à la base de données
     """
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
     logger.info("Connexions database fermées")
 
 async def check_db_connection() -> bool:
@@ -4,29 +4,53 @@ Application principale de gestion patrimoniale
 """
 
 import os
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from sqlalchemy.orm.exc import StaleDataError
 from dotenv import load_dotenv
-import logging
 
-# Configurer le logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
-
-# Configuration et Database
+# Configuration
 from app.config import get_settings
+from app.core.logging import get_logger, setup_logging
+
+settings = get_settings()
+
+# Configurer le logging: file bornée, JSON sérialisé et écrit dans un thread dédié
+# (identifiant de requête et trace ajoutés à chaque log, voir app.core.tracing)
+setup_logging(
+    level=settings.LOG_LEVEL,
+    json_format=settings.LOG_JSON,
+    log_file=settings.LOG_FILE if os.path.isdir(os.path.dirname(settings.LOG_FILE)) else None,
+    queue_size=settings.LOG_QUEUE_SIZE,
+    debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE,
+    logger_sample_rates={"app.validation": settings.LOG_VALIDATION_SAMPLE_RATE},
+    levels=settings.LOG_LEVELS,
+)
+logger = get_logger(__name__)
+validation_logger = get_logger("app.validation")
+
+# Database et services
+from app.core.tracing import RequestContextMiddleware, configure_tracing, shutdown_tracing
+from app.core.metrics import PROMETHEUS_AVAILABLE, PrometheusMiddleware
+from app.core.read_replica import ReadYourWritesMiddleware
 from app.database import check_db_connection
+from app.services.audit_partitions import ensure_audit_partitions, get_audit_partition_scheduler
+from app.services.template_manager import get_template_manager
+from app.services.template_warmup import run_template_warmup
+from app.services.health_monitor import get_health_monitor
+from app.core.loop_watchdog import get_loop_watchdog
 
-# Routeur principal API
+# Routeur principal API et probes de santé
 from app.api import api_router
+from app.api.health import router as health_router
 
 # Charger les variables d'environnement
 load_dotenv()
-settings = get_settings()
 
 
 # --- Gestion du cycle de vie de l'application ---
@@ -39,15 +63,58 @@ async def lifespan(app: FastAPI):
     print(f"📌 Environnement: {settings.ENVIRONMENT}")
     print(f"📌 Version: {settings.APP_VERSION}")
 
+    # Export des spans (TRACING_EXPORTER)
+    if configure_tracing():
+        print(f"✅ Traçage actif ({settings.TRACING_EXPORTER})")
+
     # Vérification connexion base de données
     db_connected = await check_db_connection()
     if db_connected:
         print("✅ Base de données PostgreSQL connectée")
+
+        # Partitions audit_logs du mois courant et des mois à venir
+        try:
+            created = await ensure_audit_partitions()
+            if created:
+                print(f"✅ Partitions audit créées: {', '.join(created)}")
+        except Exception as e:
+            print(f"⚠️  Partitions audit non vérifiées: {e}")
     else:
         print("⚠️  Base de données non accessible au démarrage")
 
+    # Partitions audit_logs revérifiées périodiquement (changement de mois)
+    partition_scheduler = get_audit_partition_scheduler()
+    if partition_scheduler.start():
+        print(f"✅ Vérification des partitions audit ({settings.AUDIT_PARTITIONS_CHECK_INTERVAL:g}s)")
+
+    # Registre des templates DOCX et rechargement à chaud
+    template_manager = get_template_manager()
+    if template_manager.start_watcher(settings.TEMPLATES_WATCH_INTERVAL):
+        print(f"✅ Surveillance des templates ({template_manager.templates_dir})")
+
+    # Préchauffage en tâche de fond: /health/ready répond 503 jusqu'à la fin
+    warmup_task = asyncio.create_task(run_template_warmup())
+
+    # Retard de la boucle d'événements et détection des appels bloquants
+    loop_watchdog = get_loop_watchdog()
+    if loop_watchdog.start():
+        print(f"✅ Surveillance de la boucle (seuil {settings.EVENT_LOOP_BLOCK_THRESHOLD_MS:g} ms)")
+
+    # État des composants rafraîchi en tâche de fond (lu par /health et /health/ready)
+    health_monitor = get_health_monitor()
+    if health_monitor.start():
+        print(f"✅ Moniteur de santé ({settings.HEALTH_CHECK_INTERVAL:g}s)")
+
     yield
 
+    await health_monitor.stop()
+    await loop_watchdog.stop()
+    await partition_scheduler.stop()
+
+    if not warmup_task.done():
+        warmup_task.cancel()
+    template_manager.stop_watcher()
+    shutdown_tracing()
     print("🛑 API FastAPI - Arrêt de l'application...")
 
 
@@ -70,24 +137,35 @@ app.add_middleware(
     allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
     allow_methods=settings.CORS_ALLOW_METHODS,
     allow_headers=settings.CORS_ALLOW_HEADERS,
-    expose_headers=["Content-Disposition"],  # Permettre au frontend de lire le nom de fichier
+    expose_headers=["Content-Disposition", "X-Request-ID"],  # Nom de fichier et identifiant de requête
 )
 
 
+# --- Métriques HTTP (ajouté en dernier: englobe CORS et les routes) ---
+if PROMETHEUS_AVAILABLE:
+    app.add_middleware(PrometheusMiddleware)
+
+# --- Lire ses propres écritures: marque posée avant l'envoi de la réponse ---
+app.add_middleware(ReadYourWritesMiddleware)
+
+# --- Identifiant de requête et span racine (le plus externe: couvre aussi les métriques) ---
+app.add_middleware(RequestContextMiddleware)
+
+
 # --- Handler pour les erreurs de validation ---
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    """Log detailed validation errors"""
+    """Une ligne structurée par 422 (valeurs saisies non journalisées)"""
     errors = exc.errors()
-    logger.error("=" * 50)
-    logger.error("VALIDATION ERROR DETAILS:")
-    for error in errors:
-        logger.error(f"  Field: {error.get('loc')}")
-        logger.error(f"  Message: {error.get('msg')}")
-        logger.error(f"  Type: {error.get('type')}")
-        logger.error(f"  Input: {error.get('input')}")
-        logger.error("-" * 30)
-    logger.error("=" * 50)
+    validation_logger.warning(
+        f"Erreur de validation: {request.method} {request.url.path}",
+        extra={
+            "errors": [
+                {"loc": error.get("loc"), "msg": error.get("msg"), "type": error.get("type")}
+                for error in errors
+            ]
+        }
+    )
 
     return JSONResponse(
         status_code=422,
@@ -95,9 +173,31 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+# --- Handler pour les conflits de version (verrou optimiste) ---
+@app.exception_handler(StaleDataError)
+async def stale_data_exception_handler(request: Request, exc: StaleDataError):
+    """
+    409 quand une ligne versionnée (Client.version) a été modifiée entre la
+    lecture et l'écriture: PUT, PATCH ou sauvegarde de formulaire concurrents.
+    La session a déjà été annulée par get_db.
+    """
+    logger.warning(
+        f"Conflit de version: {request.method} {request.url.path}",
+        extra={"error": str(exc)}
+    )
+
+    return JSONResponse(
+        status_code=409,
+        content={"detail": "Ressource modifiée entre-temps, recharger avant de réessayer"}
+    )
+
+
 # --- Inclusion du routeur principal ---
 app.include_router(api_router, prefix=settings.API_PREFIX)
 
+# --- Probes et métriques (hors préfixe API: /health, /health/live, /health/ready, /metrics) ---
+app.include_router(health_router)
+
 
 # --- Routes de santé et statut ---
 @app.get("/", tags=["Health"])
@@ -109,15 +209,3 @@ async def root():
         "status": "running",
         "environment": settings.ENVIRONMENT
     }
-
-
-@app.get("/health", tags=["Health"])
-async def health_check():
-    """Health check pour monitoring"""
-    db_status = await check_db_connection()
-
-    return {
-        "status": "healthy" if db_status else "degraded",
-        "database": "connected" if db_status else "disconnected",
-        "version": settings.APP_VERSION
-    }
\ No newline at end of file
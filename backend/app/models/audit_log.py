@@ -1,14 +1,17 @@
 """
 Modèle AuditLog - Table de traçabilité des actions
 Conformité réglementaire AMF/ACPR pour l'audit trail
+
+La table est partitionnée par mois sur created_at (voir
+database/migrations/partition_audit_logs.sql et app/services/audit_partitions.py).
 """
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB, INET
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 import enum
 
@@ -26,12 +29,26 @@ class AuditAction(str, enum.Enum):
     GENERATE_DOC = "GENERATE_DOC"
 
 
+def _utcnow() -> datetime:
+    """Horodatage UTC côté Python (clé de partition connue avant l'INSERT)"""
+    return datetime.now(timezone.utc)
+
+
 class AuditLog(Base):
     """
     Modèle AuditLog - Trace toutes les actions importantes
     Obligatoire pour conformité réglementaire
+
+    Partitionnement RANGE mensuel sur created_at: la clé primaire inclut
+    created_at et les index sont composites (entité/utilisateur + date) pour
+    que les lectures bornées dans le temps profitent du partition pruning.
     """
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index('idx_audit_entity_created', 'entity_type', 'entity_id', 'created_at'),
+        Index('idx_audit_user_created', 'user_id', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
     
     # ==========================================
     # COLONNES
@@ -42,34 +59,29 @@ class AuditLog(Base):
         UUID(as_uuid=True),
         primary_key=True,
         default=uuid.uuid4,
-        nullable=False,
-        index=True
+        nullable=False
     )
     
     # Utilisateur ayant effectué l'action
     user_id = Column(
         UUID(as_uuid=True),
-        ForeignKey('users.id'),
-        index=True
+        ForeignKey('users.id')
     )
     
     # Action effectuée
     action = Column(
         String(100),
-        nullable=False,
-        index=True
+        nullable=False
     )
     
     # Entité concernée
     entity_type = Column(
         String(50),
-        nullable=False,
-        index=True
+        nullable=False
     )
     
     entity_id = Column(
-        UUID(as_uuid=True),
-        index=True
+        UUID(as_uuid=True)
     )
     
     # Valeurs avant/après pour UPDATE
@@ -80,12 +92,13 @@ class AuditLog(Base):
     ip_address = Column(INET)
     user_agent = Column(Text)
     
-    # Timestamp
+    # Timestamp - clé de partition (fait partie de la clé primaire)
     created_at = Column(
         DateTime(timezone=True),
+        primary_key=True,
+        default=_utcnow,
         server_default=func.now(),
-        nullable=False,
-        index=True
+        nullable=False
     )
     
     # ==========================================
@@ -75,7 +75,9 @@ class Client(Base):
     # ==========================================
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     conseiller_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False, index=True)
-    numero_client = Column(String(50), unique=True, index=True)  # Format: FAR-2025-0001
+    # Format: FAR-2025-0001 - alloué par next_numero_client() dans l'INSERT
+    # (fonction et compteur: database/schema.sql, migrations/add_numero_client_counter.sql)
+    numero_client = Column(String(50), unique=True, index=True, server_default=func.next_numero_client())
     statut = Column(String(50), default=ClientStatut.PROSPECT.value, index=True)
     
     # ==========================================
@@ -296,6 +298,8 @@ class Client(Base):
     profil_risque_calcule = Column(String(50), index=True)
     profil_risque_score = Column(Integer)
     profil_risque_date_calcul = Column(DateTime(timezone=True))
+    profil_risque_empreinte = Column(String(64))  # Empreinte entrées + version des barèmes
+    profil_risque_regles_version = Column(String(50))  # RISK_RULES_VERSION appliquée
     
     # ==========================================
     # SECTION 9 : PRÉFÉRENCES DURABILITÉ (ESG)
@@ -317,6 +321,8 @@ class Client(Base):
     # SECTION 10 : LCB-FT (Lutte Blanchiment)
     # ==========================================
     lcb_ft_niveau_risque = Column(String(50), index=True)
+    lcb_ft_empreinte = Column(String(64))  # Empreinte entrées + version des règles
+    lcb_ft_regles_version = Column(String(50))  # Version des règles LCB-FT appliquée
     lcb_ft_ppe = Column(Boolean, default=False)
     lcb_ft_ppe_fonction = Column(String(255))
     lcb_ft_ppe_famille = Column(Boolean, default=False)
@@ -370,6 +376,12 @@ class Client(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     validated_at = Column(DateTime(timezone=True))
     validated_by = Column(UUID(as_uuid=True), ForeignKey('users.id'))
+
+    # Verrou optimiste: incrémenté à chaque UPDATE (autosave inclus)
+    version = Column(Integer, nullable=False, default=1, server_default='1')
+
+    # created_at/updated_at relus via RETURNING à l'INSERT/UPDATE (pas de refresh)
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": version}
     
     # ==========================================
     # RELATIONS
@@ -3,7 +3,7 @@ Modèle Document - Table des documents générés
 Gestion des documents DOCX et exports CSV
 """
 
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -39,6 +39,10 @@ class Document(Base):
     Traçabilité complète pour conformité AMF/ACPR
     """
     __tablename__ = "documents"
+    __table_args__ = (
+        # Recherche d'un rendu identique déjà généré (cache de génération)
+        Index('idx_documents_empreinte_rendu', 'client_id', 'type_document', 'empreinte_rendu'),
+    )
     
     # ==========================================
     # COLONNES
@@ -73,6 +77,10 @@ class Document(Base):
     chemin_fichier = Column(Text, nullable=False)
     taille_octets = Column(Integer)
     hash_fichier = Column(String(64))  # SHA-256 pour intégrité
+    # Clé du blob dans le stockage adressé par contenu (partagée entre documents identiques)
+    stockage_cle = Column(String(255), index=True)
+    # Empreinte du rendu (template, remplacements, conseiller): régénération évitée
+    empreinte_rendu = Column(String(64))
     
     # Génération
     genere_par = Column(
@@ -129,6 +137,8 @@ class Document(Base):
             "chemin_fichier": self.chemin_fichier,
             "taille_octets": self.taille_octets,
             "hash_fichier": self.hash_fichier,
+            "stockage_cle": self.stockage_cle,
+            "empreinte_rendu": self.empreinte_rendu,
             "genere_par": str(self.genere_par) if self.genere_par else None,
             "date_generation": self.date_generation.isoformat() if self.date_generation else None,
             "date_signature": self.date_signature.isoformat() if self.date_signature else None,
@@ -4,7 +4,7 @@ Schemas Pydantic pour Client - Validation des données
 """
 
 from pydantic import BaseModel, EmailStr, field_validator, Field, model_validator, ConfigDict
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime, date
 from decimal import Decimal
 from uuid import UUID
@@ -837,6 +837,7 @@ class ClientResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     validated_at: Optional[datetime] = None
+    version: int = 1
 
     # Propriétés calculées
     nom_complet_t1: Optional[str] = None
@@ -884,6 +885,7 @@ class ClientResponse(BaseModel):
             created_at=obj.created_at,
             updated_at=obj.updated_at,
             validated_at=obj.validated_at,
+            version=getattr(obj, 'version', None) or 1,
             nom_complet_t1=f"{obj.t1_prenom or ''} {obj.t1_nom or ''}".strip() or None,
             nom_complet_t2=f"{obj.t2_prenom or ''} {obj.t2_nom or ''}".strip() if obj.t2_nom else None,
             has_titulaire_2=bool(obj.t2_nom),
@@ -1135,4 +1137,46 @@ class ClientFormDataCreate(BaseModel):
         # Seuls les champs de suivi (rto_applicable, rto_genere, etc.) existent dans le modèle
         # Les données complètes RTO sont accessibles via form_data.rto
 
-        return result
\ No newline at end of file
+        return result
+
+
+# ==========================================
+# SCHEMAS AUTOSAVE (PATCH INCRÉMENTAL)
+# ==========================================
+
+class JsonPatchOperation(BaseModel):
+    """Opération JSON Patch (RFC 6902) sur form_data"""
+    op: Literal['add', 'replace', 'remove']
+    path: str  # Pointeur JSON, ex: "/titulaire1/nom"
+    value: Any = None
+
+
+class ClientFormPatch(BaseModel):
+    """
+    Schema autosave: delta du formulaire + version connue du frontend
+
+    Accepte des opérations JSON Patch et/ou un delta imbriqué
+    (JSON Merge Patch: null supprime la clé).
+    """
+    version: int = Field(..., ge=1)
+    operations: List[JsonPatchOperation] = []
+    delta: Optional[Dict[str, Any]] = None
+
+    @model_validator(mode='after')
+    def check_not_empty(self):
+        """Au moins une opération ou un delta"""
+        if not self.operations and not self.delta:
+            raise ValueError('operations ou delta requis')
+        return self
+
+
+class ClientFormPatchResponse(BaseModel):
+    """Réponse autosave: nouvelle version et champs recalculés"""
+    id: UUID
+    version: int
+    updated_at: Optional[datetime] = None
+    updated_columns: List[str] = []
+    risk_recalculated: bool = False
+    profil_risque_calcule: Optional[str] = None
+    profil_risque_score: Optional[int] = None
+    lcb_ft_niveau_risque: Optional[str] = None
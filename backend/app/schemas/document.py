@@ -78,6 +78,9 @@ class DocumentGenerateRequest(BaseModel):
     include_patrimoine_detail: Optional[bool] = True
     include_produits: Optional[bool] = True
     
+    # Rendre même si un document identique existe déjà
+    force_regeneration: bool = False
+    
     # Métadonnées additionnelles
     metadata: Optional[Dict[str, Any]] = None
 
@@ -89,6 +92,7 @@ class DocumentGenerateResponse(BaseModel):
     document_id: Optional[UUID] = None
     download_url: Optional[str] = None
     filename: Optional[str] = None
+    reused: bool = False
 
 
 class DocumentBulkGenerateRequest(BaseModel):
@@ -5,12 +5,14 @@ Import centralisé de tous les services
 
 from app.services.docx_generator import DocxGenerator
 from app.services.csv_exporter import CsvExporter
+from app.services.client_importer import ClientImporter
 from app.services.risk_calculator import calculate_risk_profile
 from app.services.lcb_ft_classifier import classify_lcb_ft_level
 
 __all__ = [
     'DocxGenerator',
     'CsvExporter',
+    'ClientImporter',
     'calculate_risk_profile',
     'classify_lcb_ft_level'
 ]
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Vue attributaire en lecture pour les calculateurs
+
+Les calculateurs de profil de risque et LCB-FT lisent des attributs
+(client.horizon_placement). Cette vue leur présente un dictionnaire
+(ligne d'import, combinaison d'entrées d'une règle) ou un client dont
+certaines colonnes sont surchargées (patch de formulaire), sans créer
+ni modifier d'objet ORM.
+"""
+
+from typing import Any, Mapping
+
+
+class AttributeView:
+    """
+    Vue en lecture: values, puis base, puis None
+
+    Args:
+        values: Colonnes exposées (prioritaires)
+        base: Objet lu pour les colonnes absentes de values (optionnel)
+    """
+
+    __slots__ = ('_values', '_base')
+
+    def __init__(self, values: Mapping[str, Any], base: Any = None):
+        self._values = values
+        self._base = base
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+        if self._base is not None:
+            return getattr(self._base, name, None)
+        return None
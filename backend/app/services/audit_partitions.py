@@ -0,0 +1,546 @@
+"""
+Service de maintenance des partitions audit_logs
+
+Ce module gère:
+- La création anticipée des partitions mensuelles (audit_logs_yYYYYmMM),
+  vérifiée au démarrage puis périodiquement par l'application
+- La reprise des lignes tombées dans audit_logs_default: déplacées dans la
+  partition de leur mois avant son rattachement, alerte sinon
+- La rétention: détachement des partitions expirées et des lignes expirées
+  de la partition par défaut
+- L'archivage compressé (.jsonl.gz) avant suppression définitive
+
+Usage (cron / tâche planifiée):
+    python -m app.services.audit_partitions ensure
+    python -m app.services.audit_partitions archive
+"""
+
+import asyncio
+import os
+import gzip
+import json
+import re
+import hashlib
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Table parente partitionnée
+PARENT_TABLE = "audit_logs"
+
+# Partition par défaut (lignes hors des partitions mensuelles)
+DEFAULT_PARTITION = "audit_logs_default"
+
+# Verrou consultatif: un seul worker crée les partitions à la fois
+PARTITION_LOCK_KEY = 0x61756469  # "audi"
+
+# Pattern des partitions mensuelles: audit_logs_y2026m10
+PARTITION_PATTERN = re.compile(r'^audit_logs_y(\d{4})m(\d{2})$')
+
+# Taille des lots lors de l'archivage
+ARCHIVE_BATCH_SIZE = 5000
+
+
+# ==========================================
+# CALCULS DE PÉRIODES
+# ==========================================
+
+def month_start(value: date) -> date:
+    """Premier jour du mois de la date donnée"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Ajoute (ou retire) un nombre de mois à un début de mois"""
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Nom de la partition pour un mois donné"""
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_bounds(month: date) -> Tuple[date, date]:
+    """Bornes [début, fin[ de la partition d'un mois"""
+    start = month_start(month)
+    return start, add_months(start, 1)
+
+
+def parse_partition_name(name: str) -> Optional[date]:
+    """
+    Extrait le mois couvert par une partition
+
+    Returns:
+        Premier jour du mois ou None si le nom ne correspond pas
+    """
+    match = PARTITION_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def expired_months(months: List[date], retention_months: int, today: Optional[date] = None) -> List[date]:
+    """
+    Sélectionne les mois entièrement sortis de la fenêtre de rétention
+
+    Args:
+        months: Mois couverts par les partitions existantes
+        retention_months: Nombre de mois conservés en ligne (mois courant inclus)
+        today: Date de référence (tests)
+
+    Returns:
+        Mois à archiver, du plus ancien au plus récent
+    """
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    return sorted(m for m in months if m < cutoff)
+
+
+def months_to_create(
+    existing: List[date],
+    default_months: List[date],
+    months_ahead: int,
+    today: Optional[date] = None
+) -> List[date]:
+    """
+    Mois dont la partition manque
+
+    Le mois courant, les mois anticipés et les mois présents dans la
+    partition par défaut (jusqu'au dernier mois anticipé: au-delà, les
+    dates sont aberrantes et restent signalées dans la partition par défaut).
+    """
+    current = month_start(today or date.today())
+    last = add_months(current, months_ahead)
+    wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    wanted.update(m for m in default_months if m <= last)
+    return sorted(wanted - set(existing))
+
+
+# ==========================================
+# OPÉRATIONS SQL
+# ==========================================
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    """Vérifie que audit_logs est bien une table partitionnée (relkind 'p')"""
+    result = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name"),
+        {"name": PARENT_TABLE}
+    )
+    return result.scalar() == 'p'
+
+
+async def _default_partition_exists(conn: AsyncConnection) -> bool:
+    result = await conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION})
+    return result.scalar() is not None
+
+
+async def default_partition_months(conn: AsyncConnection) -> List[date]:
+    """Mois des lignes présentes dans la partition par défaut"""
+    if not await _default_partition_exists(conn):
+        return []
+    result = await conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {DEFAULT_PARTITION}"
+    ))
+    return [row[0] for row in result]
+
+
+def _range_clause(start: date, end: date) -> str:
+    return f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+
+
+async def create_partition(conn: AsyncConnection, month: date, move_default_rows: bool = True) -> int:
+    """
+    Crée la partition d'un mois
+
+    Les lignes du mois déjà présentes dans la partition par défaut
+    empêcheraient CREATE TABLE ... PARTITION OF: la partition est alors
+    créée à part, remplie avec ces lignes (retirées de la partition par
+    défaut) puis rattachée, dans la même transaction.
+
+    Returns:
+        Nombre de lignes reprises de la partition par défaut
+    """
+    name = partition_name(month)
+    start, end = partition_bounds(month)
+
+    moved = 0
+    if move_default_rows:
+        result = await conn.execute(text(
+            f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {_range_clause(start, end)}"
+        ))
+        moved = result.scalar() or 0
+
+    if not moved:
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        return 0
+
+    await conn.execute(text(
+        f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {_range_clause(start, end)} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    await conn.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    logger.warning(
+        f"Partition {name}: {moved} ligne(s) reprise(s) de {DEFAULT_PARTITION}",
+        extra={"partition": name, "rows": moved}
+    )
+    return moved
+
+
+async def _alert_default_rows(conn: AsyncConnection) -> int:
+    """Signale les lignes restées dans la partition par défaut"""
+    from app.core.sentry import capture_message
+
+    result = await conn.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}"))
+    rows = result.scalar() or 0
+    if rows:
+        logger.warning(
+            f"{rows} ligne(s) d'audit hors partitions mensuelles dans {DEFAULT_PARTITION}",
+            extra={"rows": rows}
+        )
+        capture_message(
+            "Audit rows in default partition",
+            level="warning",
+            extra={"partition": DEFAULT_PARTITION, "rows": rows}
+        )
+    return rows
+
+
+async def ensure_future_partitions(
+    conn: AsyncConnection,
+    months_ahead: Optional[int] = None,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Crée les partitions manquantes (idempotent)
+
+    Mois courant, mois à venir et mois des lignes tombées dans la partition
+    par défaut (voir months_to_create); ces lignes sont déplacées dans leur
+    partition. Les lignes restantes sont signalées.
+
+    Args:
+        conn: Connexion en transaction
+        months_ahead: Nombre de mois anticipés (défaut: AUDIT_PARTITIONS_AHEAD_MONTHS)
+        today: Date de référence (tests)
+
+    Returns:
+        Noms des partitions créées
+    """
+    if months_ahead is None:
+        months_ahead = settings.AUDIT_PARTITIONS_AHEAD_MONTHS
+
+    if not await is_partitioned(conn):
+        logger.warning("audit_logs n'est pas partitionnée - migration partition_audit_logs.sql à appliquer")
+        return []
+
+    # Verrou libéré en fin de transaction (workers et cron concurrents)
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+
+    has_default = await _default_partition_exists(conn)
+    # Partitions détachées non archivées comprises: leur table existe encore
+    existing = [p["month"] for p in await list_partitions(conn)]
+    default_months = await default_partition_months(conn) if has_default else []
+
+    created = []
+    for month in months_to_create(existing, default_months, months_ahead, today):
+        await create_partition(conn, month, move_default_rows=has_default)
+        created.append(partition_name(month))
+
+    if created:
+        logger.info(f"Partitions audit_logs créées: {', '.join(created)}")
+    if has_default:
+        await _alert_default_rows(conn)
+
+    return created
+
+
+async def list_partitions(conn: AsyncConnection) -> List[Dict[str, Any]]:
+    """
+    Liste les partitions mensuelles (attachées ou déjà détachées)
+
+    Les partitions détachées mais non archivées (échec d'un run précédent)
+    sont reprises au run suivant.
+    """
+    result = await conn.execute(text("""
+        SELECT c.relname AS name,
+               EXISTS (
+                   SELECT 1 FROM pg_inherits i
+                   JOIN pg_class p ON p.oid = i.inhparent
+                   WHERE i.inhrelid = c.oid AND p.relname = :parent
+               ) AS attached
+        FROM pg_class c
+        WHERE c.relkind = 'r' AND c.relname LIKE :pattern
+        ORDER BY c.relname
+    """), {"parent": PARENT_TABLE, "pattern": f"{PARENT_TABLE}_y%"})
+
+    partitions = []
+    for row in result.mappings():
+        month = parse_partition_name(row["name"])
+        if month:
+            partitions.append({"name": row["name"], "month": month, "attached": row["attached"]})
+    return partitions
+
+
+def _archive_path(archive_dir: str, month: date) -> str:
+    """Chemin de l'archive d'un mois"""
+    return os.path.join(archive_dir, f"{PARENT_TABLE}_{month.year:04d}_{month.month:02d}.jsonl.gz")
+
+
+async def _export_rows(conn: AsyncConnection, query: str, target: str) -> Tuple[int, str]:
+    """
+    Exporte le résultat d'une requête en JSON Lines compressé
+
+    Écrit dans un fichier temporaire puis renomme: une archive présente
+    est toujours complète.
+
+    Returns:
+        (nombre de lignes, SHA-256 de l'archive)
+    """
+    tmp_path = f"{target}.tmp"
+    rows = 0
+
+    result = await conn.stream(text(query))
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+        async for partition_rows in result.mappings().partitions(ARCHIVE_BATCH_SIZE):
+            lines = [json.dumps(dict(row), ensure_ascii=False, default=str) for row in partition_rows]
+            fh.write("\n".join(lines) + "\n")
+            rows += len(lines)
+
+    sha256_hash = hashlib.sha256()
+    with open(tmp_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256_hash.update(chunk)
+
+    os.replace(tmp_path, target)
+    return rows, sha256_hash.hexdigest()
+
+
+async def _export_partition(conn: AsyncConnection, name: str, target: str) -> Tuple[int, str]:
+    """Exporte une partition détachée (voir _export_rows)"""
+    return await _export_rows(conn, f"SELECT * FROM {name} ORDER BY created_at", target)
+
+
+async def archive_default_rows(
+    engine: AsyncEngine,
+    cutoff: date,
+    archive_dir: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Archive puis supprime les lignes expirées de la partition par défaut
+
+    Export et suppression dans une même transaction REPEATABLE READ: seules
+    les lignes exportées sont supprimées.
+
+    Returns:
+        Rapport d'archivage, None si aucune ligne expirée
+    """
+    where = f"created_at < '{cutoff.isoformat()}'"
+
+    async with engine.connect() as conn:
+        if not await _default_partition_exists(conn):
+            return None
+        result = await conn.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {where}"))
+        if not result.scalar():
+            return None
+
+    target = os.path.join(
+        archive_dir,
+        f"{DEFAULT_PARTITION}_avant_{cutoff.isoformat()}_{datetime.utcnow():%Y%m%d%H%M%S}.jsonl.gz"
+    )
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="REPEATABLE READ")
+        async with conn.begin():
+            rows, checksum = await _export_rows(
+                conn, f"SELECT * FROM {DEFAULT_PARTITION} WHERE {where} ORDER BY created_at", target
+            )
+            await conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {where}"))
+
+    logger.info(f"Partition par défaut archivée: {rows} lignes antérieures à {cutoff} -> {target}")
+    return {
+        "partition": DEFAULT_PARTITION,
+        "rows": rows,
+        "archive": target,
+        "sha256": checksum,
+        "archived_at": datetime.utcnow().isoformat()
+    }
+
+
+async def archive_expired_partitions(
+    engine: AsyncEngine,
+    retention_months: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    today: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """
+    Détache, archive puis supprime les partitions hors rétention
+
+    Chaque partition est traitée dans sa propre transaction:
+    1. DETACH PARTITION (les requêtes sur audit_logs ne la voient plus)
+    2. Export .jsonl.gz dans AUDIT_ARCHIVE_PATH
+    3. DROP TABLE uniquement si l'archive est écrite
+
+    Les lignes expirées de la partition par défaut sont archivées puis
+    supprimées de la même façon (archive_default_rows).
+
+    Args:
+        engine: Engine async
+        retention_months: Mois conservés en ligne (défaut: AUDIT_RETENTION_MONTHS)
+        archive_dir: Dossier des archives (défaut: AUDIT_ARCHIVE_PATH)
+        today: Date de référence (tests)
+
+    Returns:
+        Rapport par partition archivée
+    """
+    if retention_months is None:
+        retention_months = settings.AUDIT_RETENTION_MONTHS
+    if archive_dir is None:
+        archive_dir = settings.AUDIT_ARCHIVE_PATH
+
+    os.makedirs(archive_dir, exist_ok=True)
+
+    async with engine.connect() as conn:
+        partitions = await list_partitions(conn)
+
+    by_month = {p["month"]: p for p in partitions}
+    report = []
+
+    for month in expired_months(list(by_month), retention_months, today):
+        partition = by_month[month]
+        name = partition["name"]
+
+        try:
+            if partition["attached"]:
+                async with engine.begin() as conn:
+                    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                logger.info(f"Partition détachée: {name}")
+
+            target = _archive_path(archive_dir, month)
+            async with engine.connect() as conn:
+                rows, checksum = await _export_partition(conn, name, target)
+
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP TABLE {name}"))
+
+            logger.info(f"Partition archivée: {name} ({rows} lignes) -> {target}")
+            report.append({
+                "partition": name,
+                "rows": rows,
+                "archive": target,
+                "sha256": checksum,
+                "archived_at": datetime.utcnow().isoformat()
+            })
+
+        except Exception as e:
+            # La partition reste détachée (données intactes) et sera reprise
+            logger.error(f"Échec archivage {name}: {e}")
+            report.append({"partition": name, "error": str(e)})
+
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    try:
+        default_report = await archive_default_rows(engine, cutoff, archive_dir)
+        if default_report:
+            report.append(default_report)
+    except Exception as e:
+        logger.error(f"Échec archivage {DEFAULT_PARTITION}: {e}")
+        report.append({"partition": DEFAULT_PARTITION, "error": str(e)})
+
+    return report
+
+
+# ==========================================
+# POINTS D'ENTRÉE
+# ==========================================
+
+async def ensure_audit_partitions() -> List[str]:
+    """Crée les partitions à venir avec l'engine de l'application"""
+    from app.database import engine
+
+    async with engine.begin() as conn:
+        return await ensure_future_partitions(conn)
+
+
+async def run_audit_retention() -> List[Dict[str, Any]]:
+    """Job de rétention complet: partitions à venir + archivage"""
+    from app.database import engine
+
+    await ensure_audit_partitions()
+    return await archive_expired_partitions(engine)
+
+
+class AuditPartitionScheduler:
+    """
+    Vérifie les partitions audit_logs à intervalle régulier
+
+    Sans ce passage, un processus démarré avant un changement de mois
+    écrirait dans la partition par défaut une fois les mois anticipés
+    épuisés. Les workers concurrents sont sérialisés par verrou consultatif.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval if interval is not None else settings.AUDIT_PARTITIONS_CHECK_INTERVAL
+        self._task: Optional[asyncio.Task] = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await ensure_audit_partitions()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Vérification des partitions audit_logs impossible: {e}")
+
+    def start(self) -> bool:
+        """Lance la vérification périodique (0 = désactivé)"""
+        if self.interval <= 0 or self._task is not None:
+            return False
+        self._task = asyncio.create_task(self._loop())
+        return True
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+# Instance globale
+_partition_scheduler: Optional[AuditPartitionScheduler] = None
+
+
+def get_audit_partition_scheduler() -> AuditPartitionScheduler:
+    """Obtenir l'instance de vérification des partitions"""
+    global _partition_scheduler
+    if _partition_scheduler is None:
+        _partition_scheduler = AuditPartitionScheduler()
+    return _partition_scheduler
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "ensure"
+    if command == "archive":
+        print(json.dumps(asyncio.run(run_audit_retention()), indent=2, default=str))
+    else:
+        print(json.dumps(asyncio.run(ensure_audit_partitions()), indent=2))
@@ -0,0 +1,484 @@
+"""
+Service d'import en masse des clients (CSV / XLSX)
+Reprise du portefeuille d'un autre cabinet
+
+Pipeline:
+- Lecture en flux (CSV Harvest ';' ou XLSX en read_only)
+- Normalisation des formats de l'export Harvest (OUI/NON, JJ/MM/AAAA, 1 234,56)
+- Validation par lots contre ClientCreate
+- Profil de risque et LCB-FT calculés en mémoire (empreintes et versions
+  des règles incluses, comme à la saisie)
+- Lecture, validation et calculs dans un thread, un lot à la fois
+  (seuls les INSERT restent sur la boucle d'événements)
+- Chargement par INSERT multi-lignes, numéros clients réservés par bloc
+- Rapport d'erreurs par ligne (CSV) et état du job (JSON)
+"""
+
+import asyncio
+import csv
+import json
+import os
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union, get_args, get_origin
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.logging import get_logger
+from app.core.tracing import continue_trace
+from app.models.client import Client
+from app.schemas.client import ClientCreate
+from app.services.csv_exporter import CsvExporter
+from app.services.attribute_view import AttributeView
+from app.services.rescoring import RESULT_COLUMNS
+from app.services.scoring import score_client
+
+logger = get_logger(__name__)
+
+# Extensions acceptées
+IMPORT_EXTENSIONS = ('.csv', '.xlsx')
+
+# Valeurs booléennes reconnues (export Harvest: OUI/NON)
+TRUE_VALUES = {'oui', 'o', 'true', 'vrai', '1', 'x', 'yes', 'y'}
+FALSE_VALUES = {'non', 'n', 'false', 'faux', '0', 'no'}
+
+
+class ClientImporter:
+    """
+    Importeur de clients en masse
+    Format d'entrée aligné sur CsvExporter.harvest_columns
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        """Initialise l'importeur avec le mapping des colonnes"""
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.harvest_columns = CsvExporter().harvest_columns
+        self.client_fields = ClientCreate.model_fields
+        self.table_columns = {column.name for column in Client.__table__.columns}
+
+    # ==========================================
+    # LECTURE EN FLUX
+    # ==========================================
+
+    def iter_rows(self, path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Itère sur les lignes d'un fichier CSV ou XLSX
+
+        Args:
+            path: Chemin du fichier
+
+        Yields:
+            (numéro de ligne dans le fichier, valeurs par colonne)
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            yield from self._iter_csv(path)
+        elif extension == '.xlsx':
+            yield from self._iter_xlsx(path)
+        else:
+            raise ValueError(f"Format non supporté: {extension}")
+
+    def iter_batches(self, path: str) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """Regroupe les lignes du fichier en lots de batch_size"""
+        batch = []
+        for row in self.iter_rows(path):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _iter_csv(self, path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Lecture CSV (séparateur ';' de l'export Harvest, ',' accepté)"""
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            header = f.readline()
+            delimiter = ';' if header.count(';') >= header.count(',') else ','
+            fieldnames = next(csv.reader([header], delimiter=delimiter))
+
+            reader = csv.DictReader(f, fieldnames=fieldnames, delimiter=delimiter)
+            for line_number, row in enumerate(reader, start=2):
+                yield line_number, row
+
+    def _iter_xlsx(self, path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Lecture XLSX en mode read_only (pas de chargement complet)"""
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                return
+            fieldnames = [str(h).strip() if h is not None else '' for h in header]
+
+            for line_number, values in enumerate(rows, start=2):
+                if values is None or all(v is None for v in values):
+                    continue
+                yield line_number, dict(zip(fieldnames, values))
+        finally:
+            workbook.close()
+
+    # ==========================================
+    # NORMALISATION
+    # ==========================================
+
+    @staticmethod
+    def _field_kind(annotation: Any) -> Any:
+        """Type de base d'un champ (Optional[X] -> X)"""
+        if get_origin(annotation) is Union:
+            args = [a for a in get_args(annotation) if a is not type(None)]
+            return args[0] if args else annotation
+        return annotation
+
+    def _normalize_value(self, kind: Any, value: Any) -> Any:
+        """Convertit une valeur de l'export Harvest vers le type du schéma"""
+        if isinstance(value, str):
+            value = value.strip()
+            if value == '':
+                return None
+
+        if kind is bool:
+            if isinstance(value, str):
+                lowered = value.lower()
+                if lowered in TRUE_VALUES:
+                    return True
+                if lowered in FALSE_VALUES:
+                    return False
+            return value
+
+        if kind is date:
+            if isinstance(value, datetime):
+                return value.date()
+            if isinstance(value, str) and '/' in value:
+                try:
+                    return datetime.strptime(value, "%d/%m/%Y").date()
+                except ValueError:
+                    return value
+            return value
+
+        if kind is Decimal:
+            if isinstance(value, str):
+                return value.replace('\xa0', '').replace(' ', '').replace(',', '.')
+            return value
+
+        if kind is str and not isinstance(value, str):
+            return str(value)
+
+        return value
+
+    def normalize_row(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ne garde que les colonnes connues de ClientCreate, valeurs converties
+
+        Les cellules vides sont omises pour laisser jouer les valeurs par
+        défaut du schéma.
+        """
+        data = {}
+        for key, value in raw.items():
+            if key is None:
+                continue
+            name = key.strip()
+            field = self.client_fields.get(name)
+            if field is None:
+                continue
+            normalized = self._normalize_value(self._field_kind(field.annotation), value)
+            if normalized is not None:
+                data[name] = normalized
+        return data
+
+    # ==========================================
+    # VALIDATION ET CONSTRUCTION
+    # ==========================================
+
+    def validate_batch(
+        self,
+        rows: List[Tuple[int, Dict[str, Any]]]
+    ) -> Tuple[List[Tuple[int, ClientCreate]], List[Dict[str, Any]]]:
+        """
+        Valide un lot de lignes contre ClientCreate
+
+        Returns:
+            (lignes valides, erreurs {"ligne", "champ", "message"})
+        """
+        valid = []
+        errors = []
+        for line_number, raw in rows:
+            try:
+                valid.append((line_number, ClientCreate.model_validate(self.normalize_row(raw))))
+            except ValidationError as e:
+                for error in e.errors():
+                    errors.append({
+                        "ligne": line_number,
+                        "champ": ".".join(str(loc) for loc in error.get("loc", ())),
+                        "message": error.get("msg", "")
+                    })
+        return valid, errors
+
+    def build_records(
+        self,
+        valid: List[Tuple[int, ClientCreate]],
+        *,
+        numeros: List[str],
+        conseiller_id: uuid.UUID,
+        job_id: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Construit les lignes à insérer, profil de risque et LCB-FT inclus
+
+        Les champs du schéma sans colonne dédiée sont conservés dans
+        form_data avec la traçabilité de l'import.
+        """
+        records = []
+        for (line_number, client_in), numero in zip(valid, numeros):
+            data = client_in.model_dump()
+            numero_source = data.pop('numero_client', None)
+
+            extra = {k: data.pop(k) for k in list(data) if k not in self.table_columns}
+            extra.update({
+                "source": "import",
+                "import_job_id": job_id,
+                "import_ligne": line_number,
+                "numero_source": numero_source
+            })
+
+            data.update({
+                'id': uuid.uuid4(),
+                'numero_client': numero,
+                'conseiller_id': conseiller_id,
+                'form_data': json.loads(json.dumps(extra, default=str)),
+            })
+
+            records.append(data)
+
+        # Profil de risque et niveau LCB-FT avec empreintes et versions des
+        # règles: le re-scoring et le formulaire réutilisent ces résultats.
+        # Toutes les colonnes sont posées (None si non calculable): mêmes clés
+        # pour chaque ligne de l'INSERT multi-lignes
+        computed_at = datetime.utcnow()
+        for data in records:
+            scoring = score_client(AttributeView(data), now=computed_at)
+            data.update({name: scoring.get(name) for name in RESULT_COLUMNS})
+
+        return records
+
+    # ==========================================
+    # CHARGEMENT
+    # ==========================================
+
+    async def load_batch(self, db: AsyncSession, records: List[Dict[str, Any]]) -> int:
+        """
+        INSERT multi-lignes d'un lot (insertmanyvalues, sans ORM unit of work)
+
+        Returns:
+            Nombre de clients insérés
+        """
+        if not records:
+            return 0
+        await db.execute(insert(Client.__table__), records)
+        return len(records)
+
+    async def run(
+        self,
+        path: str,
+        *,
+        job_id: str,
+        conseiller_id: uuid.UUID,
+        session_factory: Callable[[], AsyncSession],
+        error_writer: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Exécute l'import complet, un lot = une transaction
+
+        Lecture, validation et construction des lignes (profil, LCB-FT)
+        s'exécutent dans un thread, un lot à la fois: la boucle d'événements
+        ne porte que les requêtes SQL.
+
+        Args:
+            path: Fichier CSV/XLSX
+            job_id: Identifiant du job
+            conseiller_id: Conseiller propriétaire des clients importés
+            session_factory: Fabrique de sessions (AsyncSessionLocal)
+            error_writer: Reçoit les erreurs de chaque lot
+            on_progress: Reçoit les compteurs après chaque lot
+
+        Returns:
+            Compteurs finaux (lignes, importés, erreurs)
+        """
+        from app.crud.client import crud_client
+
+        stats = {"lignes": 0, "importes": 0, "lignes_en_erreur": 0, "lots": 0}
+
+        async def flush(batch: List[Tuple[int, Dict[str, Any]]]) -> None:
+            valid, errors = await asyncio.to_thread(self.validate_batch, batch)
+            if valid:
+                try:
+                    # Bloc réservé et validé aussitôt: le verrou du compteur n'est pas
+                    # tenu pendant l'INSERT (un lot rejeté laisse un trou de numérotation)
+                    async with session_factory() as db:
+                        numeros = await crud_client.reserve_numero_clients(db, len(valid))
+                        await db.commit()
+
+                    records = await asyncio.to_thread(
+                        self.build_records,
+                        valid, numeros=numeros, conseiller_id=conseiller_id, job_id=job_id
+                    )
+                    async with session_factory() as db:
+                        stats["importes"] += await self.load_batch(db, records)
+                        await db.commit()
+                except Exception as e:
+                    logger.error(f"Import {job_id}: échec du lot {stats['lots'] + 1}: {e}")
+                    errors.extend(
+                        {"ligne": line_number, "champ": "", "message": f"Lot rejeté: {e}"}
+                        for line_number, _ in valid
+                    )
+
+            stats["lignes"] += len(batch)
+            stats["lignes_en_erreur"] += len({error["ligne"] for error in errors})
+            stats["lots"] += 1
+            if errors and error_writer:
+                error_writer(errors)
+            if on_progress:
+                on_progress(dict(stats))
+
+        batches = self.iter_batches(path)
+        try:
+            while True:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                await flush(batch)
+        finally:
+            await asyncio.to_thread(batches.close)
+
+        return stats
+
+
+# ==========================================
+# JOBS D'IMPORT
+# ==========================================
+
+def job_dir() -> str:
+    """Dossier des fichiers d'import (sources, états, rapports)"""
+    os.makedirs(settings.IMPORT_PATH, exist_ok=True)
+    return settings.IMPORT_PATH
+
+
+def job_state_path(job_id: str) -> str:
+    """Fichier d'état JSON d'un job"""
+    return os.path.join(job_dir(), f"{job_id}.json")
+
+
+def job_errors_path(job_id: str) -> str:
+    """Rapport d'erreurs CSV d'un job"""
+    return os.path.join(job_dir(), f"{job_id}_erreurs.csv")
+
+
+def save_job_state(job_id: str, state: Dict[str, Any]) -> None:
+    """Écrit l'état du job (fichier temporaire puis renommage)"""
+    path = job_state_path(job_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def load_job_state(job_id: str) -> Optional[Dict[str, Any]]:
+    """Lit l'état d'un job, None s'il n'existe pas"""
+    path = job_state_path(job_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+async def run_import_job(
+    job_id: str,
+    path: str,
+    *,
+    conseiller_id: uuid.UUID,
+    user_id: uuid.UUID,
+    filename: str,
+    trace_context: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Job d'import exécuté en tâche de fond
+
+    L'état est mis à jour après chaque lot; les erreurs sont ajoutées au
+    rapport CSV au fil de l'eau. trace_context (tracing.inject() côté
+    requête) rattache les logs et spans du job à la requête d'origine.
+    """
+    with continue_trace(trace_context, "import.clients", **{"import.job_id": job_id}):
+        await _run_import_job(job_id, path, conseiller_id=conseiller_id, user_id=user_id, filename=filename)
+
+
+async def _run_import_job(
+    job_id: str,
+    path: str,
+    *,
+    conseiller_id: uuid.UUID,
+    user_id: uuid.UUID,
+    filename: str
+) -> None:
+    """Corps du job d'import (voir run_import_job)"""
+    from app.database import AsyncSessionLocal
+    from app.models.audit_log import AuditLog, AuditAction
+
+    state = load_job_state(job_id) or {"job_id": job_id}
+    state.update({"statut": "en_cours", "debut": datetime.utcnow().isoformat()})
+    save_job_state(job_id, state)
+
+    errors_file = open(job_errors_path(job_id), 'w', encoding='utf-8', newline='')
+    writer = csv.DictWriter(errors_file, fieldnames=["ligne", "champ", "message"], delimiter=';')
+    writer.writeheader()
+
+    def on_progress(stats: Dict[str, Any]) -> None:
+        state.update(stats)
+        save_job_state(job_id, state)
+
+    try:
+        stats = await ClientImporter().run(
+            path,
+            job_id=job_id,
+            conseiller_id=conseiller_id,
+            session_factory=AsyncSessionLocal,
+            error_writer=writer.writerows,
+            on_progress=on_progress
+        )
+        state.update(stats)
+        state["statut"] = "termine"
+    except Exception as e:
+        logger.error(f"Import {job_id} interrompu: {e}")
+        state.update({"statut": "echec", "erreur": str(e)})
+    finally:
+        errors_file.close()
+        state["fin"] = datetime.utcnow().isoformat()
+        save_job_state(job_id, state)
+        if os.path.exists(path):
+            os.remove(path)
+
+    # Traçabilité de l'import
+    try:
+        async with AsyncSessionLocal() as db:
+            await AuditLog.log_action(
+                db,
+                user_id=user_id,
+                action=AuditAction.CREATE.value,
+                entity_type="client_import",
+                new_values={
+                    "job_id": job_id,
+                    "fichier": filename,
+                    "statut": state["statut"],
+                    "importes": state.get("importes", 0),
+                    "lignes_en_erreur": state.get("lignes_en_erreur", 0)
+                }
+            )
+            await db.commit()
+    except Exception as e:
+        logger.error(f"Import {job_id}: audit non enregistré: {e}")
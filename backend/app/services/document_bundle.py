@@ -0,0 +1,174 @@
+"""
+Liasse documentaire d'un client en archive zip
+
+Ce module gère:
+- L'écriture incrémentale du zip (jamais matérialisé en mémoire)
+- Le stockage sans recompression des formats déjà compressés (DOCX)
+- Les noms d'entrées uniques et l'exclusion des fichiers absents
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Tuple
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from app.core.logging import get_logger
+from app.services.document_storage import (
+    CHUNK_SIZE,
+    PRECOMPRESSED_EXTENSIONS,
+    DocumentStorage,
+    get_document_storage,
+)
+
+logger = get_logger(__name__)
+
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+@dataclass
+class BundleEntry:
+    """Document à placer dans l'archive"""
+    nom: str
+    stockage_cle: Optional[str]
+    chemin_fichier: Optional[str]
+    taille_octets: Optional[int]
+    date_time: Tuple[int, int, int, int, int, int]
+
+    @property
+    def compress_type(self) -> int:
+        extension = os.path.splitext(self.nom)[1].lower()
+        return ZIP_STORED if extension in PRECOMPRESSED_EXTENSIONS else ZIP_DEFLATED
+
+
+def _unique_name(name: str, used: set) -> str:
+    """DER.docx, DER_2.docx, DER_3.docx..."""
+    if name not in used:
+        return name
+    stem, extension = os.path.splitext(name)
+    index = 2
+    while f"{stem}_{index}{extension}" in used:
+        index += 1
+    return f"{stem}_{index}{extension}"
+
+
+def bundle_entries(documents: Iterable[Any]) -> List[BundleEntry]:
+    """
+    Entrées de l'archive pour une liste de documents
+
+    Un même contenu sous le même nom (lignes partageant un blob) n'est
+    inclus qu'une fois; deux contenus de même nom sont renommés.
+
+    Args:
+        documents: Documents (ORM) du client
+
+    Returns:
+        Entrées dans l'ordre des documents
+    """
+    entries: List[BundleEntry] = []
+    seen = set()
+    used_names: set = set()
+
+    for document in documents:
+        if (document.nom_fichier, document.hash_fichier) in seen and document.hash_fichier:
+            continue
+        seen.add((document.nom_fichier, document.hash_fichier))
+
+        date_generation: Optional[datetime] = document.date_generation
+        name = _unique_name(document.nom_fichier, used_names)
+        used_names.add(name)
+        entries.append(BundleEntry(
+            nom=name,
+            stockage_cle=document.stockage_cle,
+            chemin_fichier=document.chemin_fichier,
+            taille_octets=document.taille_octets,
+            date_time=date_generation.timetuple()[:6] if date_generation else _ZIP_EPOCH,
+        ))
+    return entries
+
+
+# ==========================================
+# ÉCRITURE EN STREAMING
+# ==========================================
+
+class _StreamSink:
+    """Flux non seekable: zipfile y écrit, le générateur récupère les octets produits"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _open_entry(entry: BundleEntry, storage: DocumentStorage) -> BinaryIO:
+    """Contenu (décompressé) d'une entrée"""
+    if entry.stockage_cle:
+        return storage.open(entry.stockage_cle)
+    return open(entry.chemin_fichier, "rb")
+
+
+def iter_zip(
+    entries: Iterable[BundleEntry],
+    storage: Optional[DocumentStorage] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Archive zip produite bloc par bloc
+
+    Seuls un bloc de lecture et les en-têtes de l'entrée courante sont en
+    mémoire. Un fichier absent est ignoré (journalisé) sans interrompre
+    l'archive.
+
+    Args:
+        entries: Entrées de l'archive
+        storage: Stockage des blobs (instance globale par défaut)
+        chunk_size: Taille des blocs de lecture
+
+    Yields:
+        Octets de l'archive
+    """
+    storage = storage or get_document_storage()
+    sink = _StreamSink()
+
+    with ZipFile(sink, "w") as archive:
+        for entry in entries:
+            try:
+                source = _open_entry(entry, storage)
+            except FileNotFoundError:
+                logger.warning(f"Liasse: fichier absent ignoré ({entry.nom})")
+                continue
+
+            info = ZipInfo(entry.nom, date_time=entry.date_time)
+            info.compress_type = entry.compress_type
+            if entry.taille_octets:
+                # Permet à zipfile de choisir ZIP64 pour les gros fichiers
+                info.file_size = entry.taille_octets
+
+            with source, archive.open(info, "w") as target:
+                for chunk in iter(lambda: source.read(chunk_size), b""):
+                    target.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+
+            data = sink.drain()
+            if data:
+                yield data
+
+    # Répertoire central
+    yield sink.drain()
@@ -0,0 +1,204 @@
+"""
+Livraison HTTP des documents générés
+
+Ce module gère:
+- L'ETag fort issu de documents.hash_fichier et les réponses 304 (If-None-Match)
+- Les requêtes partielles (Range / If-Range, une seule plage)
+- La délégation à nginx (X-Accel-Redirect) quand DOCUMENT_X_ACCEL_PREFIX est défini
+"""
+
+import mimetypes
+import os
+import re
+from typing import Iterator, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.config import settings
+from app.models.document import Document
+from app.services.document_storage import (
+    CHUNK_SIZE,
+    COMPRESSED_SUFFIX,
+    DocumentStorage,
+    get_document_storage,
+)
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """Plage demandée hors du fichier (416)"""
+
+
+# ==========================================
+# EN-TÊTES CONDITIONNELS
+# ==========================================
+
+def etag_for(hash_fichier: Optional[str]) -> Optional[str]:
+    """ETag fort: le SHA-256 du contenu"""
+    return f'"{hash_fichier}"' if hash_fichier else None
+
+
+def etag_matches(header: Optional[str], etag: Optional[str]) -> bool:
+    """
+    If-None-Match: comparaison faible sur une liste d'ETags ou '*'
+
+    Args:
+        header: Valeur de l'en-tête If-None-Match
+        etag: ETag courant du document
+
+    Returns:
+        True si le client possède déjà cette version (304)
+    """
+    if not header or not etag:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Analyse un en-tête Range
+
+    Seule une plage d'octets est servie en 206: une plage multiple ou
+    illisible est ignorée (réponse complète, autorisé par la RFC 9110).
+
+    Args:
+        header: Valeur de l'en-tête Range
+        size: Taille du fichier
+
+    Returns:
+        (début, fin) inclusifs, ou None pour une réponse complète
+
+    Raises:
+        RangeNotSatisfiable: Plage entièrement hors du fichier
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Suffixe: les N derniers octets
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+
+    first = int(start)
+    last = int(end) if end else size - 1
+    if first >= size:
+        raise RangeNotSatisfiable(header)
+    if last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+def content_disposition(filename: str) -> str:
+    """Content-Disposition attachment (filename* pour les noms accentués)"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def iter_file_range(path: str, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Octets start..end (inclus) d'un fichier par blocs"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+# ==========================================
+# RÉPONSE DE TÉLÉCHARGEMENT
+# ==========================================
+
+def build_download_response(
+    document: Document,
+    request_headers: Mapping[str, str],
+    storage: Optional[DocumentStorage] = None
+) -> Response:
+    """
+    Réponse HTTP d'un document (304, 206, 416, X-Accel-Redirect ou fichier complet)
+
+    Args:
+        document: Document à servir (accès déjà vérifié)
+        request_headers: En-têtes de la requête
+        storage: Stockage des blobs (instance globale par défaut)
+
+    Returns:
+        Réponse Starlette
+
+    Raises:
+        FileNotFoundError: Fichier absent du stockage
+    """
+    storage = storage or get_document_storage()
+    etag = etag_for(document.hash_fichier)
+    media_type = mimetypes.guess_type(document.nom_fichier)[0] or "application/octet-stream"
+
+    # Contenu privé: le navigateur revalide à chaque fois (304 si inchangé)
+    cache_headers = {"Cache-Control": "private, no-cache"}
+    if etag:
+        cache_headers["ETag"] = etag
+    if etag_matches(request_headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    headers = {**cache_headers, "Content-Disposition": content_disposition(document.nom_fichier)}
+    key = document.stockage_cle
+
+    # Blob compressé: décompression à la volée, pas de plages
+    if key and key.endswith(COMPRESSED_SUFFIX):
+        return StreamingResponse(
+            storage.iter_chunks(key),
+            media_type=media_type,
+            headers={**headers, "Accept-Ranges": "none"}
+        )
+
+    path = storage.backend.local_path(key) if key else document.chemin_fichier
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    # nginx sert le blob (sendfile, plages) sans passer par Python
+    if key and settings.DOCUMENT_X_ACCEL_PREFIX:
+        headers["X-Accel-Redirect"] = f"{settings.DOCUMENT_X_ACCEL_PREFIX.rstrip('/')}/{key}"
+        return Response(media_type=media_type, headers=headers)
+
+    size = os.path.getsize(path)
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header and if_range and if_range != etag:
+        # Version différente de celle du client: contenu complet
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**cache_headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range:
+        start, end = byte_range
+        return StreamingResponse(
+            iter_file_range(path, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers={
+                **headers,
+                "Accept-Ranges": "bytes",
+                "Content-Range": f"bytes {start}-{end}/{size}",
+                "Content-Length": str(end - start + 1),
+            }
+        )
+
+    return FileResponse(path, media_type=media_type, headers={**headers, "Accept-Ranges": "bytes"})
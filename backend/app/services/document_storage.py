@@ -0,0 +1,422 @@
+"""
+Stockage des documents générés (adressage par contenu)
+
+Ce module gère:
+- Le calcul du SHA-256 pendant l'écriture (aucune relecture du fichier)
+- Le rangement des blobs par empreinte dans une arborescence répartie (ab/cd/<sha256>)
+- La déduplication: plusieurs lignes documents référencent le même blob
+- La compression gzip des formats non compressés (CSV, TXT)
+- Le nettoyage des blobs orphelins (python -m app.services.document_storage --gc)
+
+Le backend est interchangeable: système de fichiers local aujourd'hui,
+stockage objet compatible S3 ensuite (même interface StorageBackend).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.core.logging import get_logger
+from app.models.document import Document
+
+logger = get_logger(__name__)
+
+# Formats déjà compressés: gzip n'apporterait rien
+PRECOMPRESSED_EXTENSIONS = {'.docx', '.xlsx', '.pptx', '.pdf', '.zip', '.png', '.jpg', '.jpeg'}
+COMPRESSED_SUFFIX = '.gz'
+CHUNK_SIZE = 64 * 1024
+
+# Date fixe des entrées zip d'un DOCX (même contenu => mêmes octets)
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+@dataclass
+class StoredDocument:
+    """Blob enregistré dans le stockage"""
+    cle: str
+    hash_fichier: str
+    taille_octets: int
+    taille_stockee: int
+    compresse: bool
+    nom_fichier: str
+    chemin: str
+    deja_present: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ==========================================
+# ÉCRITURE AVEC EMPREINTE
+# ==========================================
+
+class _HashingWriter:
+    """
+    Flux d'écriture qui calcule le SHA-256 et la taille au fil de l'eau
+
+    Pas de seek(): zipfile écrit alors les descripteurs après chaque
+    entrée au lieu de revenir en arrière, l'empreinte reste exacte.
+    """
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self._sha256.update(data)
+        self.size += len(data)
+        self._raw.write(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+    def flush(self) -> None:
+        self._raw.flush()
+
+    @property
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+def write_docx(doc, stream: BinaryIO) -> None:
+    """
+    Sérialise un DOCX de façon déterministe
+
+    python-docx date chaque entrée zip de l'heure courante: deux rendus
+    identiques produiraient des octets (donc des empreintes) différents.
+    Le document est enregistré par l'API publique (Document.save), puis
+    ses entrées sont recopiées à date fixe dans le flux de destination.
+
+    Args:
+        doc: Document python-docx
+        stream: Flux de destination
+    """
+    buffer = BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    with ZipFile(buffer) as source, ZipFile(stream, 'w', compression=ZIP_DEFLATED) as target:
+        for entry in source.infolist():
+            info = ZipInfo(entry.filename, date_time=_ZIP_DATE_TIME)
+            info.compress_type = ZIP_DEFLATED
+            target.writestr(info, source.read(entry))
+
+
+# ==========================================
+# BACKENDS
+# ==========================================
+
+class StorageBackend(ABC):
+    """Interface d'un backend de stockage de blobs"""
+
+    name = "abstract"
+
+    @abstractmethod
+    def temp_dir(self) -> str:
+        """Dossier des fichiers en cours d'écriture"""
+
+    @abstractmethod
+    def put_file(self, key: str, path: str) -> bool:
+        """
+        Range un fichier temporaire sous la clé
+
+        Si la clé existe déjà, le fichier temporaire est ignoré et la date
+        du blob est rafraîchie (protège du nettoyage des orphelins).
+
+        Returns:
+            True si le blob a été créé
+        """
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Ouvre un blob en lecture"""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Supprime un blob"""
+
+    @abstractmethod
+    def iter_keys(self) -> Iterator[Tuple[str, float, int]]:
+        """Itère sur (clé, date de modification, taille) des blobs"""
+
+    @abstractmethod
+    def uri(self, key: str) -> str:
+        """Chemin ou URI enregistré dans documents.chemin_fichier"""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Chemin local du blob (None si le backend est distant)"""
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    """Backend système de fichiers local"""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def temp_dir(self) -> str:
+        # Même système de fichiers que les blobs: os.replace est atomique
+        path = os.path.join(self.root, '.tmp')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put_file(self, key: str, path: str) -> bool:
+        target = self._path(key)
+        if os.path.exists(target):
+            os.utime(target)
+            return False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        return True
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), 'rb')
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def iter_keys(self) -> Iterator[Tuple[str, float, int]]:
+        if not os.path.isdir(self.root):
+            return
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                yield key, stat.st_mtime, stat.st_size
+
+    def uri(self, key: str) -> str:
+        return self._path(key)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+
+def create_backend(name: str) -> StorageBackend:
+    """Instancie le backend configuré (DOCUMENT_STORAGE_BACKEND)"""
+    if name == "local":
+        return LocalStorageBackend(settings.DOCUMENT_STORAGE_PATH)
+    raise ValueError(f"Backend de stockage inconnu: {name}")
+
+
+# ==========================================
+# STOCKAGE ADRESSÉ PAR CONTENU
+# ==========================================
+
+class DocumentStorage:
+    """
+    Stockage des documents par empreinte SHA-256
+
+    Clé d'un blob: ab/cd/<sha256><extension>[.gz], l'empreinte portant
+    sur le contenu non compressé (celle de documents.hash_fichier).
+    """
+
+    def __init__(self, backend: StorageBackend, compress: bool = True):
+        self.backend = backend
+        self.compress = compress
+
+    @staticmethod
+    def make_key(digest: str, extension: str, compressed: bool) -> str:
+        """Clé répartie sur deux niveaux de dossiers"""
+        suffix = extension + (COMPRESSED_SUFFIX if compressed else '')
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+
+    @staticmethod
+    def digest_of(key: str) -> str:
+        """Empreinte SHA-256 contenue dans une clé"""
+        return key.rsplit('/', 1)[-1][:64]
+
+    def save(self, write: Callable[[BinaryIO], None], nom_fichier: str) -> StoredDocument:
+        """
+        Écrit un document en calculant son empreinte, puis le range sous sa clé
+
+        Args:
+            write: Fonction qui écrit le contenu dans le flux fourni
+            nom_fichier: Nom présenté à l'utilisateur (détermine l'extension)
+
+        Returns:
+            Blob enregistré (deja_present si un contenu identique existait)
+        """
+        extension = os.path.splitext(nom_fichier)[1].lower()
+        compressed = self.compress and extension not in PRECOMPRESSED_EXTENSIONS
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.backend.temp_dir(), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw:
+                if compressed:
+                    with gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0) as gz:
+                        writer = _HashingWriter(gz)
+                        write(writer)
+                else:
+                    writer = _HashingWriter(raw)
+                    write(writer)
+            stored_size = os.path.getsize(tmp_path)
+            key = self.make_key(writer.hexdigest, extension, compressed)
+            created = self.backend.put_file(key, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return StoredDocument(
+            cle=key,
+            hash_fichier=writer.hexdigest,
+            taille_octets=writer.size,
+            taille_stockee=stored_size,
+            compresse=compressed,
+            nom_fichier=nom_fichier,
+            chemin=self.backend.uri(key),
+            deja_present=not created,
+        )
+
+    def save_docx(self, doc, nom_fichier: str) -> StoredDocument:
+        """Enregistre un document python-docx"""
+        return self.save(lambda stream: write_docx(doc, stream), nom_fichier)
+
+    def save_bytes(self, data: bytes, nom_fichier: str) -> StoredDocument:
+        """Enregistre un contenu en mémoire (exports CSV)"""
+        return self.save(lambda stream: stream.write(data), nom_fichier)
+
+    def open(self, key: str) -> BinaryIO:
+        """Ouvre un blob (décompressé) en lecture"""
+        stream = self.backend.open(key)
+        if key.endswith(COMPRESSED_SUFFIX):
+            return gzip.GzipFile(fileobj=stream, mode='rb')
+        return stream
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Contenu décompressé par blocs (réponses en streaming)"""
+        with self.open(key) as stream:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                yield chunk
+
+
+_document_storage: Optional[DocumentStorage] = None
+
+
+def get_document_storage() -> DocumentStorage:
+    """Instance globale du stockage des documents"""
+    global _document_storage
+    if _document_storage is None:
+        _document_storage = DocumentStorage(
+            create_backend(settings.DOCUMENT_STORAGE_BACKEND),
+            compress=settings.DOCUMENT_STORAGE_COMPRESS,
+        )
+    return _document_storage
+
+
+# ==========================================
+# NETTOYAGE DES BLOBS ORPHELINS
+# ==========================================
+
+@dataclass
+class GcReport:
+    """Résultat d'un nettoyage des blobs orphelins"""
+    examines: int = 0
+    references: int = 0
+    orphelins: int = 0
+    recents: int = 0
+    supprimes: int = 0
+    octets_liberes: int = 0
+    dry_run: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+async def referenced_keys(engine: AsyncEngine) -> set:
+    """Clés de blobs référencées par au moins un document"""
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(Document.stockage_cle).where(Document.stockage_cle.isnot(None)).distinct()
+        )
+        return {row[0] for row in result}
+
+
+def collect_orphans(
+    storage: DocumentStorage,
+    referenced: set,
+    grace_hours: float,
+    dry_run: bool = False,
+    now: Optional[float] = None
+) -> GcReport:
+    """
+    Supprime les blobs qu'aucun document ne référence
+
+    Un blob plus récent que le délai de grâce est conservé: il peut avoir
+    été écrit par une génération dont la ligne n'est pas encore commitée.
+
+    Args:
+        storage: Stockage à nettoyer
+        referenced: Clés référencées en base
+        grace_hours: Délai de grâce en heures
+        dry_run: Compter sans supprimer
+        now: Horodatage de référence (tests)
+
+    Returns:
+        Rapport de nettoyage
+    """
+    report = GcReport(references=len(referenced), dry_run=dry_run)
+    limit = (now if now is not None else time.time()) - grace_hours * 3600
+
+    for key, mtime, size in storage.backend.iter_keys():
+        report.examines += 1
+        if key in referenced:
+            continue
+        report.orphelins += 1
+        if mtime > limit:
+            report.recents += 1
+            continue
+        if dry_run or storage.backend.delete(key):
+            report.supprimes += 1
+            report.octets_liberes += size
+
+    logger.info(
+        f"Nettoyage stockage: {report.orphelins} orphelin(s), {report.supprimes} supprimé(s), "
+        f"{report.octets_liberes} octets libérés{' (dry-run)' if dry_run else ''}"
+    )
+    return report
+
+
+async def run_gc(dry_run: bool = False) -> Dict[str, Any]:
+    """Nettoyage des orphelins avec l'engine et le stockage de l'application"""
+    from app.database import engine
+
+    referenced = await referenced_keys(engine)
+    report = collect_orphans(
+        get_document_storage(), referenced,
+        grace_hours=settings.DOCUMENT_GC_GRACE_HOURS, dry_run=dry_run
+    )
+    return report.to_dict()
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    if "--gc" in sys.argv:
+        print(json.dumps(asyncio.run(run_gc(dry_run="--dry-run" in sys.argv)), indent=2))
+    else:
+        print("Usage: python -m app.services.document_storage --gc [--dry-run]")
@@ -3,8 +3,12 @@ Service de génération de documents DOCX
 Utilise python-docx et les templates TXT officiels
 """
 
+import copy
+import hashlib
+import json
 import os
 import re
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, Dict, Any
 from docx import Document
@@ -14,8 +18,75 @@ from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
 
 from app.models.client import Client
+from app.models.document import TypeDocument
 from app.models.user import User
 from app.config import settings
+from app.services.document_storage import StoredDocument, get_document_storage
+from app.services.generation_profiler import generation_phase
+from app.services.template_manager import DocumentType, TemplateInfo, get_template_manager
+
+
+# Versions des templates DOCX v2 utilisées par le générateur: une modification
+# du fichier est rechargée à chaud, une nouvelle version doit être déclarée ici
+V2_TEMPLATE_VERSIONS = {
+    DocumentType.QCC: "2.0",
+    DocumentType.PROFIL_RISQUE: "2.0",
+    DocumentType.DER: "2.0",
+    DocumentType.CONVENTION_RTO: "2.0",
+}
+
+# Types de documents API rendus avec un template v2
+V2_DOCUMENT_TYPES = {
+    TypeDocument.DER: DocumentType.DER,
+    TypeDocument.QCC: DocumentType.QCC,
+    TypeDocument.KYC: DocumentType.QCC,
+    TypeDocument.PROFIL_RISQUE: DocumentType.PROFIL_RISQUE,
+    TypeDocument.CONVENTION_RTO: DocumentType.CONVENTION_RTO,
+}
+
+# Version du code de rendu v2 (builders, sections masquées): à incrémenter
+# quand un rendu change à entrées égales, pour invalider les empreintes
+RENDER_VERSION = "1"
+
+
+@dataclass
+class RenderPlan:
+    """Rendu v2 préparé: template figé, remplacements et empreinte"""
+    document_type: DocumentType
+    template: TemplateInfo
+    replacements: Dict[str, str]
+    empreinte: str
+    # Template parsé (en cache, jamais modifié) dont le checksum entre dans l'empreinte
+    source: Any
+
+
+def render_fingerprint(template_checksum: str, replacements: Dict[str, str], conseiller: User) -> str:
+    """
+    Empreinte d'un rendu: template, remplacements et conseiller
+
+    Deux générations de même empreinte produisent le même document.
+
+    Args:
+        template_checksum: Checksum du fichier template
+        replacements: Dictionnaire {{FIELD}} -> valeur
+        conseiller: Conseiller qui génère
+
+    Returns:
+        SHA-256 hexadécimal (64 caractères)
+    """
+    payload = {
+        "version": RENDER_VERSION,
+        "template": template_checksum,
+        "remplacements": replacements,
+        "conseiller": {
+            "id": str(conseiller.id) if conseiller.id else None,
+            "nom": conseiller.nom,
+            "prenom": conseiller.prenom,
+            "email": conseiller.email,
+        },
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
 
 
 class DocxGenerator:
@@ -27,16 +98,14 @@ class DocxGenerator:
 
     def __init__(self):
         """Initialise le générateur avec les chemins"""
-        self.export_path = settings.EXPORT_PATH
+        # Stockage adressé par contenu des documents générés
+        self.storage = get_document_storage()
 
         # Chemin vers les templates TXT - utilise le dossier templates du projet
         self.txt_templates_path = os.path.join(settings.DOCX_TEMPLATE_PATH, "txt")
 
-        # Chemin vers les templates DOCX v2
-        self.v2_templates_path = os.path.join(settings.DOCX_TEMPLATE_PATH, "v2")
-
-        # Créer le dossier export si nécessaire
-        os.makedirs(self.export_path, exist_ok=True)
+        # Templates DOCX v2: registre et cache du TemplateManager
+        self.template_manager = get_template_manager()
 
         # Charger les mentions légales une seule fois
         self._mentions_legales = self._load_mentions_legales()
@@ -49,11 +118,98 @@ class DocxGenerator:
         """Charger un template TXT"""
         filepath = os.path.join(self.txt_templates_path, filename)
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return f.read()
+            return self.template_manager.load_text(filepath)
         except FileNotFoundError:
             return ""
 
+    def plan_v2_document(
+        self,
+        document_type: DocumentType,
+        client: Client,
+        conseiller: User
+    ) -> Optional[RenderPlan]:
+        """
+        Préparer un rendu v2: template, remplacements et empreinte (sans rendu)
+
+        Args:
+            document_type: Type de document (clé de V2_TEMPLATE_VERSIONS)
+            client: Client
+            conseiller: Conseiller
+
+        Returns:
+            Plan de rendu ou None si le template est absent
+        """
+        with generation_phase("template_load"):
+            template = self.template_manager.get_template(
+                document_type, V2_TEMPLATE_VERSIONS[document_type]
+            )
+            if template is None:
+                return None
+            # Checksum du contenu rendu, pas celui du scan (fichier modifié depuis)
+            template_checksum, source = self.template_manager.load_parsed(template)
+
+        builders = {
+            DocumentType.QCC: self._build_client_replacements,
+            DocumentType.PROFIL_RISQUE: self._build_profil_risque_replacements,
+            DocumentType.DER: self._build_der_replacements,
+            DocumentType.CONVENTION_RTO: self._build_rto_replacements,
+        }
+        with generation_phase("replacements"):
+            replacements = builders[document_type](client, conseiller)
+
+        with generation_phase("fingerprint"):
+            empreinte = render_fingerprint(template_checksum, replacements, conseiller)
+
+        return RenderPlan(
+            document_type=document_type,
+            template=template,
+            replacements=replacements,
+            empreinte=empreinte,
+            source=source,
+        )
+
+    def render_plan(self, plan: RenderPlan) -> Document:
+        """Remplir le template du plan en mémoire (copie du template parsé lors du plan)"""
+        with generation_phase("template_load"):
+            doc = copy.deepcopy(plan.source)
+
+        # Remplacer les placeholders
+        with generation_phase("substitution"):
+            self._replace_placeholders_in_doc(doc, plan.replacements)
+
+        # Supprimer les sections conditionnelles masquées
+        if plan.document_type == DocumentType.QCC:
+            with generation_phase("hidden_sections"):
+                self._remove_hidden_sections(doc)
+
+        return doc
+
+    def save_plan(self, plan: RenderPlan, client: Client) -> StoredDocument:
+        """Rendre et enregistrer un plan v2"""
+        doc = self.render_plan(plan)
+        filename = self._generate_filename(plan.document_type.value, client)
+        return self._save_document(doc, filename)
+
+    def render_v2_document(
+        self,
+        document_type: DocumentType,
+        client: Client,
+        conseiller: User
+    ) -> Optional[Document]:
+        """
+        Remplir un template DOCX v2 en mémoire (sans l'enregistrer)
+
+        Args:
+            document_type: Type de document (clé de V2_TEMPLATE_VERSIONS)
+            client: Client
+            conseiller: Conseiller
+
+        Returns:
+            Document rempli ou None si le template est absent
+        """
+        plan = self.plan_v2_document(document_type, client, conseiller)
+        return self.render_plan(plan) if plan else None
+
     def _load_mentions_legales(self) -> str:
         """Charger les mentions légales"""
         return self._load_txt_template("MentionsLegales.txt")
@@ -94,11 +250,13 @@ class DocxGenerator:
         """Retourner une checkbox cochée ou non"""
         return "☑" if val else "☐"
 
-    def _save_document(self, doc: Document, filename: str) -> str:
-        """Sauvegarder le document"""
-        filepath = os.path.join(self.export_path, filename)
-        doc.save(filepath)
-        return filepath
+    def _save_document(self, doc: Document, filename: str) -> StoredDocument:
+        """
+        Sauvegarder le document (blob dédupliqué, filename = nom présenté)
+        Sérialisation et SHA-256 en une seule passe: une seule phase "save"
+        """
+        with generation_phase("save"):
+            return self.storage.save_docx(doc, filename)
 
     def _generate_filename(self, doc_type: str, client) -> str:
         """
@@ -199,7 +357,7 @@ class DocxGenerator:
     # GÉNÉRATION DER (Document d'Entrée en Relation)
     # ==========================================
 
-    async def generate_der(self, client: Client, conseiller: User) -> str:
+    async def generate_der(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer le Document d'Entrée en Relation
         Utilise le template DER.txt officiel
@@ -248,7 +406,7 @@ Dans le cadre de notre activité de conseil en gestion de patrimoine, notre cabi
     # GÉNÉRATION QCC (Questionnaire Connaissance Client)
     # ==========================================
 
-    async def generate_kyc(self, client: Client, conseiller: User) -> str:
+    async def generate_kyc(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer le Questionnaire Connaissance Client et Profil de Risques
         Utilise le template QCC&Risk.txt officiel
@@ -290,7 +448,7 @@ V.2025-03
     # GÉNÉRATION LETTRE DE MISSION CIF
     # ==========================================
 
-    async def generate_lettre_mission_cif(self, client: Client, conseiller: User) -> str:
+    async def generate_lettre_mission_cif(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer la Lettre de Mission CIF
         Utilise le template LettreMission.txt officiel
@@ -334,7 +492,7 @@ Madame, Monsieur,
     # GÉNÉRATION DÉCLARATION D'ADÉQUATION (DA CIF)
     # ==========================================
 
-    async def generate_declaration_adequation(self, client: Client, conseiller: User) -> str:
+    async def generate_declaration_adequation(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer la Déclaration d'Adéquation / Rapport d'Adéquation
         Utilise le template DA CIF.txt officiel
@@ -380,7 +538,7 @@ V.2025-03
     # GÉNÉRATION CONVENTION RTO
     # ==========================================
 
-    async def generate_convention_rto(self, client: Client, conseiller: User) -> str:
+    async def generate_convention_rto(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer la Convention de Réception et Transmission d'Ordres
         Utilise le template RTO.txt officiel
@@ -466,7 +624,7 @@ CONVENTION DE RECEPTION ET TRANSMISSION D'ORDRES
             return bool(getattr(client, field_name))
         return False
 
-    async def generate_profil_risque(self, client: Client, conseiller: User) -> str:
+    async def generate_profil_risque(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer le document Profil de Risque complet
         Conforme au questionnaire réglementaire QCC
@@ -739,7 +897,7 @@ CONVENTION DE RECEPTION ET TRANSMISSION D'ORDRES
     # GÉNÉRATION RAPPORT CONSEIL IAS
     # ==========================================
 
-    async def generate_rapport_conseil_ias(self, client: Client, conseiller: User) -> str:
+    async def generate_rapport_conseil_ias(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer le Rapport de Conseil en Assurance (IAS)
         Document généré dynamiquement
@@ -1332,32 +1490,19 @@ CONVENTION DE RECEPTION ET TRANSMISSION D'ORDRES
 
         return replacements
 
-    async def generate_qcc_v2(self, client: Client, conseiller: User) -> str:
+    async def generate_qcc_v2(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer le QCC avec le template DOCX v2
         Document professionnel avec placeholders remplacés
         """
-        template_path = os.path.join(self.v2_templates_path, "QCC_V2_TEMPLATE.docx")
+        plan = self.plan_v2_document(DocumentType.QCC, client, conseiller)
 
-        if not os.path.exists(template_path):
+        if plan is None:
             # Fallback vers l'ancienne méthode
             return await self.generate_kyc(client, conseiller)
 
-        # Charger le template
-        doc = Document(template_path)
-
-        # Construire les remplacements
-        replacements = self._build_client_replacements(client, conseiller)
-
-        # Remplacer les placeholders
-        self._replace_placeholders_in_doc(doc, replacements)
-
-        # Supprimer les sections conditionnelles masquées
-        self._remove_hidden_sections(doc)
-
         # Sauvegarder avec nouveau format de nom
-        filename = self._generate_filename("QCC", client)
-        return self._save_document(doc, filename)
+        return self.save_plan(plan, client)
 
     def _remove_hidden_sections(self, doc: Document):
         """
@@ -1521,53 +1666,33 @@ CONVENTION DE RECEPTION ET TRANSMISSION D'ORDRES
 
         return replacements
 
-    async def generate_profil_risque_v2(self, client: Client, conseiller: User) -> str:
+    async def generate_profil_risque_v2(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer le Profil de Risque avec le template DOCX v2
         Document professionnel avec placeholders remplacés
         """
-        template_path = os.path.join(self.v2_templates_path, "PROFIL_RISQUE_V2_TEMPLATE.docx")
+        plan = self.plan_v2_document(DocumentType.PROFIL_RISQUE, client, conseiller)
 
-        if not os.path.exists(template_path):
+        if plan is None:
             # Fallback vers l'ancienne méthode
             return await self.generate_profil_risque(client, conseiller)
 
-        # Charger le template
-        doc = Document(template_path)
-
-        # Construire les remplacements spécifiques au Profil de Risque
-        replacements = self._build_profil_risque_replacements(client, conseiller)
-
-        # Remplacer les placeholders
-        self._replace_placeholders_in_doc(doc, replacements)
-
         # Sauvegarder avec nouveau format de nom
-        filename = self._generate_filename("PROFIL_RISQUE", client)
-        return self._save_document(doc, filename)
+        return self.save_plan(plan, client)
 
-    async def generate_der_v2(self, client: Client, conseiller: User) -> str:
+    async def generate_der_v2(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer le DER (Document d'Entrée en Relation) avec le template DOCX v2
         Document professionnel avec mise en page structurée et placeholders remplacés
         """
-        template_path = os.path.join(self.v2_templates_path, "DER_V2_TEMPLATE.docx")
+        plan = self.plan_v2_document(DocumentType.DER, client, conseiller)
 
-        if not os.path.exists(template_path):
+        if plan is None:
             # Fallback vers l'ancienne méthode
             return await self.generate_der(client, conseiller)
 
-        # Charger le template
-        doc = Document(template_path)
-
-        # Construire les remplacements spécifiques au DER
-        replacements = self._build_der_replacements(client, conseiller)
-
-        # Remplacer les placeholders
-        self._replace_placeholders_in_doc(doc, replacements)
-
         # Sauvegarder avec nouveau format de nom
-        filename = self._generate_filename("DER", client)
-        return self._save_document(doc, filename)
+        return self.save_plan(plan, client)
 
     def _build_der_replacements(self, client: Client, conseiller: User) -> Dict[str, str]:
         """
@@ -1604,29 +1729,19 @@ CONVENTION DE RECEPTION ET TRANSMISSION D'ORDRES
 
         return replacements
 
-    async def generate_rto_v2(self, client: Client, conseiller: User) -> str:
+    async def generate_rto_v2(self, client: Client, conseiller: User) -> StoredDocument:
         """
         Générer la Convention RTO (Réception et Transmission d'Ordres) avec le template DOCX v2
         Document professionnel avec mise en page structurée et placeholders remplacés
         """
-        template_path = os.path.join(self.v2_templates_path, "RTO_V2_TEMPLATE.docx")
+        plan = self.plan_v2_document(DocumentType.CONVENTION_RTO, client, conseiller)
 
-        if not os.path.exists(template_path):
+        if plan is None:
             # Fallback vers l'ancienne méthode
             return await self.generate_convention_rto(client, conseiller)
 
-        # Charger le template
-        doc = Document(template_path)
-
-        # Construire les remplacements spécifiques au RTO
-        replacements = self._build_rto_replacements(client, conseiller)
-
-        # Remplacer les placeholders
-        self._replace_placeholders_in_doc(doc, replacements)
-
         # Sauvegarder avec nouveau format de nom
-        filename = self._generate_filename("CONVENTION_RTO", client)
-        return self._save_document(doc, filename)
+        return self.save_plan(plan, client)
 
     def _build_rto_replacements(self, client: Client, conseiller: User) -> Dict[str, str]:
         """
@@ -0,0 +1,267 @@
+"""
+Service de patch incrémental du formulaire client (autosave)
+
+Ce module gère:
+- La conversion d'un delta (JSON Merge Patch) en opérations JSON Patch
+- L'application des opérations en mémoire sur form_data
+- La construction de l'expression jsonb_set / #- côté serveur
+- Le diff des colonnes mappées par extract_client_data
+"""
+
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Text, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.sql.expression import ColumnElement
+
+
+# Opérations JSON Patch (RFC 6902) supportées
+SUPPORTED_OPS = ("add", "replace", "remove")
+
+
+class FormPatchError(ValueError):
+    """Opération de patch invalide"""
+    pass
+
+
+# ==========================================
+# POINTEURS JSON
+# ==========================================
+
+def parse_pointer(pointer: str) -> List[str]:
+    """
+    Découpe un pointeur JSON (RFC 6901) en segments
+
+    Args:
+        pointer: Pointeur du type "/titulaire1/nom"
+
+    Returns:
+        Liste des segments décodés (~1 -> /, ~0 -> ~)
+    """
+    if not pointer or not pointer.startswith("/"):
+        raise FormPatchError(f"Pointeur JSON invalide: {pointer!r}")
+    return [
+        segment.replace("~1", "/").replace("~0", "~")
+        for segment in pointer[1:].split("/")
+    ]
+
+
+def merge_patch_to_operations(delta: Dict[str, Any], prefix: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Convertit un delta (JSON Merge Patch, RFC 7386) en opérations
+
+    Les objets sont parcourus récursivement, les feuilles deviennent des
+    "replace" et les valeurs null des "remove".
+
+    Args:
+        delta: Champs modifiés, imbriqués comme form_data
+        prefix: Chemin courant (récursion)
+
+    Returns:
+        Liste d'opérations {"op", "path", "value"} avec path en segments
+    """
+    prefix = prefix or []
+    operations = []
+    for key, value in delta.items():
+        path = prefix + [str(key)]
+        if isinstance(value, dict) and value:
+            operations.extend(merge_patch_to_operations(value, path))
+        elif value is None:
+            operations.append({"op": "remove", "path": path})
+        else:
+            operations.append({"op": "replace", "path": path, "value": value})
+    return operations
+
+
+# ==========================================
+# APPLICATION EN MÉMOIRE
+# ==========================================
+
+def _child(node: Any, segment: str) -> Tuple[Any, bool]:
+    """Enfant d'un objet ou d'un tableau et s'il existe"""
+    if isinstance(node, dict):
+        return node.get(segment), segment in node
+    if isinstance(node, list) and segment.isdigit() and int(segment) < len(node):
+        return node[int(segment)], True
+    return None, False
+
+
+def _node_at(document: Any, segments: List[str]) -> Tuple[Any, bool]:
+    """Noeud désigné par segments et s'il existe"""
+    node = document
+    for segment in segments:
+        node, exists = _child(node, segment)
+        if not exists:
+            return None, False
+    return node, True
+
+
+def _jsonb_anchor(document: Dict[str, Any], path: List[str]) -> int:
+    """
+    Longueur du préfixe de path adressable par jsonb_set
+
+    jsonb_set ne crée que le dernier segment d'un chemin et ne sait pas
+    insérer dans un tableau: on s'arrête au premier ancêtre manquant ou
+    au premier tableau rencontré.
+    """
+    node = document
+    for index, segment in enumerate(path[:-1]):
+        node, exists = _child(node, segment)
+        if not exists or not isinstance(node, dict):
+            return index + 1
+    return len(path)
+
+
+def _set_path(document: Dict[str, Any], path: List[str], value: Any, op: str) -> None:
+    """Écrit une valeur en créant les objets intermédiaires"""
+    node = document
+    for segment in path[:-1]:
+        child, exists = _child(node, segment)
+        if not exists or not isinstance(child, (dict, list)):
+            if isinstance(node, list):
+                raise FormPatchError(f"Index de tableau invalide: {segment}")
+            child = {}
+            node[segment] = child
+        node = child
+
+    last = path[-1]
+    if isinstance(node, list):
+        if last == "-":
+            node.append(value)
+        elif last.isdigit() and int(last) <= len(node):
+            if op == "add":
+                node.insert(int(last), value)
+            elif int(last) < len(node):
+                node[int(last)] = value
+            else:
+                raise FormPatchError(f"Index de tableau invalide: {last}")
+        else:
+            raise FormPatchError(f"Index de tableau invalide: {last}")
+    else:
+        node[last] = value
+
+
+def _remove_path(document: Dict[str, Any], path: List[str]) -> bool:
+    """Supprime un noeud, retourne False s'il n'existe pas"""
+    parent, exists = _node_at(document, path[:-1])
+    if not exists:
+        return False
+    _, found = _child(parent, path[-1])
+    if not found:
+        return False
+    if isinstance(parent, list):
+        del parent[int(path[-1])]
+    else:
+        del parent[path[-1]]
+    return True
+
+
+def apply_operations(
+    form_data: Optional[Dict[str, Any]],
+    operations: List[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Applique les opérations sur une copie de form_data
+
+    Les opérations sont normalisées pour rester exprimables avec jsonb_set:
+    une écriture sous un parent absent (ou dans un tableau) est remontée
+    au premier ancêtre manquant (ou au tableau) avec sa valeur complète.
+
+    Args:
+        form_data: form_data actuel du client
+        operations: Opérations {"op", "path" (segments), "value"}
+
+    Returns:
+        (nouveau form_data, opérations normalisées)
+
+    Raises:
+        FormPatchError: Opération non supportée ou chemin invalide
+    """
+    document = copy.deepcopy(form_data or {})
+    normalized = []
+
+    for operation in operations:
+        op = operation.get("op")
+        path = [str(segment) for segment in (operation.get("path") or [])]
+        if op not in SUPPORTED_OPS:
+            raise FormPatchError(f"Opération non supportée: {op}")
+        if not path:
+            raise FormPatchError("Le remplacement complet de form_data n'est pas autorisé")
+
+        anchor = _jsonb_anchor(document, path)
+
+        if op == "remove":
+            if not _remove_path(document, path):
+                continue
+        else:
+            _set_path(document, path, operation.get("value"), op)
+
+        if anchor == len(path):
+            normalized.append({"op": op, "path": path, "value": operation.get("value")})
+        else:
+            value, _ = _node_at(document, path[:anchor])
+            normalized.append({"op": "replace", "path": path[:anchor], "value": copy.deepcopy(value)})
+
+    return document, normalized
+
+
+# ==========================================
+# EXPRESSION SQL
+# ==========================================
+
+def build_jsonb_expression(column: ColumnElement, operations: List[Dict[str, Any]]) -> ColumnElement:
+    """
+    Construit l'expression SQL qui applique les opérations côté serveur
+
+    Produit jsonb_set(jsonb_set(COALESCE(form_data, '{}'), ...), ...) et
+    l'opérateur #- pour les suppressions: seul le delta transite, la
+    colonne n'est jamais réécrite depuis Python.
+
+    Args:
+        column: Colonne JSONB (Client.form_data)
+        operations: Opérations normalisées par apply_operations
+
+    Returns:
+        Expression SQL utilisable dans UPDATE ... SET
+    """
+    expression = func.coalesce(column, literal({}, JSONB))
+    for operation in operations:
+        path = literal(operation["path"], ARRAY(Text))
+        if operation["op"] == "remove":
+            expression = expression.op("#-")(path)
+        else:
+            expression = func.jsonb_set(
+                expression, path, literal(operation["value"], JSONB), True,
+                type_=JSONB
+            )
+    return expression
+
+
+# ==========================================
+# DIFF DES COLONNES
+# ==========================================
+
+def diff_columns(
+    old_data: Dict[str, Any],
+    new_data: Dict[str, Any],
+    allowed_columns: set
+) -> Dict[str, Any]:
+    """
+    Colonnes mappées dont la valeur change entre deux extractions
+
+    Args:
+        old_data: extract_client_data() du form_data actuel
+        new_data: extract_client_data() du form_data patché
+        allowed_columns: Colonnes modifiables du modèle Client
+
+    Returns:
+        {colonne: nouvelle valeur} pour les seules colonnes modifiées
+    """
+    changes = {}
+    for column, value in new_data.items():
+        if column not in allowed_columns or column == "form_data":
+            continue
+        if old_data.get(column) != value:
+            changes[column] = value
+    return changes
@@ -0,0 +1,222 @@
+"""
+Mesure de la génération de documents par phase
+
+Ce module gère:
+- Le suivi d'une génération (statut, durée totale) par type de document
+- Les phases chronométrées (chargement client, remplacements, template,
+  substitution, sections masquées, enregistrement, insertion en base)
+- Le profilage optionnel d'une fraction des générations (pyinstrument ou cProfile)
+- Un span par génération et par phase (voir app.core.tracing)
+- Le nombre de générations en cours (voir app.services.health_monitor)
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from app.config import settings
+from app.core import metrics
+from app.core.logging import get_logger
+from app.core.tracing import start_span
+
+logger = get_logger(__name__)
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+# Lignes conservées dans un rapport cProfile
+_PSTATS_LIMIT = 60
+
+# Génération en cours dans la tâche asyncio courante
+_current_generation: ContextVar[Optional["GenerationTracker"]] = ContextVar(
+    "current_generation", default=None
+)
+
+# Un seul profilage à la fois (un profileur par thread)
+_profiling_active = False
+
+# Générations en cours dans ce processus (lu par le moniteur de santé)
+_in_progress = 0
+
+
+def generations_in_progress() -> int:
+    """Nombre de générations de documents en cours"""
+    return _in_progress
+
+
+class GenerationTracker:
+    """Phases et statut d'une génération en cours"""
+
+    def __init__(self, type_document: str):
+        self.type_document = type_document
+        self.status = "success"
+        self.phases: Dict[str, float] = {}
+
+    def record_phase(self, name: str, seconds: float) -> None:
+        """Ajoute une durée à une phase (une phase peut être traversée plusieurs fois)"""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - start)
+
+
+@contextmanager
+def generation_phase(name: str) -> Iterator[None]:
+    """
+    Chronomètre une phase de la génération en cours
+
+    Sans génération suivie (préchauffage, scripts), ne mesure rien.
+
+    Usage:
+        with generation_phase("substitution"):
+            self._replace_placeholders_in_doc(doc, replacements)
+    """
+    tracker = _current_generation.get()
+    if tracker is None:
+        yield
+        return
+    with start_span(f"docx.{name}", type_document=tracker.type_document), tracker.phase(name):
+        yield
+
+
+# ==========================================
+# PROFILAGE ÉCHANTILLONNÉ
+# ==========================================
+
+class _SampledProfile:
+    """Profileur d'une génération et écriture de son rapport texte"""
+
+    def __init__(self):
+        if PYINSTRUMENT_AVAILABLE:
+            # Mode async: seules les attentes de cette tâche sont attribuées
+            self._profiler = PyinstrumentProfiler(async_mode="enabled")
+        else:
+            # cProfile voit aussi les autres tâches exécutées pendant les await
+            self._profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        if PYINSTRUMENT_AVAILABLE:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        if PYINSTRUMENT_AVAILABLE:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def report(self) -> str:
+        if PYINSTRUMENT_AVAILABLE:
+            return self._profiler.output_text(unicode=True, color=False)
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(_PSTATS_LIMIT)
+        return stream.getvalue()
+
+
+def _should_profile() -> bool:
+    rate = settings.DOCUMENT_PROFILE_SAMPLE_RATE
+    return rate > 0 and not _profiling_active and random.random() < rate
+
+
+def _write_report(tracker: GenerationTracker, profile: _SampledProfile, duration: float) -> Optional[str]:
+    """Enregistre le rapport d'une génération profilée"""
+    directory = settings.DOCUMENT_PROFILE_PATH
+    try:
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(directory, f"{stamp}_{tracker.type_document}.txt")
+        phases = "\n".join(
+            f"  {name:<16} {seconds * 1000:10.1f} ms" for name, seconds in tracker.phases.items()
+        )
+        with open(path, "w", encoding="utf-8") as report:
+            report.write(
+                f"Génération {tracker.type_document} ({tracker.status}): {duration * 1000:.1f} ms\n"
+                f"{phases}\n\n{profile.report()}"
+            )
+        return path
+    except OSError as e:
+        logger.warning(f"Rapport de profilage non écrit: {str(e)}")
+        return None
+
+
+# ==========================================
+# SUIVI D'UNE GÉNÉRATION
+# ==========================================
+
+@contextmanager
+def track_document_generation(type_document: str) -> Iterator[GenerationTracker]:
+    """
+    Suit une génération: durée totale, phases et statut par type de document
+
+    Le statut vaut "success" (ou celui fixé par l'appelant, ex: "reused"),
+    "error" si une exception sort du bloc.
+
+    Usage:
+        with track_document_generation(doc_type.value) as generation:
+            with generation_phase("db_insert"):
+                ...
+    """
+    global _profiling_active, _in_progress
+
+    tracker = GenerationTracker(type_document)
+    token = _current_generation.set(tracker)
+    _in_progress += 1
+
+    profile = None
+    if _should_profile():
+        _profiling_active = True
+        profile = _SampledProfile()
+        profile.start()
+
+    start = time.perf_counter()
+    try:
+        with start_span("document.generate", type_document=type_document) as span:
+            yield tracker
+            if span is not None:
+                span.set_attribute("document.status", tracker.status)
+    except BaseException:
+        tracker.status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_generation.reset(token)
+        _in_progress -= 1
+
+        if profile is not None:
+            profile.stop()
+            _profiling_active = False
+            path = _write_report(tracker, profile, duration)
+            if path:
+                logger.info(
+                    f"Génération {type_document} profilée",
+                    duration_ms=round(duration * 1000, 1),
+                    extra={"report": path}
+                )
+
+        metrics.documents_generated_total.labels(
+            type_document=type_document, status=tracker.status
+        ).inc()
+        metrics.document_generation_duration_seconds.labels(
+            type_document=type_document
+        ).observe(duration)
+        for name, seconds in tracker.phases.items():
+            metrics.document_generation_phase_seconds.labels(
+                type_document=type_document, phase=name
+            ).observe(seconds)
@@ -0,0 +1,344 @@
+"""
+Surveillance de la santé des composants en tâche de fond
+
+Ce module gère:
+- Les vérifications (PostgreSQL, Redis, disque, templates) relancées à
+  intervalle régulier, chacune avec un délai maximal
+- Les vérifications fichiers dans un thread (jamais sur la boucle d'événements)
+- Des signaux de charge: saturation du pool DB, retard de la boucle
+  d'événements, générations de documents en cours, retard du réplica
+- Un instantané en mémoire lu en O(1) par /health et /health/ready
+"""
+
+import asyncio
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from app.config import settings
+from app.core.logging import get_logger
+from app.core.loop_watchdog import get_loop_watchdog
+from app.services.generation_profiler import generations_in_progress
+
+logger = get_logger(__name__)
+
+# Espace disque libre (%) en dessous duquel le disque est dégradé / en échec
+DISK_DEGRADED_PERCENT = 20
+DISK_UNHEALTHY_PERCENT = 10
+
+# Occupation du pool DB (connexions prises / capacité) à partir de laquelle il est dégradé
+POOL_SATURATION_DEGRADED = 0.9
+
+# Retard de la boucle d'événements (ms) à partir duquel elle est dégradée
+LOOP_LAG_DEGRADED_MS = 100.0
+
+# Générations simultanées à partir desquelles le générateur est dégradé
+GENERATIONS_DEGRADED = 20
+
+
+class ComponentHealth(BaseModel):
+    """État de santé d'un composant"""
+    name: str
+    status: str  # "healthy", "unhealthy", "degraded"
+    latency_ms: Optional[float] = None
+    message: Optional[str] = None
+    last_check: str
+
+
+def _component(name: str, status: str, message: str, latency_ms: Optional[float] = None) -> ComponentHealth:
+    return ComponentHealth(
+        name=name,
+        status=status,
+        latency_ms=latency_ms,
+        message=message,
+        last_check=datetime.utcnow().isoformat()
+    )
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+# ==========================================
+# VÉRIFICATIONS
+# ==========================================
+
+async def check_database() -> ComponentHealth:
+    """Vérifie la connexion à PostgreSQL"""
+    from sqlalchemy import text
+    from app.database import engine
+
+    start = time.perf_counter()
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    return _component("database", "healthy", "PostgreSQL connection OK", _elapsed_ms(start))
+
+
+async def check_redis() -> ComponentHealth:
+    """Vérifie la connexion à Redis"""
+    from app.core.redis_client import get_redis
+
+    start = time.perf_counter()
+    redis = await get_redis()
+    await redis.ping()
+    return _component("redis", "healthy", "Redis connection OK", _elapsed_ms(start))
+
+
+def _disk_usage() -> ComponentHealth:
+    """Espace disque disponible (appel bloquant)"""
+    data_path = os.environ.get("DATA_PATH", "/app/data")
+    if not os.path.exists(data_path):
+        data_path = "/"
+
+    total, used, free = shutil.disk_usage(data_path)
+    free_percent = (free / total) * 100
+
+    if free_percent < DISK_UNHEALTHY_PERCENT:
+        return _component("disk", "unhealthy", f"CRITICAL: Only {free_percent:.1f}% free space")
+    if free_percent < DISK_DEGRADED_PERCENT:
+        return _component("disk", "degraded", f"WARNING: Only {free_percent:.1f}% free space")
+    return _component("disk", "healthy", f"Free: {free_percent:.1f}% ({free // (1024**3)} GB)")
+
+
+async def check_disk_space() -> ComponentHealth:
+    """Vérifie l'espace disque disponible"""
+    return await asyncio.to_thread(_disk_usage)
+
+
+def _count_templates() -> ComponentHealth:
+    """Templates DOCX présents (appel bloquant)"""
+    templates_path = os.environ.get("TEMPLATES_PATH", settings.DOCX_TEMPLATE_PATH)
+
+    if not os.path.exists(templates_path):
+        return _component("templates", "degraded", f"Templates directory not found: {templates_path}")
+
+    with os.scandir(templates_path) as entries:
+        count = sum(1 for entry in entries if entry.name.endswith(".docx"))
+
+    if count == 0:
+        return _component("templates", "degraded", "No DOCX templates found")
+    return _component("templates", "healthy", f"{count} template(s) available")
+
+
+async def check_templates() -> ComponentHealth:
+    """Vérifie que les templates DOCX sont accessibles"""
+    return await asyncio.to_thread(_count_templates)
+
+
+async def check_db_pool() -> ComponentHealth:
+    """Occupation du pool de connexions (sans ouvrir de connexion)"""
+    from app.database import engine
+
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return _component("db_pool", "healthy", f"{type(pool).__name__}: no pooling")
+
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    saturation = checked_out / capacity if capacity else 0.0
+
+    status = "degraded" if saturation >= POOL_SATURATION_DEGRADED else "healthy"
+    return _component("db_pool", status, f"{checked_out}/{capacity} connections in use ({saturation:.0%})")
+
+
+async def check_db_replica() -> ComponentHealth:
+    """
+    Retard du réplica en lecture (conservé pour le routage des lectures)
+
+    Réplica en retard ou injoignable: lectures sur le primaire, état dégradé.
+    """
+    from app.core.read_replica import measure_replica_lag
+
+    start = time.perf_counter()
+    try:
+        lag = await measure_replica_lag()
+    except Exception as e:
+        logger.warning(f"Replica health check failed: {e}")
+        return _component("db_replica", "degraded", f"Replica unavailable, reads on primary: {e}", _elapsed_ms(start))
+
+    if lag > settings.DATABASE_REPLICA_MAX_LAG:
+        return _component(
+            "db_replica", "degraded", f"Replication lag {lag:.1f}s, reads on primary", _elapsed_ms(start)
+        )
+    return _component("db_replica", "healthy", f"Replication lag {lag:.1f}s", _elapsed_ms(start))
+
+
+async def check_event_loop() -> ComponentHealth:
+    """
+    Retard de la boucle d'événements
+
+    Pire retard mesuré par la surveillance continue depuis la vérification
+    précédente; à défaut, temps d'attente d'un tour de boucle.
+    """
+    watchdog = get_loop_watchdog()
+    if watchdog.running:
+        lag_ms = round(watchdog.pop_max_lag() * 1000, 2)
+    else:
+        start = time.perf_counter()
+        await asyncio.sleep(0)
+        lag_ms = _elapsed_ms(start)
+
+    status = "degraded" if lag_ms >= LOOP_LAG_DEGRADED_MS else "healthy"
+    return _component("event_loop", status, f"Lag: {lag_ms:.1f} ms", lag_ms)
+
+
+async def check_generations() -> ComponentHealth:
+    """Générations de documents en cours dans ce processus"""
+    in_progress = generations_in_progress()
+
+    status = "degraded" if in_progress >= GENERATIONS_DEGRADED else "healthy"
+    return _component("generations", status, f"{in_progress} generation(s) in progress")
+
+
+HealthCheck = Callable[[], Awaitable[ComponentHealth]]
+
+DEFAULT_CHECKS: Dict[str, HealthCheck] = {
+    "database": check_database,
+    "redis": check_redis,
+    "disk": check_disk_space,
+    "templates": check_templates,
+    "db_pool": check_db_pool,
+    "event_loop": check_event_loop,
+    "generations": check_generations,
+}
+if settings.DATABASE_REPLICA_URL:
+    DEFAULT_CHECKS["db_replica"] = check_db_replica
+
+
+# ==========================================
+# MONITEUR
+# ==========================================
+
+class HealthMonitor:
+    """
+    Rafraîchit l'état des composants en tâche de fond
+
+    Les probes lisent le dernier instantané (snapshot) sans toucher à la base,
+    à Redis ni au disque. L'instantané est remplacé d'un bloc à chaque tour.
+    """
+
+    def __init__(
+        self,
+        checks: Optional[Dict[str, HealthCheck]] = None,
+        interval: Optional[float] = None,
+        timeout: Optional[float] = None
+    ):
+        self.checks = checks if checks is not None else dict(DEFAULT_CHECKS)
+        self.interval = interval if interval is not None else settings.HEALTH_CHECK_INTERVAL
+        self.timeout = timeout if timeout is not None else settings.HEALTH_CHECK_TIMEOUT
+        self._components: Dict[str, ComponentHealth] = {}
+        self._refreshed_at: Optional[float] = None
+        self._last_refresh: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refreshing: Optional[asyncio.Task] = None
+
+    async def _run_check(self, name: str, check: HealthCheck) -> ComponentHealth:
+        start = time.perf_counter()
+        try:
+            # Un thread en dépassement n'est pas interrompu: seul son résultat est ignoré
+            return await asyncio.wait_for(check(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Health check {name} timed out")
+            return _component(name, "unhealthy", f"Timeout after {self.timeout:g}s", _elapsed_ms(start))
+        except Exception as e:
+            logger.error(f"Health check {name} failed: {e}")
+            return _component(name, "unhealthy", str(e), _elapsed_ms(start))
+
+    async def refresh(self) -> Dict[str, ComponentHealth]:
+        """Relance toutes les vérifications en parallèle et remplace l'instantané"""
+        results = await asyncio.gather(
+            *(self._run_check(name, check) for name, check in self.checks.items())
+        )
+        self._components = {name: result for name, result in zip(self.checks, results)}
+        self._refreshed_at = time.monotonic()
+        self._last_refresh = datetime.utcnow().isoformat()
+        return self._components
+
+    async def ensure_fresh(self) -> None:
+        """
+        Rafraîchit à la demande si la tâche de fond ne tourne pas
+        (avant le démarrage, HEALTH_CHECK_INTERVAL=0, scripts)
+
+        Les appels simultanés partagent le même rafraîchissement.
+        """
+        if self._task is not None and self._refreshed_at is not None:
+            return
+        if not self.is_stale():
+            return
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self.refresh())
+        await asyncio.shield(self._refreshing)
+
+    def snapshot(self) -> Dict[str, ComponentHealth]:
+        """Dernier état connu par composant"""
+        return self._components
+
+    def component(self, name: str) -> Optional[ComponentHealth]:
+        return self._components.get(name)
+
+    @property
+    def last_refresh(self) -> Optional[str]:
+        return self._last_refresh
+
+    def age_seconds(self) -> Optional[float]:
+        """Âge de l'instantané (None si jamais rafraîchi)"""
+        if self._refreshed_at is None:
+            return None
+        return time.monotonic() - self._refreshed_at
+
+    def is_stale(self) -> bool:
+        """Instantané absent ou trop ancien (tâche de fond bloquée ou arrêtée)"""
+        age = self.age_seconds()
+        return age is None or age > settings.HEALTH_MAX_AGE
+
+    def overall_status(self) -> str:
+        statuses = [c.status for c in self._components.values()]
+        if "unhealthy" in statuses:
+            return "unhealthy"
+        if "degraded" in statuses:
+            return "degraded"
+        return "healthy"
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Health monitor refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> bool:
+        """Lance le rafraîchissement périodique (0 = désactivé)"""
+        if self.interval <= 0 or self._task is not None:
+            return False
+        self._task = asyncio.create_task(self._loop())
+        return True
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+# Instance globale
+_health_monitor: Optional[HealthMonitor] = None
+
+
+def get_health_monitor() -> HealthMonitor:
+    """Obtenir l'instance du moniteur de santé"""
+    global _health_monitor
+    if _health_monitor is None:
+        _health_monitor = HealthMonitor()
+    return _health_monitor
+
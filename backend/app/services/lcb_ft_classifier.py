@@ -1,107 +1,435 @@
 """
 Service de classification LCB-FT
 Lutte contre le blanchiment et financement du terrorisme
+
+Les règles proviennent de settings.LCB_FT_CRITERES (ou du fichier JSON
+LCB_FT_RULES_FILE) et sont compilées une seule fois:
+- mots-clés (professions, pays) -> automate Aho-Corasick
+- facteurs déclaratifs -> évaluation unitaire ou par colonnes (numpy)
 """
 
-from typing import Literal
+import hashlib
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Literal, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core.logging import get_logger
 from app.models.client import Client
+from app.services.attribute_view import AttributeView
+
+logger = get_logger(__name__)
+
+
+# Colonnes lues par la classification: toute modification impose un recalcul
+LCB_FT_INPUT_FIELDS = frozenset({
+    'lcb_ft_ppe', 'lcb_ft_ppe_famille', 't1_us_person', 't2_us_person',
+    't1_residence_fiscale', 't1_residence_fiscale_autre',
+    'origine_economique_gains_jeu', 'origine_economique_cession_pro',
+    'origine_economique_autres', 'lcb_ft_justificatifs',
+    'origine_fonds_montant_prevu', 'patrimoine_global',
+    't1_profession', 't1_chef_entreprise', 't1_entreprise_forme_juridique',
+})
+
+NiveauLcbFt = Literal["Faible", "Standard", "Renforcé", "Élevé"]
+
+# Libellés des facteurs (explications)
+FACTEUR_LIBELLES = {
+    'ppe': "Personne politiquement exposée (ou famille)",
+    'us_person': "US Person (FATCA)",
+    'residence_hors_reference': "Résidence fiscale hors territoire de référence",
+    'pays_risque': "Résidence dans un pays à haut risque",
+    'gains_jeu': "Fonds issus de gains de jeu",
+    'cession_pro': "Fonds issus d'une cession d'entreprise",
+    'origine_autres_non_justifiee': "Autre origine des fonds non justifiée",
+    'montant_tres_eleve': "Montant prévu très élevé",
+    'montant_eleve': "Montant prévu élevé",
+    'patrimoine_tres_eleve': "Patrimoine très élevé",
+    'profession_risque': "Profession à risque",
+    'structure_complexe': "Structure juridique complexe",
+}
+
+
+# ==========================================
+# AUTOMATE DE MOTS-CLÉS (AHO-CORASICK)
+# ==========================================
+
+class KeywordMatcher:
+    """
+    Recherche simultanée de plusieurs mots-clés dans un texte
+
+    Automate Aho-Corasick: un seul passage sur le texte quel que soit le
+    nombre de mots-clés (équivalent à any(k in texte for k in mots_cles)).
+    """
+
+    def __init__(self, keywords: Iterable[str], lowercase: bool = False):
+        self.lowercase = lowercase
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword.lower() if lowercase else keyword)
+        self._build()
+
+    def _add(self, keyword: str) -> None:
+        """Ajoute un mot-clé au trie"""
+        state = 0
+        for char in keyword:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state] = self._output[state] + (keyword,)
+
+    def _build(self) -> None:
+        """Calcule les liens d'échec (parcours en largeur)"""
+        queue = list(self._goto[0].values())
+        while queue:
+            state = queue.pop(0)
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def findall(self, text: Optional[str]) -> List[str]:
+        """Mots-clés présents dans le texte (dans l'ordre de découverte)"""
+        if not text:
+            return []
+        if self.lowercase:
+            text = text.lower()
+        found = []
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                found.extend(k for k in self._output[state] if k not in found)
+        return found
+
+    def search(self, text: Optional[str]) -> bool:
+        """Au moins un mot-clé présent"""
+        return bool(self.findall(text))
+
+
+# ==========================================
+# RÈGLES COMPILÉES
+# ==========================================
+
+def _parse_montant(value: Any) -> Optional[float]:
+    """Montant numérique ou None si non interprétable"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
 
+@dataclass
+class LcbFtResult:
+    """Résultat de classification avec explication par facteur"""
+    niveau: NiveauLcbFt
+    score: int
+    facteurs: List[Dict[str, Any]] = field(default_factory=list)
+    version: str = ""
 
-def classify_lcb_ft_level(client: Client) -> Literal["Faible", "Standard", "Renforcé", "Élevé"]:
+    def to_dict(self) -> Dict[str, Any]:
+        """Convertit le résultat en dictionnaire"""
+        return {
+            "niveau": self.niveau,
+            "score": self.score,
+            "facteurs": self.facteurs,
+            "version": self.version,
+        }
+
+
+class LcbFtRules:
+    """
+    Règles LCB-FT compilées
+
+    Chaque facteur est un prédicat (client -> détail ou None); le même jeu
+    de règles sert au calcul unitaire et au calcul par colonnes.
+    """
+
+    def __init__(self, criteres: Mapping[str, Any]):
+        # Version déclarée + empreinte des critères: toute modification de la
+        # configuration change la version effective, même sans incrément
+        digest = hashlib.sha256(
+            json.dumps(criteres, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        self.version = f"{criteres.get('version', '')}+{digest[:8]}"
+        self.points: Dict[str, int] = dict(criteres.get('facteurs', {}))
+        self.seuils: List[Tuple[str, int]] = sorted(
+            criteres.get('seuils', {}).items(), key=lambda item: item[1], reverse=True
+        )
+        self.residence_reference = criteres.get('residence_reference', 'France')
+        self.montant_eleve = float(criteres.get('montant_eleve', 500000))
+        self.montant_tres_eleve = float(criteres.get('montant_tres_eleve', 1000000))
+        self.patrimoine_tres_eleve = str(criteres.get('patrimoine_tres_eleve', '5000000'))
+
+        self.pays = KeywordMatcher(criteres.get('pays_risque', []))
+        self.professions = KeywordMatcher(criteres.get('professions_risque', []), lowercase=True)
+        self.formes_juridiques = KeywordMatcher(criteres.get('formes_juridiques_risque', []), lowercase=True)
+
+        # Facteurs dans l'ordre d'évaluation
+        self.regles: List[Tuple[str, Callable[[Any], Optional[str]]]] = [
+            ('ppe', self._ppe),
+            ('us_person', self._us_person),
+            ('residence_hors_reference', self._residence_hors_reference),
+            ('pays_risque', self._pays_risque),
+            ('gains_jeu', lambda c: "gains de jeu" if c.origine_economique_gains_jeu else None),
+            ('cession_pro', lambda c: "cession professionnelle" if c.origine_economique_cession_pro else None),
+            ('origine_autres_non_justifiee', self._origine_autres),
+            ('montant_tres_eleve', self._montant_tres_eleve),
+            ('montant_eleve', self._montant_eleve),
+            ('patrimoine_tres_eleve', self._patrimoine),
+            ('profession_risque', self._profession),
+            ('structure_complexe', self._structure),
+        ]
+
+    # Prédicats: retournent un détail (explication) ou None
+
+    def _ppe(self, client: Any) -> Optional[str]:
+        if client.lcb_ft_ppe or client.lcb_ft_ppe_famille:
+            return "PPE" if client.lcb_ft_ppe else "famille PPE"
+        return None
+
+    def _us_person(self, client: Any) -> Optional[str]:
+        if client.t1_us_person or client.t2_us_person:
+            return "titulaire 1" if client.t1_us_person else "titulaire 2"
+        return None
+
+    def _residence_hors_reference(self, client: Any) -> Optional[str]:
+        if client.t1_residence_fiscale != self.residence_reference:
+            return str(client.t1_residence_fiscale)
+        return None
+
+    def _pays_risque(self, client: Any) -> Optional[str]:
+        pays = self.pays.findall(client.t1_residence_fiscale_autre)
+        return ", ".join(pays) if pays else None
+
+    def _origine_autres(self, client: Any) -> Optional[str]:
+        if client.origine_economique_autres and not client.lcb_ft_justificatifs:
+            return str(client.origine_economique_autres)
+        return None
+
+    def _montant_tres_eleve(self, client: Any) -> Optional[str]:
+        montant = _parse_montant(client.origine_fonds_montant_prevu)
+        if montant is not None and montant > self.montant_tres_eleve:
+            return f"{montant:.0f}"
+        return None
+
+    def _montant_eleve(self, client: Any) -> Optional[str]:
+        montant = _parse_montant(client.origine_fonds_montant_prevu)
+        if montant is not None and self.montant_eleve < montant <= self.montant_tres_eleve:
+            return f"{montant:.0f}"
+        return None
+
+    def _patrimoine(self, client: Any) -> Optional[str]:
+        if client.patrimoine_global and self.patrimoine_tres_eleve in client.patrimoine_global:
+            return client.patrimoine_global
+        return None
+
+    def _profession(self, client: Any) -> Optional[str]:
+        mots = self.professions.findall(client.t1_profession or "")
+        return ", ".join(mots) if mots else None
+
+    def _structure(self, client: Any) -> Optional[str]:
+        if client.t1_chef_entreprise and client.t1_entreprise_forme_juridique:
+            if self.formes_juridiques.search(client.t1_entreprise_forme_juridique):
+                return client.t1_entreprise_forme_juridique
+        return None
+
+    # Classification
+
+    def niveau(self, score: int) -> NiveauLcbFt:
+        """Niveau correspondant à un score"""
+        for niveau, seuil in self.seuils:
+            if score >= seuil:
+                return niveau
+        return "Faible"
+
+    def evaluate(self, client: Any) -> LcbFtResult:
+        """
+        Évaluer un client avec le détail des facteurs retenus
+
+        Args:
+            client: Client (ou tout objet exposant les colonnes)
+
+        Returns:
+            Niveau, score et facteurs explicatifs
+        """
+        score = 0
+        facteurs = []
+        for code, regle in self.regles:
+            detail = regle(client)
+            if detail is None:
+                continue
+            points = self.points.get(code, 0)
+            score += points
+            facteurs.append({
+                "code": code,
+                "points": points,
+                "libelle": FACTEUR_LIBELLES.get(code, code),
+                "detail": detail,
+            })
+        return LcbFtResult(niveau=self.niveau(score), score=score, facteurs=facteurs, version=self.version)
+
+    def evaluate_batch(self, columns: Mapping[str, Sequence[Any]]) -> Dict[str, Any]:
+        """
+        Évaluer un lot de clients présentés en colonnes
+
+        Chaque facteur est évalué une seule fois par valeur distincte de ses
+        colonnes d'entrée, puis propagé à toutes les lignes.
+
+        Args:
+            columns: Une séquence par colonne de LCB_FT_INPUT_FIELDS
+
+        Returns:
+            {"score": int16[n], "niveau": object[n],
+             "facteurs": {code: bool[n]}, "version": str}
+        """
+        size = len(next(iter(columns.values()))) if columns else 0
+        score = np.zeros(size, dtype=np.int16)
+        facteurs = {}
+
+        for code, regle in self.regles:
+            inputs = _RULE_INPUTS[code]
+            matched = _evaluate_unique(regle, inputs, columns, size)
+            facteurs[code] = matched
+            score += np.where(matched, self.points.get(code, 0), 0).astype(np.int16)
+
+        niveau = np.full(size, "Faible", dtype=object)
+        for nom, seuil in reversed(self.seuils):
+            niveau[score >= seuil] = nom
+
+        return {"score": score, "niveau": niveau, "facteurs": facteurs, "version": self.version}
+
+
+# Colonnes d'entrée de chaque facteur (évaluation par valeurs distinctes)
+_RULE_INPUTS: Dict[str, Tuple[str, ...]] = {
+    'ppe': ('lcb_ft_ppe', 'lcb_ft_ppe_famille'),
+    'us_person': ('t1_us_person', 't2_us_person'),
+    'residence_hors_reference': ('t1_residence_fiscale',),
+    'pays_risque': ('t1_residence_fiscale_autre',),
+    'gains_jeu': ('origine_economique_gains_jeu',),
+    'cession_pro': ('origine_economique_cession_pro',),
+    'origine_autres_non_justifiee': ('origine_economique_autres', 'lcb_ft_justificatifs'),
+    'montant_tres_eleve': ('origine_fonds_montant_prevu',),
+    'montant_eleve': ('origine_fonds_montant_prevu',),
+    'patrimoine_tres_eleve': ('patrimoine_global',),
+    'profession_risque': ('t1_profession',),
+    'structure_complexe': ('t1_chef_entreprise', 't1_entreprise_forme_juridique'),
+}
+
+
+def _hashable(value: Any) -> Any:
+    """Clé de regroupement d'une valeur (JSONB -> texte)"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return value
+
+
+def _evaluate_unique(
+    regle: Callable[[Any], Optional[str]],
+    inputs: Tuple[str, ...],
+    columns: Mapping[str, Sequence[Any]],
+    size: int
+) -> np.ndarray:
+    """Applique un prédicat une fois par combinaison distincte d'entrées"""
+    values = [columns.get(name) for name in inputs]
+    values = [v if v is not None else [None] * size for v in values]
+
+    cache: Dict[Tuple[Any, ...], bool] = {}
+    result = np.zeros(size, dtype=bool)
+    for index, combination in enumerate(zip(*values)):
+        key = tuple(_hashable(v) for v in combination)
+        matched = cache.get(key)
+        if matched is None:
+            matched = regle(AttributeView(dict(zip(inputs, combination)))) is not None
+            cache[key] = matched
+        result[index] = matched
+    return result
+
+
+# ==========================================
+# CHARGEMENT DES RÈGLES
+# ==========================================
+
+def load_criteres() -> Dict[str, Any]:
+    """
+    Critères effectifs: config + surcharge éventuelle par fichier JSON
+
+    Returns:
+        Dictionnaire de critères (fusion superficielle)
+    """
+    criteres = dict(settings.LCB_FT_CRITERES)
+    if settings.LCB_FT_RULES_FILE:
+        try:
+            with open(settings.LCB_FT_RULES_FILE, 'r', encoding='utf-8') as f:
+                criteres.update(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Règles LCB-FT non chargées ({settings.LCB_FT_RULES_FILE}): {e}")
+    return criteres
+
+
+@lru_cache()
+def get_lcb_ft_rules() -> LcbFtRules:
+    """Règles compilées (une seule compilation par processus)"""
+    return LcbFtRules(load_criteres())
+
+
+# ==========================================
+# API PUBLIQUE
+# ==========================================
+
+def classify_lcb_ft_level(client: Client) -> NiveauLcbFt:
     """
     Classifier le niveau de risque LCB-FT d'un client
     Basé sur les critères réglementaires ACPR
-    
+
     Args:
         client: Client avec ses données
-        
+
     Returns:
         Niveau de risque LCB-FT
     """
-    risk_factors = 0
-    
-    # ==========================================
-    # 1. PERSONNE POLITIQUEMENT EXPOSÉE
-    # ==========================================
-    if client.lcb_ft_ppe or client.lcb_ft_ppe_famille:
-        risk_factors += 3  # Facteur élevé
-    
-    # ==========================================
-    # 2. US PERSON (FATCA)
-    # ==========================================
-    if client.t1_us_person or client.t2_us_person:
-        risk_factors += 2
-    
-    # ==========================================
-    # 3. RÉSIDENCE FISCALE
-    # ==========================================
-    if client.t1_residence_fiscale != "France":
-        risk_factors += 1
-    if client.t1_residence_fiscale_autre:
-        # Pays à risque
-        high_risk_countries = ["Iran", "Corée du Nord", "Myanmar"]
-        if any(country in client.t1_residence_fiscale_autre for country in high_risk_countries):
-            risk_factors += 3
-    
-    # ==========================================
-    # 4. ORIGINE DES FONDS
-    # ==========================================
-    
-    # Gains de jeu = risque élevé
-    if client.origine_economique_gains_jeu:
-        risk_factors += 2
-    
-    # Cession d'entreprise = risque moyen
-    if client.origine_economique_cession_pro:
-        risk_factors += 1
-    
-    # Origine "autres" non documentée
-    if client.origine_economique_autres and not client.lcb_ft_justificatifs:
-        risk_factors += 1
-    
-    # ==========================================
-    # 5. MONTANTS IMPORTANTS
-    # ==========================================
-    if client.origine_fonds_montant_prevu:
-        try:
-            montant = float(client.origine_fonds_montant_prevu)
-            if montant > 1000000:
-                risk_factors += 2
-            elif montant > 500000:
-                risk_factors += 1
-        except:
-            pass
-    
-    # Patrimoine très élevé
-    if client.patrimoine_global and "5000000" in client.patrimoine_global:
-        risk_factors += 1
-    
-    # ==========================================
-    # 6. ACTIVITÉ PROFESSIONNELLE
-    # ==========================================
-    profession = (client.t1_profession or "").lower()
-    high_risk_professions = [
-        "trader", "cambiste", "crypto", "bitcoin",
-        "casino", "jeux", "paris"
-    ]
-    if any(prof in profession for prof in high_risk_professions):
-        risk_factors += 2
-    
-    # ==========================================
-    # 7. COMPLEXITÉ DE LA STRUCTURE
-    # ==========================================
-    if client.t1_chef_entreprise and client.t1_entreprise_forme_juridique:
-        if "holding" in client.t1_entreprise_forme_juridique.lower():
-            risk_factors += 1
-    
-    # ==========================================
-    # CLASSIFICATION FINALE
-    # ==========================================
-    if risk_factors >= 5:
-        return "Élevé"
-    elif risk_factors >= 3:
-        return "Renforcé"
-    elif risk_factors >= 1:
-        return "Standard"
-    else:
-        return "Faible"
\ No newline at end of file
+    return get_lcb_ft_rules().evaluate(client).niveau
+
+
+def explain_lcb_ft_level(client: Client) -> Dict[str, Any]:
+    """
+    Classifier un client avec l'explication de chaque facteur
+
+    Args:
+        client: Client avec ses données
+
+    Returns:
+        Niveau, score, facteurs retenus et version des règles
+    """
+    return get_lcb_ft_rules().evaluate(client).to_dict()
+
+
+def classify_lcb_ft_batch(columns: Mapping[str, Sequence[Any]]) -> Dict[str, Any]:
+    """
+    Classifier un lot de clients (colonnes projetées depuis la base)
+
+    Args:
+        columns: Une séquence par colonne de LCB_FT_INPUT_FIELDS
+
+    Returns:
+        Scores, niveaux et facteurs retenus par ligne
+    """
+    return get_lcb_ft_rules().evaluate_batch(columns)
@@ -0,0 +1,284 @@
+"""
+Service de re-scoring incrémental (profil de risque et niveau LCB-FT)
+
+Ce module gère:
+- Le repérage des clients dont une empreinte de scoring a changé
+- Le parcours des clients par pagination keyset (id > dernier id)
+- Le recalcul par lots des seuls clients dont une empreinte a changé
+- L'écriture groupée UPDATE ... FROM (VALUES ...)
+- Le rapport des mouvements de classification (hausses / baisses)
+
+Usage (cron / tâche planifiée, nocturne):
+    python -m app.services.rescoring
+    python -m app.services.rescoring --dry-run
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, cast, column, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.sql import Update
+
+from app.config import settings
+from app.core.logging import get_logger
+from app.models.client import Client
+from app.services.lcb_ft_classifier import LCB_FT_INPUT_FIELDS, classify_lcb_ft_batch, get_lcb_ft_rules
+from app.services.risk_calculator import (
+    PROFIL_SEUILS, RISK_INPUT_FIELDS, RISK_RULES_VERSION, calculate_risk_profiles_batch, columns_from_rows
+)
+from app.services.scoring import lcb_ft_fingerprint, read_field, risk_fingerprint
+
+logger = get_logger(__name__)
+
+# Ordre des classifications (du plus faible au plus élevé)
+PROFIL_ORDRE = {profil: rang for rang, (_, profil) in enumerate(reversed(PROFIL_SEUILS))}
+LCB_FT_ORDRE = {"Faible": 0, "Standard": 1, "Renforcé": 2, "Élevé": 3}
+
+# Colonnes écrites par le re-scoring
+RESULT_COLUMNS = (
+    'profil_risque_calcule', 'profil_risque_score', 'profil_risque_date_calcul',
+    'profil_risque_empreinte', 'profil_risque_regles_version',
+    'lcb_ft_niveau_risque', 'lcb_ft_empreinte', 'lcb_ft_regles_version',
+)
+
+
+# ==========================================
+# RAPPORT
+# ==========================================
+
+@dataclass
+class RescoringReport:
+    """Compteurs et mouvements d'un re-scoring"""
+    examines: int = 0
+    inchanges: int = 0
+    recalcules: int = 0
+    mis_a_jour: int = 0
+    conflits: int = 0
+    profil_risque: Dict[str, Any] = field(default_factory=dict)
+    lcb_ft: Dict[str, Any] = field(default_factory=dict)
+    debut: datetime = field(default_factory=datetime.utcnow)
+
+    @staticmethod
+    def _record(bucket: Dict[str, Any], ordre: Mapping[str, int], old: Optional[str], new: Optional[str]) -> None:
+        """Classe un mouvement: stable, initialisé, hausse, baisse"""
+        if old == new:
+            key = "stables"
+        elif old is None:
+            key = "initialises"
+        elif old in ordre and new in ordre:
+            key = "hausses" if ordre[new] > ordre[old] else "baisses"
+        else:
+            key = "modifies"
+        bucket[key] = bucket.get(key, 0) + 1
+        if old != new:
+            transitions = bucket.setdefault("transitions", {})
+            transition = f"{old} -> {new}"
+            transitions[transition] = transitions.get(transition, 0) + 1
+
+    def record(self, old: Mapping[str, Any], new: Mapping[str, Any]) -> None:
+        """Enregistre les mouvements d'un client mis à jour"""
+        self._record(self.profil_risque, PROFIL_ORDRE,
+                     old.get('profil_risque_calcule'), new['profil_risque_calcule'])
+        self._record(self.lcb_ft, LCB_FT_ORDRE,
+                     old.get('lcb_ft_niveau_risque'), new['lcb_ft_niveau_risque'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convertit le rapport en dictionnaire"""
+        return {
+            "examines": self.examines,
+            "inchanges": self.inchanges,
+            "recalcules": self.recalcules,
+            "mis_a_jour": self.mis_a_jour,
+            "conflits": self.conflits,
+            "profil_risque": self.profil_risque,
+            "lcb_ft": self.lcb_ft,
+            "debut": self.debut.isoformat(),
+            "duree_secondes": round((datetime.utcnow() - self.debut).total_seconds(), 3),
+        }
+
+
+# ==========================================
+# CALCUL D'UN LOT
+# ==========================================
+
+def score_rows(rows: Sequence[Any], now: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Recalcule les clients d'un lot dont une empreinte a changé
+
+    Args:
+        rows: Lignes exposant id, version, entrées, résultats et empreintes
+        now: Date de calcul du profil de risque
+
+    Returns:
+        (valeurs à écrire par client, nombre de clients inchangés)
+    """
+    now = now or datetime.utcnow()
+    stale = []
+    for row in rows:
+        fingerprints = (risk_fingerprint(row), lcb_ft_fingerprint(row))
+        if fingerprints != (read_field(row, 'profil_risque_empreinte'), read_field(row, 'lcb_ft_empreinte')):
+            stale.append((row, fingerprints))
+
+    if not stale:
+        return [], len(rows)
+
+    stale_rows = [row for row, _ in stale]
+    risk = calculate_risk_profiles_batch(columns_from_rows(stale_rows))
+    lcb_ft = classify_lcb_ft_batch(columns_from_rows(stale_rows, LCB_FT_INPUT_FIELDS))
+
+    lcb_ft_version = get_lcb_ft_rules().version
+    updates = []
+    for index, (row, (risk_fp, lcb_fp)) in enumerate(stale):
+        risk_changed = risk_fp != read_field(row, 'profil_risque_empreinte')
+        updates.append({
+            'id': read_field(row, 'id'),
+            'version': read_field(row, 'version'),
+            'profil_risque_calcule': risk["profil"][index],
+            'profil_risque_score': int(risk["score"][index]),
+            'profil_risque_date_calcul': now if risk_changed else read_field(row, 'profil_risque_date_calcul'),
+            'profil_risque_empreinte': risk_fp,
+            'profil_risque_regles_version': RISK_RULES_VERSION,
+            'lcb_ft_niveau_risque': lcb_ft["niveau"][index],
+            'lcb_ft_empreinte': lcb_fp,
+            'lcb_ft_regles_version': lcb_ft_version,
+        })
+    return updates, len(rows) - len(stale)
+
+
+# ==========================================
+# ACCÈS BASE
+# ==========================================
+
+def build_update_statement(updates: List[Dict[str, Any]]) -> Update:
+    """
+    UPDATE clients ... FROM (VALUES ...) pour un lot
+
+    La version lue sert de garde: un client modifié entre la lecture et
+    l'écriture n'est pas écrasé (repris au passage suivant). Le re-scoring
+    n'est pas une modification du client: la version n'est pas incrémentée,
+    updated_at=updated_at neutralise l'onupdate=now() du modèle et le
+    trigger update_clients_updated_at laisse updated_at intact quand seules
+    les colonnes de scoring changent.
+    """
+    table = Client.__table__
+    source = values(
+        column('id', UUID(as_uuid=True)),
+        column('version', Integer),
+        *(column(name, table.c[name].type) for name in RESULT_COLUMNS),
+        name='v'
+    ).data([
+        tuple(update_row[name] for name in ('id', 'version') + RESULT_COLUMNS)
+        for update_row in updates
+    ])
+
+    return (
+        update(table)
+        .where(table.c.id == source.c.id, table.c.version == source.c.version)
+        .values(
+            # Cast explicite: une colonne entièrement NULL serait typée text
+            **{name: cast(source.c[name], table.c[name].type) for name in RESULT_COLUMNS},
+            updated_at=table.c.updated_at
+        )
+        .returning(table.c.id)
+    )
+
+
+def _select_chunk(last_id: Any, batch_size: int):
+    """Page suivante (keyset sur id, sans OFFSET)"""
+    table = Client.__table__
+    names = sorted(RISK_INPUT_FIELDS | LCB_FT_INPUT_FIELDS) + [
+        'id', 'version', 'profil_risque_calcule', 'profil_risque_date_calcul',
+        'profil_risque_empreinte', 'lcb_ft_niveau_risque', 'lcb_ft_empreinte',
+    ]
+    query = select(*(table.c[name] for name in names)).order_by(table.c.id).limit(batch_size)
+    if last_id is not None:
+        query = query.where(table.c.id > last_id)
+    return query
+
+
+async def _rescore_chunk(
+    conn: AsyncConnection,
+    rows: Sequence[Any],
+    report: RescoringReport,
+    dry_run: bool
+) -> None:
+    """Recalcule et écrit un lot dans la transaction courante"""
+    updates, unchanged = score_rows(rows)
+    report.examines += len(rows)
+    report.inchanges += unchanged
+    report.recalcules += len(updates)
+    if not updates:
+        return
+
+    if dry_run:
+        written = {update_row['id'] for update_row in updates}
+    else:
+        result = await conn.execute(build_update_statement(updates))
+        written = set(result.scalars().all())
+
+    previous = {row.id: row._mapping for row in rows}
+    for update_row in updates:
+        if update_row['id'] in written:
+            report.mis_a_jour += 1
+            report.record(previous[update_row['id']], update_row)
+        else:
+            report.conflits += 1
+
+
+async def rescore_clients(
+    engine: AsyncEngine,
+    batch_size: Optional[int] = None,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Re-scoring incrémental de tous les clients
+
+    Chaque lot est lu et écrit dans sa propre transaction courte.
+
+    Args:
+        engine: Engine async
+        batch_size: Clients par lot (défaut RESCORING_BATCH_SIZE)
+        dry_run: Calcule le rapport sans écrire
+
+    Returns:
+        Rapport (compteurs, hausses/baisses et transitions par classification)
+    """
+    batch_size = batch_size or settings.RESCORING_BATCH_SIZE
+    report = RescoringReport()
+    last_id = None
+
+    while True:
+        async with engine.begin() as conn:
+            rows = (await conn.execute(_select_chunk(last_id, batch_size))).all()
+            if not rows:
+                break
+            await _rescore_chunk(conn, rows, report, dry_run)
+        last_id = rows[-1].id
+        if len(rows) < batch_size:
+            break
+
+    summary = report.to_dict()
+    logger.info(
+        f"Re-scoring{' (simulation)' if dry_run else ''}: {summary['examines']} examinés, "
+        f"{summary['mis_a_jour']} mis à jour, {summary['inchanges']} inchangés, "
+        f"{summary['conflits']} conflits"
+    )
+    return summary
+
+
+async def run_rescoring(dry_run: bool = False) -> Dict[str, Any]:
+    """Job nocturne avec l'engine de l'application"""
+    from app.database import engine
+
+    return await rescore_clients(engine, dry_run=dry_run)
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    print(json.dumps(asyncio.run(run_rescoring(dry_run="--dry-run" in sys.argv)), indent=2, default=str))
@@ -1,72 +1,164 @@
 """
 Service de calcul du profil de risque
 Algorithme basé sur les critères AMF
+
+Deux points d'entrée partagent les mêmes barèmes:
+- calculate_risk_profile: un client (objet ORM)
+- calculate_risk_profiles_batch: colonnes projetées depuis la base (re-scoring en masse)
 """
 
-from typing import Dict, Any
+import hashlib
+import json
+from typing import Dict, Any, Mapping, Sequence, Iterable, List, Tuple
+
+import numpy as np
+
+from app.config import settings
 from app.models.client import Client
 
 
-def calculate_risk_profile(client: Client) -> Dict[str, Any]:
+# Colonnes lues par le calcul: toute modification impose un recalcul
+RISK_INPUT_FIELDS = frozenset({
+    'horizon_placement', 'tolerance_risque', 'pertes_maximales_acceptables',
+    'kyc_portefeuille_experience_pro', 'kyc_portefeuille_gestion_personnelle',
+    'kyc_derives_detention', 'kyc_structures_detention',
+    'kyc_culture_presse_financiere', 'kyc_culture_suivi_bourse',
+    'patrimoine_global', 'liquidite_importante',
+})
+
+# Version des barèmes: à incrémenter à chaque modification des barèmes
+# (déclenche le re-scoring des clients existants)
+RISK_RULES_BASE_VERSION = "2026.1"
+
+
+def _profil_seuils(seuils: Mapping[str, Tuple[int, int]]) -> Tuple[Tuple[int, str], ...]:
     """
-    Calculer le profil de risque d'un client
-    Basé sur les critères réglementaires AMF
-    
-    Args:
-        client: Client avec ses données KYC
-        
-    Returns:
-        Dict avec profil et score calculés
+    Seuils d'entrée (score minimum) des profils, du plus élevé au plus bas
+
+    Les intervalles [min, max] (bornes incluses) doivent se suivre depuis 0,
+    sans trou ni chevauchement.
     """
-    score = 0
-    max_score = 100
-    
-    # ==========================================
-    # 1. HORIZON DE PLACEMENT (25 points)
-    # ==========================================
-    horizon = client.horizon_placement
+    ordered = sorted(seuils.items(), key=lambda item: item[1][0])
+    expected = 0
+    for profil, (low, high) in ordered:
+        if low != expected or high < low:
+            raise ValueError(f"PROFIL_RISQUE_SEUILS: intervalle de {profil} invalide ({low}-{high})")
+        expected = high + 1
+    return tuple((low, profil) for profil, (low, _) in reversed(ordered))
+
+
+# Seuils des profils (settings.PROFIL_RISQUE_SEUILS)
+PROFIL_SEUILS = _profil_seuils(settings.PROFIL_RISQUE_SEUILS)
+
+# Version effective: version déclarée + empreinte des seuils configurés
+# (toute modification des seuils change la version, comme pour LCB-FT)
+RISK_RULES_VERSION = "{}+{}".format(
+    RISK_RULES_BASE_VERSION,
+    hashlib.sha256(
+        json.dumps(settings.PROFIL_RISQUE_SEUILS, sort_keys=True).encode('utf-8')
+    ).hexdigest()[:8]
+)
+
+
+# ==========================================
+# BARÈMES PAR CRITÈRE
+# ==========================================
+
+def _score_horizon(horizon: Any) -> int:
+    """Horizon de placement (25 points)"""
     if horizon:
         if "8" in horizon or "long" in horizon.lower():
-            score += 25
+            return 25
         elif "5" in horizon:
-            score += 18
+            return 18
         elif "3" in horizon:
-            score += 10
+            return 10
         elif "2" in horizon or "court" in horizon.lower():
-            score += 5
-    
-    # ==========================================
-    # 2. TOLÉRANCE AU RISQUE (25 points)
-    # ==========================================
-    tolerance = client.tolerance_risque
+            return 5
+    return 0
+
+
+def _score_tolerance(tolerance: Any) -> int:
+    """Tolérance au risque (25 points)"""
     if tolerance:
         tolerance_lower = tolerance.lower()
         if "très élevé" in tolerance_lower or "agressif" in tolerance_lower:
-            score += 25
+            return 25
         elif "élevé" in tolerance_lower or "dynamique" in tolerance_lower:
-            score += 20
+            return 20
         elif "moyen" in tolerance_lower or "équilibré" in tolerance_lower:
-            score += 15
+            return 15
         elif "faible" in tolerance_lower or "prudent" in tolerance_lower:
-            score += 8
+            return 8
         elif "très faible" in tolerance_lower or "sécuritaire" in tolerance_lower:
-            score += 3
-    
-    # ==========================================
-    # 3. PERTES MAXIMALES ACCEPTABLES (20 points)
-    # ==========================================
-    pertes = client.pertes_maximales_acceptables
+            return 3
+    return 0
+
+
+def _score_pertes(pertes: Any) -> int:
+    """Pertes maximales acceptables (20 points)"""
     if pertes:
         if "100" in pertes:
-            score += 20
+            return 20
         elif "50" in pertes:
-            score += 15
+            return 15
         elif "25" in pertes:
-            score += 10
+            return 10
         elif "15" in pertes or "10" in pertes:
-            score += 5
-        elif "aucune" in pertes.lower() or "0" in pertes:
-            score += 0
+            return 5
+    return 0
+
+
+def _score_patrimoine(patrimoine: Any) -> int:
+    """Situation patrimoniale (10 points)"""
+    if patrimoine:
+        if "5000000" in patrimoine:
+            return 10
+        elif "1000000" in patrimoine:
+            return 8
+        elif "500000" in patrimoine:
+            return 6
+        elif "300000" in patrimoine:
+            return 4
+        elif "100000" in patrimoine:
+            return 2
+    return 0
+
+
+def _profil_from_score(score: int) -> str:
+    """Profil correspondant à un score"""
+    for seuil, profil in PROFIL_SEUILS:
+        if score >= seuil:
+            return profil
+    return PROFIL_SEUILS[-1][1]
+
+
+# ==========================================
+# CALCUL UNITAIRE
+# ==========================================
+
+def calculate_risk_profile(client: Client) -> Dict[str, Any]:
+    """
+    Calculer le profil de risque d'un client
+    Basé sur les critères réglementaires AMF
+    
+    Args:
+        client: Client avec ses données KYC
+        
+    Returns:
+        Dict avec profil et score calculés
+    """
+    score = 0
+    max_score = 100
+    
+    # 1. Horizon de placement (25 points)
+    score += _score_horizon(client.horizon_placement)
+    
+    # 2. Tolérance au risque (25 points)
+    score += _score_tolerance(client.tolerance_risque)
+    
+    # 3. Pertes maximales acceptables (20 points)
+    score += _score_pertes(client.pertes_maximales_acceptables)
     
     # ==========================================
     # 4. EXPÉRIENCE FINANCIÈRE (15 points)
@@ -88,43 +180,15 @@ def calculate_risk_profile(client: Client) -> Dict[str, Any]:
     if client.kyc_culture_presse_financiere and client.kyc_culture_suivi_bourse:
         score += 3
     
-    # ==========================================
-    # 5. SITUATION PATRIMONIALE (10 points)
-    # ==========================================
-    patrimoine = client.patrimoine_global
-    if patrimoine:
-        if "5000000" in patrimoine:
-            score += 10
-        elif "1000000" in patrimoine:
-            score += 8
-        elif "500000" in patrimoine:
-            score += 6
-        elif "300000" in patrimoine:
-            score += 4
-        elif "100000" in patrimoine:
-            score += 2
+    # 5. Situation patrimoniale (10 points)
+    score += _score_patrimoine(client.patrimoine_global)
     
-    # ==========================================
-    # 6. LIQUIDITÉ (5 points)
-    # ==========================================
+    # 6. Liquidité (5 points)
     if not client.liquidite_importante:
         score += 5
     
-    # ==========================================
-    # DÉTERMINATION DU PROFIL
-    # ==========================================
-    profil = ""
-    if score >= 75:
-        profil = "Dynamique"
-    elif score >= 50:
-        profil = "Équilibré"
-    elif score >= 25:
-        profil = "Prudent"
-    else:
-        profil = "Sécuritaire"
-    
     return {
-        "profil": profil,
+        "profil": _profil_from_score(score),
         "score": score,
         "max_score": max_score,
         "details": {
@@ -134,4 +198,98 @@ def calculate_risk_profile(client: Client) -> Dict[str, Any]:
             "experience": bool(client.kyc_portefeuille_experience_pro),
             "liquidite_requise": client.liquidite_importante
         }
-    }
\ No newline at end of file
+    }
+
+
+# ==========================================
+# CALCUL PAR LOTS (VECTORISÉ)
+# ==========================================
+
+def _categorical_points(values: Sequence[Any], scorer) -> np.ndarray:
+    """
+    Points d'une colonne catégorielle via table de correspondance
+
+    Le barème n'est évalué qu'une fois par valeur distincte (quelques
+    dizaines de réponses possibles), puis propagé par indexation.
+    """
+    array = np.asarray(values, dtype=object)
+    if array.size == 0:
+        return np.zeros(0, dtype=np.int16)
+    array = np.where(array == None, "", array).astype(str)  # noqa: E711
+    uniques, inverse = np.unique(array, return_inverse=True)
+    table = np.fromiter((scorer(value) for value in uniques), dtype=np.int16, count=len(uniques))
+    return table[inverse]
+
+
+def _bool_column(values: Sequence[Any]) -> np.ndarray:
+    """Colonne booléenne (None -> False, même règle que le calcul unitaire)"""
+    return np.fromiter((bool(value) for value in values), dtype=bool, count=len(values))
+
+
+def calculate_risk_profiles_batch(columns: Mapping[str, Sequence[Any]]) -> Dict[str, np.ndarray]:
+    """
+    Calculer les profils de risque de nombreux clients en une passe
+
+    Résultats identiques à calculate_risk_profile, client par client.
+
+    Args:
+        columns: Une séquence par colonne de RISK_INPUT_FIELDS (même
+            longueur), par ex. projection SQL ou DataFrame
+
+    Returns:
+        {"score": int16[n], "profil": object[n]}
+    """
+    size = len(next(iter(columns.values()))) if columns else 0
+
+    def column(name: str) -> Sequence[Any]:
+        values = columns.get(name)
+        return values if values is not None else [None] * size
+
+    score = (
+        _categorical_points(column('horizon_placement'), _score_horizon)
+        + _categorical_points(column('tolerance_risque'), _score_tolerance)
+        + _categorical_points(column('pertes_maximales_acceptables'), _score_pertes)
+        + _categorical_points(column('patrimoine_global'), _score_patrimoine)
+    ).astype(np.int16)
+
+    # Expérience financière
+    score += np.where(_bool_column(column('kyc_portefeuille_experience_pro')), 5, 0).astype(np.int16)
+    score += np.where(_bool_column(column('kyc_portefeuille_gestion_personnelle')), 3, 0).astype(np.int16)
+    score += np.where(
+        _bool_column(column('kyc_derives_detention')) | _bool_column(column('kyc_structures_detention')),
+        4, 0
+    ).astype(np.int16)
+    score += np.where(
+        _bool_column(column('kyc_culture_presse_financiere')) & _bool_column(column('kyc_culture_suivi_bourse')),
+        3, 0
+    ).astype(np.int16)
+
+    # Liquidité
+    score += np.where(_bool_column(column('liquidite_importante')), 0, 5).astype(np.int16)
+
+    profil = np.select(
+        [score >= seuil for seuil, _ in PROFIL_SEUILS],
+        [np.array(nom, dtype=object) for _, nom in PROFIL_SEUILS],
+        default=PROFIL_SEUILS[-1][1]
+    ).astype(object)
+
+    return {"score": score, "profil": profil}
+
+
+def columns_from_rows(rows: Iterable[Any], fields: Iterable[str] = RISK_INPUT_FIELDS) -> Dict[str, List[Any]]:
+    """
+    Transpose des lignes (Row SQLAlchemy, objets) en colonnes
+
+    Args:
+        rows: Lignes exposant les champs en attributs
+        fields: Colonnes à extraire
+
+    Returns:
+        {colonne: [valeurs]}
+    """
+    fields = list(fields)
+    columns = {field: [] for field in fields}
+    for row in rows:
+        for field in fields:
+            columns[field].append(getattr(row, field, None))
+    return columns
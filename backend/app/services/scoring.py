@@ -0,0 +1,132 @@
+"""
+Service de scoring mémoïsé (profil de risque et niveau LCB-FT)
+
+Chaque calculateur déclare ses colonnes d'entrée (RISK_INPUT_FIELDS,
+LCB_FT_INPUT_FIELDS) et la version de ses règles. L'empreinte de ces
+entrées est enregistrée avec le résultat: tant qu'elle ne change pas, le
+résultat stocké est réutilisé (formulaire, autosave, re-scoring nocturne).
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from app.core.logging import get_logger
+from app.services.lcb_ft_classifier import LCB_FT_INPUT_FIELDS, classify_lcb_ft_level, get_lcb_ft_rules
+from app.services.risk_calculator import RISK_INPUT_FIELDS, RISK_RULES_VERSION, calculate_risk_profile
+
+logger = get_logger(__name__)
+
+
+# ==========================================
+# EMPREINTES
+# ==========================================
+
+def _normalize(value: Any) -> Any:
+    """Valeur canonique (Decimal 750000.00 == 750000)"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float, Decimal)):
+        return format(Decimal(str(value)).normalize(), 'f')
+    return value
+
+
+def read_field(source: Any, name: str) -> Any:
+    """Lit un champ sur un dict, une Row ou un objet"""
+    if isinstance(source, Mapping):
+        return source.get(name)
+    return getattr(source, name, None)
+
+
+def input_fingerprint(source: Any, fields: Iterable[str], version: str) -> str:
+    """
+    Empreinte stable des entrées d'un calculateur
+
+    Args:
+        source: Client, Row ou dictionnaire exposant les champs
+        fields: Colonnes d'entrée du calculateur
+        version: Version des règles appliquées
+
+    Returns:
+        SHA-256 hexadécimal (64 caractères)
+    """
+    payload = {
+        "version": version,
+        "entrees": {name: _normalize(read_field(source, name)) for name in sorted(fields)},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def risk_fingerprint(source: Any) -> str:
+    """Empreinte des entrées du profil de risque"""
+    return input_fingerprint(source, RISK_INPUT_FIELDS, RISK_RULES_VERSION)
+
+
+def lcb_ft_fingerprint(source: Any) -> str:
+    """Empreinte des entrées LCB-FT"""
+    return input_fingerprint(source, LCB_FT_INPUT_FIELDS, get_lcb_ft_rules().version)
+
+
+# ==========================================
+# SCORING MÉMOÏSÉ
+# ==========================================
+
+def score_client(source: Any, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Recalcule uniquement les scores dont l'empreinte a changé
+
+    Args:
+        source: Client (ou vue) exposant entrées, résultats et empreintes
+        now: Date de calcul du profil de risque
+
+    Returns:
+        Colonnes à écrire (vide si les deux résultats stockés sont à jour)
+    """
+    values: Dict[str, Any] = {}
+
+    fingerprint = risk_fingerprint(source)
+    if fingerprint != read_field(source, 'profil_risque_empreinte'):
+        try:
+            profile = calculate_risk_profile(source)
+            values.update({
+                'profil_risque_calcule': profile["profil"],
+                'profil_risque_score': profile["score"],
+                'profil_risque_date_calcul': now or datetime.utcnow(),
+                'profil_risque_empreinte': fingerprint,
+                'profil_risque_regles_version': RISK_RULES_VERSION,
+            })
+        except Exception:
+            pass  # Ignorer si les données sont insuffisantes
+
+    fingerprint = lcb_ft_fingerprint(source)
+    if fingerprint != read_field(source, 'lcb_ft_empreinte'):
+        try:
+            values.update({
+                'lcb_ft_niveau_risque': classify_lcb_ft_level(source),
+                'lcb_ft_empreinte': fingerprint,
+                'lcb_ft_regles_version': get_lcb_ft_rules().version,
+            })
+        except Exception:
+            pass  # Ignorer si les données sont insuffisantes
+
+    return values
+
+
+def apply_scoring(client: Any, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Pose sur le client les scores recalculés (objet ORM, avant flush)
+
+    Args:
+        client: Client ORM
+        now: Date de calcul du profil de risque
+
+    Returns:
+        Colonnes modifiées
+    """
+    values = score_client(client, now)
+    for name, value in values.items():
+        setattr(client, name, value)
+    return values
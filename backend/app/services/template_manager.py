@@ -6,17 +6,22 @@ Ce module gère:
 - La sélection automatique de la dernière version
 - La validation des templates
 - Le registre des templates disponibles
+- Le cache des templates parsés (par checksum) et le rechargement à chaud
 """
 
 import os
 import re
+import copy
 import hashlib
+import threading
+from io import BytesIO
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field, replace
 from enum import Enum
 
+from app.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -65,6 +70,11 @@ class TemplateManager:
     - Versionnement sémantique (v1, v2, v3...)
     - Sélection de la version active
     - Validation de l'intégrité
+    - Scan incrémental (seuls les fichiers modifiés sont relus)
+    - Cache des templates parsés et surveillance du dossier
+
+    Chaque scan construit un nouveau registre puis le substitue à l'ancien
+    en une affectation: une génération en cours garde sa version.
     """
 
     # Pattern pour extraire la version du nom de fichier
@@ -81,54 +91,106 @@ class TemplateManager:
             templates_dir: Chemin vers le dossier des templates
         """
         if templates_dir is None:
-            templates_dir = os.environ.get(
-                'TEMPLATES_PATH',
-                str(Path(__file__).parent.parent.parent / 'templates')
-            )
+            templates_dir = os.environ.get('TEMPLATES_PATH', settings.DOCX_TEMPLATE_PATH)
 
         self.templates_dir = Path(templates_dir)
         self.registry = TemplateRegistry(templates_dir=self.templates_dir)
 
+        # Index du dernier scan: chemin -> (mtime_ns, taille, TemplateInfo ou None)
+        self._index: Dict[Path, Tuple[int, int, Optional[TemplateInfo]]] = {}
+
+        # Templates DOCX parsés, par checksum (copiés à chaque utilisation)
+        self._parsed: Dict[str, Any] = {}
+
+        # Templates TXT: chemin -> (mtime_ns, taille, contenu)
+        self._texts: Dict[Path, Tuple[int, int, str]] = {}
+
+        self._lock = threading.RLock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+
         logger.info(f"TemplateManager initialisé: {self.templates_dir}")
 
     def scan_templates(self) -> TemplateRegistry:
         """
         Scanne le dossier templates et construit le registre
 
+        Seuls les fichiers nouveaux ou modifiés (mtime/taille) sont relus et
+        leur checksum recalculé; les autres reprennent l'entrée précédente.
+
         Returns:
             Registre des templates trouvés
         """
-        self.registry.templates.clear()
-
-        if not self.templates_dir.exists():
-            logger.error(f"Dossier templates introuvable: {self.templates_dir}")
-            return self.registry
-
-        # Scanner récursivement
-        docx_files = list(self.templates_dir.rglob("*.docx"))
-        logger.info(f"Scan: {len(docx_files)} fichiers .docx trouvés")
-
-        for file_path in docx_files:
-            template_info = self._parse_template(file_path)
-            if template_info:
-                if template_info.document_type not in self.registry.templates:
-                    self.registry.templates[template_info.document_type] = []
-                self.registry.templates[template_info.document_type].append(template_info)
+        with self._lock:
+            registry = TemplateRegistry(templates_dir=self.templates_dir)
+
+            if not self.templates_dir.exists():
+                logger.error(f"Dossier templates introuvable: {self.templates_dir}")
+                self._swap(registry, {})
+                return registry
+
+            index = {}
+            changed = 0
+            for file_path in self.templates_dir.rglob("*.docx"):
+                try:
+                    stat = file_path.stat()
+                except OSError:
+                    continue  # Supprimé pendant le scan
+
+                cached = self._index.get(file_path)
+                if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                    template_info = cached[2]
+                else:
+                    template_info = self._parse_template(file_path)
+                    changed += 1
+                index[file_path] = (stat.st_mtime_ns, stat.st_size, template_info)
+
+                if template_info:
+                    # Copie: is_active est propre à chaque registre
+                    registry.templates.setdefault(template_info.document_type, []).append(
+                        replace(template_info)
+                    )
+
+            removed = len(set(self._index) - set(index))
+            first_scan = self.registry.last_scan is None
+
+            # Trier par version et déterminer les templates actifs
+            self._sort_and_activate(registry)
+
+            registry.last_scan = datetime.utcnow()
+            self._swap(registry, index)
+
+        if first_scan or changed or removed:
+            logger.info(
+                f"Scan: {len(index)} fichiers .docx, {changed} relu(s), {removed} supprimé(s)"
+            )
+            # Log le résumé
+            for doc_type, templates in registry.templates.items():
+                active = next((t for t in templates if t.is_active), None)
+                logger.info(
+                    f"  {doc_type.value}: {len(templates)} version(s), "
+                    f"active: {active.version if active else 'aucune'}"
+                )
 
-        # Trier par version et déterminer les templates actifs
-        self._sort_and_activate()
+        return registry
 
-        self.registry.last_scan = datetime.utcnow()
+    def _swap(self, registry: TemplateRegistry, index: Dict[Path, Tuple[int, int, Optional[TemplateInfo]]]):
+        """
+        Substitue le nouveau registre et purge le cache des templates parsés
 
-        # Log le résumé
-        for doc_type, templates in self.registry.templates.items():
-            active = next((t for t in templates if t.is_active), None)
-            logger.info(
-                f"  {doc_type.value}: {len(templates)} version(s), "
-                f"active: {active.version if active else 'aucune'}"
-            )
+        Args:
+            registry: Registre complet du scan
+            index: Index du scan
+        """
+        self.registry = registry
+        self._index = index
 
-        return self.registry
+        checksums = {
+            info.checksum for _, _, info in index.values() if info is not None
+        }
+        for checksum in list(self._parsed):
+            if checksum not in checksums:
+                del self._parsed[checksum]
 
     def _parse_template(self, file_path: Path) -> Optional[TemplateInfo]:
         """
@@ -142,9 +204,11 @@ class TemplateManager:
         """
         file_name = file_path.name.upper()
 
-        # Ignorer les fichiers avec suffixes de backup
+        # Ignorer les fichiers avec suffixes de backup (segment complet:
+        # _TEMP ne doit pas exclure les fichiers *_TEMPLATE)
+        stem = file_path.stem.upper()
         for suffix in self.IGNORE_SUFFIXES:
-            if suffix in file_name:
+            if re.search(re.escape(suffix) + r'(?=_|$)', stem):
                 logger.debug(f"Ignoré (suffixe {suffix}): {file_path.name}")
                 return None
 
@@ -244,12 +308,17 @@ class TemplateManager:
             logger.error(f"Erreur checksum {file_path}: {e}")
             return ""
 
-    def _sort_and_activate(self):
+    def _sort_and_activate(self, registry: Optional[TemplateRegistry] = None):
         """
         Trie les templates par version et active la plus récente
+
+        Args:
+            registry: Registre à trier (registre courant par défaut)
         """
-        for doc_type, templates in self.registry.templates.items():
-            # Trier par version décroissante
+        registry = registry or self.registry
+        for doc_type, templates in registry.templates.items():
+            # Trier par version décroissante (nom de fichier en départage)
+            templates.sort(key=lambda t: t.file_name)
             templates.sort(
                 key=lambda t: tuple(map(int, t.version.split('.'))),
                 reverse=True
@@ -274,11 +343,12 @@ class TemplateManager:
         Returns:
             TemplateInfo ou None si non trouvé
         """
-        if document_type not in self.registry.templates:
+        registry = self.registry
+        if document_type not in registry.templates:
             logger.warning(f"Aucun template pour {document_type.value}")
             return None
 
-        templates = self.registry.templates[document_type]
+        templates = registry.templates[document_type]
 
         if version:
             # Version spécifique demandée
@@ -310,6 +380,170 @@ class TemplateManager:
         template = self.get_template(document_type, version)
         return template.file_path if template else None
 
+    def load_document(
+        self,
+        document_type: DocumentType,
+        version: str = None
+    ) -> Optional[Any]:
+        """
+        Template DOCX prêt à remplir (copie du template parsé en cache)
+
+        Args:
+            document_type: Type de document
+            version: Version spécifique ou None pour la dernière
+
+        Returns:
+            Document python-docx indépendant ou None si non trouvé
+        """
+        template = self.get_template(document_type, version)
+        if not template:
+            return None
+        return self.open_template(template)
+
+    def open_template(self, template: TemplateInfo) -> Any:
+        """
+        Ouvre un template via le cache (parsé une fois par checksum)
+
+        Le document en cache n'est jamais modifié: chaque appel reçoit une
+        copie profonde qu'il peut remplir librement.
+
+        Args:
+            template: Template du registre
+
+        Returns:
+            Document python-docx
+        """
+        return copy.deepcopy(self.preload(template))
+
+    def preload(self, template: TemplateInfo) -> Any:
+        """
+        Parse un template et le place en cache (sans copie)
+
+        Args:
+            template: Template du registre
+
+        Returns:
+            Document python-docx en cache (à ne pas modifier)
+        """
+        return self.load_parsed(template)[1]
+
+    def load_parsed(self, template: TemplateInfo) -> Tuple[str, Any]:
+        """
+        Template parsé en cache et checksum du contenu parsé
+
+        Fichier modifié depuis le scan: le contenu lu est indexé sous son
+        checksum réel et un nouveau TemplateInfo remplace l'ancien dans le
+        registre, les ouvertures suivantes retrouvent ainsi l'entrée du
+        cache. Le TemplateInfo reçu n'est jamais modifié.
+
+        Args:
+            template: Template du registre
+
+        Returns:
+            (checksum du contenu parsé, document python-docx à ne pas modifier)
+        """
+        checksum = template.checksum
+        parsed = self._parsed.get(checksum)
+        if parsed is None:
+            from docx import Document
+
+            data = template.file_path.read_bytes()
+            checksum = hashlib.md5(data).hexdigest()
+            parsed = self._parsed.get(checksum)
+            if parsed is None:
+                parsed = Document(BytesIO(data))
+            with self._lock:
+                self._parsed[checksum] = parsed
+                if checksum != template.checksum:
+                    logger.info(f"Template modifié depuis le scan: {template.file_name}")
+                    self._replace_template(
+                        template, replace(template, checksum=checksum, file_size=len(data))
+                    )
+
+        return checksum, parsed
+
+    def _replace_template(self, old: TemplateInfo, new: TemplateInfo):
+        """
+        Substitue un registre où `old` est remplacé par `new` (sous self._lock)
+
+        Sans effet si un scan a déjà remplacé le registre contenant `old`.
+        """
+        if not any(info is old for info in self.registry.templates.get(old.document_type, [])):
+            return
+        self.registry = replace(self.registry, templates={
+            doc_type: [new if info is old else info for info in templates]
+            for doc_type, templates in self.registry.templates.items()
+        })
+
+    def load_text(self, file_path: Path) -> str:
+        """
+        Contenu d'un template TXT (relu seulement si mtime/taille changent)
+
+        Args:
+            file_path: Chemin du fichier
+
+        Returns:
+            Contenu du fichier
+
+        Raises:
+            FileNotFoundError: Fichier absent
+        """
+        file_path = Path(file_path)
+        stat = file_path.stat()
+        cached = self._texts.get(file_path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        content = file_path.read_text(encoding='utf-8')
+        with self._lock:
+            self._texts[file_path] = (stat.st_mtime_ns, stat.st_size, content)
+        return content
+
+    # ==========================================
+    # SURVEILLANCE DU DOSSIER
+    # ==========================================
+
+    def start_watcher(self, interval: float) -> bool:
+        """
+        Démarre la surveillance du dossier (scrutation mtime/taille)
+
+        Args:
+            interval: Secondes entre deux scans (0 = désactivé)
+
+        Returns:
+            True si la surveillance est active
+        """
+        if interval <= 0:
+            return False
+        if self._watcher and self._watcher.is_alive():
+            return True
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(interval,),
+            name="template-watcher",
+            daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"Surveillance des templates: toutes les {interval}s")
+        return True
+
+    def stop_watcher(self, timeout: float = 5.0):
+        """Arrête la surveillance du dossier"""
+        self._stop_watching.set()
+        if self._watcher:
+            self._watcher.join(timeout)
+            self._watcher = None
+
+    def _watch(self, interval: float):
+        """Boucle de surveillance (thread dédié)"""
+        while not self._stop_watching.wait(interval):
+            try:
+                self.scan_templates()
+            except Exception as e:
+                logger.error(f"Erreur scan templates: {e}")
+
     def list_templates(self) -> Dict[str, List[dict]]:
         """
         Liste tous les templates disponibles
@@ -380,9 +614,10 @@ class TemplateManager:
         Returns:
             Dictionnaire de statistiques
         """
-        total_templates = sum(len(t) for t in self.registry.templates.values())
+        registry = self.registry
+        total_templates = sum(len(t) for t in registry.templates.values())
         active_templates = sum(
-            1 for templates in self.registry.templates.values()
+            1 for templates in registry.templates.values()
             for t in templates if t.is_active
         )
 
@@ -390,11 +625,14 @@ class TemplateManager:
             "templates_dir": str(self.templates_dir),
             "total_templates": total_templates,
             "active_templates": active_templates,
-            "document_types": len(self.registry.templates),
-            "last_scan": self.registry.last_scan.isoformat() if self.registry.last_scan else None,
+            "document_types": len(registry.templates),
+            "parsed_cached": len(self._parsed),
+            "texts_cached": len(self._texts),
+            "watching": bool(self._watcher and self._watcher.is_alive()),
+            "last_scan": registry.last_scan.isoformat() if registry.last_scan else None,
             "by_type": {
                 doc_type.value: len(templates)
-                for doc_type, templates in self.registry.templates.items()
+                for doc_type, templates in registry.templates.items()
             }
         }
 
@@ -0,0 +1,171 @@
+"""
+Préchauffage des templates au démarrage
+
+Ce module gère:
+- Le parsing (mise en cache) des templates DOCX actifs et des versions v2
+- La lecture (mise en cache) des templates TXT
+- Un rendu à blanc de chaque document v2 avec un client synthétique
+- Le rapport des durées par template et l'état lu par /health/ready
+"""
+
+import asyncio
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.core.logging import get_logger
+from app.models.client import Client
+from app.models.user import User
+from app.services.docx_generator import DocxGenerator, V2_TEMPLATE_VERSIONS
+from app.services.template_manager import TemplateManager, get_template_manager
+
+logger = get_logger(__name__)
+
+# État du préchauffage: en_attente, en_cours, termine, echec, desactive
+_state: Dict[str, Any] = {"statut": "en_attente", "rapport": None}
+
+
+def is_warm() -> bool:
+    """Préchauffage terminé (avec ou sans erreur) ou désactivé"""
+    return _state["statut"] in ("termine", "echec", "desactive")
+
+
+def get_warmup_state() -> Dict[str, Any]:
+    """Statut et dernier rapport de préchauffage"""
+    return dict(_state)
+
+
+# ==========================================
+# DONNÉES SYNTHÉTIQUES
+# ==========================================
+
+def synthetic_client() -> Client:
+    """Client transitoire (jamais ajouté à une session) pour le rendu à blanc"""
+    return Client(
+        numero_client="PRECHAUFFAGE",
+        t1_civilite="M.",
+        t1_nom="Préchauffage",
+        t1_prenom="Test",
+        t1_residence_fiscale="France",
+        form_data={},
+    )
+
+
+def synthetic_conseiller() -> User:
+    """Conseiller transitoire pour le rendu à blanc"""
+    return User(nom="Préchauffage", prenom="Conseiller", email="prechauffage@example.com")
+
+
+# ==========================================
+# PRÉCHAUFFAGE
+# ==========================================
+
+def _timed(name: str, action: Callable[[], Any]) -> Dict[str, Any]:
+    """Exécute une étape et mesure sa durée"""
+    start = time.perf_counter()
+    entry: Dict[str, Any] = {"nom": name, "statut": "ok"}
+    try:
+        action()
+    except Exception as e:
+        entry["statut"] = "erreur"
+        entry["message"] = str(e)
+        logger.warning(f"Préchauffage {name}: {e}")
+    entry["duree_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return entry
+
+
+def _dry_render(generator: DocxGenerator, document_type, client: Client, conseiller: User) -> None:
+    """Rendu complet en mémoire (remplacement + sérialisation)"""
+    doc = generator.render_v2_document(document_type, client, conseiller)
+    if doc is None:
+        raise FileNotFoundError(f"Template v2 absent pour {document_type.value}")
+    doc.save(BytesIO())
+
+
+def warm_up_templates(
+    manager: Optional[TemplateManager] = None,
+    generator: Optional[DocxGenerator] = None
+) -> Dict[str, Any]:
+    """
+    Précharge tous les templates et effectue un rendu à blanc
+
+    Args:
+        manager: TemplateManager (instance globale par défaut)
+        generator: Générateur DOCX (créé si absent)
+
+    Returns:
+        Rapport: durées par template DOCX, TXT et rendu
+    """
+    start = time.perf_counter()
+    manager = manager or get_template_manager()
+    generator = generator or DocxGenerator()
+
+    # Templates DOCX: versions actives et versions figées du générateur
+    templates = {}
+    for versions in manager.registry.templates.values():
+        for template in versions:
+            if template.is_active:
+                templates[template.file_path] = template
+    for document_type, version in V2_TEMPLATE_VERSIONS.items():
+        template = manager.get_template(document_type, version)
+        if template:
+            templates[template.file_path] = template
+
+    docx: List[Dict[str, Any]] = [
+        _timed(template.file_name, lambda t=template: manager.preload(t))
+        for template in templates.values()
+    ]
+
+    # Templates TXT
+    txt_dir = Path(generator.txt_templates_path)
+    txt = [
+        _timed(path.name, lambda p=path: manager.load_text(p))
+        for path in sorted(txt_dir.glob("*.txt"))
+    ] if txt_dir.exists() else []
+
+    # Rendu à blanc (imports, builders, sérialisation)
+    client, conseiller = synthetic_client(), synthetic_conseiller()
+    rendus = [
+        _timed(document_type.value, lambda d=document_type: _dry_render(generator, d, client, conseiller))
+        for document_type in V2_TEMPLATE_VERSIONS
+    ]
+
+    erreurs = sum(1 for entry in docx + txt + rendus if entry["statut"] != "ok")
+    return {
+        "docx": docx,
+        "txt": txt,
+        "rendus": rendus,
+        "erreurs": erreurs,
+        "duree_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+async def run_template_warmup() -> Dict[str, Any]:
+    """
+    Préchauffage en tâche de fond (thread) au démarrage
+
+    /health/ready répond 503 tant que cette tâche n'est pas terminée.
+
+    Returns:
+        Rapport de préchauffage
+    """
+    if not settings.TEMPLATES_WARMUP:
+        _state["statut"] = "desactive"
+        return {}
+
+    _state["statut"] = "en_cours"
+    try:
+        report = await asyncio.to_thread(warm_up_templates)
+    except Exception as e:
+        logger.error(f"Préchauffage des templates impossible: {e}")
+        _state.update(statut="echec", rapport={"message": str(e)})
+        return _state["rapport"]
+
+    for entry in report["docx"] + report["txt"] + report["rendus"]:
+        logger.info(f"Préchauffage {entry['nom']}: {entry['duree_ms']} ms ({entry['statut']})")
+    logger.info(f"Préchauffage terminé en {report['duree_ms']} ms, {report['erreurs']} erreur(s)")
+
+    _state.update(statut="termine", rapport=report)
+    return report
@@ -4,8 +4,10 @@ Fixtures et configuration globale
 """
 
 import asyncio
+import uuid
 import pytest
 import pytest_asyncio
+from types import SimpleNamespace
 from typing import AsyncGenerator, Generator
 from unittest.mock import MagicMock, AsyncMock
 from httpx import AsyncClient
@@ -268,6 +270,39 @@ def mock_client_standard_lcb(mock_client_minimal):
     return client
 
 
+# ==========================================
+# FIXTURES SCORING
+# ==========================================
+
+@pytest.fixture
+def make_scoring_row():
+    """Fabrique de lignes clients projetées (entrées, résultats, empreintes)"""
+    def factory(**overrides):
+        data = {
+            'id': uuid.uuid4(), 'version': 3,
+            'horizon_placement': "5 à 8 ans", 'tolerance_risque': "Moyen",
+            'pertes_maximales_acceptables': "15%", 'patrimoine_global': "500000",
+            'liquidite_importante': True,
+            'kyc_portefeuille_experience_pro': False, 'kyc_portefeuille_gestion_personnelle': True,
+            'kyc_derives_detention': False, 'kyc_structures_detention': False,
+            'kyc_culture_presse_financiere': True, 'kyc_culture_suivi_bourse': False,
+            'lcb_ft_ppe': False, 'lcb_ft_ppe_famille': False,
+            't1_us_person': False, 't2_us_person': False,
+            't1_residence_fiscale': "France", 't1_residence_fiscale_autre': None,
+            'origine_economique_gains_jeu': False, 'origine_economique_cession_pro': False,
+            'origine_economique_autres': False, 'lcb_ft_justificatifs': False,
+            'origine_fonds_montant_prevu': None, 't1_profession': "Employé",
+            't1_chef_entreprise': False, 't1_entreprise_forme_juridique': None,
+            'profil_risque_calcule': None, 'profil_risque_score': None,
+            'profil_risque_date_calcul': None, 'profil_risque_empreinte': None,
+            'profil_risque_regles_version': None, 'lcb_ft_niveau_risque': None,
+            'lcb_ft_empreinte': None, 'lcb_ft_regles_version': None,
+        }
+        data.update(overrides)
+        return SimpleNamespace(**data)
+    return factory
+
+
 # ==========================================
 # FIXTURES REDIS MOCK
 # ==========================================
@@ -286,6 +321,36 @@ def mock_redis():
     return redis
 
 
+# ==========================================
+# FIXTURES GÉNÉRATION DOCX
+# ==========================================
+
+@pytest.fixture
+def v2_generator(tmp_path, monkeypatch):
+    """Générateur avec un template DER v2 et un stockage temporaires"""
+    from docx import Document
+    from app.services import document_storage as document_storage_module
+    from app.services import template_manager as template_manager_module
+    from app.services.docx_generator import DocxGenerator
+    from app.services.document_storage import DocumentStorage, LocalStorageBackend
+    from app.services.template_manager import TemplateManager
+
+    (tmp_path / "v2").mkdir()
+    doc = Document()
+    doc.add_paragraph("DER {{NOM_COMPLET_T1}} {{NOM_CONSEILLER}}")
+    doc.save(str(tmp_path / "v2" / "DER_V2_TEMPLATE.docx"))
+
+    manager = TemplateManager(str(tmp_path))
+    manager.scan_templates()
+    monkeypatch.setattr(template_manager_module, "_template_manager", manager)
+    monkeypatch.setattr(
+        document_storage_module, "_document_storage",
+        DocumentStorage(LocalStorageBackend(str(tmp_path / "blobs")))
+    )
+    monkeypatch.setattr(settings, "DOCX_TEMPLATE_PATH", str(tmp_path))
+    return DocxGenerator()
+
+
 # ==========================================
 # HELPERS
 # ==========================================
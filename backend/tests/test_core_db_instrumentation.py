@@ -0,0 +1,164 @@
+"""
+Tests unitaires de l'instrumentation SQLAlchemy
+(empreinte des requêtes, pool, journal des requêtes lentes, spans)
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import metrics
+from app.core.db_instrumentation import InstrumentedAsyncPool, instrument_engine, statement_info
+from app.core.tracing import configure_tracing, shutdown_tracing, start_span
+from app.models.audit_log import AuditLog
+from app.models.document import Document
+
+from tests.test_core_metrics import Recorder
+from tests.test_core_tracing import ListExporter
+
+
+class GaugeRecorder:
+    """Jauge (ou histogramme sans label) qui garde sa dernière valeur"""
+
+    def __init__(self):
+        self.value = None
+        self.observations = []
+
+    def set(self, value):
+        self.value = value
+
+    def observe(self, value):
+        self.observations.append(value)
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Métriques DB remplacées par des enregistreurs"""
+    recorders = {"db_query_duration_seconds": Recorder()}
+    for name in [
+        "db_connections_active", "db_connections_idle", "db_connections_overflow",
+        "db_connections_pool_size", "db_pool_checkout_wait_seconds",
+    ]:
+        recorders[name] = GaugeRecorder()
+    for name, recorder in recorders.items():
+        monkeypatch.setattr(metrics, name, recorder)
+    return recorders
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}",
+        poolclass=InstrumentedAsyncPool,
+        pool_size=1,
+        max_overflow=1,
+    )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.unit
+class TestStatementInfo:
+    """Tests de la normalisation"""
+
+    def test_valeurs_differentes_meme_empreinte(self):
+        first = statement_info("SELECT * FROM clients WHERE nom = 'DUPONT' AND id IN ($1, $2, $3) LIMIT 10")
+        second = statement_info("SELECT *\n  FROM clients WHERE nom = 'O''HARA' AND id IN ($1) LIMIT 50")
+
+        assert first.empreinte == second.empreinte
+        assert first.normalisee == "SELECT * FROM clients WHERE nom = ? AND id IN (?) LIMIT ?"
+
+    def test_operation_et_table(self):
+        insert = statement_info('INSERT INTO public."documents" (id, nom) VALUES ($1, $2), ($3, $4)')
+        update = statement_info("UPDATE clients SET t1_nom=%(t1_nom)s WHERE clients.id = %(id)s")
+
+        assert (insert.operation, insert.table) == ("INSERT", "documents")
+        assert insert.normalisee.endswith("VALUES (?)")
+        assert (update.operation, update.table) == ("UPDATE", "clients")
+        assert "t1_nom" in update.normalisee
+
+    def test_sql_asyncpg_avec_conversions_de_type(self):
+        dialect = asyncpg_dialect()
+
+        def compiled(statement):
+            return str(statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True}))
+
+        ids = [uuid.uuid4() for _ in range(5)]
+        in_lists = {
+            statement_info(compiled(select(Document.id).where(Document.id.in_(ids[:n])))).empreinte
+            for n in (1, 2, 5)
+        }
+        row = {"action": "CREATE", "entity_type": "client", "created_at": datetime.now(timezone.utc)}
+        batches = {
+            statement_info(compiled(insert(AuditLog).values([row] * n))).empreinte
+            for n in (1, 3, 500)
+        }
+
+        assert len(in_lists) == 1
+        assert len(batches) == 1
+        info = statement_info(compiled(insert(AuditLog).values([row] * 3)))
+        assert "::" not in info.normalisee
+        assert info.normalisee.endswith("VALUES (?)")
+
+
+@pytest.mark.unit
+class TestInstrumentEngine:
+    """Tests des événements branchés sur l'engine"""
+
+    async def test_duree_par_empreinte_et_pool(self, engine, recorded):
+        instrument_engine(engine, slow_query_ms=10_000, explain=False)
+
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert recorded["db_connections_active"].value == 1
+            async with engine.connect() as other:
+                await other.execute(text("SELECT 2"))
+                assert recorded["db_connections_overflow"].value == 1
+
+        info = statement_info("SELECT 1")
+        key = tuple(sorted({"operation": "SELECT", "table": "-", "fingerprint": info.empreinte}.items()))
+        assert len(recorded["db_query_duration_seconds"].values[key]) == 2
+        assert recorded["db_connections_pool_size"].value == 1
+        assert recorded["db_connections_active"].value == 0
+        assert recorded["db_connections_idle"].value == 1
+        assert len(recorded["db_pool_checkout_wait_seconds"].observations) == 2
+
+    async def test_requete_lente_journalisee_avec_plan(self, engine, recorded, caplog):
+        instrument_engine(engine, slow_query_ms=0, explain=True, explain_interval_seconds=300)
+        caplog.set_level(logging.INFO, logger="app.core.db_instrumentation")
+
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT :nom AS nom"), {"nom": "DUPONT"})
+            await conn.execute(text("SELECT :nom AS nom"), {"nom": "DURAND"})
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+
+        slow = [r for r in caplog.records if r.getMessage() == "Requête SQL lente"]
+        plans = [r for r in caplog.records if r.getMessage() == "Plan d'une requête lente"]
+        assert len(slow) == 2
+        assert slow[0].extra_data["statement"] == "SELECT ? AS nom"
+        assert "DUPONT" not in str(slow[0].extra_data)
+        # Un seul EXPLAIN par empreinte et par intervalle, lui-même non journalisé comme lent
+        assert len(plans) == 1
+        assert plans[0].extra_data["fingerprint"] == slow[0].extra_data["fingerprint"]
+
+    async def test_span_par_requete(self, engine, recorded):
+        exporter = ListExporter()
+        instrument_engine(engine, slow_query_ms=10_000, explain=False)
+        configure_tracing(exporter)
+        try:
+            with start_span("HTTP GET") as root:
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        finally:
+            shutdown_tracing()
+
+        db_span = next(span for span in exporter.spans if span.name == "db SELECT -")
+        assert db_span.parent_id == root.span_id
+        assert db_span.attributes["db.statement"] == "SELECT ?"
@@ -0,0 +1,128 @@
+"""
+Tests unitaires du pipeline de logs
+(file bornée, échantillonnage, niveaux modifiables à chaud)
+"""
+
+import json
+import logging
+import queue
+
+import pytest
+
+from app.core import metrics
+from app.core.logging import (
+    JSONFormatter, LogQueueHandler, SamplingFilter,
+    apply_log_levels, get_log_levels, set_log_level, set_log_levels,
+)
+
+from tests.test_core_metrics import Recorder
+
+
+def make_record(level=logging.INFO, name="app.test", msg="message %s", args=("1",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+@pytest.fixture
+def dropped(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(metrics, "logs_dropped_total", recorder)
+    return recorder
+
+
+@pytest.fixture
+def restore_levels():
+    """Remet les niveaux des loggers touchés par un test"""
+    names = ["", "app.test", "app.test.child"]
+    saved = {name: logging.getLogger(name).level for name in names}
+    yield
+    for name, level in saved.items():
+        logging.getLogger(name).setLevel(level)
+
+
+@pytest.mark.unit
+class TestLogQueueHandler:
+    """Tests de la file bornée"""
+
+    def test_message_interpole_avant_depot(self, dropped):
+        handler = LogQueueHandler(queue.Queue(maxsize=10))
+        args = ["avant"]
+
+        handler.handle(make_record(msg="valeur %s", args=(args,)))
+        args[0] = "après"
+
+        record = handler.queue.get_nowait()
+        assert record.msg == "valeur ['avant']"
+        assert record.args is None
+
+    def test_pertes_sous_pression_et_file_pleine(self, dropped):
+        handler = LogQueueHandler(queue.Queue(maxsize=4))
+
+        for _ in range(3):
+            handler.handle(make_record())
+        # 3/4 = seuil de pression: INFO abandonné, WARNING conservé
+        handler.handle(make_record())
+        handler.handle(make_record(level=logging.WARNING))
+        # File pleine: même ERROR abandonné, sans bloquer
+        handler.handle(make_record(level=logging.ERROR))
+
+        assert handler.queue.qsize() == 4
+        assert dropped.values == {(("level", "INFO"),): 1, (("level", "ERROR"),): 1}
+
+    def test_formatage_json_apres_file(self, dropped):
+        handler = LogQueueHandler(queue.Queue(maxsize=10))
+        record = make_record(msg="durée %d", args=(12,))
+        record.duration_ms = 12.5
+
+        handler.handle(record)
+        line = json.loads(JSONFormatter().format(handler.queue.get_nowait()))
+
+        assert line["message"] == "durée 12"
+        assert line["duration_ms"] == 12.5
+        assert line["timestamp"].endswith("Z")
+
+
+@pytest.mark.unit
+class TestSamplingFilter:
+    """Tests de l'échantillonnage"""
+
+    def test_taux_par_logger_et_debug(self, monkeypatch):
+        monkeypatch.setattr("app.core.logging.random.random", lambda: 0.5)
+        sampling = SamplingFilter(debug_rate=0.1, logger_rates={"app.validation": 0.9})
+
+        assert sampling.filter(make_record(level=logging.DEBUG)) is False
+        assert sampling.filter(make_record(level=logging.INFO)) is True
+        assert sampling.filter(make_record(level=logging.WARNING, name="app.validation")) is True
+
+        sampling.logger_rates["app.validation"] = 0.0
+        assert sampling.filter(make_record(level=logging.WARNING, name="app.validation")) is False
+
+
+@pytest.mark.unit
+class TestLogLevels:
+    """Tests des niveaux modifiables à chaud"""
+
+    def test_set_et_get(self, restore_levels):
+        set_log_level("app.test", "debug")
+        apply_log_levels("app.test.child=ERROR, root=WARNING")
+
+        levels = get_log_levels()
+        assert levels["app.test"] == "DEBUG"
+        assert levels["app.test.child"] == "ERROR"
+        assert levels["root"] == "WARNING"
+
+        set_log_level("app.test.child", None)
+        assert "app.test.child" not in get_log_levels()
+        assert logging.getLogger("app.test.child").getEffectiveLevel() == logging.DEBUG
+
+    def test_niveau_inconnu(self, restore_levels):
+        with pytest.raises(ValueError):
+            set_log_level("app.test", "BAVARD")
+
+    def test_lot_invalide_sans_changement_partiel(self, restore_levels):
+        set_log_level("app.test", "WARNING")
+        before = get_log_levels()
+
+        with pytest.raises(ValueError):
+            set_log_levels({"app.test": "DEBUG", "app.test.child": "ERROR", "app.autre": "BAVARD"})
+
+        assert get_log_levels() == before
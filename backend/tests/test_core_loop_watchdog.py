@@ -0,0 +1,81 @@
+"""
+Tests unitaires de la surveillance de la boucle d'événements
+(retard mesuré, blocage détecté avec la pile fautive)
+"""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.core import metrics
+from app.core.loop_watchdog import LoopWatchdog
+
+from tests.test_core_db_instrumentation import GaugeRecorder
+
+
+class CounterRecorder:
+    """Compteur sans label"""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    recorders = {"event_loop_lag_seconds": GaugeRecorder(), "event_loop_blocked_total": CounterRecorder()}
+    for name, recorder in recorders.items():
+        monkeypatch.setattr(metrics, name, recorder)
+    return recorders
+
+
+def blocking_render():
+    """Appel bloquant exécuté sur la boucle"""
+    time.sleep(0.25)
+
+
+@pytest.mark.unit
+class TestLoopWatchdog:
+    """Tests du battement et du thread de surveillance"""
+
+    async def test_blocage_signale_avec_la_pile(self, recorded, caplog):
+        caplog.set_level(logging.WARNING, logger="app.core.loop_watchdog")
+        watchdog = LoopWatchdog(interval=0.02, threshold_ms=100, report_interval=300)
+
+        assert watchdog.start() is True
+        try:
+            await asyncio.sleep(0.05)
+            # Même appel bloquant: compté à chaque fois, signalé une fois par intervalle
+            for _ in range(2):
+                blocking_render()
+                await asyncio.sleep(0.05)
+        finally:
+            await watchdog.stop()
+
+        reports = [r for r in caplog.records if r.getMessage() == "Boucle d'événements bloquée"]
+        assert recorded["event_loop_blocked_total"].value == 2
+        assert len(reports) == 1
+        assert "blocking_render" in reports[0].extra_data["stack"]
+        assert reports[0].extra_data["blocked_ms"] >= 100
+        assert watchdog.pop_max_lag() >= 0.2
+        assert recorded["event_loop_lag_seconds"].value is not None
+
+    async def test_boucle_fluide(self, recorded):
+        watchdog = LoopWatchdog(interval=0.01, threshold_ms=200, report_interval=300)
+
+        watchdog.start()
+        try:
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+        finally:
+            await watchdog.stop()
+
+        assert recorded["event_loop_blocked_total"].value == 0
+        assert watchdog.running is False
+
+    async def test_desactive(self):
+        assert LoopWatchdog(interval=0).start() is False
@@ -0,0 +1,118 @@
+"""
+Tests unitaires du middleware de métriques HTTP
+(labels par template de route, statuts réels, taille et premier octet)
+"""
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from httpx import AsyncClient
+
+from app.core import metrics
+from app.core.metrics import UNMATCHED_ENDPOINT, PrometheusMiddleware
+
+
+class Recorder:
+    """Métrique qui enregistre ses observations par labels"""
+
+    def __init__(self):
+        self.values = {}
+
+    def labels(self, **labels):
+        key = tuple(sorted(labels.items()))
+        return _Child(self.values, key)
+
+
+class _Child:
+    def __init__(self, values, key):
+        self.values = values
+        self.key = key
+
+    def inc(self, amount=1):
+        self.values[self.key] = self.values.get(self.key, 0) + amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def observe(self, value):
+        self.values.setdefault(self.key, []).append(value)
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Métriques HTTP remplacées par des enregistreurs"""
+    names = [
+        "http_requests_total", "http_request_duration_seconds", "http_requests_in_progress",
+        "http_response_size_bytes", "http_time_to_first_byte_seconds",
+    ]
+    recorders = {name: Recorder() for name in names}
+    for name, recorder in recorders.items():
+        monkeypatch.setattr(metrics, name, recorder)
+    return recorders
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        if item_id == "absent":
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    @app.get("/export")
+    async def export():
+        return StreamingResponse(iter([b"a;b\n", b"1;2\n"]), media_type="text/csv")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(PrometheusMiddleware)
+    return AsyncClient(app=app, base_url="http://test")
+
+
+def labels(method, endpoint, status=None):
+    items = {"method": method, "endpoint": endpoint}
+    if status is not None:
+        items["status"] = str(status)
+    return tuple(sorted(items.items()))
+
+
+@pytest.mark.unit
+class TestPrometheusMiddleware:
+    """Tests du middleware"""
+
+    async def test_template_de_route_et_statut_reel(self, client, recorded):
+        async with client:
+            await client.get("/items/3f2a9c1e-0000-4000-8000-000000000001")
+            await client.get("/items/autre")
+            await client.get("/items/absent")
+
+        totals = recorded["http_requests_total"].values
+        assert totals[labels("GET", "/items/{item_id}", 200)] == 2
+        assert totals[labels("GET", "/items/{item_id}", 404)] == 1
+        assert recorded["http_requests_in_progress"].values[(("method", "GET"),)] == 0
+
+    async def test_route_inconnue(self, client, recorded):
+        async with client:
+            await client.get("/nulle/part/123")
+
+        assert recorded["http_requests_total"].values[labels("GET", UNMATCHED_ENDPOINT, 404)] == 1
+
+    async def test_taille_et_premier_octet_streaming(self, client, recorded):
+        async with client:
+            await client.get("/export")
+
+        assert recorded["http_response_size_bytes"].values[labels("GET", "/export")] == [8]
+        ttfb = recorded["http_time_to_first_byte_seconds"].values[labels("GET", "/export")][0]
+        duration = recorded["http_request_duration_seconds"].values[labels("GET", "/export")][0]
+        assert 0 <= ttfb <= duration
+
+    async def test_exception_comptee_en_500(self, client, recorded):
+        async with client:
+            with pytest.raises(RuntimeError):
+                await client.get("/boom")
+
+        assert recorded["http_requests_total"].values[labels("GET", "/boom", 500)] == 1
@@ -0,0 +1,295 @@
+"""
+Tests unitaires du routage des lectures vers le réplica
+(retard de réplication, lecture de ses propres écritures, détection des écritures)
+"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+from sqlalchemy import Column, Integer, String, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from app import database
+from app.config import settings
+from app.core import deps, metrics, read_replica
+from app.core.read_replica import (
+    READ_YOUR_WRITES_PREFIX, SESSION_WRITES_KEY, ReadYourWritesMiddleware, ReplicaState, choose_read_target,
+    mark_user_write, set_request_user,
+)
+
+from tests.test_core_metrics import Recorder
+
+Base = declarative_base()
+
+
+class Note(Base):
+    __tablename__ = "notes"
+    id = Column(Integer, primary_key=True)
+    texte = Column(String)
+
+
+class FakeRedis:
+    """Sous-ensemble SET/EXISTS de Redis"""
+
+    def __init__(self, fail=False):
+        self.store = {}
+        self.fail = fail
+
+    async def set(self, key, value, px=None):
+        if self.fail:
+            raise ConnectionError("Redis indisponible")
+        self.store[key] = (value, px)
+
+    async def exists(self, key):
+        if self.fail:
+            raise ConnectionError("Redis indisponible")
+        return int(key in self.store)
+
+
+def labels(**items):
+    return tuple(sorted(items.items()))
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+
+    async def get_redis():
+        return fake
+
+    monkeypatch.setattr(read_replica, "get_redis", get_redis)
+    return fake
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Réplica configuré (engine factice) et mesure de retard remise à zéro"""
+    state = ReplicaState()
+    monkeypatch.setattr(database, "replica_engine", object())
+    monkeypatch.setattr(read_replica, "_replica_state", state)
+    return state
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(metrics, "db_read_routing_total", recorder)
+    return recorder
+
+
+@pytest.fixture
+async def notes_db(tmp_path, monkeypatch):
+    """get_db sur une base SQLite (validation après yield, comme app.database.get_db)"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'notes.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_db():
+        async with factory() as session:
+            yield session
+            await session.commit()
+
+    monkeypatch.setattr(deps, "get_db", get_db)
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.unit
+class TestChooseReadTarget:
+    """Tests du choix réplica / primaire"""
+
+    async def test_sans_replica(self, routed, monkeypatch):
+        monkeypatch.setattr(database, "replica_engine", None)
+
+        assert await choose_read_target("u1") == "primary"
+        assert routed.values == {labels(target="primary", reason="no_replica"): 1}
+
+    async def test_retard_de_replication(self, replica, redis, routed, monkeypatch):
+        monkeypatch.setattr(settings, "DATABASE_REPLICA_MAX_LAG", 5.0)
+
+        assert await choose_read_target("u1") == "primary"  # jamais mesuré
+        replica.record_lag(0.4)
+        assert await choose_read_target("u1") == "replica"
+        replica.record_lag(12.0)
+        assert await choose_read_target("u1") == "primary"
+        replica.record_failure()
+        assert await choose_read_target("u1") == "primary"
+
+        assert routed.values == {
+            labels(target="primary", reason="lag_unknown"): 1,
+            labels(target="replica", reason="replica"): 1,
+            labels(target="primary", reason="lag"): 1,
+            labels(target="primary", reason="replica_down"): 1,
+        }
+
+    async def test_mesure_perimee(self, replica, redis, monkeypatch):
+        replica.record_lag(0.1)
+        monkeypatch.setattr(settings, "HEALTH_MAX_AGE", -1)
+
+        assert await choose_read_target("u1") == "primary"
+
+    async def test_lire_ses_ecritures(self, replica, redis, routed, monkeypatch):
+        monkeypatch.setattr(settings, "DATABASE_READ_YOUR_WRITES_SECONDS", 10.0)
+        replica.record_lag(0.1)
+
+        await mark_user_write("u1")
+
+        assert redis.store[f"{READ_YOUR_WRITES_PREFIX}u1"] == ("1", 10000)
+        assert await choose_read_target("u1") == "primary"
+        assert await choose_read_target("u2") == "replica"
+        assert routed.values[labels(target="primary", reason="recent_write")] == 1
+
+    async def test_redis_indisponible(self, replica, redis):
+        replica.record_lag(0.1)
+        redis.fail = True
+
+        await mark_user_write("u1")
+        assert await choose_read_target("u1") == "primary"
+
+
+@pytest.mark.unit
+class TestSessionWrites:
+    """Tests de la détection des écritures d'une session"""
+
+    async def test_flush_et_lecture(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'notes.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        try:
+            async with AsyncSession(engine) as session:
+                await session.execute(select(Note))
+                assert SESSION_WRITES_KEY not in session.info
+
+                session.add(Note(texte="brouillon"))
+                await session.commit()
+                assert session.info[SESSION_WRITES_KEY] is True
+        finally:
+            await engine.dispose()
+
+
+@pytest.mark.unit
+class TestGetReadSession:
+    """Tests de la dépendance get_read_session"""
+
+    async def test_session_selon_la_cible(self, monkeypatch):
+        async def primary():
+            yield "primary"
+
+        async def replica_session():
+            yield "replica"
+
+        target = "replica"
+
+        async def choose(user_id):
+            return target
+
+        monkeypatch.setattr(deps, "get_db", primary)
+        monkeypatch.setattr(deps, "get_read_db", replica_session)
+        monkeypatch.setattr(deps, "choose_read_target", choose)
+        user = type("U", (), {"id": "u1"})()
+
+        assert [s async for s in deps.get_read_session(user)] == ["replica"]
+        target = "primary"
+        assert [s async for s in deps.get_read_session(user)] == ["primary"]
+
+
+@pytest.mark.unit
+class TestReadYourWritesMiddleware:
+    """Marque des écritures posée avant l'envoi de la réponse (application FastAPI)"""
+
+    @pytest.fixture
+    def client(self, notes_db, replica, redis, monkeypatch):
+        monkeypatch.setattr(settings, "DATABASE_READ_YOUR_WRITES_SECONDS", 10.0)
+
+        app = FastAPI()
+        app.add_middleware(ReadYourWritesMiddleware)
+
+        @app.post("/notes")
+        async def create_note(db: AsyncSession = Depends(deps.get_session)):
+            set_request_user("u1")
+            db.add(Note(texte="brouillon"))
+            await db.flush()
+            return {"ok": True}
+
+        @app.get("/notes")
+        async def list_notes(db: AsyncSession = Depends(deps.get_session)):
+            set_request_user("u2")
+            return {"count": len((await db.execute(select(Note))).scalars().all())}
+
+        # Clés Redis présentes au moment où la réponse part vers le client
+        self.seen = []
+
+        async def observed(scope, receive, send):
+            async def snapshot(message):
+                if message["type"] == "http.response.start":
+                    self.seen.append(set(redis.store))
+                await send(message)
+            await app(scope, receive, snapshot)
+
+        return AsyncClient(app=observed, base_url="http://test")
+
+    async def test_ecriture_marquee_avant_la_reponse(self, client):
+        async with client:
+            response = await client.post("/notes")
+
+        assert response.status_code == 200
+        assert self.seen == [{f"{READ_YOUR_WRITES_PREFIX}u1"}]
+
+    async def test_lecture_non_marquee(self, client, redis):
+        async with client:
+            response = await client.get("/notes")
+
+        assert response.json() == {"count": 0}
+        assert self.seen == [set()]
+        assert redis.store == {}
+
+
+@pytest.mark.unit
+class TestGetCurrentReadUser:
+    """Utilisateur des routes en lecture: session primaire fermée avant la route"""
+
+    async def test_session_primaire_fermee(self, monkeypatch):
+        events = []
+
+        class Factory:
+            async def __aenter__(self):
+                events.append("open")
+                return "primary"
+
+            async def __aexit__(self, *exc_info):
+                events.append("close")
+
+        async def authenticate(credentials, db):
+            assert db == "primary"
+            return type("U", (), {"id": "u1", "is_active": True, "is_admin": False})()
+
+        async def replica_session():
+            events.append("read")
+            yield "replica"
+
+        async def choose(user_id):
+            return "replica"
+
+        monkeypatch.setattr(deps, "AsyncSessionLocal", Factory)
+        monkeypatch.setattr(deps, "_authenticate", authenticate)
+        monkeypatch.setattr(deps, "get_read_db", replica_session)
+        monkeypatch.setattr(deps, "choose_read_target", choose)
+
+        app = FastAPI()
+
+        @app.get("/stats")
+        async def stats(
+            current_user=Depends(deps.get_current_read_user),
+            db=Depends(deps.get_read_session)
+        ):
+            events.append("route")
+            return {"user": current_user.id, "db": db}
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/stats", headers={"Authorization": "Bearer t"})
+
+        assert response.json() == {"user": "u1", "db": "replica"}
+        assert events == ["open", "close", "read", "route"]
@@ -0,0 +1,105 @@
+"""
+Tests unitaires de l'instrumentation du client Redis
+(commandes, pipelines et hit/miss par préfixe de clé)
+"""
+
+import pytest
+from redis.asyncio.client import Pipeline, Redis
+from redis.exceptions import ConnectionError
+
+from app.core import metrics
+from app.core.cache import CacheKeys
+from app.core.redis_client import CACHE_PREFIX, UNKNOWN_PREFIX, InstrumentedRedis, key_prefix
+
+from tests.test_core_metrics import Recorder
+
+CLIENT_PREFIX = f"{CACHE_PREFIX}{CacheKeys.CLIENT}"
+
+
+def labels(**items):
+    return tuple(sorted(items.items()))
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Métriques Redis remplacées par des enregistreurs"""
+    names = ["redis_operations_total", "redis_operation_duration_seconds", "redis_cache_lookups_total"]
+    recorders = {name: Recorder() for name in names}
+    for name, recorder in recorders.items():
+        monkeypatch.setattr(metrics, name, recorder)
+    return recorders
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Client instrumenté sur un serveur simulé"""
+    store = {f"{CLIENT_PREFIX}42": "{}"}
+
+    async def execute_command(self, *args, **options):
+        if args[0] == "GET":
+            return store.get(args[1])
+        if args[0] == "PING":
+            raise ConnectionError("Redis indisponible")
+        return True
+
+    async def execute(self, raise_on_error=True):
+        return [store.get(args[1]) for args, _ in self.command_stack]
+
+    monkeypatch.setattr(Redis, "execute_command", execute_command)
+    monkeypatch.setattr(Pipeline, "execute", execute)
+    return InstrumentedRedis.from_url("redis://localhost:6379/0", decode_responses=True)
+
+
+@pytest.mark.unit
+class TestKeyPrefix:
+    """Tests du préfixe de clé"""
+
+    def test_prefixe_le_plus_long(self):
+        assert key_prefix(("GET", f"{CLIENT_PREFIX}42")) == CLIENT_PREFIX
+        assert key_prefix(("GET", f"{CACHE_PREFIX}{CacheKeys.CLIENT_LIST}42")) == (
+            f"{CACHE_PREFIX}{CacheKeys.CLIENT_LIST}"
+        )
+        assert key_prefix(("GET", "inconnu:42")) == UNKNOWN_PREFIX
+        assert key_prefix(("PING",)) == "-"
+
+
+@pytest.mark.unit
+class TestInstrumentedRedis:
+    """Tests du client instrumenté"""
+
+    async def test_commandes_et_hit_miss(self, client, recorded):
+        await client.get(f"{CLIENT_PREFIX}42")
+        await client.get(f"{CLIENT_PREFIX}43")
+        await client.setex(f"{CLIENT_PREFIX}43", 60, "{}")
+
+        operations = recorded["redis_operations_total"].values
+        assert operations[labels(operation="GET", prefix=CLIENT_PREFIX, status="success")] == 2
+        assert operations[labels(operation="SETEX", prefix=CLIENT_PREFIX, status="success")] == 1
+        lookups = recorded["redis_cache_lookups_total"].values
+        assert lookups[labels(prefix=CLIENT_PREFIX, result="hit")] == 1
+        assert lookups[labels(prefix=CLIENT_PREFIX, result="miss")] == 1
+        assert len(recorded["redis_operation_duration_seconds"].values[
+            labels(operation="GET", prefix=CLIENT_PREFIX)
+        ]) == 2
+
+    async def test_erreur_comptee(self, client, recorded):
+        with pytest.raises(ConnectionError):
+            await client.ping()
+
+        assert recorded["redis_operations_total"].values[
+            labels(operation="PING", prefix="-", status="error")
+        ] == 1
+
+    async def test_pipeline(self, client, recorded):
+        pipe = client.pipeline()
+        pipe.get(f"{CLIENT_PREFIX}42")
+        pipe.get(f"{CLIENT_PREFIX}44")
+        await pipe.execute()
+
+        assert len(recorded["redis_operation_duration_seconds"].values[
+            labels(operation="PIPELINE", prefix="-")
+        ]) == 1
+        assert recorded["redis_operations_total"].values[
+            labels(operation="GET", prefix=CLIENT_PREFIX, status="success")
+        ] == 2
+        assert recorded["redis_cache_lookups_total"].values[labels(prefix=CLIENT_PREFIX, result="miss")] == 1
@@ -0,0 +1,122 @@
+"""
+Tests unitaires du contexte de requête et des traces
+(X-Request-ID, spans imbriqués, propagation vers les tâches de fond)
+"""
+
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from app.config import settings
+from app.core import tracing
+from app.core.tracing import (
+    RequestContextFilter, RequestContextMiddleware, SpanExporter,
+    configure_tracing, continue_trace, get_request_id, inject, shutdown_tracing, start_span,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class ListExporter(SpanExporter):
+    """Exporteur en mémoire"""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    configure_tracing(exporter)
+    yield exporter
+    shutdown_tracing()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        with start_span("docx.substitution"):
+            record = logging.LogRecord("test", logging.INFO, __file__, 1, "msg", None, None)
+            RequestContextFilter().filter(record)
+        return {"request_id": get_request_id(), "log_request_id": record.request_id}
+
+    app.add_middleware(RequestContextMiddleware)
+    return AsyncClient(app=app, base_url="http://test")
+
+
+@pytest.mark.unit
+class TestRequestContextMiddleware:
+    """Tests de l'identifiant de requête"""
+
+    async def test_identifiant_propage(self, client):
+        async with client:
+            response = await client.get("/items/1", headers={"X-Request-ID": "abc-123"})
+
+        assert response.headers["X-Request-ID"] == "abc-123"
+        assert response.json() == {"request_id": "abc-123", "log_request_id": "abc-123"}
+
+    async def test_identifiant_genere_si_invalide(self, client):
+        async with client:
+            response = await client.get("/items/1", headers={"X-Request-ID": "a b\"c"})
+
+        request_id = response.headers["X-Request-ID"]
+        assert len(request_id) == 32
+        assert response.json()["log_request_id"] == request_id
+        assert get_request_id() is None
+
+    async def test_spans_imbriques_et_traceparent(self, client, exporter):
+        async with client:
+            await client.get("/items/1", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+        shutdown_tracing()
+
+        spans = {span.name: span for span in exporter.spans}
+        root, child = spans["GET /items/{item_id}"], spans["docx.substitution"]
+        assert root.trace_id == child.trace_id == TRACE_ID
+        assert root.parent_id == PARENT_ID
+        assert child.parent_id == root.span_id
+        assert root.attributes["http.status_code"] == 200
+
+    async def test_trace_non_echantillonnee(self, client, exporter, monkeypatch):
+        monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 0.0)
+
+        async with client:
+            await client.get("/items/1")
+        shutdown_tracing()
+
+        assert exporter.spans == []
+
+
+@pytest.mark.unit
+class TestPropagation:
+    """Tests de la reprise du contexte dans une tâche de fond"""
+
+    def test_inject_continue_trace(self, exporter):
+        with continue_trace({"X-Request-ID": "req-1"}, "HTTP POST"):
+            carrier = inject()
+
+        with continue_trace(carrier, "import.clients") as job:
+            assert get_request_id() == "req-1"
+            job_trace_id = job.trace_id
+        shutdown_tracing()
+
+        request_span = next(span for span in exporter.spans if span.name == "HTTP POST")
+        assert job_trace_id == request_span.trace_id
+        assert carrier["traceparent"] == f"00-{request_span.trace_id}-{request_span.span_id}-01"
+
+    def test_sans_traceur(self):
+        assert tracing.tracing_enabled() is False
+        with start_span("docx.save") as span:
+            assert span is None
+
+    def test_exporteur_abstrait(self):
+        with pytest.raises(TypeError):
+            SpanExporter()
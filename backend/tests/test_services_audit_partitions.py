@@ -0,0 +1,118 @@
+"""
+Tests unitaires du service de partitionnement audit_logs
+"""
+
+import asyncio
+
+import pytest
+from datetime import date
+
+from app.services import audit_partitions
+
+from app.services.audit_partitions import (
+    month_start,
+    add_months,
+    partition_name,
+    partition_bounds,
+    parse_partition_name,
+    expired_months,
+    months_to_create,
+    AuditPartitionScheduler,
+)
+
+
+@pytest.mark.unit
+class TestMonthArithmetic:
+    """Tests des calculs de mois"""
+
+    def test_month_start(self):
+        assert month_start(date(2026, 10, 19)) == date(2026, 10, 1)
+
+    def test_add_months_crosses_year(self):
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+
+    def test_add_months_negative(self):
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+        assert add_months(date(2026, 10, 1), -24) == date(2024, 10, 1)
+
+
+@pytest.mark.unit
+class TestPartitionNaming:
+    """Tests du nommage et des bornes des partitions"""
+
+    def test_partition_name(self):
+        assert partition_name(date(2026, 3, 1)) == "audit_logs_y2026m03"
+
+    def test_parse_roundtrip(self):
+        month = date(2025, 12, 1)
+        assert parse_partition_name(partition_name(month)) == month
+
+    def test_parse_ignores_other_tables(self):
+        assert parse_partition_name("audit_logs_default") is None
+        assert parse_partition_name("audit_logs_legacy") is None
+
+    def test_bounds_december(self):
+        assert partition_bounds(date(2026, 12, 15)) == (date(2026, 12, 1), date(2027, 1, 1))
+
+
+@pytest.mark.unit
+class TestRetention:
+    """Tests de la sélection des partitions expirées"""
+
+    def test_expired_months(self):
+        months = [date(2024, 9, 1), date(2024, 10, 1), date(2024, 11, 1), date(2026, 10, 1)]
+        expired = expired_months(months, retention_months=24, today=date(2026, 10, 19))
+        assert expired == [date(2024, 9, 1)]
+
+    def test_nothing_expired(self):
+        assert expired_months([date(2026, 10, 1)], retention_months=1, today=date(2026, 10, 1)) == []
+
+
+@pytest.mark.unit
+class TestMonthsToCreate:
+    """Tests de la sélection des partitions à créer"""
+
+    def test_mois_courant_et_anticipes(self):
+        created = months_to_create([date(2026, 10, 1)], [], months_ahead=2, today=date(2026, 10, 19))
+        assert created == [date(2026, 11, 1), date(2026, 12, 1)]
+
+    def test_mois_de_la_partition_par_defaut(self):
+        """Un mois sans partition dont les lignes sont tombées dans la partition par défaut"""
+        existing = [date(2026, 10, 1), date(2026, 11, 1)]
+        default_months = [date(2026, 8, 1), date(2026, 10, 1), date(2031, 1, 1)]
+
+        created = months_to_create(existing, default_months, months_ahead=1, today=date(2026, 10, 19))
+
+        # Dates aberrantes (au-delà des mois anticipés) laissées à l'alerte
+        assert created == [date(2026, 8, 1)]
+
+
+@pytest.mark.unit
+class TestAuditPartitionScheduler:
+    """Tests de la vérification périodique"""
+
+    async def test_verification_periodique(self, monkeypatch):
+        calls = []
+
+        async def ensure():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("base indisponible")
+            return []
+
+        monkeypatch.setattr(audit_partitions, "ensure_audit_partitions", ensure)
+        scheduler = AuditPartitionScheduler(interval=0.01)
+
+        assert scheduler.start() is True
+        assert scheduler.start() is False
+        async def two_runs():
+            while len(calls) < 2:
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(two_runs(), timeout=2)
+        await scheduler.stop()
+
+        assert len(calls) >= 2  # un échec n'arrête pas la boucle
+
+    def test_desactive(self):
+        assert AuditPartitionScheduler(interval=0).start() is False
@@ -0,0 +1,254 @@
+"""
+Tests unitaires du service d'import en masse des clients
+"""
+
+import pytest
+import threading
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from httpx import AsyncClient
+
+from app.api import imports as imports_api
+from app.config import settings
+from app.core.deps import get_current_active_user
+from app.crud.client import crud_client
+from app.main import app
+from app.services.client_importer import ClientImporter
+from app.services.lcb_ft_classifier import get_lcb_ft_rules
+from app.services.risk_calculator import RISK_RULES_VERSION
+from app.services.scoring import lcb_ft_fingerprint, risk_fingerprint, score_client
+
+
+VALID_ROW = {
+    "numero_client": "ABC-0001",
+    "t1_civilite": "Monsieur",
+    "t1_nom": "Dupont",
+    "t1_prenom": "Jean",
+    "t1_date_naissance": "15/03/1970",
+    "t1_lieu_naissance": "Papeete",
+    "t1_adresse": "1 rue du Port",
+    "t1_email": "jean.dupont@example.com",
+    "t1_telephone": "87000000",
+    "t1_profession": "Trader",
+    "t1_us_person": "NON",
+    "situation_familiale": "Marié(e)",
+    "revenus_annuels_foyer": "50000-100000",
+    "patrimoine_global": "1000000-5000000",
+    "origine_fonds_nature": "Epargne",
+    "origine_fonds_montant_prevu": "600 000,00",
+    "objectifs_investissement": "Valorisation",
+    "horizon_placement": "Plus de 8 ans",
+    "tolerance_risque": "Élevé",
+    "pertes_maximales_acceptables": "50%",
+    "date_creation": "01/01/2025 10:00:00",
+}
+
+
+@pytest.fixture
+def importer():
+    return ClientImporter(batch_size=2)
+
+
+@pytest.mark.unit
+class TestNormalisation:
+    """Tests de la conversion des formats de l'export Harvest"""
+
+    def test_formats_harvest(self, importer):
+        data = importer.normalize_row(VALID_ROW)
+        assert data["t1_date_naissance"] == date(1970, 3, 15)
+        assert data["t1_us_person"] is False
+        assert data["origine_fonds_montant_prevu"] == "600000.00"
+
+    def test_colonnes_inconnues_et_vides_ignorees(self, importer):
+        data = importer.normalize_row({"date_creation": "x", "t1_nom": "  ", "inconnue": 1})
+        assert data == {}
+
+
+@pytest.mark.unit
+class TestValidation:
+    """Tests de la validation par lot"""
+
+    def test_lot_mixte(self, importer):
+        invalid = dict(VALID_ROW, t1_email="pas-un-email")
+        valid, errors = importer.validate_batch([(2, VALID_ROW), (3, invalid)])
+        assert [line for line, _ in valid] == [2]
+        assert errors and all(error["ligne"] == 3 for error in errors)
+        assert any("t1_email" in error["champ"] for error in errors)
+
+    def test_build_records_calcule_profil_et_lcb(self, importer):
+        valid, _ = importer.validate_batch([(2, VALID_ROW)])
+        conseiller_id = uuid.uuid4()
+        records = importer.build_records(
+            valid, numeros=["FAR-2026-0042"], conseiller_id=conseiller_id, job_id="job"
+        )
+        record = records[0]
+        assert record["numero_client"] == "FAR-2026-0042"
+        assert record["conseiller_id"] == conseiller_id
+        assert record["form_data"]["numero_source"] == "ABC-0001"
+        assert record["form_data"]["import_ligne"] == 2
+        assert record["profil_risque_calcule"] is not None
+        # Trader + montant > 500 000 + patrimoine élevé
+        assert record["lcb_ft_niveau_risque"] in ("Renforcé", "Élevé")
+        assert record["origine_fonds_montant_prevu"] == Decimal("600000.00")
+
+    def test_build_records_pose_empreintes_et_versions(self, importer):
+        valid, _ = importer.validate_batch([(2, VALID_ROW)])
+        record = importer.build_records(
+            valid, numeros=["FAR-2026-0042"], conseiller_id=uuid.uuid4(), job_id="job"
+        )[0]
+
+        assert record["profil_risque_empreinte"] == risk_fingerprint(record)
+        assert record["lcb_ft_empreinte"] == lcb_ft_fingerprint(record)
+        assert record["profil_risque_regles_version"] == RISK_RULES_VERSION
+        assert record["lcb_ft_regles_version"] == get_lcb_ft_rules().version
+        # Client importé à jour: ni le formulaire ni le re-scoring ne recalculent
+        assert score_client(record) == {}
+
+
+@pytest.mark.unit
+class TestLecture:
+    """Tests de la lecture en flux"""
+
+    def test_csv_point_virgule(self, importer, tmp_path):
+        path = tmp_path / "clients.csv"
+        path.write_text("t1_nom;t1_prenom\nDupont;Jean\nMartin;Anne\n", encoding="utf-8")
+        rows = list(importer.iter_rows(str(path)))
+        assert rows == [(2, {"t1_nom": "Dupont", "t1_prenom": "Jean"}), (3, {"t1_nom": "Martin", "t1_prenom": "Anne"})]
+
+    def test_xlsx(self, importer, tmp_path):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["t1_nom", "t1_prenom"])
+        sheet.append(["Dupont", "Jean"])
+        sheet.append([None, None])
+        path = tmp_path / "clients.xlsx"
+        workbook.save(path)
+
+        rows = list(importer.iter_rows(str(path)))
+        assert rows == [(2, {"t1_nom": "Dupont", "t1_prenom": "Jean"})]
+
+    def test_format_non_supporte(self, importer):
+        with pytest.raises(ValueError):
+            list(importer.iter_rows("clients.txt"))
+
+
+class FakeSession:
+    """Session journalisant ses opérations"""
+
+    def __init__(self, journal):
+        self.journal = journal
+        self.number = sum(1 for entry in journal if entry == "open") + 1
+
+    async def __aenter__(self):
+        self.journal.append("open")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.journal.append("close")
+
+    async def execute(self, statement, records=None):
+        self.journal.append(("insert", self.number, len(records)))
+
+    async def commit(self):
+        self.journal.append(("commit", self.number))
+
+
+@pytest.mark.unit
+class TestRun:
+    """Tests de l'import complet (sessions factices)"""
+
+    async def test_lots_hors_boucle_et_reservation_validee_a_part(self, importer, tmp_path, monkeypatch):
+        path = tmp_path / "clients.csv"
+        header = ";".join(VALID_ROW)
+        row = ";".join(VALID_ROW.values())
+        path.write_text("\n".join([header, row, row, row]) + "\n", encoding="utf-8")
+
+        journal = []
+        loop_thread = threading.get_ident()
+        threads = set()
+
+        async def reserve(db, count, year=None):
+            db.journal.append(("reserve", db.number, count))
+            return [f"FAR-2025-{n:04d}" for n in range(1, count + 1)]
+
+        validate_batch, build_records = importer.validate_batch, importer.build_records
+
+        def validate(batch):
+            threads.add(threading.get_ident())
+            return validate_batch(batch)
+
+        def build(*args, **kwargs):
+            threads.add(threading.get_ident())
+            return build_records(*args, **kwargs)
+
+        monkeypatch.setattr(crud_client, "reserve_numero_clients", reserve)
+        monkeypatch.setattr(importer, "validate_batch", validate)
+        monkeypatch.setattr(importer, "build_records", build)
+
+        stats = await importer.run(
+            str(path), job_id="job", conseiller_id=uuid.uuid4(),
+            session_factory=lambda: FakeSession(journal)
+        )
+
+        assert stats == {"lignes": 3, "importes": 3, "lignes_en_erreur": 0, "lots": 2}
+        assert loop_thread not in threads
+        # Réservation validée et fermée avant l'ouverture de la session d'INSERT
+        assert journal[:8] == [
+            "open", ("reserve", 1, 2), ("commit", 1), "close",
+            "open", ("insert", 2, 2), ("commit", 2), "close",
+        ]
+
+
+@pytest.mark.unit
+class TestUpload:
+    """Tests de la réception du fichier (route POST /imports/clients)"""
+
+    @pytest.fixture
+    def upload(self, monkeypatch, tmp_path, mock_user):
+        jobs = []
+
+        async def override_current_user():
+            return mock_user
+
+        def fake_run_import_job(job_id, path, **kwargs):
+            jobs.append(path)
+
+        monkeypatch.setattr(settings, "IMPORT_PATH", str(tmp_path))
+        monkeypatch.setattr(settings, "IMPORT_MAX_FILE_SIZE_MB", 1)
+        monkeypatch.setattr(imports_api, "UPLOAD_CHUNK_SIZE", 64 * 1024)
+        monkeypatch.setattr(imports_api, "run_import_job", fake_run_import_job)
+        app.dependency_overrides[get_current_active_user] = override_current_user
+
+        async def post(content: bytes):
+            async with AsyncClient(app=app, base_url="http://test") as ac:
+                return await ac.post(
+                    f"{settings.API_PREFIX}/imports/clients",
+                    files={"file": ("clients.csv", content, "text/csv")}
+                )
+
+        yield post, jobs, tmp_path
+        app.dependency_overrides.clear()
+
+    async def test_fichier_enregistre(self, upload):
+        post, jobs, tmp_path = upload
+        content = b"t1_nom;t1_prenom\n" + b"Dupont;Jean\n" * 1000
+
+        response = await post(content)
+
+        assert response.status_code == 202
+        assert len(jobs) == 1
+        with open(jobs[0], "rb") as f:
+            assert f.read() == content
+
+    async def test_413_des_le_depassement(self, upload):
+        post, jobs, tmp_path = upload
+
+        response = await post(b"x" * (3 * 1024 * 1024))
+
+        assert response.status_code == 413
+        assert jobs == []
+        assert not list(tmp_path.glob("*.csv"))
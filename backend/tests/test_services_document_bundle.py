@@ -0,0 +1,76 @@
+"""
+Tests unitaires de la liasse zip en streaming
+"""
+
+from datetime import datetime
+from io import BytesIO
+from types import SimpleNamespace
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+
+from app.services.document_bundle import bundle_entries, iter_zip
+from app.services.document_storage import DocumentStorage, LocalStorageBackend
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return DocumentStorage(LocalStorageBackend(str(tmp_path / "blobs")))
+
+
+def make_document(storage, content, nom):
+    """Document (vue) dont le contenu est enregistré dans le stockage"""
+    stored = storage.save_bytes(content, nom)
+    return SimpleNamespace(
+        nom_fichier=nom,
+        stockage_cle=stored.cle,
+        chemin_fichier=stored.chemin,
+        hash_fichier=stored.hash_fichier,
+        taille_octets=stored.taille_octets,
+        date_generation=datetime(2026, 10, 19, 14, 30),
+    )
+
+
+@pytest.mark.unit
+class TestBundleEntries:
+    """Tests du choix des entrées"""
+
+    def test_noms_uniques_et_blobs_partages(self, storage):
+        der = make_document(storage, b"DER v1", "DER.docx")
+        der_lie = make_document(storage, b"DER v1", "DER.docx")
+        der_autre = make_document(storage, b"DER v2", "DER.docx")
+
+        entries = bundle_entries([der, der_lie, der_autre])
+
+        assert [entry.nom for entry in entries] == ["DER.docx", "DER_2.docx"]
+
+
+@pytest.mark.unit
+class TestIterZip:
+    """Tests de l'archive en streaming"""
+
+    def test_archive_valide(self, storage):
+        documents = [
+            make_document(storage, b"PK docx" * 1000, "DER.docx"),
+            make_document(storage, b"nom;prenom\n" * 1000, "export.csv"),
+        ]
+
+        chunks = list(iter_zip(bundle_entries(documents), storage, chunk_size=1024))
+        archive = ZipFile(BytesIO(b"".join(chunks)))
+
+        assert len(chunks) > 2
+        assert archive.testzip() is None
+        assert archive.read("DER.docx") == b"PK docx" * 1000
+        assert archive.read("export.csv") == b"nom;prenom\n" * 1000
+        assert archive.getinfo("DER.docx").compress_type == ZIP_STORED
+        assert archive.getinfo("export.csv").compress_type == ZIP_DEFLATED
+        assert archive.getinfo("DER.docx").date_time == (2026, 10, 19, 14, 30, 0)
+
+    def test_fichier_absent_ignore(self, storage):
+        present = make_document(storage, b"QCC", "QCC.docx")
+        absent = make_document(storage, b"DER", "DER.docx")
+        storage.backend.delete(absent.stockage_cle)
+
+        archive = ZipFile(BytesIO(b"".join(iter_zip(bundle_entries([present, absent]), storage))))
+
+        assert archive.namelist() == ["QCC.docx"]
@@ -0,0 +1,154 @@
+"""
+Tests unitaires de la livraison HTTP des documents
+(ETag, 304, plages d'octets, URLs signées, X-Accel-Redirect)
+"""
+
+import hashlib
+
+import pytest
+
+from app.config import settings
+from app.core.security import create_download_signature, verify_download_signature
+from app.models.document import Document
+from app.services.document_delivery import (
+    RangeNotSatisfiable,
+    build_download_response,
+    content_disposition,
+    etag_matches,
+    parse_range,
+)
+from app.services.document_storage import DocumentStorage, LocalStorageBackend
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def stored_document(tmp_path):
+    """Document DOCX enregistré dans un stockage temporaire"""
+    storage = DocumentStorage(LocalStorageBackend(str(tmp_path / "blobs")))
+    stored = storage.save_bytes(CONTENT, "DER_DUPONT_J.docx")
+    document = Document(
+        nom_fichier=stored.nom_fichier,
+        chemin_fichier=stored.chemin,
+        hash_fichier=stored.hash_fichier,
+        stockage_cle=stored.cle,
+    )
+    return storage, document
+
+
+async def read_body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+@pytest.mark.unit
+class TestConditionalHeaders:
+    """Tests des en-têtes conditionnels"""
+
+    def test_etag_matches(self):
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('"x", W/"abc"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches('"x"', '"abc"')
+        assert not etag_matches(None, '"abc"')
+
+    @pytest.mark.parametrize("header,expected", [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=900-5000", (900, 999)),
+        ("bytes=0-1,5-9", None),
+        ("items=0-1", None),
+        (None, None),
+    ])
+    def test_parse_range(self, header, expected):
+        assert parse_range(header, 1000) == expected
+
+    def test_range_hors_fichier(self):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range("bytes=1000-", 1000)
+
+    def test_nom_accentue(self):
+        assert content_disposition("DER_HÉLÈNE.docx").startswith("attachment; filename*=utf-8''")
+        assert content_disposition("DER.docx") == 'attachment; filename="DER.docx"'
+
+
+@pytest.mark.unit
+class TestDownloadResponse:
+    """Tests de la réponse de téléchargement"""
+
+    def test_etag_fort(self, stored_document):
+        storage, document = stored_document
+
+        response = build_download_response(document, {}, storage)
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+        assert response.headers["accept-ranges"] == "bytes"
+
+    def test_304_si_inchange(self, stored_document):
+        storage, document = stored_document
+
+        response = build_download_response(
+            document, {"if-none-match": f'"{document.hash_fichier}"'}, storage
+        )
+
+        assert response.status_code == 304
+
+    async def test_plage_partielle(self, stored_document):
+        storage, document = stored_document
+
+        response = build_download_response(document, {"range": "bytes=10-19"}, storage)
+
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+        assert await read_body(response) == CONTENT[10:20]
+
+    def test_if_range_obsolete_contenu_complet(self, stored_document):
+        storage, document = stored_document
+
+        response = build_download_response(
+            document, {"range": "bytes=10-19", "if-range": '"ancien"'}, storage
+        )
+
+        assert response.status_code == 200
+
+    def test_416(self, stored_document):
+        storage, document = stored_document
+
+        response = build_download_response(document, {"range": "bytes=999999-"}, storage)
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    def test_x_accel_redirect(self, stored_document, monkeypatch):
+        storage, document = stored_document
+        monkeypatch.setattr(settings, "DOCUMENT_X_ACCEL_PREFIX", "/protected-documents/")
+
+        response = build_download_response(document, {}, storage)
+
+        assert response.headers["x-accel-redirect"] == f"/protected-documents/{document.stockage_cle}"
+        assert response.body == b""
+
+    def test_fichier_absent(self, stored_document):
+        storage, document = stored_document
+        storage.backend.delete(document.stockage_cle)
+
+        with pytest.raises(FileNotFoundError):
+            build_download_response(document, {}, storage)
+
+
+@pytest.mark.unit
+class TestSignedUrls:
+    """Tests des URLs de téléchargement signées"""
+
+    def test_signature_valide(self):
+        expires, signature = create_download_signature("doc-1")
+
+        assert verify_download_signature("doc-1", expires, signature)
+        assert not verify_download_signature("doc-2", expires, signature)
+        assert not verify_download_signature("doc-1", expires + 1, signature)
+
+    def test_signature_expiree(self):
+        expires, signature = create_download_signature("doc-1", expires_in=-1)
+
+        assert not verify_download_signature("doc-1", expires, signature)
@@ -0,0 +1,115 @@
+"""
+Tests unitaires du stockage des documents adressé par contenu
+(empreinte à l'écriture, déduplication, compression, orphelins)
+"""
+
+import hashlib
+import os
+import time
+from zipfile import ZipFile
+
+import pytest
+from docx import Document
+
+from app.services.document_storage import (
+    DocumentStorage,
+    LocalStorageBackend,
+    collect_orphans,
+)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Stockage local dans un dossier temporaire"""
+    return DocumentStorage(LocalStorageBackend(str(tmp_path / "blobs")))
+
+
+def make_docx(text="Contenu"):
+    doc = Document()
+    doc.add_paragraph(text)
+    return doc
+
+
+@pytest.mark.unit
+class TestSave:
+    """Tests de l'écriture des blobs"""
+
+    def test_empreinte_calculee_a_l_ecriture(self, storage):
+        stored = storage.save_docx(make_docx(), "DER_DUPONT_J_20261019_1430.docx")
+
+        with open(stored.chemin, "rb") as f:
+            content = f.read()
+        assert stored.hash_fichier == hashlib.sha256(content).hexdigest()
+        assert stored.taille_octets == len(content)
+        assert stored.cle == f"{stored.hash_fichier[:2]}/{stored.hash_fichier[2:4]}/{stored.hash_fichier}.docx"
+        assert ZipFile(stored.chemin).testzip() is None
+
+    def test_deduplication_des_rendus_identiques(self, storage):
+        first = storage.save_docx(make_docx(), "DER_DUPONT_J_20261019_1430.docx")
+        time.sleep(2)  # Résolution des dates zip
+        second = storage.save_docx(make_docx(), "DER_DUPONT_J_20261019_1432.docx")
+
+        assert second.cle == first.cle
+        assert second.deja_present and not first.deja_present
+        assert [key for key, _, _ in storage.backend.iter_keys()] == [first.cle]
+
+    def test_docx_relisible_a_dates_fixes(self, storage):
+        stored = storage.save_docx(make_docx("Relu"), "DER.docx")
+
+        with ZipFile(stored.chemin) as archive:
+            assert {info.date_time for info in archive.infolist()} == {(1980, 1, 1, 0, 0, 0)}
+        assert Document(stored.chemin).paragraphs[-1].text == "Relu"
+
+    def test_contenus_differents(self, storage):
+        first = storage.save_docx(make_docx("A"), "DER.docx")
+        second = storage.save_docx(make_docx("B"), "DER.docx")
+
+        assert first.cle != second.cle
+
+    def test_csv_compresse(self, storage):
+        data = b"nom;prenom\n" + b"DUPONT;Jean\n" * 1000
+
+        stored = storage.save_bytes(data, "harvest_clients.csv")
+
+        assert stored.compresse and stored.cle.endswith(".csv.gz")
+        assert stored.hash_fichier == hashlib.sha256(data).hexdigest()
+        assert stored.taille_stockee < stored.taille_octets
+        assert b"".join(storage.iter_chunks(stored.cle)) == data
+
+    def test_aucun_fichier_temporaire_restant(self, storage):
+        storage.save_bytes(b"x", "a.csv")
+        storage.save_bytes(b"x", "a.csv")
+
+        assert os.listdir(storage.backend.temp_dir()) == []
+
+
+@pytest.mark.unit
+class TestCollectOrphans:
+    """Tests du nettoyage des blobs orphelins"""
+
+    def test_supprime_les_orphelins_anciens(self, storage):
+        kept = storage.save_bytes(b"garde", "a.csv")
+        orphan = storage.save_bytes(b"orphelin", "b.csv")
+
+        report = collect_orphans(storage, {kept.cle}, grace_hours=1, now=time.time() + 7200)
+
+        assert report.supprimes == 1
+        assert report.octets_liberes == orphan.taille_stockee
+        assert [key for key, _, _ in storage.backend.iter_keys()] == [kept.cle]
+
+    def test_delai_de_grace(self, storage):
+        storage.save_bytes(b"recent", "a.csv")
+
+        report = collect_orphans(storage, set(), grace_hours=1)
+
+        assert report.orphelins == 1
+        assert report.recents == 1
+        assert report.supprimes == 0
+
+    def test_dry_run(self, storage):
+        orphan = storage.save_bytes(b"orphelin", "a.csv")
+
+        report = collect_orphans(storage, set(), grace_hours=0, dry_run=True, now=time.time() + 1)
+
+        assert report.supprimes == 1
+        assert os.path.exists(orphan.chemin)
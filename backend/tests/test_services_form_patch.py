@@ -0,0 +1,83 @@
+"""
+Tests unitaires du patch incrémental du formulaire (autosave)
+"""
+
+import pytest
+
+from app.services.form_patch import (
+    FormPatchError,
+    parse_pointer,
+    merge_patch_to_operations,
+    apply_operations,
+    diff_columns,
+)
+
+
+@pytest.mark.unit
+class TestParsePointer:
+    """Tests du décodage des pointeurs JSON"""
+
+    def test_pointer_simple(self):
+        assert parse_pointer("/titulaire1/nom") == ["titulaire1", "nom"]
+
+    def test_pointer_echappements(self):
+        assert parse_pointer("/a~1b/c~0d") == ["a/b", "c~d"]
+
+    def test_pointer_invalide(self):
+        with pytest.raises(FormPatchError):
+            parse_pointer("titulaire1/nom")
+
+
+@pytest.mark.unit
+class TestMergePatch:
+    """Tests de la conversion delta -> opérations"""
+
+    def test_delta_imbrique(self):
+        operations = merge_patch_to_operations({"titulaire1": {"nom": "Dupont", "email": None}})
+        assert {"op": "replace", "path": ["titulaire1", "nom"], "value": "Dupont"} in operations
+        assert {"op": "remove", "path": ["titulaire1", "email"]} in operations
+
+
+@pytest.mark.unit
+class TestApplyOperations:
+    """Tests de l'application et de la normalisation jsonb_set"""
+
+    def test_replace_chemin_existant(self):
+        form = {"titulaire1": {"nom": "A"}}
+        new_form, ops = apply_operations(form, [{"op": "replace", "path": ["titulaire1", "nom"], "value": "B"}])
+        assert new_form["titulaire1"]["nom"] == "B"
+        assert ops == [{"op": "replace", "path": ["titulaire1", "nom"], "value": "B"}]
+        # L'original n'est pas modifié
+        assert form["titulaire1"]["nom"] == "A"
+
+    def test_parent_absent_remonte(self):
+        new_form, ops = apply_operations({}, [{"op": "add", "path": ["titulaire2", "nom"], "value": "C"}])
+        assert new_form == {"titulaire2": {"nom": "C"}}
+        assert ops == [{"op": "replace", "path": ["titulaire2"], "value": {"nom": "C"}}]
+
+    def test_tableau_remplace_en_entier(self):
+        new_form, ops = apply_operations({"enfants": [1, 2]}, [{"op": "add", "path": ["enfants", "-"], "value": 3}])
+        assert new_form["enfants"] == [1, 2, 3]
+        assert ops == [{"op": "replace", "path": ["enfants"], "value": [1, 2, 3]}]
+
+    def test_remove_absent_ignore(self):
+        new_form, ops = apply_operations({"a": 1}, [{"op": "remove", "path": ["b", "c"]}])
+        assert new_form == {"a": 1}
+        assert ops == []
+
+    def test_chemin_vide_refuse(self):
+        with pytest.raises(FormPatchError):
+            apply_operations({}, [{"op": "replace", "path": [], "value": {}}])
+
+
+@pytest.mark.unit
+class TestDiffColumns:
+    """Tests du diff des colonnes mappées"""
+
+    def test_seules_colonnes_modifiees(self):
+        old = {"t1_nom": "A", "t1_prenom": "Jean", "form_data": {}}
+        new = {"t1_nom": "B", "t1_prenom": "Jean", "form_data": {"x": 1}}
+        assert diff_columns(old, new, {"t1_nom", "t1_prenom", "form_data"}) == {"t1_nom": "B"}
+
+    def test_colonnes_non_autorisees_ignorees(self):
+        assert diff_columns({}, {"inconnue": 1}, {"t1_nom"}) == {}
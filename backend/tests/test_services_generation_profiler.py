@@ -0,0 +1,81 @@
+"""
+Tests unitaires de la mesure par phase de la génération de documents
+"""
+
+import pytest
+
+from app.config import settings
+from app.core import metrics
+from app.services.generation_profiler import generation_phase, track_document_generation
+from app.services.template_manager import DocumentType
+from app.services.template_warmup import synthetic_client, synthetic_conseiller
+
+from tests.test_core_metrics import Recorder
+
+
+def labels(**items):
+    return tuple(sorted(items.items()))
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Métriques de génération remplacées par des enregistreurs"""
+    names = [
+        "documents_generated_total", "document_generation_duration_seconds",
+        "document_generation_phase_seconds",
+    ]
+    recorders = {name: Recorder() for name in names}
+    for name, recorder in recorders.items():
+        monkeypatch.setattr(metrics, name, recorder)
+    return recorders
+
+
+@pytest.mark.unit
+class TestTrackDocumentGeneration:
+    """Tests du suivi d'une génération"""
+
+    def test_phases_du_rendu_v2(self, v2_generator, recorded):
+        client, conseiller = synthetic_client(), synthetic_conseiller()
+
+        with track_document_generation("DER") as generation:
+            generation.record_phase("client_load", 0.002)
+            plan = v2_generator.plan_v2_document(DocumentType.DER, client, conseiller)
+            v2_generator.save_plan(plan, client)
+
+        phases = recorded["document_generation_phase_seconds"].values
+        for phase in ["client_load", "template_load", "replacements", "fingerprint", "substitution", "save"]:
+            assert len(phases[labels(type_document="DER", phase=phase)]) == 1
+        assert phases[labels(type_document="DER", phase="client_load")] == [0.002]
+        assert recorded["documents_generated_total"].values[labels(type_document="DER", status="success")] == 1
+        assert len(recorded["document_generation_duration_seconds"].values[labels(type_document="DER")]) == 1
+
+    def test_erreur_et_statut_fixe(self, recorded):
+        with pytest.raises(ValueError):
+            with track_document_generation("QCC"):
+                raise ValueError("template illisible")
+        with track_document_generation("QCC") as generation:
+            generation.status = "reused"
+
+        totals = recorded["documents_generated_total"].values
+        assert totals[labels(type_document="QCC", status="error")] == 1
+        assert totals[labels(type_document="QCC", status="reused")] == 1
+
+    def test_phase_hors_generation_ignoree(self, recorded):
+        with generation_phase("save"):
+            pass
+
+        assert recorded["document_generation_phase_seconds"].values == {}
+
+    def test_profilage_echantillonne(self, recorded, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DOCUMENT_PROFILE_SAMPLE_RATE", 1.0)
+        monkeypatch.setattr(settings, "DOCUMENT_PROFILE_PATH", str(tmp_path))
+
+        with track_document_generation("DER"):
+            with generation_phase("substitution"):
+                sum(range(1000))
+
+        reports = list(tmp_path.iterdir())
+        assert len(reports) == 1
+        content = reports[0].read_text(encoding="utf-8")
+        assert content.startswith("Génération DER (success)")
+        assert "substitution" in content
@@ -0,0 +1,154 @@
+"""
+Tests unitaires du moniteur de santé
+(instantané en tâche de fond, délais, probes sans accès aux composants)
+"""
+
+import asyncio
+
+import pytest
+
+from app.api import health
+from app.config import settings
+from app.services import health_monitor as health_monitor_module
+from app.services import template_warmup
+from app.services.generation_profiler import generations_in_progress, track_document_generation
+from app.services.health_monitor import (
+    HealthMonitor, _component, check_disk_space, check_generations, check_templates,
+)
+
+
+class CountingCheck:
+    """Vérification factice qui compte ses appels"""
+
+    def __init__(self, name, status="healthy", delay=0.0):
+        self.name = name
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return _component(self.name, self.status, "ok")
+
+
+class CountingToThread:
+    """Enveloppe de asyncio.to_thread qui compte ses appels"""
+
+    def __init__(self, to_thread):
+        self.to_thread = to_thread
+        self.calls = 0
+
+    async def __call__(self, func, *args):
+        self.calls += 1
+        return await self.to_thread(func, *args)
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    """Moniteur global limité à des vérifications factices"""
+    checks = {"database": CountingCheck("database"), "redis": CountingCheck("redis")}
+    instance = HealthMonitor(checks=checks, interval=0, timeout=1)
+    monkeypatch.setattr(health_monitor_module, "_health_monitor", instance)
+    monkeypatch.setitem(template_warmup._state, "statut", "termine")
+    return instance
+
+
+@pytest.mark.unit
+class TestHealthMonitor:
+    """Tests du rafraîchissement"""
+
+    async def test_delai_depasse(self):
+        monitor = HealthMonitor(
+            checks={"lent": CountingCheck("lent", delay=1), "rapide": CountingCheck("rapide")},
+            interval=0,
+            timeout=0.05
+        )
+
+        components = await monitor.refresh()
+
+        assert components["lent"].status == "unhealthy"
+        assert components["lent"].message.startswith("Timeout")
+        assert components["rapide"].status == "healthy"
+        assert monitor.overall_status() == "unhealthy"
+
+    async def test_erreur_convertie(self):
+        async def broken():
+            raise ConnectionError("refused")
+
+        monitor = HealthMonitor(checks={"redis": broken}, interval=0, timeout=1)
+        components = await monitor.refresh()
+
+        assert components["redis"].status == "unhealthy"
+        assert components["redis"].message == "refused"
+
+    async def test_probes_lisent_l_instantane(self, monitor):
+        monitor._task = object()  # tâche de fond simulée: pas de rafraîchissement à la demande
+        await monitor.refresh()
+
+        for _ in range(5):
+            assert (await health.readiness_probe()) == {"status": "ready"}
+            await health.health_check()
+
+        assert monitor.checks["database"].calls == 1
+
+    async def test_readiness_selon_composants(self, monitor):
+        monitor.checks["redis"].status = "unhealthy"
+
+        response = await health.readiness_probe()
+
+        assert response.status_code == 503
+        assert b"redis unavailable" in response.body
+
+    async def test_instantane_perime(self, monitor, monkeypatch):
+        monitor._task = object()
+        await monitor.refresh()
+        monkeypatch.setattr(settings, "HEALTH_MAX_AGE", -1)
+
+        response = await health.readiness_probe()
+        body = await health.health_check()
+
+        assert response.status_code == 503
+        assert b"stale" in response.body
+        assert body.status == "degraded"
+
+    async def test_tache_de_fond(self):
+        check = CountingCheck("database")
+        monitor = HealthMonitor(checks={"database": check}, interval=0.01, timeout=1)
+
+        assert monitor.start() is True
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        assert check.calls >= 2
+        assert monitor.is_stale() is False
+
+
+@pytest.mark.unit
+class TestChecks:
+    """Tests des vérifications locales"""
+
+    async def test_templates_et_disque_dans_un_thread(self, tmp_path, monkeypatch):
+        (tmp_path / "DER.docx").write_bytes(b"")
+        monkeypatch.setenv("TEMPLATES_PATH", str(tmp_path))
+        monkeypatch.setattr(
+            health_monitor_module.asyncio, "to_thread",
+            CountingToThread(health_monitor_module.asyncio.to_thread)
+        )
+
+        templates = await check_templates()
+        disk = await check_disk_space()
+
+        assert templates.status == "healthy"
+        assert templates.message == "1 template(s) available"
+        assert disk.name == "disk"
+        assert health_monitor_module.asyncio.to_thread.calls == 2
+
+    async def test_generations_en_cours(self):
+        before = generations_in_progress()
+        with track_document_generation("DER"):
+            assert generations_in_progress() == before + 1
+            component = await check_generations()
+
+        assert generations_in_progress() == before
+        assert component.message == f"{before + 1} generation(s) in progress"
@@ -3,10 +3,18 @@ Tests unitaires pour le service de classification LCB-FT
 Lutte contre le blanchiment et financement du terrorisme
 """
 
+import json
+from types import SimpleNamespace
+
 import pytest
 from unittest.mock import MagicMock
 
-from app.services.lcb_ft_classifier import classify_lcb_ft_level
+from app.config import settings
+from app.services.lcb_ft_classifier import (
+    LCB_FT_INPUT_FIELDS, KeywordMatcher, LcbFtRules, classify_lcb_ft_batch,
+    classify_lcb_ft_level, explain_lcb_ft_level, load_criteres
+)
+from app.services.risk_calculator import columns_from_rows
 
 
 class TestLcbFtClassifier:
@@ -448,3 +456,106 @@ class TestLcbFtClassifier:
         mock_client_minimal.t1_us_person = True
         result = classify_lcb_ft_level(mock_client_minimal)
         assert result == "Élevé"
+
+
+# ==========================================
+# MOTEUR DE RÈGLES COMPILÉ
+# ==========================================
+
+BASE_LCB_FT_INPUTS = {
+    'lcb_ft_ppe': False, 'lcb_ft_ppe_famille': False,
+    't1_us_person': False, 't2_us_person': False,
+    't1_residence_fiscale': "France", 't1_residence_fiscale_autre': None,
+    'origine_economique_gains_jeu': False, 'origine_economique_cession_pro': False,
+    'origine_economique_autres': False, 'lcb_ft_justificatifs': False,
+    'origine_fonds_montant_prevu': None, 'patrimoine_global': None,
+    't1_profession': "Employé", 't1_chef_entreprise': False,
+    't1_entreprise_forme_juridique': None,
+}
+
+LCB_FT_CASES = [
+    {},
+    {'lcb_ft_ppe_famille': True},
+    {'t2_us_person': True, 't1_residence_fiscale': None},
+    {'t1_residence_fiscale_autre': "Résident Iran et Myanmar"},
+    {'t1_residence_fiscale_autre': "Syrie"},
+    {'origine_economique_autres': True},
+    {'origine_economique_autres': True, 'lcb_ft_justificatifs': True},
+    {'origine_fonds_montant_prevu': "1500000", 'origine_economique_gains_jeu': True},
+    {'origine_fonds_montant_prevu': "1000000"},
+    {'origine_fonds_montant_prevu': "non renseigné"},
+    {'patrimoine_global': "Plus de 5000000"},
+    {'t1_profession': "CryptoTrader indépendant"},
+    {'t1_chef_entreprise': True, 't1_entreprise_forme_juridique': "SAS Holding"},
+    {'t1_chef_entreprise': False, 't1_entreprise_forme_juridique': "Holding"},
+]
+
+
+class TestLcbFtRules:
+    """Moteur de règles: explications, mots-clés et calcul par lots"""
+
+    @pytest.mark.unit
+    def test_keyword_matcher_equivaut_a_in(self):
+        """L'automate retrouve les mots-clés imbriqués ou chevauchants"""
+        matcher = KeywordMatcher(["he", "she", "hers", "his"])
+
+        assert matcher.findall("ushers") == ["she", "he", "hers"]
+        assert not matcher.search("aucun")
+        assert not matcher.search(None)
+
+        professions = KeywordMatcher(["jeux", "paris"], lowercase=True)
+        assert professions.search("Gérant de JEUX")
+
+    @pytest.mark.unit
+    def test_explication_des_facteurs(self):
+        """Chaque facteur retenu est expliqué avec ses points"""
+        client = SimpleNamespace(**{**BASE_LCB_FT_INPUTS, 'lcb_ft_ppe': True,
+                                    'origine_fonds_montant_prevu': "750000"})
+
+        result = explain_lcb_ft_level(client)
+
+        assert result["niveau"] == "Renforcé"
+        assert result["score"] == 4
+        assert [f["code"] for f in result["facteurs"]] == ["ppe", "montant_eleve"]
+        assert result["version"]
+
+    @pytest.mark.unit
+    def test_pays_configure_syrie(self):
+        """Les pays à risque proviennent de la configuration"""
+        client = SimpleNamespace(**{**BASE_LCB_FT_INPUTS, 't1_residence_fiscale_autre': "Syrie"})
+
+        assert classify_lcb_ft_level(client) == "Renforcé"
+
+    @pytest.mark.unit
+    def test_surcharge_par_fichier(self, tmp_path, monkeypatch):
+        """Le fichier JSON surcharge les critères de la configuration"""
+        rules_file = tmp_path / "regles.json"
+        rules_file.write_text(json.dumps({"version": "test", "pays_risque": ["Atlantide"]}), encoding="utf-8")
+        monkeypatch.setattr(settings, "LCB_FT_RULES_FILE", str(rules_file))
+
+        rules = LcbFtRules(load_criteres())
+        client = SimpleNamespace(**{**BASE_LCB_FT_INPUTS, 't1_residence_fiscale_autre': "Atlantide"})
+
+        assert rules.version.startswith("test+")
+        assert rules.evaluate(client).score == 3
+
+    @pytest.mark.unit
+    def test_parite_lot_unitaire(self):
+        """Le calcul par lots reproduit exactement le calcul unitaire"""
+        clients = [SimpleNamespace(**{**BASE_LCB_FT_INPUTS, **case}) for case in LCB_FT_CASES]
+
+        batch = classify_lcb_ft_batch(columns_from_rows(clients, LCB_FT_INPUT_FIELDS))
+
+        for index, client in enumerate(clients):
+            expected = explain_lcb_ft_level(client)
+            assert int(batch["score"][index]) == expected["score"], LCB_FT_CASES[index]
+            assert batch["niveau"][index] == expected["niveau"], LCB_FT_CASES[index]
+            for facteur in expected["facteurs"]:
+                assert batch["facteurs"][facteur["code"]][index]
+
+    @pytest.mark.unit
+    def test_lot_vide(self):
+        """Lot vide: tableaux vides"""
+        batch = classify_lcb_ft_batch({field: [] for field in LCB_FT_INPUT_FIELDS})
+
+        assert batch["score"].shape == (0,)
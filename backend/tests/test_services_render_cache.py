@@ -0,0 +1,88 @@
+"""
+Tests unitaires de l'empreinte de rendu (génération identique évitée)
+"""
+
+import hashlib
+
+import pytest
+from docx import Document
+
+from app.services.docx_generator import render_fingerprint
+from app.services.template_manager import DocumentType
+from app.services.template_warmup import synthetic_client, synthetic_conseiller
+
+
+@pytest.mark.unit
+class TestRenderFingerprint:
+    """Tests de l'empreinte de rendu"""
+
+    def test_stable_a_entrees_egales(self):
+        conseiller = synthetic_conseiller()
+        replacements = {"{{NOM}}": "DUPONT"}
+
+        assert render_fingerprint("abc", replacements, conseiller) == render_fingerprint(
+            "abc", dict(replacements), conseiller
+        )
+
+    def test_change_avec_template_donnees_ou_conseiller(self):
+        conseiller = synthetic_conseiller()
+        reference = render_fingerprint("abc", {"{{NOM}}": "DUPONT"}, conseiller)
+
+        autre_conseiller = synthetic_conseiller()
+        autre_conseiller.email = "autre@example.com"
+
+        assert render_fingerprint("abd", {"{{NOM}}": "DUPONT"}, conseiller) != reference
+        assert render_fingerprint("abc", {"{{NOM}}": "DURAND"}, conseiller) != reference
+        assert render_fingerprint("abc", {"{{NOM}}": "DUPONT"}, autre_conseiller) != reference
+
+
+@pytest.mark.unit
+class TestRenderPlan:
+    """Tests du plan de rendu v2"""
+
+    def test_plan_sans_rendu(self, v2_generator, monkeypatch):
+        opened = []
+        original = v2_generator.template_manager.open_template
+        monkeypatch.setattr(v2_generator.template_manager, "open_template",
+                            lambda t: opened.append(t) or original(t))
+
+        plan = v2_generator.plan_v2_document(DocumentType.DER, synthetic_client(), synthetic_conseiller())
+
+        assert plan.template.checksum
+        assert len(plan.empreinte) == 64
+        assert opened == []
+
+    def test_meme_empreinte_meme_blob(self, v2_generator):
+        client, conseiller = synthetic_client(), synthetic_conseiller()
+
+        first = v2_generator.plan_v2_document(DocumentType.DER, client, conseiller)
+        second = v2_generator.plan_v2_document(DocumentType.DER, client, conseiller)
+
+        assert first.empreinte == second.empreinte
+        stored_first = v2_generator.save_plan(first, client)
+        stored_second = v2_generator.save_plan(second, client)
+        assert stored_second.cle == stored_first.cle
+        assert stored_second.deja_present
+
+    def test_empreinte_du_contenu_rendu(self, v2_generator):
+        """Template modifié depuis le scan: l'empreinte suit les octets rendus"""
+        client, conseiller = synthetic_client(), synthetic_conseiller()
+        path = v2_generator.template_manager.get_template(DocumentType.DER).file_path
+        before = v2_generator.plan_v2_document(DocumentType.DER, client, conseiller)
+
+        doc = Document()
+        doc.add_paragraph("DER modifié {{NOM_CONSEILLER}}")
+        doc.save(str(path))
+        # Cache vidé (purge d'un scan): le fichier est relu au plan suivant
+        v2_generator.template_manager._parsed.clear()
+        plan = v2_generator.plan_v2_document(DocumentType.DER, client, conseiller)
+
+        checksum = hashlib.md5(path.read_bytes()).hexdigest()
+        assert plan.empreinte == render_fingerprint(checksum, plan.replacements, conseiller)
+        assert plan.empreinte != before.empreinte
+        assert v2_generator.render_plan(plan).paragraphs[0].text.startswith("DER modifié")
+
+    def test_template_absent(self, v2_generator):
+        assert v2_generator.plan_v2_document(
+            DocumentType.QCC, synthetic_client(), synthetic_conseiller()
+        ) is None
@@ -3,9 +3,14 @@ Tests unitaires pour le service de calcul de profil de risque
 """
 
 import pytest
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
-from app.services.risk_calculator import calculate_risk_profile
+from app.config import settings
+from app.services.risk_calculator import (
+    calculate_risk_profile, calculate_risk_profiles_batch, columns_from_rows, RISK_INPUT_FIELDS,
+    PROFIL_SEUILS, RISK_RULES_BASE_VERSION, RISK_RULES_VERSION, _profil_from_score, _profil_seuils
+)
 
 
 class TestRiskCalculator:
@@ -304,3 +309,134 @@ class TestRiskCalculator:
 
         assert details["horizon"] == "5 ans"
         assert details["tolerance"] == "Moyen"
+
+
+# ==========================================
+# PARITÉ CALCUL UNITAIRE / CALCUL PAR LOTS
+# ==========================================
+
+# Valeurs par défaut identiques à mock_client_minimal
+BASE_RISK_INPUTS = {
+    'horizon_placement': None,
+    'tolerance_risque': None,
+    'pertes_maximales_acceptables': None,
+    'patrimoine_global': None,
+    'liquidite_importante': False,
+    'kyc_portefeuille_experience_pro': False,
+    'kyc_portefeuille_gestion_personnelle': False,
+    'kyc_derives_detention': False,
+    'kyc_structures_detention': False,
+    'kyc_culture_presse_financiere': False,
+    'kyc_culture_suivi_bourse': False,
+}
+
+# Cas des tests ci-dessus (fixtures et paramétrages)
+PARITY_CASES = [
+    {},
+    {'horizon_placement': "Plus de 8 ans", 'tolerance_risque': "Élevé - Dynamique",
+     'pertes_maximales_acceptables': "50%", 'kyc_portefeuille_experience_pro': True,
+     'kyc_portefeuille_gestion_personnelle': True, 'kyc_derives_detention': True,
+     'kyc_culture_presse_financiere': True, 'kyc_culture_suivi_bourse': True,
+     'patrimoine_global': "Plus de 5000000 XPF"},
+    {'horizon_placement': "Moins de 2 ans", 'tolerance_risque': "Très faible - Sécuritaire",
+     'pertes_maximales_acceptables': "Aucune perte", 'liquidite_importante': True},
+    {'horizon_placement': "Plus de 8 ans", 'tolerance_risque': "Très élevé - Agressif",
+     'pertes_maximales_acceptables': "100%", 'patrimoine_global': "Plus de 5000000"},
+    {'horizon_placement': "5 à 8 ans", 'tolerance_risque': "Moyen - Équilibré",
+     'pertes_maximales_acceptables': "25%", 'patrimoine_global': "500000"},
+    {'horizon_placement': "5 ans", 'tolerance_risque': "Moyen", 'pertes_maximales_acceptables': "15%",
+     'patrimoine_global': "300000", 'kyc_portefeuille_experience_pro': True},
+    {'horizon_placement': "3 ans", 'tolerance_risque': "Faible - Prudent",
+     'pertes_maximales_acceptables': "10%", 'patrimoine_global': "100000"},
+    {'liquidite_importante': True},
+    {'kyc_structures_detention': True, 'liquidite_importante': None},
+] + [
+    {'horizon_placement': value} for value in (
+        "Plus de 8 ans", "8 ans ou plus", "long terme", "5 à 8 ans", "5 ans",
+        "3 à 5 ans", "3 ans", "2 ans", "court terme")
+] + [
+    {'tolerance_risque': value, 'liquidite_importante': True} for value in (
+        "Très élevé", "Agressif", "Élevé", "Dynamique", "Moyen", "Équilibré",
+        "Faible", "Prudent", "Très faible", "Sécuritaire")
+] + [
+    {'pertes_maximales_acceptables': value, 'liquidite_importante': True} for value in (
+        "100%", "50%", "25%", "15%", "10%", "Aucune", "0%")
+] + [
+    {'patrimoine_global': value, 'liquidite_importante': True} for value in (
+        "Plus de 5000000", "5000000", "1000000 à 5000000", "1000000", "500000 à 1000000",
+        "500000", "300000 à 500000", "300000", "100000 à 300000", "100000")
+]
+
+
+class TestRiskBatchParity:
+    """Le calcul par lots reproduit exactement le calcul unitaire"""
+
+    @pytest.mark.unit
+    def test_parite_sur_tous_les_cas(self):
+        """Même score et même profil pour chaque cas, en un seul lot"""
+        clients = [SimpleNamespace(**{**BASE_RISK_INPUTS, **case}) for case in PARITY_CASES]
+
+        batch = calculate_risk_profiles_batch(columns_from_rows(clients))
+
+        for index, client in enumerate(clients):
+            expected = calculate_risk_profile(client)
+            assert int(batch["score"][index]) == expected["score"], PARITY_CASES[index]
+            assert batch["profil"][index] == expected["profil"], PARITY_CASES[index]
+
+    @pytest.mark.unit
+    def test_lot_volumineux(self):
+        """100k clients en une passe, parité vérifiée sur un échantillon"""
+        clients = [
+            SimpleNamespace(**{**BASE_RISK_INPUTS, **PARITY_CASES[i % len(PARITY_CASES)]})
+            for i in range(100_000)
+        ]
+
+        batch = calculate_risk_profiles_batch(columns_from_rows(clients))
+
+        assert batch["score"].shape == (100_000,)
+        for index in range(0, 100_000, 997):
+            assert int(batch["score"][index]) == calculate_risk_profile(clients[index])["score"]
+
+    @pytest.mark.unit
+    def test_lot_vide_et_colonnes_manquantes(self):
+        """Lot vide et colonne absente (traitée comme None)"""
+        empty = calculate_risk_profiles_batch({field: [] for field in RISK_INPUT_FIELDS})
+        assert empty["score"].shape == (0,)
+
+        partial = calculate_risk_profiles_batch({'horizon_placement': ["Plus de 8 ans"]})
+        # 25 (horizon) + 5 (liquidité None -> bonus)
+        assert int(partial["score"][0]) == 30
+
+
+class TestProfilSeuils:
+    """Seuils des profils issus de settings.PROFIL_RISQUE_SEUILS"""
+
+    @pytest.mark.unit
+    def test_seuils_depuis_la_configuration(self):
+        assert PROFIL_SEUILS == _profil_seuils(settings.PROFIL_RISQUE_SEUILS)
+        for profil, (low, high) in settings.PROFIL_RISQUE_SEUILS.items():
+            assert _profil_from_score(low) == profil
+            assert _profil_from_score(high) == profil
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("score,profil", [
+        (24, "Sécuritaire"), (25, "Prudent"),
+        (49, "Prudent"), (50, "Équilibré"),
+        (74, "Équilibré"), (75, "Dynamique"),
+    ])
+    def test_bornes(self, score, profil):
+        """Bornes incluses: 25, 50 et 75 ouvrent le profil supérieur"""
+        assert _profil_from_score(score) == profil
+
+    @pytest.mark.unit
+    def test_intervalles_discontinus_refuses(self):
+        with pytest.raises(ValueError):
+            _profil_seuils({"Prudent": (0, 49), "Dynamique": (51, 100)})
+        with pytest.raises(ValueError):
+            _profil_seuils({"Prudent": (0, 50), "Dynamique": (50, 100)})
+
+    @pytest.mark.unit
+    def test_version_inclut_empreinte_des_seuils(self):
+        base, digest = RISK_RULES_VERSION.split("+")
+        assert base == RISK_RULES_BASE_VERSION
+        assert len(digest) == 8
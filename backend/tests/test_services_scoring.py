@@ -0,0 +1,116 @@
+"""
+Tests unitaires du scoring mémoïsé (empreintes d'entrées)
+"""
+
+import pytest
+from datetime import datetime
+from decimal import Decimal
+
+from app.crud.client import crud_client
+from app.models.client import Client
+from app.schemas.client import ClientUpdate
+from app.services.risk_calculator import RISK_RULES_VERSION
+from app.services.scoring import apply_scoring, input_fingerprint, risk_fingerprint, score_client
+
+
+@pytest.mark.unit
+class TestFingerprint:
+    """Tests des empreintes d'entrées"""
+
+    def test_stable_et_independante_de_l_ordre(self):
+        a = input_fingerprint({'x': 1, 'y': "a"}, ['x', 'y'], "v1")
+        b = input_fingerprint({'y': "a", 'x': 1}, ['y', 'x'], "v1")
+        assert a == b
+        assert len(a) == 64
+
+    def test_montants_normalises(self):
+        assert input_fingerprint({'m': Decimal("750000.00")}, ['m'], "v1") == \
+            input_fingerprint({'m': 750000}, ['m'], "v1")
+        assert input_fingerprint({'m': Decimal("750000.00")}, ['m'], "v1") == \
+            input_fingerprint({'m': "750000"}, ['m'], "v1")
+
+    def test_version_change_l_empreinte(self):
+        assert input_fingerprint({'x': 1}, ['x'], "v1") != input_fingerprint({'x': 1}, ['x'], "v2")
+
+    def test_champ_hors_entrees_ignore(self, make_scoring_row):
+        row = make_scoring_row()
+        assert risk_fingerprint(row) == risk_fingerprint(make_scoring_row(t1_nom="Autre", version=9))
+        assert risk_fingerprint(row) != risk_fingerprint(make_scoring_row(tolerance_risque="Agressif"))
+
+
+@pytest.mark.unit
+class TestScoreClient:
+    """Tests de la réutilisation des résultats stockés"""
+
+    def test_premier_calcul_enregistre_empreintes_et_versions(self, make_scoring_row):
+        client = make_scoring_row()
+
+        values = apply_scoring(client)
+
+        assert client.profil_risque_calcule == values['profil_risque_calcule']
+        assert client.profil_risque_empreinte == risk_fingerprint(client)
+        assert client.profil_risque_regles_version == RISK_RULES_VERSION
+        assert client.lcb_ft_niveau_risque == "Faible"
+        assert client.lcb_ft_regles_version
+
+    def test_entrees_inchangees_reutilisees(self, make_scoring_row):
+        client = make_scoring_row()
+        apply_scoring(client, now=datetime(2026, 1, 1))
+
+        client.t1_nom = "Modifié"  # Hors entrées du scoring
+
+        assert score_client(client) == {}
+        assert client.profil_risque_date_calcul == datetime(2026, 1, 1)
+
+    def test_seul_le_score_impacte_est_recalcule(self, make_scoring_row):
+        client = make_scoring_row()
+        apply_scoring(client)
+
+        client.lcb_ft_ppe = True
+        values = score_client(client)
+
+        assert set(values) == {'lcb_ft_niveau_risque', 'lcb_ft_empreinte', 'lcb_ft_regles_version'}
+        assert values['lcb_ft_niveau_risque'] == "Renforcé"
+
+
+class FakeSession:
+    """Session sans base: add / commit / refresh sans effet"""
+
+    def add(self, obj):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+
+@pytest.mark.unit
+class TestClientWritePaths:
+    """Les écritures CRUD tiennent les empreintes à jour"""
+
+    async def test_put_puis_formulaire_restaurant_les_entrees(self):
+        client = Client(
+            horizon_placement="Plus de 8 ans", tolerance_risque="Très élevé - Agressif",
+            pertes_maximales_acceptables="50%", patrimoine_global="1000000",
+            liquidite_importante=False,
+        )
+        apply_scoring(client)
+        initial = client.profil_risque_calcule
+
+        # PUT: entrées du profil modifiées, profil et empreinte recalculés ensemble
+        client = await crud_client.update(
+            FakeSession(), db_obj=client,
+            obj_in=ClientUpdate(tolerance_risque="Très faible - Sécuritaire", horizon_placement="2 ans")
+        )
+        assert client.profil_risque_calcule != initial
+        assert client.profil_risque_empreinte == risk_fingerprint(client)
+
+        # Enregistrement du formulaire rétablissant les entrées initiales
+        client.tolerance_risque = "Très élevé - Agressif"
+        client.horizon_placement = "Plus de 8 ans"
+        apply_scoring(client)
+
+        assert client.profil_risque_calcule == initial
+        assert client.profil_risque_empreinte == risk_fingerprint(client)
@@ -0,0 +1,157 @@
+"""
+Tests unitaires du gestionnaire de templates DOCX
+(scan incrémental, cache des templates parsés, remplacement atomique)
+"""
+
+import os
+import pytest
+from docx import Document
+
+from app.services.template_manager import DocumentType, TemplateManager
+
+
+def write_template(path, text="{{NOM}}"):
+    """Crée un DOCX minimal"""
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.save(str(path))
+
+
+@pytest.fixture
+def templates_dir(tmp_path):
+    """Dossier avec un QCC v2, un DER et un backup ignoré"""
+    (tmp_path / "v2").mkdir()
+    write_template(tmp_path / "v2" / "QCC_V2_TEMPLATE.docx", "QCC {{NOM}}")
+    write_template(tmp_path / "DER_TEMPLATE.docx", "DER {{NOM}}")
+    write_template(tmp_path / "v2" / "DER_V2_TEMPLATE_BACKUP.docx")
+    return tmp_path
+
+
+@pytest.mark.unit
+class TestTemplateScan:
+    """Tests du scan et du registre"""
+
+    def test_suffixes_ignores_sans_exclure_template(self, templates_dir):
+        manager = TemplateManager(str(templates_dir))
+        manager.scan_templates()
+
+        assert manager.get_template(DocumentType.QCC).version == "2.0"
+        assert [t["file_name"] for t in manager.list_templates()["DER"]] == ["DER_TEMPLATE.docx"]
+
+    def test_scan_incremental(self, templates_dir, monkeypatch):
+        manager = TemplateManager(str(templates_dir))
+        manager.scan_templates()
+
+        computed = []
+        original = manager._compute_checksum
+        monkeypatch.setattr(manager, "_compute_checksum", lambda p: computed.append(p.name) or original(p))
+
+        manager.scan_templates()
+        assert computed == []
+
+        qcc = templates_dir / "v2" / "QCC_V2_TEMPLATE.docx"
+        write_template(qcc, "QCC modifié {{NOM}}")
+        stat = qcc.stat()
+        os.utime(qcc, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        manager.scan_templates()
+        assert computed == ["QCC_V2_TEMPLATE.docx"]
+
+    def test_remplacement_atomique_du_registre(self, templates_dir):
+        manager = TemplateManager(str(templates_dir))
+        manager.scan_templates()
+        before = manager.registry
+        template_before = manager.get_template(DocumentType.QCC)
+
+        write_template(templates_dir / "v2" / "QCC_V3_TEMPLATE.docx")
+        manager.scan_templates()
+
+        assert manager.registry is not before
+        assert manager.get_template(DocumentType.QCC).version == "3.0"
+        # L'ancien registre reste cohérent pour une génération en cours
+        assert template_before.is_active
+        assert before.templates[DocumentType.QCC] == [template_before]
+
+
+@pytest.mark.unit
+class TestTemplateCache:
+    """Tests du cache des templates parsés"""
+
+    def test_copies_independantes(self, templates_dir):
+        manager = TemplateManager(str(templates_dir))
+        manager.scan_templates()
+
+        first = manager.load_document(DocumentType.QCC, "2.0")
+        first.paragraphs[0].text = "rempli"
+        second = manager.load_document(DocumentType.QCC, "2.0")
+
+        assert second.paragraphs[0].text == "QCC {{NOM}}"
+        assert manager.get_stats()["parsed_cached"] == 1
+
+    def test_cache_purge_apres_modification(self, templates_dir):
+        manager = TemplateManager(str(templates_dir))
+        manager.scan_templates()
+        manager.load_document(DocumentType.QCC)
+        old_checksum = manager.get_template(DocumentType.QCC).checksum
+
+        (templates_dir / "v2" / "QCC_V2_TEMPLATE.docx").unlink()
+        manager.scan_templates()
+
+        assert old_checksum not in manager._parsed
+        assert manager.load_document(DocumentType.QCC) is None
+
+    def test_fichier_modifie_depuis_le_scan(self, templates_dir, monkeypatch):
+        """Le contenu relu est retrouvé par les ouvertures suivantes"""
+        manager = TemplateManager(str(templates_dir))
+        manager.scan_templates()
+        template = manager.get_template(DocumentType.QCC)
+        scanned_checksum = template.checksum
+
+        write_template(templates_dir / "v2" / "QCC_V2_TEMPLATE.docx", "QCC modifié {{NOM}}")
+        checksum, parsed = manager.load_parsed(template)
+
+        assert checksum != scanned_checksum
+        # TemplateInfo partagé intact, remplacé dans le registre
+        assert template.checksum == scanned_checksum
+        assert manager.get_template(DocumentType.QCC).checksum == checksum
+        assert parsed.paragraphs[0].text == "QCC modifié {{NOM}}"
+
+        reads = []
+        monkeypatch.setattr(type(template.file_path), "read_bytes", lambda p: reads.append(p))
+        assert manager.load_document(DocumentType.QCC).paragraphs[0].text == "QCC modifié {{NOM}}"
+        assert reads == []
+        assert list(manager._parsed) == [checksum]
+
+    def test_registre_remplace_par_un_scan(self, templates_dir):
+        """Un TemplateInfo d'un ancien registre n'écrase pas le registre courant"""
+        manager = TemplateManager(str(templates_dir))
+        manager.scan_templates()
+        template = manager.get_template(DocumentType.QCC)
+
+        write_template(templates_dir / "v2" / "QCC_V2_TEMPLATE.docx", "QCC modifié {{NOM}}")
+        registry = manager.scan_templates()
+        checksum, _ = manager.load_parsed(template)
+
+        assert manager.registry is registry
+        assert manager.get_template(DocumentType.QCC).checksum == checksum
+
+    def test_version_absente(self, templates_dir):
+        manager = TemplateManager(str(templates_dir))
+        manager.scan_templates()
+
+        assert manager.load_document(DocumentType.QCC, "9.0") is None
+
+
+@pytest.mark.unit
+class TestTemplateWatcher:
+    """Tests de la surveillance du dossier"""
+
+    def test_demarrage_et_arret(self, templates_dir):
+        manager = TemplateManager(str(templates_dir))
+
+        assert manager.start_watcher(0) is False
+        assert manager.start_watcher(60) is True
+        assert manager.get_stats()["watching"] is True
+
+        manager.stop_watcher()
+        assert manager.get_stats()["watching"] is False
@@ -0,0 +1,94 @@
+"""
+Tests unitaires du préchauffage des templates
+"""
+
+import pytest
+from docx import Document
+
+from app.api.health import readiness_probe
+from app.config import settings
+from app.services import template_manager as template_manager_module
+from app.services import template_warmup
+from app.services.docx_generator import DocxGenerator
+from app.services.template_manager import TemplateManager
+from app.services.template_warmup import run_template_warmup, warm_up_templates
+
+
+def write_template(path, text):
+    """Crée un DOCX minimal"""
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.save(str(path))
+
+
+@pytest.fixture
+def warmup_env(tmp_path, monkeypatch):
+    """Dossier templates minimal (v2 + TXT) et générateur associé"""
+    (tmp_path / "v2").mkdir()
+    (tmp_path / "txt").mkdir()
+    for name in ("QCC", "PROFIL_RISQUE", "DER", "RTO"):
+        write_template(tmp_path / "v2" / f"{name}_V2_TEMPLATE.docx", name + " {{NOM_CLIENT}}")
+    (tmp_path / "txt" / "MentionsLegales.txt").write_text("Mentions", encoding="utf-8")
+
+    manager = TemplateManager(str(tmp_path))
+    manager.scan_templates()
+    monkeypatch.setattr(template_manager_module, "_template_manager", manager)
+    monkeypatch.setattr(settings, "EXPORT_PATH", str(tmp_path / "exports"))
+
+    generator = DocxGenerator()
+    generator.txt_templates_path = str(tmp_path / "txt")
+    return manager, generator
+
+
+@pytest.mark.unit
+class TestWarmUp:
+    """Tests du préchauffage"""
+
+    def test_rapport_par_template(self, warmup_env):
+        manager, generator = warmup_env
+
+        report = warm_up_templates(manager, generator)
+
+        assert report["erreurs"] == 0
+        assert len(report["docx"]) == 4
+        assert [entry["nom"] for entry in report["txt"]] == ["MentionsLegales.txt"]
+        assert {entry["nom"] for entry in report["rendus"]} == {
+            "QCC", "PROFIL_RISQUE", "DER", "CONVENTION_RTO"
+        }
+        assert all("duree_ms" in entry for entry in report["docx"] + report["rendus"])
+        assert manager.get_stats()["parsed_cached"] == 4
+        assert manager.get_stats()["texts_cached"] == 1
+
+    def test_template_absent_signale_sans_bloquer(self, warmup_env, tmp_path):
+        manager, generator = warmup_env
+        (tmp_path / "v2" / "DER_V2_TEMPLATE.docx").unlink()
+        manager.scan_templates()
+
+        report = warm_up_templates(manager, generator)
+
+        der = next(entry for entry in report["rendus"] if entry["nom"] == "DER")
+        assert der["statut"] == "erreur"
+        assert report["erreurs"] == 1
+
+
+@pytest.mark.unit
+class TestReadiness:
+    """La readiness attend la fin du préchauffage"""
+
+    @pytest.mark.asyncio
+    async def test_not_ready_pendant_le_prechauffage(self, monkeypatch):
+        monkeypatch.setitem(template_warmup._state, "statut", "en_cours")
+
+        response = await readiness_probe()
+
+        assert response.status_code == 503
+        assert b"templates warming up" in response.body
+
+    @pytest.mark.asyncio
+    async def test_prechauffage_desactive(self, monkeypatch):
+        monkeypatch.setattr(settings, "TEMPLATES_WARMUP", False)
+        monkeypatch.setitem(template_warmup._state, "statut", "en_attente")
+
+        await run_template_warmup()
+
+        assert template_warmup.is_warm()
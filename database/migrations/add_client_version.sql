@@ -0,0 +1,10 @@
+-- ==========================================
+-- Migration: Version des fiches clients (autosave)
+-- Date: 2026-10-19
+-- Description: Verrou optimiste pour l'autosave incrémental du formulaire
+-- ==========================================
+
+-- Incrémentée à chaque UPDATE (ORM et PATCH /clients/{id}/form)
+ALTER TABLE clients ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+COMMENT ON COLUMN clients.version IS 'Verrou optimiste - version attendue par PATCH /clients/{id}/form';
@@ -0,0 +1,13 @@
+-- ==========================================
+-- Migration: Empreinte de rendu des documents
+-- Date: 2026-10-19
+-- Description: Empreinte (template, remplacements, conseiller) d'un rendu
+--              v2: une génération identique réutilise le document existant
+-- ==========================================
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS empreinte_rendu VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_documents_empreinte_rendu
+    ON documents(client_id, type_document, empreinte_rendu);
+
+COMMENT ON COLUMN documents.empreinte_rendu IS 'SHA-256 des entrées du rendu v2 (NULL: document sans cache de génération)';
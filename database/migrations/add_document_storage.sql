@@ -0,0 +1,12 @@
+-- ==========================================
+-- Migration: Stockage des documents par contenu
+-- Date: 2026-10-19
+-- Description: Clé du blob (ab/cd/<sha256>.docx) dans le stockage adressé
+--              par contenu; plusieurs documents identiques partagent un blob
+-- ==========================================
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS stockage_cle VARCHAR(255);
+
+CREATE INDEX IF NOT EXISTS idx_documents_stockage_cle ON documents(stockage_cle);
+
+COMMENT ON COLUMN documents.stockage_cle IS 'Clé du blob dans DOCUMENT_STORAGE_PATH (NULL: fichier historique dans EXPORT_PATH)';
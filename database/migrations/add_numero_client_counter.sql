@@ -0,0 +1,47 @@
+-- ==========================================
+-- Migration: Numérotation client par compteur annuel
+-- Date: 2026-10-19
+-- Description: Remplace le SELECT max(numero_client) par un compteur
+--              par année (UPDATE ... RETURNING), alloué dans l'INSERT
+-- ==========================================
+
+BEGIN;
+
+-- Compteur par année (une ligne par année, verrou de ligne très court)
+CREATE TABLE IF NOT EXISTS client_number_counters (
+    year INTEGER PRIMARY KEY,
+    last_value INTEGER NOT NULL DEFAULT 0
+);
+
+-- Initialisation depuis les numéros existants (FAR-YYYY-NNNN)
+INSERT INTO client_number_counters (year, last_value)
+SELECT split_part(numero_client, '-', 2)::INTEGER,
+       MAX(split_part(numero_client, '-', 3)::INTEGER)
+FROM clients
+WHERE numero_client ~ '^FAR-[0-9]{4}-[0-9]+$'
+GROUP BY 1
+ON CONFLICT (year) DO UPDATE
+    SET last_value = GREATEST(client_number_counters.last_value, EXCLUDED.last_value);
+
+-- Réserve un bloc de numéros, retourne le premier du bloc
+CREATE OR REPLACE FUNCTION reserve_numero_client(
+    block_size INTEGER DEFAULT 1,
+    for_year INTEGER DEFAULT EXTRACT(YEAR FROM NOW())::INTEGER
+)
+RETURNS INTEGER AS $$
+    INSERT INTO client_number_counters AS c (year, last_value)
+    VALUES (for_year, block_size)
+    ON CONFLICT (year) DO UPDATE SET last_value = c.last_value + EXCLUDED.last_value
+    RETURNING last_value - block_size + 1;
+$$ LANGUAGE sql;
+
+-- Prochain numéro formaté (valeur par défaut de clients.numero_client)
+CREATE OR REPLACE FUNCTION next_numero_client()
+RETURNS VARCHAR AS $$
+    SELECT 'FAR-' || EXTRACT(YEAR FROM NOW())::INTEGER || '-' || LPAD(n::TEXT, GREATEST(4, LENGTH(n::TEXT)), '0')
+    FROM reserve_numero_client(1) AS n;
+$$ LANGUAGE sql;
+
+ALTER TABLE clients ALTER COLUMN numero_client SET DEFAULT next_numero_client();
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- ==========================================
+-- Migration: Empreintes de scoring (re-scoring incrémental)
+-- Date: 2026-10-19
+-- Description: Empreinte des entrées et de la version des règles du profil
+--              de risque et du niveau LCB-FT, pour ne recalculer que les
+--              clients dont les entrées ou les règles ont changé
+-- ==========================================
+
+ALTER TABLE clients ADD COLUMN IF NOT EXISTS profil_risque_empreinte VARCHAR(64);
+ALTER TABLE clients ADD COLUMN IF NOT EXISTS lcb_ft_empreinte VARCHAR(64);
+
+COMMENT ON COLUMN clients.profil_risque_empreinte IS 'SHA-256 des entrées du profil de risque et de RISK_RULES_VERSION';
+COMMENT ON COLUMN clients.lcb_ft_empreinte IS 'SHA-256 des entrées LCB-FT et de la version des règles compilées';
@@ -0,0 +1,12 @@
+-- ==========================================
+-- Migration: Version des règles de scoring
+-- Date: 2026-10-19
+-- Description: Version des barèmes / règles ayant produit le profil de
+--              risque et le niveau LCB-FT enregistrés (scoring mémoïsé)
+-- ==========================================
+
+ALTER TABLE clients ADD COLUMN IF NOT EXISTS profil_risque_regles_version VARCHAR(50);
+ALTER TABLE clients ADD COLUMN IF NOT EXISTS lcb_ft_regles_version VARCHAR(50);
+
+COMMENT ON COLUMN clients.profil_risque_regles_version IS 'RISK_RULES_VERSION ayant produit profil_risque_calcule';
+COMMENT ON COLUMN clients.lcb_ft_regles_version IS 'Version des règles LCB-FT ayant produit lcb_ft_niveau_risque';
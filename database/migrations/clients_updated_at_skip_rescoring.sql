@@ -0,0 +1,33 @@
+-- Migration: updated_at des clients ignoré par le re-scoring
+-- Date: 2026-10-19
+-- Description: Le trigger update_clients_updated_at ne touche plus
+--              updated_at quand seules les colonnes de scoring changent
+--              (re-scoring en masse après un changement de barème)
+-- ==========================================
+
+CREATE OR REPLACE FUNCTION update_clients_updated_at()
+RETURNS TRIGGER AS $$
+DECLARE
+    -- Colonnes écrites par le re-scoring (app/services/rescoring.RESULT_COLUMNS)
+    colonnes_scoring CONSTANT TEXT[] := ARRAY[
+        'profil_risque_calcule', 'profil_risque_score', 'profil_risque_date_calcul',
+        'profil_risque_empreinte', 'profil_risque_regles_version',
+        'lcb_ft_niveau_risque', 'lcb_ft_empreinte', 'lcb_ft_regles_version',
+        'updated_at'
+    ];
+BEGIN
+    -- Chemin rapide: empreintes inchangées, ce n'est pas un re-scoring
+    IF NEW.profil_risque_empreinte IS NOT DISTINCT FROM OLD.profil_risque_empreinte
+       AND NEW.lcb_ft_empreinte IS NOT DISTINCT FROM OLD.lcb_ft_empreinte THEN
+        NEW.updated_at = NOW();
+    ELSIF (to_jsonb(NEW) - colonnes_scoring) IS DISTINCT FROM (to_jsonb(OLD) - colonnes_scoring) THEN
+        NEW.updated_at = NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_clients_updated_at ON clients;
+
+CREATE TRIGGER update_clients_updated_at BEFORE UPDATE ON clients
+    FOR EACH ROW EXECUTE FUNCTION update_clients_updated_at();
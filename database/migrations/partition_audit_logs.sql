@@ -0,0 +1,107 @@
+-- ==========================================
+-- Migration: Partitionnement mensuel de audit_logs
+-- Date: 2026-10-19
+-- Description: audit_logs devient une table partitionnée RANGE (created_at)
+--              avec une partition par mois. Les 5 index mono-colonne sont
+--              remplacés par 2 index composites (entité/utilisateur + date).
+--              La rétention (détachement + archivage) est gérée par
+--              app/services/audit_partitions.py
+-- ==========================================
+
+BEGIN;
+
+-- ==========================================
+-- PARTIE 1: RENOMMER L'ANCIENNE TABLE
+-- ==========================================
+
+ALTER TABLE audit_logs RENAME TO audit_logs_legacy;
+
+DROP INDEX IF EXISTS idx_audit_user;
+DROP INDEX IF EXISTS idx_audit_entity;
+DROP INDEX IF EXISTS idx_audit_action;
+DROP INDEX IF EXISTS idx_audit_created;
+
+-- ==========================================
+-- PARTIE 2: TABLE PARTITIONNÉE
+-- ==========================================
+-- La clé de partition doit faire partie de la clé primaire
+
+CREATE TABLE audit_logs (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    user_id UUID REFERENCES users(id),
+    action VARCHAR(100) NOT NULL,
+    entity_type VARCHAR(50) NOT NULL,
+    entity_id UUID,
+    old_values JSONB,
+    new_values JSONB,
+    ip_address INET,
+    user_agent TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (id, created_at),
+
+    -- Contraintes
+    CONSTRAINT chk_audit_action CHECK (action IN ('CREATE', 'UPDATE', 'DELETE', 'LOGIN', 'LOGOUT', 'EXPORT', 'GENERATE_DOC'))
+) PARTITION BY RANGE (created_at);
+
+-- Index composites (propagés automatiquement à chaque partition)
+CREATE INDEX idx_audit_entity_created ON audit_logs (entity_type, entity_id, created_at);
+CREATE INDEX idx_audit_user_created ON audit_logs (user_id, created_at);
+
+-- Filet de sécurité: les lignes hors partitions mensuelles atterrissent ici
+CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+-- ==========================================
+-- PARTIE 3: CRÉATION DES PARTITIONS MENSUELLES
+-- ==========================================
+-- Nom: audit_logs_yYYYYmMM (ex: audit_logs_y2026m10)
+-- Utilisable via pg_cron: SELECT ensure_audit_log_partitions(NOW()::date, 3);
+
+CREATE OR REPLACE FUNCTION ensure_audit_log_partitions(from_month DATE, months_ahead INT)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::date;
+    last_month DATE := (date_trunc('month', NOW()) + make_interval(months => months_ahead))::date;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := format('audit_logs_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, (month_start + INTERVAL '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Couvrir l'historique existant + 3 mois à venir
+SELECT ensure_audit_log_partitions(
+    COALESCE((SELECT MIN(created_at)::date FROM audit_logs_legacy), NOW()::date),
+    3
+);
+
+-- ==========================================
+-- PARTIE 4: RECOPIE DES DONNÉES
+-- ==========================================
+
+INSERT INTO audit_logs (
+    id, user_id, action, entity_type, entity_id,
+    old_values, new_values, ip_address, user_agent, created_at
+)
+SELECT
+    id, user_id, action, entity_type, entity_id,
+    old_values, new_values, ip_address, user_agent,
+    COALESCE(created_at AT TIME ZONE 'UTC', NOW())
+FROM audit_logs_legacy;
+
+DROP TABLE audit_logs_legacy;
+
+COMMIT;
+
+ANALYZE audit_logs;
@@ -42,6 +42,34 @@ CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_role ON users(role);
 CREATE INDEX idx_users_actif ON users(actif);
 
+-- ==========================================
+-- NUMÉROTATION CLIENT (FAR-YYYY-NNNN)
+-- ==========================================
+-- Compteur par année: allocation par UPDATE ... RETURNING dans l'INSERT
+CREATE TABLE client_number_counters (
+    year INTEGER PRIMARY KEY,
+    last_value INTEGER NOT NULL DEFAULT 0
+);
+
+-- Réserve un bloc de numéros, retourne le premier du bloc
+CREATE OR REPLACE FUNCTION reserve_numero_client(
+    block_size INTEGER DEFAULT 1,
+    for_year INTEGER DEFAULT EXTRACT(YEAR FROM NOW())::INTEGER
+)
+RETURNS INTEGER AS $$
+    INSERT INTO client_number_counters AS c (year, last_value)
+    VALUES (for_year, block_size)
+    ON CONFLICT (year) DO UPDATE SET last_value = c.last_value + EXCLUDED.last_value
+    RETURNING last_value - block_size + 1;
+$$ LANGUAGE sql;
+
+-- Prochain numéro formaté (valeur par défaut de clients.numero_client)
+CREATE OR REPLACE FUNCTION next_numero_client()
+RETURNS VARCHAR AS $$
+    SELECT 'FAR-' || EXTRACT(YEAR FROM NOW())::INTEGER || '-' || LPAD(n::TEXT, GREATEST(4, LENGTH(n::TEXT)), '0')
+    FROM reserve_numero_client(1) AS n;
+$$ LANGUAGE sql;
+
 -- ==========================================
 -- TABLE: clients (TABLE PRINCIPALE - 120+ champs)
 -- ==========================================
@@ -49,7 +77,7 @@ CREATE TABLE clients (
     -- Identifiants
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     conseiller_id UUID NOT NULL REFERENCES users(id) ON DELETE RESTRICT,
-    numero_client VARCHAR(50) UNIQUE,
+    numero_client VARCHAR(50) UNIQUE DEFAULT next_numero_client(),
     statut VARCHAR(50) DEFAULT 'prospect',
     
     -- ==========================================
@@ -266,6 +294,8 @@ CREATE TABLE clients (
     profil_risque_calcule VARCHAR(50),
     profil_risque_score INTEGER,
     profil_risque_date_calcul TIMESTAMP,
+    profil_risque_empreinte VARCHAR(64),  -- Empreinte entrées + version des barèmes (re-scoring)
+    profil_risque_regles_version VARCHAR(50),  -- Version des barèmes appliquée
     
     -- ==========================================
     -- SECTION 9 : PRÉFÉRENCES DURABILITÉ
@@ -289,6 +319,8 @@ CREATE TABLE clients (
     -- SECTION 10 : LCB-FT (Lutte Blanchiment)
     -- ==========================================
     lcb_ft_niveau_risque VARCHAR(50),
+    lcb_ft_empreinte VARCHAR(64),  -- Empreinte entrées + version des règles (re-scoring)
+    lcb_ft_regles_version VARCHAR(50),  -- Version des règles LCB-FT appliquée
     lcb_ft_ppe BOOLEAN DEFAULT FALSE,
     lcb_ft_ppe_fonction VARCHAR(255),
     lcb_ft_ppe_famille BOOLEAN DEFAULT FALSE,
@@ -341,6 +373,7 @@ CREATE TABLE clients (
     updated_at TIMESTAMP DEFAULT NOW(),
     validated_at TIMESTAMP,
     validated_by UUID REFERENCES users(id),
+    version INTEGER NOT NULL DEFAULT 1,  -- Verrou optimiste (autosave)
     
     -- Contraintes (modifiées pour accepter NULL/brouillons)
     CONSTRAINT chk_clients_statut CHECK (statut IS NULL OR statut IN ('brouillon', 'prospect', 'client_actif', 'client_inactif')),
@@ -403,6 +436,8 @@ CREATE TABLE documents (
     chemin_fichier TEXT NOT NULL,
     taille_octets INTEGER,
     hash_fichier VARCHAR(64),
+    stockage_cle VARCHAR(255),
+    empreinte_rendu VARCHAR(64),
     genere_par UUID REFERENCES users(id),
     date_generation TIMESTAMP DEFAULT NOW(),
     date_signature TIMESTAMP,
@@ -419,12 +454,14 @@ CREATE INDEX idx_documents_client ON documents(client_id);
 CREATE INDEX idx_documents_type ON documents(type_document);
 CREATE INDEX idx_documents_signe ON documents(signe);
 CREATE INDEX idx_documents_date ON documents(date_generation DESC);
+CREATE INDEX idx_documents_stockage_cle ON documents(stockage_cle);
+CREATE INDEX idx_documents_empreinte_rendu ON documents(client_id, type_document, empreinte_rendu);
 
 -- ==========================================
--- TABLE: audit_logs
+-- TABLE: audit_logs (partitionnée par mois sur created_at)
 -- ==========================================
 CREATE TABLE audit_logs (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     user_id UUID REFERENCES users(id),
     action VARCHAR(100) NOT NULL,
     entity_type VARCHAR(50) NOT NULL,
@@ -433,17 +470,46 @@ CREATE TABLE audit_logs (
     new_values JSONB,
     ip_address INET,
     user_agent TEXT,
-    created_at TIMESTAMP DEFAULT NOW(),
-    
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (id, created_at),
+
     -- Contraintes
     CONSTRAINT chk_audit_action CHECK (action IN ('CREATE', 'UPDATE', 'DELETE', 'LOGIN', 'LOGOUT', 'EXPORT', 'GENERATE_DOC'))
-);
+) PARTITION BY RANGE (created_at);
 
--- Index
-CREATE INDEX idx_audit_user ON audit_logs(user_id);
-CREATE INDEX idx_audit_entity ON audit_logs(entity_type, entity_id);
-CREATE INDEX idx_audit_action ON audit_logs(action);
-CREATE INDEX idx_audit_created ON audit_logs(created_at DESC);
+-- Index composites (propagés à chaque partition)
+CREATE INDEX idx_audit_entity_created ON audit_logs(entity_type, entity_id, created_at);
+CREATE INDEX idx_audit_user_created ON audit_logs(user_id, created_at);
+
+-- Partition par défaut (filet de sécurité)
+CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+-- Création des partitions mensuelles (audit_logs_yYYYYmMM)
+CREATE OR REPLACE FUNCTION ensure_audit_log_partitions(from_month DATE, months_ahead INT)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::date;
+    last_month DATE := (date_trunc('month', NOW()) + make_interval(months => months_ahead))::date;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := format('audit_logs_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, (month_start + INTERVAL '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_audit_log_partitions(NOW()::date, 3);
 
 -- ==========================================
 -- TRIGGERS pour updated_at
@@ -459,8 +525,31 @@ $$ LANGUAGE plpgsql;
 CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
     FOR EACH ROW EXECUTE FUNCTION update_updated_at();
 
+-- Clients: le re-scoring (colonnes de scoring seules) n'est pas une modification
+CREATE OR REPLACE FUNCTION update_clients_updated_at()
+RETURNS TRIGGER AS $$
+DECLARE
+    -- Colonnes écrites par le re-scoring (app/services/rescoring.RESULT_COLUMNS)
+    colonnes_scoring CONSTANT TEXT[] := ARRAY[
+        'profil_risque_calcule', 'profil_risque_score', 'profil_risque_date_calcul',
+        'profil_risque_empreinte', 'profil_risque_regles_version',
+        'lcb_ft_niveau_risque', 'lcb_ft_empreinte', 'lcb_ft_regles_version',
+        'updated_at'
+    ];
+BEGIN
+    -- Chemin rapide: empreintes inchangées, ce n'est pas un re-scoring
+    IF NEW.profil_risque_empreinte IS NOT DISTINCT FROM OLD.profil_risque_empreinte
+       AND NEW.lcb_ft_empreinte IS NOT DISTINCT FROM OLD.lcb_ft_empreinte THEN
+        NEW.updated_at = NOW();
+    ELSIF (to_jsonb(NEW) - colonnes_scoring) IS DISTINCT FROM (to_jsonb(OLD) - colonnes_scoring) THEN
+        NEW.updated_at = NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
 CREATE TRIGGER update_clients_updated_at BEFORE UPDATE ON clients
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+    FOR EACH ROW EXECUTE FUNCTION update_clients_updated_at();
 
 CREATE TRIGGER update_produits_updated_at BEFORE UPDATE ON produits
     FOR EACH ROW EXECUTE FUNCTION update_updated_at();